@@ -0,0 +1,253 @@
+"""initial schema
+
+Creates every table that does not exist yet, so databases previously
+built by Base.metadata.create_all() can be upgraded in place.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 12:38:00.124408
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing(table_name: str) -> bool:
+    """Databases created before migrations existed already have some tables"""
+    return table_name not in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if _missing('change_journal'):
+        op.create_table('change_journal',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('site_id', sa.String(length=64), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=50), nullable=False),
+        sa.Column('op', sa.String(length=20), nullable=False),
+        sa.Column('record_id', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('site_id', 'seq', name='uq_change_journal_site_seq')
+        )
+        op.create_index(op.f('ix_change_journal_id'), 'change_journal', ['id'], unique=False)
+    if _missing('companies'):
+        op.create_table('companies',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('contact_email', sa.String(length=255), nullable=True),
+        sa.Column('contact_phone', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_companies_id'), 'companies', ['id'], unique=False)
+        op.create_index(op.f('ix_companies_name'), 'companies', ['name'], unique=True)
+    if _missing('inventory'):
+        op.create_table('inventory',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('box_type', sa.Enum('HQ', 'NQ', name='boxtype'), nullable=False),
+        sa.Column('base_quantity', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('box_type')
+        )
+        op.create_index(op.f('ix_inventory_id'), 'inventory', ['id'], unique=False)
+    if _missing('sync_conflicts'):
+        op.create_table('sync_conflicts',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('site_id', sa.String(length=64), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=50), nullable=False),
+        sa.Column('op', sa.String(length=20), nullable=False),
+        sa.Column('record_id', sa.Integer(), nullable=True),
+        sa.Column('reason', sa.String(length=255), nullable=False),
+        sa.Column('local_values', sa.JSON(), nullable=True),
+        sa.Column('central_values', sa.JSON(), nullable=True),
+        sa.Column('resolved', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_sync_conflicts_id'), 'sync_conflicts', ['id'], unique=False)
+        op.create_index(op.f('ix_sync_conflicts_site_id'), 'sync_conflicts', ['site_id'], unique=False)
+    if _missing('sync_id_map'):
+        op.create_table('sync_id_map',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('site_id', sa.String(length=64), nullable=False),
+        sa.Column('entity', sa.String(length=50), nullable=False),
+        sa.Column('local_id', sa.Integer(), nullable=False),
+        sa.Column('central_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('site_id', 'entity', 'local_id', name='uq_sync_id_map_local')
+        )
+        op.create_index(op.f('ix_sync_id_map_id'), 'sync_id_map', ['id'], unique=False)
+    if _missing('sync_state'):
+        op.create_table('sync_state',
+        sa.Column('site_id', sa.String(length=64), nullable=False),
+        sa.Column('last_seq', sa.Integer(), nullable=False),
+        sa.Column('pushed_seq', sa.Integer(), nullable=False),
+        sa.Column('applied_seq', sa.Integer(), nullable=False),
+        sa.Column('pull_watermark', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('site_id')
+        )
+    if _missing('users'):
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('username', sa.String(length=100), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('full_name', sa.String(length=255), nullable=True),
+        sa.Column('role', sa.Enum('ADMIN', 'MANAGER', 'OPERATOR', name='userrole'), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+        op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+        op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    if _missing('audit_logs'):
+        op.create_table('audit_logs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('table_name', sa.String(length=100), nullable=False),
+        sa.Column('record_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.Enum('CREATE', 'UPDATE', 'DELETE', name='auditaction'), nullable=False),
+        sa.Column('old_values', sa.JSON(), nullable=True),
+        sa.Column('new_values', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_audit_logs_created_at'), 'audit_logs', ['created_at'], unique=False)
+        op.create_index(op.f('ix_audit_logs_id'), 'audit_logs', ['id'], unique=False)
+        op.create_index(op.f('ix_audit_logs_user_id'), 'audit_logs', ['user_id'], unique=False)
+    if _missing('projects'):
+        op.create_table('projects',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('project_id', sa.String(length=100), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('location', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.Enum('ACTIVE', 'INACTIVE', 'COMPLETED', name='projectstatus'), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_projects_id'), 'projects', ['id'], unique=False)
+        op.create_index(op.f('ix_projects_project_id'), 'projects', ['project_id'], unique=True)
+    if _missing('drillholes'):
+        op.create_table('drillholes',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('drillhole_id', sa.String(length=100), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.DECIMAL(precision=10, scale=2), nullable=True),
+        sa.Column('status', sa.Enum('ACTIVE', 'COMPLETED', 'ABANDONED', name='drillholestatus'), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_drillholes_drillhole_id'), 'drillholes', ['drillhole_id'], unique=False)
+        op.create_index(op.f('ix_drillholes_id'), 'drillholes', ['id'], unique=False)
+        op.create_index(op.f('ix_drillholes_project_id'), 'drillholes', ['project_id'], unique=False)
+    if _missing('dispatches'):
+        op.create_table('dispatches',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('drillhole_id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('dispatch_date', sa.DateTime(), nullable=False),
+        sa.Column('hq_boxes', sa.Integer(), nullable=False),
+        sa.Column('nq_boxes', sa.Integer(), nullable=False),
+        sa.Column('driver', sa.String(length=255), nullable=False),
+        sa.Column('technician', sa.String(length=255), nullable=False),
+        sa.Column('samples_collected', sa.Integer(), nullable=True),
+        sa.Column('sample_type', sa.String(length=100), nullable=True),
+        sa.Column('status', sa.Enum('OUTSTANDING', 'RETURNED', name='dispatchstatus'), nullable=False),
+        sa.Column('return_date', sa.DateTime(), nullable=True),
+        sa.Column('returned_hq', sa.Integer(), nullable=True),
+        sa.Column('returned_nq', sa.Integer(), nullable=True),
+        sa.Column('return_condition', sa.String(length=50), nullable=True),
+        sa.Column('return_notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['drillhole_id'], ['drillholes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_dispatches_company_id'), 'dispatches', ['company_id'], unique=False)
+        op.create_index(op.f('ix_dispatches_dispatch_date'), 'dispatches', ['dispatch_date'], unique=False)
+        op.create_index(op.f('ix_dispatches_id'), 'dispatches', ['id'], unique=False)
+        op.create_index(op.f('ix_dispatches_project_id'), 'dispatches', ['project_id'], unique=False)
+        op.create_index(op.f('ix_dispatches_status'), 'dispatches', ['status'], unique=False)
+    if _missing('samples'):
+        op.create_table('samples',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('dispatch_id', sa.Integer(), nullable=False),
+        sa.Column('sample_id', sa.String(length=100), nullable=False),
+        sa.Column('sample_type', sa.Enum('CORE', 'ASSAY', 'GEOCHEMICAL', 'MINERALOGY', name='sampletype'), nullable=False),
+        sa.Column('from_depth', sa.DECIMAL(precision=10, scale=2), nullable=True),
+        sa.Column('to_depth', sa.DECIMAL(precision=10, scale=2), nullable=True),
+        sa.Column('status', sa.Enum('COLLECTED', 'PROCESSING', 'COMPLETED', name='samplestatus'), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['dispatch_id'], ['dispatches.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_samples_dispatch_id'), 'samples', ['dispatch_id'], unique=False)
+        op.create_index(op.f('ix_samples_id'), 'samples', ['id'], unique=False)
+        op.create_index(op.f('ix_samples_sample_id'), 'samples', ['sample_id'], unique=True)
+        op.create_index(op.f('ix_samples_sample_type'), 'samples', ['sample_type'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_samples_sample_type'), table_name='samples')
+    op.drop_index(op.f('ix_samples_sample_id'), table_name='samples')
+    op.drop_index(op.f('ix_samples_id'), table_name='samples')
+    op.drop_index(op.f('ix_samples_dispatch_id'), table_name='samples')
+    op.drop_table('samples')
+    op.drop_index(op.f('ix_dispatches_status'), table_name='dispatches')
+    op.drop_index(op.f('ix_dispatches_project_id'), table_name='dispatches')
+    op.drop_index(op.f('ix_dispatches_id'), table_name='dispatches')
+    op.drop_index(op.f('ix_dispatches_dispatch_date'), table_name='dispatches')
+    op.drop_index(op.f('ix_dispatches_company_id'), table_name='dispatches')
+    op.drop_table('dispatches')
+    op.drop_index(op.f('ix_drillholes_project_id'), table_name='drillholes')
+    op.drop_index(op.f('ix_drillholes_id'), table_name='drillholes')
+    op.drop_index(op.f('ix_drillholes_drillhole_id'), table_name='drillholes')
+    op.drop_table('drillholes')
+    op.drop_index(op.f('ix_projects_project_id'), table_name='projects')
+    op.drop_index(op.f('ix_projects_id'), table_name='projects')
+    op.drop_table('projects')
+    op.drop_index(op.f('ix_audit_logs_user_id'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_id'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_created_at'), table_name='audit_logs')
+    op.drop_table('audit_logs')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_table('sync_state')
+    op.drop_index(op.f('ix_sync_id_map_id'), table_name='sync_id_map')
+    op.drop_table('sync_id_map')
+    op.drop_index(op.f('ix_sync_conflicts_site_id'), table_name='sync_conflicts')
+    op.drop_index(op.f('ix_sync_conflicts_id'), table_name='sync_conflicts')
+    op.drop_table('sync_conflicts')
+    op.drop_index(op.f('ix_inventory_id'), table_name='inventory')
+    op.drop_table('inventory')
+    op.drop_index(op.f('ix_companies_name'), table_name='companies')
+    op.drop_index(op.f('ix_companies_id'), table_name='companies')
+    op.drop_table('companies')
+    op.drop_index(op.f('ix_change_journal_id'), table_name='change_journal')
+    op.drop_table('change_journal')
@@ -0,0 +1,41 @@
+"""updated_at indexes
+
+Indexes updated_at on the tables whose data version (row count plus
+MAX(updated_at)) backs list and report ETags, so the version lookup is an
+index read instead of a table scan.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 13:05:12.481203
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ['companies', 'projects', 'drillholes', 'dispatches', 'samples', 'users', 'inventory']
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    indexes = sa.inspect(op.get_bind()).get_indexes(table_name)
+    return any(index['name'] == index_name for index in indexes)
+
+
+def upgrade() -> None:
+    for table_name in TABLES:
+        index_name = op.f(f'ix_{table_name}_updated_at')
+        if not _has_index(table_name, index_name):
+            op.create_index(index_name, table_name, ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    for table_name in TABLES:
+        index_name = op.f(f'ix_{table_name}_updated_at')
+        if _has_index(table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
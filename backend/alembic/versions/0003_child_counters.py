@@ -0,0 +1,50 @@
+"""child counters
+
+Adds projects.drillhole_count, projects.dispatch_count,
+drillholes.dispatch_count and dispatches.sample_count and backfills them
+from the child tables. updated_at is preserved during the backfill.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 14:02:47.315920
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+# (parent table, counter column, child table, child foreign key)
+COUNTERS = [
+    ('projects', 'drillhole_count', 'drillholes', 'project_id'),
+    ('projects', 'dispatch_count', 'dispatches', 'project_id'),
+    ('drillholes', 'dispatch_count', 'dispatches', 'drillhole_id'),
+    ('dispatches', 'sample_count', 'samples', 'dispatch_id'),
+]
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns(table_name)
+    return any(column['name'] == column_name for column in columns)
+
+
+def upgrade() -> None:
+    for parent, column, child, foreign_key in COUNTERS:
+        if not _has_column(parent, column):
+            op.add_column(parent, sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+        op.execute(
+            f"UPDATE {parent} SET {column} = "
+            f"(SELECT COUNT(*) FROM {child} WHERE {child}.{foreign_key} = {parent}.id), "
+            f"updated_at = updated_at"
+        )
+
+
+def downgrade() -> None:
+    for parent, column, _, _ in reversed(COUNTERS):
+        if _has_column(parent, column):
+            op.drop_column(parent, column)
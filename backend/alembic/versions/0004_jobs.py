@@ -0,0 +1,64 @@
+"""jobs
+
+Adds the jobs table used by the background job runner
+(app.services.jobs). Workers poll it through ix_jobs_status_run_after.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 15:21:08.604417
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def _missing(table_name: str) -> bool:
+    return table_name not in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if _missing('jobs'):
+        op.create_table('jobs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=True),
+        sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', 'CANCELLED', name='jobstatus'), nullable=False),
+        sa.Column('progress_done', sa.Integer(), nullable=False),
+        sa.Column('progress_total', sa.Integer(), nullable=True),
+        sa.Column('message', sa.String(length=255), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('artifact_path', sa.String(length=500), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('worker_id', sa.String(length=100), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_jobs_id'), 'jobs', ['id'], unique=False)
+        op.create_index(op.f('ix_jobs_kind'), 'jobs', ['kind'], unique=False)
+        op.create_index(op.f('ix_jobs_created_by'), 'jobs', ['created_by'], unique=False)
+        op.create_index('ix_jobs_status_run_after', 'jobs', ['status', 'run_after'], unique=False)
+
+
+def downgrade() -> None:
+    if not _missing('jobs'):
+        op.drop_index('ix_jobs_status_run_after', table_name='jobs')
+        op.drop_index(op.f('ix_jobs_created_by'), table_name='jobs')
+        op.drop_index(op.f('ix_jobs_kind'), table_name='jobs')
+        op.drop_index(op.f('ix_jobs_id'), table_name='jobs')
+        op.drop_table('jobs')
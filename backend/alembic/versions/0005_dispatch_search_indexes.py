@@ -0,0 +1,46 @@
+"""dispatch search indexes
+
+Indexes the equality filters of GET /dispatches/search together with
+dispatch_date, the leading column of its keyset page order, and indexes
+driver and technician for their prefix filters.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 17:42:10.118254
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_dispatches_project_date', ['project_id', 'dispatch_date']),
+    ('ix_dispatches_drillhole_date', ['drillhole_id', 'dispatch_date']),
+    ('ix_dispatches_company_date', ['company_id', 'dispatch_date']),
+    ('ix_dispatches_status_date', ['status', 'dispatch_date']),
+    ('ix_dispatches_driver', ['driver']),
+    ('ix_dispatches_technician', ['technician']),
+]
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    indexes = sa.inspect(op.get_bind()).get_indexes(table_name)
+    return any(index['name'] == index_name for index in indexes)
+
+
+def upgrade() -> None:
+    for index_name, columns in INDEXES:
+        if not _has_index('dispatches', index_name):
+            op.create_index(index_name, 'dispatches', columns, unique=False)
+
+
+def downgrade() -> None:
+    for index_name, columns in reversed(INDEXES):
+        if _has_index('dispatches', index_name):
+            op.drop_index(index_name, table_name='dispatches')
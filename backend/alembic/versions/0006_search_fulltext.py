@@ -0,0 +1,48 @@
+"""search fulltext indexes
+
+Adds ngram FULLTEXT indexes on samples.sample_id and
+drillholes.drillhole_id for substring search (GET /search). MySQL only;
+other databases answer substring queries with a LIKE scan. The ngram
+parser splits codes into ngram_token_size (default 2) character tokens, so
+queries of two or more characters match anywhere in a code.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 18:36:52.902117
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ft_samples_sample_id', 'samples', 'sample_id'),
+    ('ft_drillholes_drillhole_id', 'drillholes', 'drillhole_id'),
+]
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    indexes = sa.inspect(op.get_bind()).get_indexes(table_name)
+    return any(index['name'] == index_name for index in indexes)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    for index_name, table_name, column in INDEXES:
+        if not _has_index(table_name, index_name):
+            op.create_index(index_name, table_name, [column], mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    for index_name, table_name, column in INDEXES:
+        if _has_index(table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
@@ -0,0 +1,86 @@
+"""sample drillhole
+
+Adds samples.drillhole_id, copied from each sample's dispatch, and the
+(drillhole_id, from_depth) index behind the depth interval endpoints. The
+backfill runs in id ranges of BATCH_SIZE samples so no single UPDATE holds
+locks on the whole table; updated_at is preserved.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 19:24:08.517306
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 50000
+INDEX_NAME = 'ix_samples_drillhole_from_depth'
+FOREIGN_KEY_NAME = 'fk_samples_drillhole_id'
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns(table_name)
+    return any(column['name'] == column_name for column in columns)
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    indexes = sa.inspect(op.get_bind()).get_indexes(table_name)
+    return any(index['name'] == index_name for index in indexes)
+
+
+def _has_foreign_key(table_name: str, name: str) -> bool:
+    foreign_keys = sa.inspect(op.get_bind()).get_foreign_keys(table_name)
+    return any(foreign_key['name'] == name for foreign_key in foreign_keys)
+
+
+def _backfill(bind) -> None:
+    if bind.dialect.name == 'mysql':
+        statement = (
+            "UPDATE samples JOIN dispatches ON dispatches.id = samples.dispatch_id "
+            "SET samples.drillhole_id = dispatches.drillhole_id, samples.updated_at = samples.updated_at "
+            "WHERE samples.id >= :low AND samples.id < :high"
+        )
+    else:
+        statement = (
+            "UPDATE samples SET drillhole_id = "
+            "(SELECT drillhole_id FROM dispatches WHERE dispatches.id = samples.dispatch_id), "
+            "updated_at = updated_at "
+            "WHERE id >= :low AND id < :high"
+        )
+    low, high = bind.execute(sa.text("SELECT MIN(id), MAX(id) FROM samples")).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, BATCH_SIZE):
+        bind.execute(sa.text(statement), {'low': start, 'high': start + BATCH_SIZE})
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not _has_column('samples', 'drillhole_id'):
+        op.add_column('samples', sa.Column('drillhole_id', sa.Integer(), nullable=True))
+    # Backfill before indexing so the index is built once
+    _backfill(bind)
+    if not _has_index('samples', INDEX_NAME):
+        op.create_index(INDEX_NAME, 'samples', ['drillhole_id', 'from_depth'], unique=False)
+    # SQLite cannot add a constraint to an existing table
+    if bind.dialect.name == 'mysql' and not _has_foreign_key('samples', FOREIGN_KEY_NAME):
+        op.create_foreign_key(
+            FOREIGN_KEY_NAME, 'samples', 'drillholes', ['drillhole_id'], ['id'], ondelete='CASCADE'
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'mysql' and _has_foreign_key('samples', FOREIGN_KEY_NAME):
+        op.drop_constraint(FOREIGN_KEY_NAME, 'samples', type_='foreignkey')
+    if _has_index('samples', INDEX_NAME):
+        op.drop_index(INDEX_NAME, table_name='samples')
+    if _has_column('samples', 'drillhole_id'):
+        op.drop_column('samples', 'drillhole_id')
@@ -0,0 +1,104 @@
+"""assays
+
+Adds the lab assay tables: assay_analytes (element and unit per code),
+assay_batches (one per imported results file) and assay_results, one row
+per sample, analyte and batch. assay_results is the large table; it has
+no index beyond its primary key and the three read paths (per hole, per
+analyte by value, per sample) plus the batch foreign key.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 21:02:41.318842
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def _missing(table_name: str) -> bool:
+    return table_name not in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if _missing('assay_analytes'):
+        op.create_table('assay_analytes',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('code', sa.String(length=40), nullable=False),
+        sa.Column('element', sa.String(length=20), nullable=False),
+        sa.Column('unit', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('code', name='uq_assay_analytes_code')
+        )
+        op.create_index(op.f('ix_assay_analytes_id'), 'assay_analytes', ['id'], unique=False)
+
+    if _missing('assay_batches'):
+        op.create_table('assay_batches',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('lab', sa.String(length=100), nullable=True),
+        sa.Column('certificate', sa.String(length=100), nullable=True),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=True),
+        sa.Column('rows_read', sa.Integer(), nullable=False),
+        sa.Column('result_count', sa.Integer(), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False),
+        sa.Column('samples_completed', sa.Integer(), nullable=False),
+        sa.Column('unknown_count', sa.Integer(), nullable=False),
+        sa.Column('unknown_samples', sa.JSON(), nullable=True),
+        sa.Column('analytes', sa.JSON(), nullable=True),
+        sa.Column('imported_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_assay_batches_id'), 'assay_batches', ['id'], unique=False)
+        op.create_index(op.f('ix_assay_batches_certificate'), 'assay_batches', ['certificate'], unique=False)
+        op.create_index(op.f('ix_assay_batches_created_by'), 'assay_batches', ['created_by'], unique=False)
+        op.create_index(op.f('ix_assay_batches_updated_at'), 'assay_batches', ['updated_at'], unique=False)
+
+    if _missing('assay_results'):
+        op.create_table('assay_results',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('batch_id', sa.Integer(), nullable=False),
+        sa.Column('sample_id', sa.Integer(), nullable=False),
+        sa.Column('drillhole_id', sa.Integer(), nullable=True),
+        sa.Column('analyte_id', sa.Integer(), nullable=False),
+        sa.Column('value', sa.Float(precision=53), nullable=False),
+        sa.Column('qualifier', sa.String(length=1), nullable=True),
+        sa.ForeignKeyConstraint(['batch_id'], ['assay_batches.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['sample_id'], ['samples.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['drillhole_id'], ['drillholes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['analyte_id'], ['assay_analytes.id']),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_assay_results_batch_id'), 'assay_results', ['batch_id'], unique=False)
+        op.create_index('ix_assay_results_hole_analyte', 'assay_results', ['drillhole_id', 'analyte_id', 'sample_id'], unique=False)
+        op.create_index('ix_assay_results_analyte_value', 'assay_results', ['analyte_id', 'value'], unique=False)
+        op.create_index('ix_assay_results_sample_analyte', 'assay_results', ['sample_id', 'analyte_id'], unique=False)
+
+
+def downgrade() -> None:
+    if not _missing('assay_results'):
+        op.drop_index('ix_assay_results_sample_analyte', table_name='assay_results')
+        op.drop_index('ix_assay_results_analyte_value', table_name='assay_results')
+        op.drop_index('ix_assay_results_hole_analyte', table_name='assay_results')
+        op.drop_index(op.f('ix_assay_results_batch_id'), table_name='assay_results')
+        op.drop_table('assay_results')
+    if not _missing('assay_batches'):
+        op.drop_index(op.f('ix_assay_batches_updated_at'), table_name='assay_batches')
+        op.drop_index(op.f('ix_assay_batches_created_by'), table_name='assay_batches')
+        op.drop_index(op.f('ix_assay_batches_certificate'), table_name='assay_batches')
+        op.drop_index(op.f('ix_assay_batches_id'), table_name='assay_batches')
+        op.drop_table('assay_batches')
+    if not _missing('assay_analytes'):
+        op.drop_index(op.f('ix_assay_analytes_id'), table_name='assay_analytes')
+        op.drop_table('assay_analytes')
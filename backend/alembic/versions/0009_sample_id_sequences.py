@@ -0,0 +1,47 @@
+"""sample id sequences
+
+Adds sample_id_sequences: one row per sample_id prefix with the next
+number to hand out. Blocks are reserved by incrementing next_value.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 23:14:05.527310
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def _missing(table_name: str) -> bool:
+    return table_name not in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if _missing('sample_id_sequences'):
+        op.create_table('sample_id_sequences',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('prefix', sa.String(length=80), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=False),
+        sa.Column('next_value', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('prefix', name='uq_sample_id_sequences_prefix')
+        )
+        op.create_index(op.f('ix_sample_id_sequences_id'), 'sample_id_sequences', ['id'], unique=False)
+        op.create_index(op.f('ix_sample_id_sequences_project_id'), 'sample_id_sequences', ['project_id'], unique=False)
+
+
+def downgrade() -> None:
+    if not _missing('sample_id_sequences'):
+        op.drop_index(op.f('ix_sample_id_sequences_project_id'), table_name='sample_id_sequences')
+        op.drop_index(op.f('ix_sample_id_sequences_id'), table_name='sample_id_sequences')
+        op.drop_table('sample_id_sequences')
@@ -0,0 +1,42 @@
+"""sync tombstones
+
+Adds sync_tombstones: central records the id of every deleted company,
+project and drillhole so sync pulls can send deletions as a delta.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-20 09:41:12.208514
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def _missing(table_name: str) -> bool:
+    return table_name not in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if _missing('sync_tombstones'):
+        op.create_table('sync_tombstones',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('entity', sa.String(length=50), nullable=False),
+        sa.Column('record_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_sync_tombstones_id'), 'sync_tombstones', ['id'], unique=False)
+        op.create_index(op.f('ix_sync_tombstones_deleted_at'), 'sync_tombstones', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    if not _missing('sync_tombstones'):
+        op.drop_index(op.f('ix_sync_tombstones_deleted_at'), table_name='sync_tombstones')
+        op.drop_index(op.f('ix_sync_tombstones_id'), table_name='sync_tombstones')
+        op.drop_table('sync_tombstones')
@@ -0,0 +1,42 @@
+"""table versions
+
+Adds table_versions: one deletion counter per table. Data versions read
+MAX(id) plus this counter instead of COUNT(*), which scans the whole table
+on InnoDB. Every existing table starts with a row at 0.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-21 10:12:37.604918
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def _missing(table_name: str) -> bool:
+    return table_name not in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if _missing('table_versions'):
+        table_versions = op.create_table('table_versions',
+        sa.Column('table_name', sa.String(length=64), nullable=False),
+        sa.Column('deletions', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+        )
+        names = sa.inspect(op.get_bind()).get_table_names()
+        op.bulk_insert(table_versions, [
+            {'table_name': name, 'deletions': 0}
+            for name in names if name not in ('alembic_version', 'table_versions')
+        ])
+
+
+def downgrade() -> None:
+    if not _missing('table_versions'):
+        op.drop_table('table_versions')
@@ -1,17 +1,43 @@
 """
 API dependencies for authentication and database session
 """
+from datetime import datetime
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User, UserRole
+from app.config import settings
+from app.services.data_version import get_data_version
+from app.services.reference_cache import ReferenceNames, ReferenceSnapshot, reference_cache
+from app.services.statements import get_by_id
+from app.utils.http_cache import cache_headers, etag_matches, make_etag
 from app.utils.security import decode_token
 
 # HTTP Bearer token security
 security = HTTPBearer()
 
+ROLE_HIERARCHY = {
+    UserRole.OPERATOR: 0,
+    UserRole.MANAGER: 1,
+    UserRole.ADMIN: 2,
+}
+
+
+def has_role(user: User, required_role: UserRole) -> bool:
+    """
+    Check whether a user has at least the given role
+    
+    Args:
+        user: User to check
+        required_role: Minimum role
+        
+    Returns:
+        True if the user's role is at or above required_role
+    """
+    return ROLE_HIERARCHY.get(user.role, 0) >= ROLE_HIERARCHY.get(required_role, 0)
+
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -55,7 +81,7 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_by_id(db, User, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -122,13 +148,7 @@ def require_role(required_role: UserRole):
         Dependency function
     """
     def role_checker(current_user: User = Depends(get_current_user)) -> User:
-        role_hierarchy = {
-            UserRole.OPERATOR: 0,
-            UserRole.MANAGER: 1,
-            UserRole.ADMIN: 2,
-        }
-        
-        if role_hierarchy.get(current_user.role, 0) < role_hierarchy.get(required_role, 0):
+        if not has_role(current_user, required_role):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions"
@@ -138,3 +158,108 @@ def require_role(required_role: UserRole):
     
     return role_checker
 
+
+def conditional_get(*models):
+    """
+    Dependency factory for ETag-validated GET endpoints
+    
+    The ETag covers the data version of the given tables, the request path
+    and query string, and the current UTC date (days_out values change
+    daily). A matching If-None-Match short-circuits with 304 before the
+    endpoint queries any rows. No ETag is issued while a table was modified
+    within the last second, since TIMESTAMP resolution could hide a second
+    change in the same second.
+    
+    Declare it after the user dependency so unauthenticated requests never
+    receive a 304.
+    
+    Args:
+        models: ORM model classes the response is built from
+        
+    Returns:
+        Dependency function returning the ETag or None
+    """
+    def etag_checker(request: Request, db: Session = Depends(get_db)) -> Optional[str]:
+        version = get_data_version(db, models)
+        # reference_names resolves names at this version
+        request.state.data_version = version
+        if not version.settled:
+            return None
+        
+        etag = make_etag(
+            version.token,
+            request.url.path,
+            request.url.query,
+            datetime.utcnow().date().isoformat(),
+        )
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+            )
+        
+        return etag
+    
+    return etag_checker
+
+
+def reference_names(request: Request, db: Session = Depends(get_db)) -> ReferenceNames:
+    """
+    Dependency returning company, project and drillhole name lookups
+    
+    Declared after conditional_get, the names are at the data version the
+    ETag was computed from.
+    
+    Args:
+        request: Incoming request
+        db: Database session
+        
+    Returns:
+        ReferenceNames
+    """
+    return reference_cache.names(db, getattr(request.state, "data_version", None))
+
+
+def reference_snapshot(request: Request, db: Session = Depends(get_db)) -> ReferenceSnapshot:
+    """
+    Dependency for endpoints served from the reference cache
+    
+    A matching If-None-Match short-circuits with 304 without touching the
+    database (unless the snapshot is due for revalidation). Declare it after
+    the user dependency.
+    
+    Args:
+        request: Incoming request
+        db: Database session
+        
+    Returns:
+        Current reference snapshot
+    """
+    snapshot = reference_cache.get(db)
+    etag = snapshot.etag(request.url.path, request.url.query)
+    if etag is not None and etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=reference_cache_headers(request, snapshot)
+        )
+    return snapshot
+
+
+def reference_cache_headers(request: Request, snapshot: ReferenceSnapshot) -> dict:
+    """
+    ETag and Cache-Control headers for a response built from a snapshot
+    
+    Clients may reuse it for as long as the server would serve it from the
+    cache without revalidating.
+    
+    Args:
+        request: Incoming request
+        snapshot: Reference snapshot the response was built from
+        
+    Returns:
+        Header dictionary
+    """
+    return cache_headers(
+        snapshot.etag(request.url.path, request.url.query),
+        max_age=int(settings.REFERENCE_CACHE_TTL_SECONDS),
+    )
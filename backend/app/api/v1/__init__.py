@@ -2,7 +2,7 @@
 API v1 routes
 """
 from fastapi import APIRouter
-from app.api.v1 import auth, companies, dispatches, reports, samples, users, projects, drillholes
+from app.api.v1 import auth, companies, dispatches, reports, samples, users, projects, drillholes, search, assays, sync, jobs, admin
 
 api_router = APIRouter()
 
@@ -14,4 +14,10 @@ api_router.include_router(samples.router, prefix="/samples", tags=["Samples"])
 api_router.include_router(users.router, prefix="/users", tags=["Users"])
 api_router.include_router(projects.router, prefix="/projects", tags=["Projects"])
 api_router.include_router(drillholes.router, prefix="/drillholes", tags=["Drillholes"])
+api_router.include_router(search.router, prefix="/search", tags=["Search"])
+api_router.include_router(assays.router, prefix="/assays", tags=["Assays"])
 
+
+api_router.include_router(sync.router, prefix="/sync", tags=["Sync"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
\ No newline at end of file
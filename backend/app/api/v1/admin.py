@@ -0,0 +1,177 @@
+"""
+Administration API routes
+"""
+import sys
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse, Response
+from app.config import settings
+from app.models.user import User
+from app.api.deps import get_current_admin_user
+from app.database import connection_stats, slow_query_log
+from app.services.reference_cache import reference_cache
+from app.services.sample_intervals import interval_cache
+from app.utils.profiler import list_profiles, load_profile, render_flamegraph
+from app.utils.single_flight import FLIGHTS
+from app.utils.slow_queries import aggregate
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+def get_metrics(
+    request: Request,
+    current_user: User = Depends(get_current_admin_user)
+) -> Dict[str, Any]:
+    """
+    Get runtime metrics of this worker process (Admin only)
+    
+    Counters are kept per process; with several gunicorn workers each
+    request sees the numbers of the worker that served it.
+    
+    Args:
+        request: Incoming request
+        current_user: Current authenticated admin user
+        
+    Returns:
+        Metrics by subsystem
+    """
+    admission = getattr(request.app.state, "admission", None)
+    rate_limiter = getattr(request.app.state, "rate_limiter", None)
+    compositing = sys.modules.get("app.services.compositing")
+    return {
+        "admission": admission.stats() if admission else None,
+        "rate_limit": rate_limiter.stats() if rate_limiter else None,
+        "single_flight": {name: flight.stats() for name, flight in sorted(FLIGHTS.items())},
+        "slow_queries": slow_query_log.stats() if slow_query_log else None,
+        "reference_cache": reference_cache.stats(),
+        "interval_cache": interval_cache.stats(),
+        # Loaded with NumPy on the first composites request
+        "composite_cache": compositing.composite_cache.stats() if compositing else None,
+        "database": connection_stats(),
+    }
+
+
+@router.get("/slow-queries")
+def get_slow_queries(
+    limit: int = 50,
+    route: Optional[str] = None,
+    current_user: User = Depends(get_current_admin_user)
+) -> Dict[str, Any]:
+    """
+    Get slow SQL statements aggregated by fingerprint (Admin only)
+    
+    Reads the slow query log shared by the workers of this server
+    (SLOW_QUERY_LOG and its rolled-over predecessor). Statements that
+    differ only in literal values share a fingerprint.
+    
+    Args:
+        limit: Maximum number of fingerprints
+        route: Only statements issued by this route (e.g. "GET /api/v1/reports/dashboard")
+        current_user: Current authenticated admin user
+        
+    Returns:
+        Threshold and per-fingerprint count, total/mean/p95/max time,
+        routes, normalized SQL and EXPLAIN output, slowest total first
+    """
+    return {
+        "threshold_ms": settings.SLOW_QUERY_MS,
+        "enabled": slow_query_log is not None,
+        "fingerprints": aggregate(settings.SLOW_QUERY_LOG, limit, route),
+    }
+
+
+@router.get("/profiles")
+def get_profiles(
+    limit: int = 100,
+    current_user: User = Depends(get_current_admin_user)
+) -> List[Dict[str, Any]]:
+    """
+    List stored request profiles, newest first (Admin only)
+    
+    Profiles are stored per server in PROFILE_DIR; request one with the
+    X-Profile: 1 header or ?profile=1 on any endpoint.
+    
+    Args:
+        limit: Maximum number of profiles
+        current_user: Current authenticated admin user
+        
+    Returns:
+        Profile summaries (duration, SQL totals, samples)
+    """
+    return list_profiles(settings.PROFILE_DIR, limit)
+
+
+def _get_profile(profile_id: str) -> Dict[str, Any]:
+    document = load_profile(settings.PROFILE_DIR, profile_id)
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return document
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(
+    profile_id: str,
+    current_user: User = Depends(get_current_admin_user)
+) -> Dict[str, Any]:
+    """
+    Get a stored request profile (Admin only)
+    
+    Args:
+        profile_id: Profile ID (X-Profile-Id of the profiled response)
+        current_user: Current authenticated admin user
+        
+    Returns:
+        Profile with every SQL statement (duration, rows) and folded stacks
+        
+    Raises:
+        HTTPException: If profile not found
+    """
+    return _get_profile(profile_id)
+
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+def get_profile_folded(
+    profile_id: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get the folded stacks of a profile, for flamegraph.pl or speedscope (Admin only)
+    
+    Args:
+        profile_id: Profile ID
+        current_user: Current authenticated admin user
+        
+    Returns:
+        One "frame;frame;frame count" line per distinct stack
+        
+    Raises:
+        HTTPException: If profile not found
+    """
+    return PlainTextResponse(_get_profile(profile_id)["folded"])
+
+
+@router.get("/profiles/{profile_id}/flamegraph", response_class=Response)
+def get_profile_flamegraph(
+    profile_id: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Render a profile as an SVG flame graph (Admin only)
+    
+    Args:
+        profile_id: Profile ID
+        current_user: Current authenticated admin user
+        
+    Returns:
+        SVG image
+        
+    Raises:
+        HTTPException: If profile not found
+    """
+    document = _get_profile(profile_id)
+    title = f"{document['method']} {document['path']} - {document['duration_ms']} ms, {document['sql_count']} queries"
+    return Response(render_flamegraph(document["folded"], title), media_type="image/svg+xml")
@@ -0,0 +1,446 @@
+"""
+Assay results API routes
+"""
+import os
+import shutil
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile, status
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models.assay import AssayBatch
+from app.models.drillhole import Drillhole
+from app.models.sample import Sample
+from app.models.user import User, UserRole
+from app.schemas.assay import (
+    AssayAnalyteResponse,
+    AssayBatchResponse,
+    AssayCompositeReport,
+    AssayResultPage,
+    DrillholeAssays,
+)
+from app.api.deps import get_current_user, require_role, conditional_get, reference_names
+from app.services.assay_import import supported_file
+from app.services.assay_results import analyte_results, hole_assays, list_analytes, resolve_codes
+from app.services.jobs import artifact_dir, enqueue
+from app.services.reference_cache import ReferenceNames
+from app.services.statements import get_by_id
+from app.utils.http_cache import cache_headers
+from app.utils.responses import ORJSONResponse
+
+router = APIRouter()
+
+# Composites are built from these tables (compositing.COMPOSITE_MODELS).
+# app.services.compositing loads NumPy, so it is imported on first use
+# rather than when the API starts.
+COMPOSITE_VERSION_MODELS = (AssayBatch, Sample, Drillhole)
+
+
+@router.post("/import", response_model=AssayBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+def import_assays(
+    file: UploadFile = File(...),
+    lab: Optional[str] = Form(None),
+    certificate: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(UserRole.MANAGER))
+):
+    """
+    Upload a lab results file (CSV or XLSX) for import
+
+    The file needs a sample id column (Sample ID, Sample, ...) and one
+    column per analyte (Au_ppm, Cu %, ...); lines above the header are
+    skipped. It is imported by a background job; follow its progress with
+    GET /jobs/{job_id}. Samples with results are marked completed.
+
+    Args:
+        file: Results file
+        lab: Laboratory name
+        certificate: Lab certificate or batch number
+        db: Database session
+        current_user: Current authenticated user (manager or admin)
+
+    Returns:
+        The new assay batch, with the id of its import job
+
+    Raises:
+        HTTPException: If the file type is not supported
+    """
+    filename = os.path.basename(file.filename or "")
+    error = supported_file(filename)
+    if error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error
+        )
+
+    batch = AssayBatch(lab=lab, certificate=certificate, filename=filename, created_by=current_user.id)
+    db.add(batch)
+    db.flush()
+    job = enqueue(db, "import_assays", user_id=current_user.id)
+    directory = artifact_dir(job.id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, filename)
+    with open(path, "wb") as handle:
+        shutil.copyfileobj(file.file, handle)
+    job.params = {"batch_id": batch.id, "path": path}
+    batch.job_id = job.id
+    db.commit()
+    db.refresh(batch)
+
+    return batch
+
+
+@router.get("/batches", response_model=List[AssayBatchResponse])
+def list_batches(
+    skip: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List assay batches, newest first
+
+    Args:
+        skip: Number of records to skip
+        limit: Maximum number of records to return
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        List of assay batches
+    """
+    return db.query(AssayBatch).order_by(AssayBatch.id.desc()).offset(skip).limit(limit).all()
+
+
+@router.get("/batches/{batch_id}", response_model=AssayBatchResponse)
+def get_batch(
+    batch_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get an assay batch and its import totals
+
+    Args:
+        batch_id: Assay batch ID
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        Assay batch data
+
+    Raises:
+        HTTPException: If batch not found
+    """
+    batch = get_by_id(db, AssayBatch, batch_id)
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assay batch not found"
+        )
+
+    return batch
+
+
+@router.get("/analytes", response_model=List[AssayAnalyteResponse])
+def get_analytes(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(AssayBatch))
+):
+    """
+    List the analytes imported so far
+
+    Args:
+        db: Database session
+        current_user: Current authenticated user
+        etag: ETag of the current data version
+
+    Returns:
+        Analytes by code
+    """
+    return ORJSONResponse(list_analytes(db), headers=cache_headers(etag))
+
+
+@router.get("/results", response_model=AssayResultPage)
+def list_results(
+    analyte: str,
+    project_id: Optional[int] = None,
+    drillhole_id: Optional[int] = None,
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(AssayBatch, Sample)),
+    names: ReferenceNames = Depends(reference_names)
+):
+    """
+    List the values of one analyte, highest first
+
+    Re-assayed samples show the value of their newest batch. Pages are
+    keyset based: pass the returned next_cursor to get the following page
+    (null on the last page).
+
+    Args:
+        analyte: Analyte code (e.g. Au_ppm)
+        project_id: Filter by project ID
+        drillhole_id: Filter by drillhole ID
+        min_value: Only values of at least this
+        max_value: Only values of at most this
+        cursor: next_cursor of the previous page
+        limit: Page size (1-1000)
+        db: Database session
+        current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
+
+    Returns:
+        Page of values with their samples and the cursor of the next page
+
+    Raises:
+        HTTPException: If the analyte is unknown or the cursor is invalid
+    """
+    try:
+        analyte_id = resolve_codes(db, [analyte])[analyte]
+        page = analyte_results(
+            db, names, analyte_id, project_id, drillhole_id, min_value, max_value, cursor, limit
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+
+    return ORJSONResponse({"analyte": analyte, **page}, headers=cache_headers(etag))
+
+
+@router.get("/drillholes/{drillhole_id}", response_model=DrillholeAssays)
+def get_drillhole_assays(
+    drillhole_id: int,
+    analytes: Optional[str] = None,
+    from_depth: Optional[float] = Query(None, ge=0),
+    to_depth: Optional[float] = Query(None, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(AssayBatch, Sample)),
+    names: ReferenceNames = Depends(reference_names)
+):
+    """
+    Get the assay values of a drillhole's samples, by depth
+
+    One row per assayed sample with its values by analyte code;
+    below-detection (<) and over-range (>) values are flagged in
+    qualifiers. Re-assayed samples show the value of their newest batch.
+
+    Args:
+        drillhole_id: Drillhole ID
+        analytes: Comma-separated analyte codes (default: all)
+        from_depth: Only samples overlapping the range from this depth
+        to_depth: Only samples overlapping the range to this depth
+        db: Database session
+        current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
+
+    Returns:
+        Samples in from_depth order with their assay values
+
+    Raises:
+        HTTPException: If an analyte is unknown, or drillhole not found
+    """
+    drillhole = names.drillhole(drillhole_id)
+    if drillhole is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Drillhole not found"
+        )
+
+    analyte_ids = None
+    if analytes:
+        codes = [code.strip() for code in analytes.split(",") if code.strip()]
+        try:
+            analyte_ids = list(resolve_codes(db, codes).values())
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc)
+            )
+
+    assays = hole_assays(db, drillhole_id, analyte_ids, from_depth, to_depth)
+    return ORJSONResponse(
+        {"drillhole_id": drillhole_id, "drillhole": drillhole, **assays},
+        headers=cache_headers(etag)
+    )
+
+
+def _composite_run(
+    request: Request,
+    db: Session,
+    names: ReferenceNames,
+    project_id: int,
+    analytes: Optional[str],
+    method: str,
+    length: float,
+    from_depth: Optional[float],
+    to_depth: Optional[float],
+    min_coverage: float,
+):
+    from app.services.compositing import COMPOSITE_METHODS, composite_cache
+
+    if method not in COMPOSITE_METHODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"method must be one of: {', '.join(COMPOSITE_METHODS)}"
+        )
+    if from_depth is not None and to_depth is not None and to_depth <= from_depth:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="to_depth must be below from_depth"
+        )
+    if names.project(project_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    try:
+        analyte_ids = None
+        if analytes:
+            codes = [code.strip() for code in analytes.split(",") if code.strip()]
+            analyte_ids = list(resolve_codes(db, codes).values())
+        return composite_cache.get(
+            db, project_id, analyte_ids, getattr(request.state, "data_version", None),
+            length=length if method == "length" else None,
+            from_depth=from_depth, to_depth=to_depth, min_coverage=min_coverage,
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+
+
+@router.get("/composites", response_model=AssayCompositeReport)
+def get_composites(
+    request: Request,
+    project_id: int,
+    analytes: Optional[str] = None,
+    method: str = "length",
+    length: float = Query(2.0, ge=0.1, le=1000),
+    from_depth: Optional[float] = Query(None, ge=0),
+    to_depth: Optional[float] = Query(None, ge=0),
+    min_coverage: float = Query(0.5, ge=0, le=1),
+    drillhole_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(*COMPOSITE_VERSION_MODELS)),
+    names: ReferenceNames = Depends(reference_names)
+):
+    """
+    Get length-weighted assay composites of a project's drillholes
+
+    method=length cuts every hole into length metre composites counted
+    down from the collar (or from from_depth); method=interval makes one
+    composite per hole over its sampled range (or from_depth to to_depth).
+    Values are weighted by the sample length inside each composite; an
+    analyte assayed over less than min_coverage of a composite is left out.
+    Results are cached per data version.
+
+    Args:
+        request: Incoming request
+        project_id: Project to composite
+        analytes: Comma-separated analyte codes (default: all)
+        method: length or interval
+        length: Composite length in metres (method=length)
+        from_depth: Composite from this depth
+        to_depth: Composite to this depth
+        min_coverage: Fraction of a composite an analyte must be assayed over
+        drillhole_id: Only this drillhole's composites
+        db: Database session
+        current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
+
+    Returns:
+        Composites in drillhole and depth order with values by analyte code
+
+    Raises:
+        HTTPException: If a parameter or analyte is invalid, or project not found
+    """
+    from app.services.compositing import composite_rows
+
+    run = _composite_run(request, db, names, project_id, analytes, method, length, from_depth, to_depth, min_coverage)
+    return ORJSONResponse(
+        {
+            "project_id": project_id,
+            "method": method,
+            "length": length if method == "length" else None,
+            "min_coverage": min_coverage,
+            "analytes": run.analytes,
+            "composites": composite_rows(run, names, drillhole_id),
+        },
+        headers=cache_headers(etag)
+    )
+
+
+@router.get("/composites/export")
+def export_composites(
+    request: Request,
+    project_id: int,
+    analytes: Optional[str] = None,
+    method: str = "length",
+    length: float = Query(2.0, ge=0.1, le=1000),
+    from_depth: Optional[float] = Query(None, ge=0),
+    to_depth: Optional[float] = Query(None, ge=0),
+    min_coverage: float = Query(0.5, ge=0, le=1),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(*COMPOSITE_VERSION_MODELS)),
+    names: ReferenceNames = Depends(reference_names)
+):
+    """
+    Export a project's assay composites as a Parquet file
+
+    Same composites as GET /assays/composites, one row per composite and
+    one column per analyte (null when empty).
+
+    Args:
+        request: Incoming request
+        project_id: Project to composite
+        analytes: Comma-separated analyte codes (default: all)
+        method: length or interval
+        length: Composite length in metres (method=length)
+        from_depth: Composite from this depth
+        to_depth: Composite to this depth
+        min_coverage: Fraction of a composite an analyte must be assayed over
+        db: Database session
+        current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
+
+    Returns:
+        Parquet file response
+
+    Raises:
+        HTTPException: If pyarrow is not installed, a parameter or analyte
+            is invalid, or project not found
+    """
+    from app.services.compositing import composite_parquet, parquet_unavailable
+
+    error = parquet_unavailable()
+    if error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error
+        )
+
+    run = _composite_run(request, db, names, project_id, analytes, method, length, from_depth, to_depth, min_coverage)
+    return Response(
+        content=composite_parquet(run, names),
+        media_type="application/vnd.apache.parquet",
+        headers={
+            "Content-Disposition": f"attachment; filename=composites_project_{project_id}.parquet",
+            **cache_headers(etag),
+        }
+    )
@@ -14,6 +14,7 @@ from app.utils.security import (
     decode_token,
 )
 from app.api.deps import get_current_user
+from app.services.statements import get_by_id
 
 router = APIRouter()
 
@@ -129,7 +130,7 @@ def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
         )
     
     user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_by_id(db, User, user_id)
     
     if not user or not user.is_active:
         raise HTTPException(
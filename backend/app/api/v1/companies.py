@@ -2,38 +2,53 @@
 Companies API routes
 """
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.database import get_db
 from app.models.company import Company
 from app.models.user import User, UserRole
 from app.schemas.company import CompanyCreate, CompanyUpdate, CompanyResponse
-from app.api.deps import get_current_user, require_role
+from app.schemas.job import JobAccepted
+from app.api.deps import get_current_user, require_role, reference_snapshot, reference_cache_headers
+from app.services.jobs import enqueue
+from app.services.purge import company_purge_plan, count_rows, run_purge
+from app.services.reference_cache import ReferenceSnapshot, reference_cache
+from app.utils.responses import ORJSONResponse
+from app.services.statements import get_by_id
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[CompanyResponse])
 def list_companies(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    snapshot: ReferenceSnapshot = Depends(reference_snapshot)
 ):
     """
     List all companies
     
+    Served from the reference cache; clients may reuse the response for
+    REFERENCE_CACHE_TTL_SECONDS.
+    
     Args:
+        request: Incoming request
         skip: Number of records to skip
         limit: Maximum number of records to return
-        db: Database session
         current_user: Current authenticated user
+        snapshot: Reference data snapshot
         
     Returns:
         List of companies
     """
-    companies = db.query(Company).offset(skip).limit(limit).all()
-    return companies
+    return ORJSONResponse(
+        snapshot.companies[skip:skip + limit],
+        headers=reference_cache_headers(request, snapshot)
+    )
 
 
 @router.post("/", response_model=CompanyResponse, status_code=status.HTTP_201_CREATED)
@@ -67,6 +82,7 @@ def create_company(
     company = Company(**company_data.model_dump())
     db.add(company)
     db.commit()
+    reference_cache.invalidate()
     db.refresh(company)
     
     return company
@@ -92,7 +108,7 @@ def get_company(
     Raises:
         HTTPException: If company not found
     """
-    company = db.query(Company).filter(Company.id == company_id).first()
+    company = get_by_id(db, Company, company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -124,7 +140,7 @@ def update_company(
     Raises:
         HTTPException: If company not found
     """
-    company = db.query(Company).filter(Company.id == company_id).first()
+    company = get_by_id(db, Company, company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -137,19 +153,29 @@ def update_company(
         setattr(company, field, value)
     
     db.commit()
+    reference_cache.invalidate()
     db.refresh(company)
     
     return company
 
 
-@router.delete("/{company_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{company_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={202: {"model": JobAccepted, "description": "Large company; deletion continues as a background job"}},
+)
 def delete_company(
     company_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.ADMIN))
 ):
     """
-    Delete company
+    Delete company and everything under it
+    
+    The subtree is deleted leaf-first in committed batches. Small subtrees
+    are removed before the response; larger ones (more than
+    PURGE_INLINE_ROWS rows) are queued as a purge job and the request
+    returns 202 with the job id; poll GET /jobs/{id} for progress.
     
     Args:
         company_id: Company ID
@@ -159,13 +185,25 @@ def delete_company(
     Raises:
         HTTPException: If company not found
     """
-    company = db.query(Company).filter(Company.id == company_id).first()
+    company = get_by_id(db, Company, company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Company not found"
         )
     
-    db.delete(company)
+    plan = company_purge_plan(company.id)
+    rows = sum(count_rows(db, plan).values())
+    if rows <= settings.PURGE_INLINE_ROWS:
+        run_purge(db, plan, settings.PURGE_BATCH_SIZE)
+        reference_cache.invalidate()
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    
+    job = enqueue(db, "purge_company", {"company_id": company.id}, user_id=current_user.id)
     db.commit()
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"detail": "Company deletion started", "job_id": job.id, "rows": rows},
+        headers={"Location": f"{settings.API_V1_PREFIX}/jobs/{job.id}"}
+    )
 
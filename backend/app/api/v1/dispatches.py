@@ -1,26 +1,40 @@
 """
 Dispatches API routes
 """
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
 from app.database import get_db
+from app.models.company import Company
 from app.models.dispatch import Dispatch, DispatchStatus
+from app.models.drillhole import Drillhole
+from app.models.project import Project
+from app.models.sample import Sample
 from app.models.user import User
 from app.schemas.dispatch import (
     DispatchCreate,
     DispatchUpdate,
     DispatchReturn,
     DispatchResponse,
+    DispatchSearchPage,
     DispatchWithDetails,
 )
-from app.api.deps import get_current_user
-from app.utils.helpers import calculate_days_out
+from app.api.deps import get_current_user, conditional_get, reference_names
+from app.utils.http_cache import cache_headers
+from app.utils.responses import ORJSONResponse
+from app.services.dispatch_listing import dispatch_details_statement, dispatch_detail_rows
+from app.services.dispatch_search import DispatchFilters, search_dispatches
+from app.services.reference_cache import ReferenceNames
+from app.services.change_journal import record_change, serialize_row, serialize_values, SERVER_FIELDS
+from app.services.statements import get_by_id, paginate
 
 router = APIRouter()
 
+# sample_count is kept by app.models.counters without touching the
+# dispatch's updated_at, so the samples table's version is part of the ETag
+DISPATCH_VERSION_MODELS = (Dispatch, Sample, Project, Drillhole, Company)
+
 
 @router.get("/", response_model=List[DispatchWithDetails])
 def list_dispatches(
@@ -29,7 +43,9 @@ def list_dispatches(
     status_filter: DispatchStatus = None,
     company_id: int = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(*DISPATCH_VERSION_MODELS)),
+    names: ReferenceNames = Depends(reference_names)
 ):
     """
     List all dispatches with optional filtering
@@ -41,42 +57,24 @@ def list_dispatches(
         company_id: Filter by company ID
         db: Database session
         current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
         
     Returns:
         List of dispatches with details
     """
-    query = db.query(Dispatch)
+    stmt = dispatch_details_statement()
     
     if status_filter:
-        query = query.filter(Dispatch.status == status_filter)
+        stmt += lambda s: s.where(Dispatch.status == status_filter)
     
     if company_id:
-        query = query.filter(Dispatch.company_id == company_id)
+        stmt += lambda s: s.where(Dispatch.company_id == company_id)
     
-    dispatches = query.order_by(Dispatch.dispatch_date.desc()).offset(skip).limit(limit).all()
+    stmt += lambda s: s.order_by(Dispatch.dispatch_date.desc())
+    rows = db.execute(paginate(stmt, skip, limit)).all()
     
-    # Enrich with additional details
-    result = []
-    for dispatch in dispatches:
-        dispatch_dict = {
-            **DispatchResponse.from_orm(dispatch).model_dump(),
-            "project_name": dispatch.project.name if dispatch.project else None,
-            "drillhole_name": dispatch.drillhole.drillhole_id if dispatch.drillhole else None,
-            "company_name": dispatch.company.name if dispatch.company else None,
-            "days_out": calculate_days_out(dispatch.dispatch_date, dispatch.return_date),
-        }
-        
-        # Check if return matches dispatch
-        if dispatch.status == DispatchStatus.RETURNED:
-            is_match = (
-                dispatch.returned_hq == dispatch.hq_boxes and
-                dispatch.returned_nq == dispatch.nq_boxes
-            )
-            dispatch_dict["is_match"] = is_match
-        
-        result.append(DispatchWithDetails(**dispatch_dict))
-    
-    return result
+    return ORJSONResponse(dispatch_detail_rows(rows, names), headers=cache_headers(etag))
 
 
 @router.post("/", response_model=DispatchResponse, status_code=status.HTTP_201_CREATED)
@@ -104,16 +102,103 @@ def create_dispatch(
     
     dispatch = Dispatch(**dispatch_dict)
     db.add(dispatch)
+    db.flush()
+    record_change(db, "dispatch", "create", dispatch.id, serialize_row(dispatch, exclude=SERVER_FIELDS))
     db.commit()
     db.refresh(dispatch)
     
     return dispatch
 
 
+@router.get("/search", response_model=DispatchSearchPage)
+def search_dispatches_endpoint(
+    project_id: Optional[int] = None,
+    drillhole_id: Optional[int] = None,
+    company_id: Optional[int] = None,
+    status_filter: Optional[DispatchStatus] = None,
+    driver: Optional[str] = None,
+    technician: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    return_condition: Optional[str] = None,
+    has_discrepancy: Optional[bool] = None,
+    days_out_min: Optional[int] = Query(None, ge=0),
+    days_out_max: Optional[int] = Query(None, ge=0),
+    sample_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(*DISPATCH_VERSION_MODELS)),
+    names: ReferenceNames = Depends(reference_names)
+):
+    """
+    Search dispatches, newest first
+    
+    All filters are optional and combined with AND. Pages are keyset based:
+    pass the returned next_cursor to get the following page (null on the
+    last page).
+    
+    Args:
+        project_id: Filter by project ID
+        drillhole_id: Filter by drillhole ID
+        company_id: Filter by company ID
+        status_filter: Filter by dispatch status
+        driver: Driver name prefix
+        technician: Technician name prefix
+        date_from: Dispatched at or after
+        date_to: Dispatched at or before
+        return_condition: Exact return condition
+        has_discrepancy: Returned with (true) or without (false) a box count
+            mismatch; outstanding dispatches never match
+        days_out_min: Minimum days out
+        days_out_max: Maximum days out
+        sample_type: Exact sample type
+        cursor: next_cursor of the previous page
+        limit: Page size (1-1000)
+        db: Database session
+        current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
+        
+    Returns:
+        Page of dispatches with details and the cursor of the next page
+        
+    Raises:
+        HTTPException: If the cursor is invalid
+    """
+    filters = DispatchFilters(
+        project_id=project_id,
+        drillhole_id=drillhole_id,
+        company_id=company_id,
+        status=status_filter,
+        driver=driver,
+        technician=technician,
+        date_from=date_from,
+        date_to=date_to,
+        return_condition=return_condition,
+        has_discrepancy=has_discrepancy,
+        days_out_min=days_out_min,
+        days_out_max=days_out_max,
+        sample_type=sample_type,
+    )
+    try:
+        page = search_dispatches(db, filters, names, cursor, limit)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    return ORJSONResponse(page, headers=cache_headers(etag))
+
+
 @router.get("/outstanding", response_model=List[DispatchWithDetails])
 def get_outstanding_dispatches(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(*DISPATCH_VERSION_MODELS)),
+    names: ReferenceNames = Depends(reference_names)
 ):
     """
     Get all outstanding dispatches
@@ -121,26 +206,19 @@ def get_outstanding_dispatches(
     Args:
         db: Database session
         current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
         
     Returns:
         List of outstanding dispatches
     """
-    dispatches = db.query(Dispatch).filter(
+    stmt = dispatch_details_statement()
+    stmt += lambda s: s.where(
         Dispatch.status == DispatchStatus.OUTSTANDING
-    ).order_by(Dispatch.dispatch_date.asc()).all()
-    
-    result = []
-    for dispatch in dispatches:
-        dispatch_dict = {
-            **DispatchResponse.from_orm(dispatch).model_dump(),
-            "project_name": dispatch.project.name if dispatch.project else None,
-            "drillhole_name": dispatch.drillhole.drillhole_id if dispatch.drillhole else None,
-            "company_name": dispatch.company.name if dispatch.company else None,
-            "days_out": calculate_days_out(dispatch.dispatch_date, None),
-        }
-        result.append(DispatchWithDetails(**dispatch_dict))
+    ).order_by(Dispatch.dispatch_date.asc())
+    rows = db.execute(stmt).all()
     
-    return result
+    return ORJSONResponse(dispatch_detail_rows(rows, names), headers=cache_headers(etag))
 
 
 @router.get("/{dispatch_id}", response_model=DispatchResponse)
@@ -163,7 +241,7 @@ def get_dispatch(
     Raises:
         HTTPException: If dispatch not found
     """
-    dispatch = db.query(Dispatch).filter(Dispatch.id == dispatch_id).first()
+    dispatch = get_by_id(db, Dispatch, dispatch_id)
     if not dispatch:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -195,7 +273,7 @@ def update_dispatch(
     Raises:
         HTTPException: If dispatch not found
     """
-    dispatch = db.query(Dispatch).filter(Dispatch.id == dispatch_id).first()
+    dispatch = get_by_id(db, Dispatch, dispatch_id)
     if not dispatch:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -207,6 +285,7 @@ def update_dispatch(
     for field, value in update_data.items():
         setattr(dispatch, field, value)
     
+    record_change(db, "dispatch", "update", dispatch.id, serialize_values(update_data))
     db.commit()
     db.refresh(dispatch)
     
@@ -235,7 +314,7 @@ def process_return(
     Raises:
         HTTPException: If dispatch not found or already returned
     """
-    dispatch = db.query(Dispatch).filter(Dispatch.id == dispatch_id).first()
+    dispatch = get_by_id(db, Dispatch, dispatch_id)
     if not dispatch:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -256,6 +335,13 @@ def process_return(
     dispatch.return_condition = return_data.return_condition
     dispatch.return_notes = return_data.return_notes
     
+    record_change(db, "dispatch", "return", dispatch.id, serialize_values({
+        "return_date": dispatch.return_date,
+        "returned_hq": dispatch.returned_hq,
+        "returned_nq": dispatch.returned_nq,
+        "return_condition": dispatch.return_condition,
+        "return_notes": dispatch.return_notes,
+    }))
     db.commit()
     db.refresh(dispatch)
     
@@ -279,13 +365,14 @@ def delete_dispatch(
     Raises:
         HTTPException: If dispatch not found
     """
-    dispatch = db.query(Dispatch).filter(Dispatch.id == dispatch_id).first()
+    dispatch = get_by_id(db, Dispatch, dispatch_id)
     if not dispatch:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Dispatch not found"
         )
     
+    record_change(db, "dispatch", "delete", dispatch.id)
     db.delete(dispatch)
     db.commit()
 
@@ -1,22 +1,44 @@
 """
 Drillholes API routes
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.models.dispatch import Dispatch
 from app.models.drillhole import Drillhole, DrillholeStatus
+from app.models.project import Project
+from app.models.sample import Sample
 from app.models.user import User
 from app.schemas.drillhole import (
     DrillholeCreate,
     DrillholeUpdate,
     DrillholeResponse,
     DrillholeWithDetails,
+    SampleInterval,
+    DrillholeIntervalCheck,
+    ProjectIntervalCheck,
 )
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, conditional_get, reference_names
+from app.services.change_journal import record_deletions
+from app.services.counters import subtract_child_counts
+from app.services.reference_cache import ReferenceNames, reference_cache
+from app.services.sample_intervals import (
+    INTERVAL_MATCHES,
+    check_hole,
+    check_project,
+    interval_cache,
+    samples_in_range,
+)
+from app.utils.http_cache import cache_headers
+from app.utils.responses import ORJSONResponse, schema_columns, rows_to_dicts
+from app.services.statements import get_by_id, paginate
 
 router = APIRouter()
 
+DRILLHOLE_COLUMNS = schema_columns(DrillholeResponse, Drillhole)
+
 
 @router.get("/", response_model=List[DrillholeWithDetails])
 def list_drillholes(
@@ -25,7 +47,9 @@ def list_drillholes(
     project_id: int = None,
     status_filter: DrillholeStatus = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(Drillhole, Project, Dispatch)),
+    names: ReferenceNames = Depends(reference_names)
 ):
     """
     List all drillholes with optional filtering
@@ -37,32 +61,32 @@ def list_drillholes(
         status_filter: Filter by drillhole status
         db: Database session
         current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
         
     Returns:
         List of drillholes with details
     """
-    query = db.query(Drillhole)
+    stmt = lambda_stmt(lambda: select(*DRILLHOLE_COLUMNS, Drillhole.dispatch_count))
     
     if project_id:
-        query = query.filter(Drillhole.project_id == project_id)
+        stmt += lambda s: s.where(Drillhole.project_id == project_id)
     
     if status_filter:
-        query = query.filter(Drillhole.status == status_filter)
+        stmt += lambda s: s.where(Drillhole.status == status_filter)
     
-    drillholes = query.order_by(Drillhole.created_at.desc()).offset(skip).limit(limit).all()
+    stmt += lambda s: s.order_by(Drillhole.created_at.desc())
+    rows = db.execute(paginate(stmt, skip, limit)).all()
     
-    # Enrich with additional details
-    result = []
+    drillholes = rows_to_dicts(rows)
     for drillhole in drillholes:
-        drillhole_dict = {
-            **DrillholeResponse.from_orm(drillhole).model_dump(),
-            "project_name": drillhole.project.name if drillhole.project else None,
-            "project_project_id": drillhole.project.project_id if drillhole.project else None,
-            "dispatch_count": len(drillhole.dispatches),
-        }
-        result.append(DrillholeWithDetails(**drillhole_dict))
+        # Keep the DrillholeWithDetails field order
+        dispatch_count = drillhole.pop("dispatch_count")
+        drillhole["project_name"] = names.project(drillhole["project_id"])
+        drillhole["project_project_id"] = names.project_code(drillhole["project_id"])
+        drillhole["dispatch_count"] = dispatch_count
     
-    return result
+    return ORJSONResponse(drillholes, headers=cache_headers(etag))
 
 
 @router.post("/", response_model=DrillholeResponse, status_code=status.HTTP_201_CREATED)
@@ -87,16 +111,152 @@ def create_drillhole(
     drillhole = Drillhole(**drillhole_dict)
     db.add(drillhole)
     db.commit()
+    reference_cache.invalidate()
     db.refresh(drillhole)
     
     return drillhole
 
 
+@router.get("/intervals/check", response_model=ProjectIntervalCheck)
+def check_project_intervals(
+    project_id: int,
+    min_gap: float = Query(0.0, ge=0),
+    issues_only: bool = True,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(Sample, Drillhole)),
+    names: ReferenceNames = Depends(reference_names)
+):
+    """
+    Find sampling gaps and overlaps in every drillhole of a project
+    
+    Args:
+        project_id: Project ID
+        min_gap: Ignore gaps of at most this many metres
+        issues_only: List only drillholes with gaps or overlaps
+        db: Database session
+        current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
+        
+    Returns:
+        Per-drillhole coverage summaries
+        
+    Raises:
+        HTTPException: If project not found
+    """
+    if names.project(project_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    check = check_project(db, project_id, names, min_gap, issues_only)
+    return ORJSONResponse(check, headers=cache_headers(etag))
+
+
+@router.get("/{drillhole_id}/samples", response_model=List[SampleInterval])
+def list_drillhole_samples(
+    drillhole_id: int,
+    request: Request,
+    from_depth: Optional[float] = Query(None, ge=0),
+    to_depth: Optional[float] = Query(None, ge=0),
+    match: str = "overlaps",
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(Sample)),
+    names: ReferenceNames = Depends(reference_names)
+):
+    """
+    List the samples of a drillhole by depth
+    
+    Intervals are half-open: a sample from 120 to 125 m overlaps 124-130 m
+    but not 125-130 m.
+    
+    Args:
+        drillhole_id: Drillhole ID
+        request: Incoming request
+        from_depth: Range top in metres (default: unbounded)
+        to_depth: Range bottom in metres (default: unbounded)
+        match: overlaps (samples sharing any depth with the range), within
+            (samples inside it) or contains (samples spanning all of it;
+            equal from_depth and to_depth find the samples at one depth)
+        db: Database session
+        current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
+        
+    Returns:
+        Samples in from_depth order
+        
+    Raises:
+        HTTPException: If the range or match is invalid, or drillhole not found
+    """
+    if match not in INTERVAL_MATCHES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"match must be one of: {', '.join(INTERVAL_MATCHES)}"
+        )
+    if from_depth is not None and to_depth is not None and to_depth < from_depth:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="to_depth must not be above from_depth"
+        )
+    if names.drillhole(drillhole_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Drillhole not found"
+        )
+    
+    hole = interval_cache.get(db, drillhole_id, getattr(request.state, "data_version", None))
+    samples = samples_in_range(hole, from_depth, to_depth, match)
+    return ORJSONResponse(samples, headers=cache_headers(etag))
+
+
+@router.get("/{drillhole_id}/intervals/check", response_model=DrillholeIntervalCheck)
+def check_drillhole_intervals(
+    drillhole_id: int,
+    request: Request,
+    min_gap: float = Query(0.0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(Sample)),
+    names: ReferenceNames = Depends(reference_names)
+):
+    """
+    Find sampling gaps and overlaps down a drillhole
+    
+    Args:
+        drillhole_id: Drillhole ID
+        request: Incoming request
+        min_gap: Ignore gaps of at most this many metres
+        db: Database session
+        current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
+        
+    Returns:
+        Coverage summary with gap and overlap depth ranges
+        
+    Raises:
+        HTTPException: If drillhole not found
+    """
+    if names.drillhole(drillhole_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Drillhole not found"
+        )
+    
+    hole = interval_cache.get(db, drillhole_id, getattr(request.state, "data_version", None))
+    return ORJSONResponse(check_hole(hole, min_gap), headers=cache_headers(etag))
+
+
 @router.get("/{drillhole_id}", response_model=DrillholeWithDetails)
 def get_drillhole(
     drillhole_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    names: ReferenceNames = Depends(reference_names)
 ):
     """
     Get drillhole by ID with details
@@ -105,6 +265,7 @@ def get_drillhole(
         drillhole_id: Drillhole ID
         db: Database session
         current_user: Current authenticated user
+        names: Reference name lookups
         
     Returns:
         Drillhole data with details
@@ -112,7 +273,7 @@ def get_drillhole(
     Raises:
         HTTPException: If drillhole not found
     """
-    drillhole = db.query(Drillhole).filter(Drillhole.id == drillhole_id).first()
+    drillhole = get_by_id(db, Drillhole, drillhole_id)
     if not drillhole:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -121,9 +282,9 @@ def get_drillhole(
     
     # Enrich with details
     drillhole_dict = DrillholeResponse.from_orm(drillhole).model_dump()
-    drillhole_dict["project_name"] = drillhole.project.name if drillhole.project else None
-    drillhole_dict["project_project_id"] = drillhole.project.project_id if drillhole.project else None
-    drillhole_dict["dispatch_count"] = len(drillhole.dispatches)
+    drillhole_dict["project_name"] = names.project(drillhole.project_id)
+    drillhole_dict["project_project_id"] = names.project_code(drillhole.project_id)
+    drillhole_dict["dispatch_count"] = drillhole.dispatch_count
     
     return DrillholeWithDetails(**drillhole_dict)
 
@@ -150,7 +311,7 @@ def update_drillhole(
     Raises:
         HTTPException: If drillhole not found
     """
-    drillhole = db.query(Drillhole).filter(Drillhole.id == drillhole_id).first()
+    drillhole = get_by_id(db, Drillhole, drillhole_id)
     if not drillhole:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -163,6 +324,7 @@ def update_drillhole(
         setattr(drillhole, field, value)
     
     db.commit()
+    reference_cache.invalidate()
     db.refresh(drillhole)
     
     return drillhole
@@ -185,12 +347,17 @@ def delete_drillhole(
     Raises:
         HTTPException: If drillhole not found
     """
-    drillhole = db.query(Drillhole).filter(Drillhole.id == drillhole_id).first()
+    drillhole = get_by_id(db, Drillhole, drillhole_id)
     if not drillhole:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Drillhole not found"
         )
     
+    # Its dispatches go through ON DELETE CASCADE, which skips the
+    # counter events, so release them from their projects here
+    subtract_child_counts(db, Dispatch, Dispatch.drillhole_id == drillhole.id)
+    record_deletions(db, Drillhole, [drillhole.id])
     db.delete(drillhole)
     db.commit()
+    reference_cache.invalidate()
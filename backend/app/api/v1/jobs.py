@@ -0,0 +1,199 @@
+"""
+Background jobs API routes
+"""
+import os
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models.job import Job, JobStatus
+from app.models.user import User, UserRole
+from app.schemas.job import JobCreate, JobResponse
+from app.api.deps import get_current_user, has_role
+from app.services.job_handlers import USER_JOB_KINDS
+from app.services.jobs import enqueue, request_cancel
+from app.services.statements import get_by_id
+
+router = APIRouter()
+
+
+def _get_visible_job(db: Session, job_id: int, user: User) -> Job:
+    """Load a job the user created (managers and admins see all jobs)"""
+    job = get_by_id(db, Job, job_id)
+    if not job or (job.created_by != user.id and not has_role(user, UserRole.MANAGER)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+@router.get("/", response_model=List[JobResponse])
+def list_jobs(
+    skip: int = 0,
+    limit: int = 50,
+    status_filter: JobStatus = None,
+    kind: str = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List jobs, newest first
+
+    Operators see their own jobs; managers and admins see all jobs.
+
+    Args:
+        skip: Number of records to skip
+        limit: Maximum number of records to return
+        status_filter: Filter by job status
+        kind: Filter by job kind
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        List of jobs
+    """
+    query = db.query(Job)
+
+    if not has_role(current_user, UserRole.MANAGER):
+        query = query.filter(Job.created_by == current_user.id)
+
+    if status_filter:
+        query = query.filter(Job.status == status_filter)
+
+    if kind:
+        query = query.filter(Job.kind == kind)
+
+    return query.order_by(Job.id.desc()).offset(skip).limit(limit).all()
+
+
+@router.post("/", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    job_data: JobCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue a job
+
+    Args:
+        job_data: Job kind and parameters
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        Queued job
+
+    Raises:
+        HTTPException: If the kind is unknown or not allowed for the user
+    """
+    required_role = USER_JOB_KINDS.get(job_data.kind)
+    if required_role is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown job kind: {job_data.kind}"
+        )
+
+    if not has_role(current_user, required_role):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Insufficient permissions"
+        )
+
+    job = enqueue(db, job_data.kind, job_data.params, user_id=current_user.id)
+    db.commit()
+    db.refresh(job)
+
+    return job
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get job status, progress and result
+
+    Args:
+        job_id: Job ID
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        Job data
+
+    Raises:
+        HTTPException: If job not found
+    """
+    return _get_visible_job(db, job_id, current_user)
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+def cancel_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Cancel a job
+
+    Queued jobs are cancelled immediately; running jobs stop at their next
+    progress report.
+
+    Args:
+        job_id: Job ID
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        Job data
+
+    Raises:
+        HTTPException: If job not found or already finished
+    """
+    job = _get_visible_job(db, job_id, current_user)
+
+    if job.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job already {job.status.value}"
+        )
+
+    job = request_cancel(db, job)
+    db.commit()
+
+    return job
+
+
+@router.get("/{job_id}/artifact")
+def download_job_artifact(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Download the file produced by a job
+
+    Args:
+        job_id: Job ID
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        File response
+
+    Raises:
+        HTTPException: If job not found or it has no finished artifact
+    """
+    job = _get_visible_job(db, job_id, current_user)
+
+    if job.status != JobStatus.SUCCEEDED or not job.artifact_path or not os.path.exists(job.artifact_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job has no artifact"
+        )
+
+    return FileResponse(job.artifact_path, filename=os.path.basename(job.artifact_path))
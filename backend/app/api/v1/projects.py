@@ -2,8 +2,10 @@
 Projects API routes
 """
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.database import get_db
 from app.models.project import Project, ProjectStatus
 from app.models.user import User
@@ -13,45 +15,57 @@ from app.schemas.project import (
     ProjectResponse,
     ProjectWithDetails,
 )
-from app.api.deps import get_current_user
+from app.schemas.job import JobAccepted
+from app.api.deps import get_current_user, reference_names, reference_snapshot, reference_cache_headers
+from app.services.jobs import enqueue
+from app.services.purge import project_purge_plan, count_rows, run_purge
+from app.services.reference_cache import ReferenceNames, ReferenceSnapshot, reference_cache
+from app.utils.responses import ORJSONResponse
+from app.services.statements import get_by_id
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[ProjectResponse])
 def list_projects(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     company_id: int = None,
     status_filter: ProjectStatus = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    snapshot: ReferenceSnapshot = Depends(reference_snapshot)
 ):
     """
     List all projects with optional filtering
     
+    Served from the reference cache, newest first; clients may reuse the
+    response for REFERENCE_CACHE_TTL_SECONDS.
+    
     Args:
+        request: Incoming request
         skip: Number of records to skip
         limit: Maximum number of records to return
         company_id: Filter by company ID
         status_filter: Filter by project status
-        db: Database session
         current_user: Current authenticated user
+        snapshot: Reference data snapshot
         
     Returns:
         List of projects
     """
-    query = db.query(Project)
+    projects = snapshot.projects
     
     if company_id:
-        query = query.filter(Project.company_id == company_id)
+        projects = [project for project in projects if project["company_id"] == company_id]
     
     if status_filter:
-        query = query.filter(Project.status == status_filter)
-    
-    projects = query.order_by(Project.created_at.desc()).offset(skip).limit(limit).all()
+        projects = [project for project in projects if project["status"] == status_filter]
     
-    return projects
+    return ORJSONResponse(
+        projects[skip:skip + limit],
+        headers=reference_cache_headers(request, snapshot)
+    )
 
 
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
@@ -86,6 +100,7 @@ def create_project(
     project = Project(**project_dict)
     db.add(project)
     db.commit()
+    reference_cache.invalidate()
     db.refresh(project)
     
     return project
@@ -95,7 +110,8 @@ def create_project(
 def get_project(
     project_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    names: ReferenceNames = Depends(reference_names)
 ):
     """
     Get project by ID with details
@@ -104,6 +120,7 @@ def get_project(
         project_id: Project ID
         db: Database session
         current_user: Current authenticated user
+        names: Reference name lookups
         
     Returns:
         Project data with details
@@ -111,7 +128,7 @@ def get_project(
     Raises:
         HTTPException: If project not found
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = get_by_id(db, Project, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -120,9 +137,9 @@ def get_project(
     
     # Enrich with details
     project_dict = ProjectResponse.from_orm(project).model_dump()
-    project_dict["company_name"] = project.company.name if project.company else None
-    project_dict["drillhole_count"] = len(project.drillholes)
-    project_dict["dispatch_count"] = len(project.dispatches)
+    project_dict["company_name"] = names.company(project.company_id)
+    project_dict["drillhole_count"] = project.drillhole_count
+    project_dict["dispatch_count"] = project.dispatch_count
     
     return ProjectWithDetails(**project_dict)
 
@@ -149,7 +166,7 @@ def update_project(
     Raises:
         HTTPException: If project not found
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = get_by_id(db, Project, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -162,19 +179,29 @@ def update_project(
         setattr(project, field, value)
     
     db.commit()
+    reference_cache.invalidate()
     db.refresh(project)
     
     return project
 
 
-@router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{project_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={202: {"model": JobAccepted, "description": "Large project; deletion continues as a background job"}},
+)
 def delete_project(
     project_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Delete project
+    Delete project and everything under it
+    
+    The subtree is deleted leaf-first in committed batches. Small subtrees
+    are removed before the response; larger ones (more than
+    PURGE_INLINE_ROWS rows) are queued as a purge job and the request
+    returns 202 with the job id; poll GET /jobs/{id} for progress.
     
     Args:
         project_id: Project ID
@@ -184,12 +211,24 @@ def delete_project(
     Raises:
         HTTPException: If project not found
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = get_by_id(db, Project, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
     
-    db.delete(project)
+    plan = project_purge_plan(project.id)
+    rows = sum(count_rows(db, plan).values())
+    if rows <= settings.PURGE_INLINE_ROWS:
+        run_purge(db, plan, settings.PURGE_BATCH_SIZE)
+        reference_cache.invalidate()
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    
+    job = enqueue(db, "purge_project", {"project_id": project.id}, user_id=current_user.id)
     db.commit()
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"detail": "Project deletion started", "job_id": job.id, "rows": rows},
+        headers={"Location": f"{settings.API_V1_PREFIX}/jobs/{job.id}"}
+    )
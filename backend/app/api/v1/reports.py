@@ -1,69 +1,109 @@
 """
 Reports and analytics API routes
 """
-from typing import Dict, Any, List
-from fastapi import APIRouter, Depends, Response
+from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.database import get_db
+from sqlalchemy import and_, case, func, lambda_stmt, or_, select
+from app.config import settings
+from app.database import get_db, ExportSessionLocal
+from app.models.company import Company
 from app.models.dispatch import Dispatch, DispatchStatus
+from app.models.drillhole import Drillhole
 from app.models.inventory import Inventory, BoxType
+from app.models.project import Project
+from app.models.sample import Sample
 from app.models.user import User
-from app.api.deps import get_current_user
-from app.utils.helpers import calculate_match_rate, export_to_csv, calculate_days_out
+from app.api.deps import get_current_user, conditional_get, reference_names
+from app.services.dispatch_listing import EXPORT_HEADERS, dispatch_details_statement, dispatch_export_rows
+from app.services.reference_cache import ReferenceNames
+from app.utils.helpers import calculate_match_rate, iter_csv, calculate_days_out
+from app.utils.http_cache import cache_headers
+from app.utils.responses import ORJSONResponse
+from app.utils.single_flight import SingleFlight, flight_key
 
 router = APIRouter()
 
+# Rows fetched per round trip while streaming the CSV export
+EXPORT_BATCH_SIZE = 1000
+
+# Identical report requests arriving together (e.g. everyone opening the
+# dashboard at the start of a shift) share one computation
+dashboard_flight = SingleFlight("reports.dashboard")
+reconciliation_flight = SingleFlight("reports.reconciliation")
+analytics_flight = SingleFlight("reports.analytics")
+coverage_flight = SingleFlight("reports.coverage")
+
+
+def _coalesce(flight: SingleFlight, request: Request, user: User, etag: Optional[str], compute):
+    if not settings.REPORT_SINGLE_FLIGHT:
+        return compute()
+    return flight.do(flight_key(request, user.role.value, etag), compute)
+
 
 @router.get("/dashboard")
 def get_dashboard_stats(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(Inventory, Dispatch))
 ) -> Dict[str, Any]:
     """
     Get dashboard statistics
     
+    Concurrent identical requests share one computation.
+    
     Args:
+        request: Incoming request
+        response: Response whose headers carry the ETag
         db: Database session
         current_user: Current authenticated user
+        etag: ETag of the current data version
         
     Returns:
         Dashboard statistics
     """
+    response.headers.update(cache_headers(etag))
+    return _coalesce(dashboard_flight, request, current_user, etag, lambda: _dashboard_stats(db))
+
+
+def _dashboard_stats(db: Session) -> Dict[str, Any]:
     # Get inventory
-    hq_inventory = db.query(Inventory).filter(Inventory.box_type == BoxType.HQ).first()
-    nq_inventory = db.query(Inventory).filter(Inventory.box_type == BoxType.NQ).first()
-    
-    base_hq = hq_inventory.base_quantity if hq_inventory else 0
-    base_nq = nq_inventory.base_quantity if nq_inventory else 0
-    
-    # Outstanding dispatches
-    outstanding = db.query(Dispatch).filter(
-        Dispatch.status == DispatchStatus.OUTSTANDING
-    ).all()
+    base = dict(db.execute(lambda_stmt(lambda: select(Inventory.box_type, Inventory.base_quantity))).all())
+    base_hq = base.get(BoxType.HQ, 0)
+    base_nq = base.get(BoxType.NQ, 0)
     
-    outstanding_hq = sum(d.hq_boxes for d in outstanding)
-    outstanding_nq = sum(d.nq_boxes for d in outstanding)
-    outstanding_samples = sum(d.samples_collected for d in outstanding)
-    
-    # Returned dispatches
-    returned = db.query(Dispatch).filter(
-        Dispatch.status == DispatchStatus.RETURNED
-    ).all()
+    # Box, sample and match totals per status, aggregated in the database
+    totals = {
+        row.status: row
+        for row in db.execute(lambda_stmt(lambda: select(
+            Dispatch.status,
+            func.count(Dispatch.id).label("dispatches"),
+            func.sum(Dispatch.hq_boxes).label("hq"),
+            func.sum(Dispatch.nq_boxes).label("nq"),
+            func.sum(Dispatch.samples_collected).label("samples"),
+            func.sum(case(
+                (and_(Dispatch.returned_hq == Dispatch.hq_boxes, Dispatch.returned_nq == Dispatch.nq_boxes), 1),
+                else_=0,
+            )).label("matches"),
+        ).group_by(Dispatch.status)))
+    }
+    outstanding = totals.get(DispatchStatus.OUTSTANDING)
+    returned = totals.get(DispatchStatus.RETURNED)
     
-    returned_hq = sum(d.returned_hq for d in returned if d.returned_hq)
-    returned_nq = sum(d.returned_nq for d in returned if d.returned_nq)
+    outstanding_count = outstanding.dispatches if outstanding else 0
+    outstanding_hq = int(outstanding.hq or 0) if outstanding else 0
+    outstanding_nq = int(outstanding.nq or 0) if outstanding else 0
+    outstanding_samples = int(outstanding.samples or 0) if outstanding else 0
+    returned_count = returned.dispatches if returned else 0
+    perfect_matches = int(returned.matches or 0) if returned else 0
     
-    # Calculate matches
-    perfect_matches = sum(
-        1 for d in returned
-        if d.returned_hq == d.hq_boxes and d.returned_nq == d.nq_boxes
-    )
-    
-    match_rate = calculate_match_rate(len(returned), perfect_matches)
+    match_rate = calculate_match_rate(returned_count, perfect_matches)
     
     # Total samples
-    total_samples = db.query(func.sum(Dispatch.samples_collected)).scalar() or 0
+    total_samples = sum(int(row.samples or 0) for row in totals.values())
     
     return {
         "inventory": {
@@ -75,9 +115,9 @@ def get_dashboard_stats(
             }
         },
         "dispatches": {
-            "total": len(outstanding) + len(returned),
-            "outstanding": len(outstanding),
-            "returned": len(returned),
+            "total": outstanding_count + returned_count,
+            "outstanding": outstanding_count,
+            "returned": returned_count,
             "match_rate": match_rate
         },
         "samples": {
@@ -89,32 +129,50 @@ def get_dashboard_stats(
 
 @router.get("/reconciliation")
 def get_reconciliation_report(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(Dispatch, Project, Drillhole, Company)),
+    names: ReferenceNames = Depends(reference_names)
 ) -> Dict[str, Any]:
     """
     Get reconciliation report
     
+    Concurrent identical requests share one computation.
+    
     Args:
+        request: Incoming request
+        response: Response whose headers carry the ETag
         db: Database session
         current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
         
     Returns:
         Reconciliation report with discrepancies
     """
-    # Get outstanding dispatches
-    outstanding = db.query(Dispatch).filter(
+    response.headers.update(cache_headers(etag))
+    return _coalesce(reconciliation_flight, request, current_user, etag, lambda: _reconciliation_report(db, names))
+
+
+def _reconciliation_report(db: Session, names: ReferenceNames) -> Dict[str, Any]:
+    # Get outstanding dispatches (related names come from the reference
+    # cache, not from joins or lazy loads per dispatch)
+    stmt = dispatch_details_statement()
+    stmt += lambda s: s.where(
         Dispatch.status == DispatchStatus.OUTSTANDING
-    ).order_by(Dispatch.dispatch_date.asc()).all()
+    ).order_by(Dispatch.dispatch_date.asc())
+    outstanding = db.execute(stmt).all()
     
     outstanding_list = []
     for dispatch in outstanding:
         days_out = calculate_days_out(dispatch.dispatch_date, None)
         outstanding_list.append({
             "id": dispatch.id,
-            "project": dispatch.project.name if dispatch.project else None,
-            "drillhole": dispatch.drillhole.drillhole_id if dispatch.drillhole else None,
-            "company": dispatch.company.name if dispatch.company else None,
+            "project": names.project(dispatch.project_id),
+            "drillhole": names.drillhole(dispatch.drillhole_id),
+            "company": names.company(dispatch.company_id),
             "dispatch_date": dispatch.dispatch_date.isoformat(),
             "hq_boxes": dispatch.hq_boxes,
             "nq_boxes": dispatch.nq_boxes,
@@ -123,32 +181,37 @@ def get_reconciliation_report(
             "technician": dispatch.technician
         })
     
-    # Get discrepancies
-    returned = db.query(Dispatch).filter(
-        Dispatch.status == DispatchStatus.RETURNED
-    ).all()
+    # Get discrepancies (only returns whose box counts differ are fetched)
+    stmt = dispatch_details_statement()
+    stmt += lambda s: s.where(
+        Dispatch.status == DispatchStatus.RETURNED,
+        or_(
+            func.coalesce(Dispatch.returned_hq, 0) != Dispatch.hq_boxes,
+            func.coalesce(Dispatch.returned_nq, 0) != Dispatch.nq_boxes,
+        )
+    ).order_by(Dispatch.id)
+    returned = db.execute(stmt).all()
     
     discrepancies = []
     for dispatch in returned:
         hq_diff = (dispatch.returned_hq or 0) - dispatch.hq_boxes
         nq_diff = (dispatch.returned_nq or 0) - dispatch.nq_boxes
         
-        if hq_diff != 0 or nq_diff != 0:
-            discrepancies.append({
-                "id": dispatch.id,
-                "project": dispatch.project.name if dispatch.project else None,
-                "drillhole": dispatch.drillhole.drillhole_id if dispatch.drillhole else None,
-                "company": dispatch.company.name if dispatch.company else None,
-                "dispatch_date": dispatch.dispatch_date.isoformat(),
-                "return_date": dispatch.return_date.isoformat() if dispatch.return_date else None,
-                "hq_dispatched": dispatch.hq_boxes,
-                "hq_returned": dispatch.returned_hq,
-                "hq_difference": hq_diff,
-                "nq_dispatched": dispatch.nq_boxes,
-                "nq_returned": dispatch.returned_nq,
-                "nq_difference": nq_diff,
-                "notes": dispatch.return_notes
-            })
+        discrepancies.append({
+            "id": dispatch.id,
+            "project": names.project(dispatch.project_id),
+            "drillhole": names.drillhole(dispatch.drillhole_id),
+            "company": names.company(dispatch.company_id),
+            "dispatch_date": dispatch.dispatch_date.isoformat(),
+            "return_date": dispatch.return_date.isoformat() if dispatch.return_date else None,
+            "hq_dispatched": dispatch.hq_boxes,
+            "hq_returned": dispatch.returned_hq,
+            "hq_difference": hq_diff,
+            "nq_dispatched": dispatch.nq_boxes,
+            "nq_returned": dispatch.returned_nq,
+            "nq_difference": nq_diff,
+            "notes": dispatch.return_notes
+        })
     
     return {
         "outstanding": outstanding_list,
@@ -158,34 +221,49 @@ def get_reconciliation_report(
 
 @router.get("/analytics")
 def get_analytics(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(Dispatch, Company)),
+    names: ReferenceNames = Depends(reference_names)
 ) -> Dict[str, Any]:
     """
     Get analytics data
     
+    Concurrent identical requests share one computation.
+    
     Args:
+        request: Incoming request
+        response: Response whose headers carry the ETag
         db: Database session
         current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
         
     Returns:
         Analytics data by company and sample type
     """
-    # Dispatches by company
+    response.headers.update(cache_headers(etag))
+    return _coalesce(analytics_flight, request, current_user, etag, lambda: _analytics(db, names))
+
+
+def _analytics(db: Session, names: ReferenceNames) -> Dict[str, Any]:
+    # Dispatches by company; names come from the reference cache
     company_stats = db.query(
         Dispatch.company_id,
         func.count(Dispatch.id).label("dispatch_count"),
         func.sum(Dispatch.samples_collected).label("total_samples")
-    ).group_by(Dispatch.company_id).all()
+    ).group_by(Dispatch.company_id).order_by(Dispatch.company_id).all()
     
-    by_company = []
-    for stat in company_stats:
-        company = db.query(Dispatch).filter(Dispatch.company_id == stat.company_id).first().company
-        by_company.append({
-            "company": company.name if company else "Unknown",
+    by_company = [
+        {
+            "company": names.company(stat.company_id) or "Unknown",
             "dispatches": stat.dispatch_count,
             "samples": stat.total_samples or 0
-        })
+        }
+        for stat in company_stats
+    ]
     
     # Dispatches by sample type
     sample_type_stats = db.query(
@@ -207,6 +285,64 @@ def get_analytics(
     }
 
 
+@router.get("/coverage")
+def get_coverage(
+    request: Request,
+    project_id: Optional[int] = None,
+    company_id: Optional[int] = None,
+    bin_size: float = Query(10.0, gt=0, le=1000),
+    min_gap: float = Query(0.0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(Sample, Drillhole)),
+    names: ReferenceNames = Depends(reference_names)
+):
+    """
+    Get downhole sampling coverage of a project or of a company's projects
+    
+    Per drillhole: metres drilled and sampled, gaps and overlapping samples.
+    Per project: the same totals. Per depth bin: holes reaching it, metres
+    drilled and sampled, and samples (by midpoint). Concurrent identical
+    requests share one computation.
+    
+    Args:
+        request: Incoming request
+        project_id: Project to report on
+        company_id: Company whose projects to report on
+        bin_size: Depth bin height in metres
+        min_gap: Ignore gaps of at most this many metres
+        db: Database session
+        current_user: Current authenticated user
+        etag: ETag of the current data version
+        names: Reference name lookups
+        
+    Returns:
+        Coverage by project, drillhole and depth bin
+        
+    Raises:
+        HTTPException: If neither project_id nor company_id is given, or
+            the depth range needs too many bins
+    """
+    # Loads NumPy; imported on first use to keep it out of worker startup
+    from app.services.coverage import DepthBinsError, coverage_report
+
+    if project_id is None and company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="project_id or company_id is required"
+        )
+    
+    compute = lambda: coverage_report(db, names, project_id, company_id, bin_size, min_gap)
+    try:
+        report = _coalesce(coverage_flight, request, current_user, etag, compute)
+    except DepthBinsError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    return ORJSONResponse(report, headers=cache_headers(etag))
+
+
 @router.get("/export")
 def export_dispatches(
     db: Session = Depends(get_db),
@@ -215,52 +351,32 @@ def export_dispatches(
     """
     Export all dispatches to CSV
     
+    Rows are streamed in batches from a server-side cursor, so the export
+    never holds the whole table in memory and the compression middleware
+    can encode it as it is sent.
+    
     Args:
         db: Database session
         current_user: Current authenticated user
         
     Returns:
-        CSV file response
+        Streaming CSV file response
     """
-    dispatches = db.query(Dispatch).order_by(Dispatch.dispatch_date.desc()).all()
-    
-    data = []
-    for dispatch in dispatches:
-        data.append({
-            "ID": dispatch.id,
-            "Project": dispatch.project.name if dispatch.project else "",
-            "Drillhole": dispatch.drillhole.drillhole_id if dispatch.drillhole else "",
-            "Company": dispatch.company.name if dispatch.company else "",
-            "Dispatch Date": dispatch.dispatch_date.isoformat(),
-            "HQ Boxes": dispatch.hq_boxes,
-            "NQ Boxes": dispatch.nq_boxes,
-            "Driver": dispatch.driver,
-            "Technician": dispatch.technician,
-            "Samples Collected": dispatch.samples_collected,
-            "Sample Type": dispatch.sample_type or "",
-            "Status": dispatch.status.value,
-            "Return Date": dispatch.return_date.isoformat() if dispatch.return_date else "",
-            "Returned HQ": dispatch.returned_hq or "",
-            "Returned NQ": dispatch.returned_nq or "",
-            "Return Condition": dispatch.return_condition or "",
-            "Return Notes": dispatch.return_notes or ""
-        })
-    
-    headers = [
-        "ID", "Project", "Drillhole", "Company", "Dispatch Date",
-        "HQ Boxes", "NQ Boxes", "Driver", "Technician",
-        "Samples Collected", "Sample Type", "Status",
-        "Return Date", "Returned HQ", "Returned NQ",
-        "Return Condition", "Return Notes"
-    ]
-    
-    csv_content = export_to_csv(data, headers)
-    
-    return Response(
-        content=csv_content,
+    return StreamingResponse(
+        iter_csv(_export_rows(), EXPORT_HEADERS),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename=dispatches_export.csv"
         }
     )
 
+
+def _export_rows():
+    # Runs while the response streams, so it owns its session rather than
+    # relying on the request's dependency lifetime; the export pool uses
+    # protocol compression when DATABASE_COMPRESS_EXPORTS is set
+    db = ExportSessionLocal()
+    try:
+        yield from dispatch_export_rows(db, EXPORT_BATCH_SIZE)
+    finally:
+        db.close()
@@ -1,21 +1,40 @@
 """
 Samples API routes
 """
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.sample import Sample, SampleType, SampleStatus
-from app.models.user import User
+from app.models.sample_sequence import SampleIdSequence
+from app.models.user import User, UserRole
 from app.schemas.sample import (
     SampleCreate,
     SampleUpdate,
     SampleResponse,
+    SampleBulkStatusUpdate,
+    SampleBulkStatusResult,
+    SampleIdSequenceCreate,
+    SampleIdSequenceResponse,
+    SampleIdReserve,
+    SampleIdBlock,
 )
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, require_role, conditional_get
+from app.utils.http_cache import cache_headers
+from app.utils.responses import ORJSONResponse, schema_columns, rows_to_dicts
+from app.services.change_journal import record_change, serialize_row, serialize_values, SERVER_FIELDS
+from app.services.sample_ids import check_manual_sample_id, create_sequence, reserve_block
+from app.services.sample_status import sample_selection, update_status
+from app.services.statements import get_by_id, paginate
 
 router = APIRouter()
 
+SAMPLE_COLUMNS = schema_columns(SampleResponse, Sample)
+
+# drillhole_id is copied from the dispatch on each side, not journaled
+JOURNAL_EXCLUDE = SERVER_FIELDS | {"drillhole_id"}
+
 
 @router.get("/", response_model=List[SampleResponse])
 def list_samples(
@@ -23,7 +42,8 @@ def list_samples(
     limit: int = 100,
     dispatch_id: int = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    etag: Optional[str] = Depends(conditional_get(Sample))
 ):
     """
     List all samples with optional filtering
@@ -34,18 +54,20 @@ def list_samples(
         dispatch_id: Filter by dispatch ID
         db: Database session
         current_user: Current authenticated user
+        etag: ETag of the current data version
         
     Returns:
         List of samples
     """
-    query = db.query(Sample)
+    stmt = lambda_stmt(lambda: select(*SAMPLE_COLUMNS))
     
     if dispatch_id:
-        query = query.filter(Sample.dispatch_id == dispatch_id)
+        stmt += lambda s: s.where(Sample.dispatch_id == dispatch_id)
     
-    samples = query.order_by(Sample.created_at.desc()).offset(skip).limit(limit).all()
+    stmt += lambda s: s.order_by(Sample.created_at.desc())
+    rows = db.execute(paginate(stmt, skip, limit)).all()
     
-    return samples
+    return ORJSONResponse(rows_to_dicts(rows), headers=cache_headers(etag))
 
 
 @router.post("/", response_model=SampleResponse, status_code=status.HTTP_201_CREATED)
@@ -64,17 +86,216 @@ def create_sample(
         
     Returns:
         Created sample
+        
+    Raises:
+        HTTPException: If neither or both of sample_id and sequence_id are
+            given, sample_id has a sequence's form but was not reserved,
+            or the sequence is not found or used up
     """
-    sample_dict = sample_data.model_dump()
+    if (sample_data.sample_id is None) == (sample_data.sequence_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give either sample_id or sequence_id"
+        )
+    
+    sample_dict = sample_data.model_dump(exclude={"sequence_id"})
+    if sample_data.sample_id is not None:
+        try:
+            check_manual_sample_id(db, sample_data.sample_id)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc)
+            )
+    else:
+        # The sequence row stays locked until the commit below
+        try:
+            block = reserve_block(db, sample_data.sequence_id, 1)
+        except ValueError as exc:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc)
+            )
+        if block is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Sample id sequence not found"
+            )
+        sample_dict["sample_id"] = block["first_sample_id"]
     
     sample = Sample(**sample_dict)
     db.add(sample)
+    db.flush()
+    record_change(db, "sample", "create", sample.id, serialize_row(sample, exclude=JOURNAL_EXCLUDE))
     db.commit()
     db.refresh(sample)
     
     return sample
 
 
+@router.post("/bulk-status", response_model=SampleBulkStatusResult)
+def bulk_update_status(
+    update_data: SampleBulkStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Move many samples to a status in one statement
+    
+    Select the samples by exactly one of: ids, dispatch_id,
+    sample_id_prefix, or sample_id_from and sample_id_to (inclusive).
+    Samples already at the status are left alone; with from_status only
+    samples currently at that status change. With audit, every changed
+    sample gets an audit log row with its old and new status.
+    
+    Args:
+        update_data: New status, selection and options
+        db: Database session
+        current_user: Current authenticated user
+        
+    Returns:
+        Number of samples changed and audit rows written
+        
+    Raises:
+        HTTPException: If the selection is missing, ambiguous or invalid
+    """
+    try:
+        where = sample_selection(
+            update_data.ids,
+            update_data.dispatch_id,
+            update_data.sample_id_prefix,
+            update_data.sample_id_from,
+            update_data.sample_id_to,
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    
+    counts = update_status(
+        db, update_data.status, where, update_data.from_status,
+        audit_user_id=current_user.id, audit=update_data.audit,
+    )
+    db.commit()
+    
+    return {"status": update_data.status, **counts}
+
+
+@router.get("/id-sequences", response_model=List[SampleIdSequenceResponse])
+def list_id_sequences(
+    project_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List sample id sequences
+    
+    Args:
+        project_id: Filter by project ID
+        db: Database session
+        current_user: Current authenticated user
+        
+    Returns:
+        Sequences in prefix order with their next sample_id
+    """
+    query = db.query(SampleIdSequence)
+    if project_id is not None:
+        query = query.filter(SampleIdSequence.project_id == project_id)
+    
+    return query.order_by(SampleIdSequence.prefix).all()
+
+
+@router.post("/id-sequences", response_model=SampleIdSequenceResponse, status_code=status.HTTP_201_CREATED)
+def create_id_sequence(
+    sequence_data: SampleIdSequenceCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(UserRole.MANAGER))
+):
+    """
+    Create a sample id sequence for a prefix
+    
+    Numbering starts at start, or after the highest sample_id of the same
+    form already in use.
+    
+    Args:
+        sequence_data: Prefix, digits, project and optional start
+        db: Database session
+        current_user: Current authenticated user (manager or admin)
+        
+    Returns:
+        Created sequence
+        
+    Raises:
+        HTTPException: If the prefix is taken or overlaps another, or the
+            width or start is invalid
+    """
+    try:
+        sequence = create_sequence(
+            db,
+            sequence_data.prefix,
+            sequence_data.width,
+            sequence_data.project_id,
+            sequence_data.start,
+        )
+    except ValueError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    db.commit()
+    db.refresh(sequence)
+    
+    return sequence
+
+
+@router.post("/id-sequences/{sequence_id}/reserve", response_model=SampleIdBlock)
+def reserve_sample_ids(
+    sequence_id: int,
+    reserve_data: SampleIdReserve,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Reserve a contiguous block of sample ids
+    
+    The ids are the caller's to use, for instance to label bags offline
+    before the samples are created. Each call is one counter update, so
+    concurrent callers get disjoint blocks.
+    
+    Args:
+        sequence_id: Sequence ID
+        reserve_data: Number of ids
+        db: Database session
+        current_user: Current authenticated user
+        
+    Returns:
+        First and last number and sample_id of the block
+        
+    Raises:
+        HTTPException: If the sequence is not found, count is out of range
+            or the sequence has too few ids left
+    """
+    try:
+        block = reserve_block(db, sequence_id, reserve_data.count)
+    except ValueError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    if block is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sample id sequence not found"
+        )
+    db.commit()
+    
+    return block
+
+
 @router.get("/{sample_id}", response_model=SampleResponse)
 def get_sample(
     sample_id: int,
@@ -95,7 +316,7 @@ def get_sample(
     Raises:
         HTTPException: If sample not found
     """
-    sample = db.query(Sample).filter(Sample.id == sample_id).first()
+    sample = get_by_id(db, Sample, sample_id)
     if not sample:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -127,7 +348,7 @@ def update_sample(
     Raises:
         HTTPException: If sample not found
     """
-    sample = db.query(Sample).filter(Sample.id == sample_id).first()
+    sample = get_by_id(db, Sample, sample_id)
     if not sample:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -139,6 +360,7 @@ def update_sample(
     for field, value in update_data.items():
         setattr(sample, field, value)
     
+    record_change(db, "sample", "update", sample.id, serialize_values(update_data))
     db.commit()
     db.refresh(sample)
     
@@ -162,12 +384,13 @@ def delete_sample(
     Raises:
         HTTPException: If sample not found
     """
-    sample = db.query(Sample).filter(Sample.id == sample_id).first()
+    sample = get_by_id(db, Sample, sample_id)
     if not sample:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Sample not found"
         )
     
+    record_change(db, "sample", "delete", sample.id)
     db.delete(sample)
     db.commit()
@@ -0,0 +1,68 @@
+"""
+Search API routes
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models.user import User
+from app.schemas.search import SearchResponse
+from app.api.deps import get_current_user, reference_names
+from app.services.reference_cache import ReferenceNames
+from app.services.search import HIT_TYPES, MIN_QUERY_LENGTH, search_identifiers
+from app.utils.responses import ORJSONResponse
+
+router = APIRouter()
+
+
+@router.get("/", response_model=SearchResponse)
+def search(
+    q: str = Query(..., min_length=MIN_QUERY_LENGTH, max_length=100),
+    types: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    names: ReferenceNames = Depends(reference_names)
+):
+    """
+    Search sample, drillhole and project codes, project and company names
+    and drivers
+    
+    Matching is case-insensitive; hits are ordered exact match, prefix,
+    then substring. Two-character queries match project and company
+    prefixes only.
+    
+    Args:
+        q: Text to find
+        types: Comma-separated hit types (sample, drillhole, project,
+            company, driver); all by default
+        limit: Maximum hits
+        db: Database session
+        current_user: Current authenticated user
+        names: Reference name lookups
+        
+    Returns:
+        Typed hits
+        
+    Raises:
+        HTTPException: If q is too short once trimmed or types names an
+            unknown hit type
+    """
+    q = q.strip()
+    if len(q) < MIN_QUERY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Query must be at least {MIN_QUERY_LENGTH} characters without surrounding spaces"
+        )
+    selected = HIT_TYPES
+    if types:
+        selected = tuple(kind.strip() for kind in types.split(",") if kind.strip())
+        unknown = [kind for kind in selected if kind not in HIT_TYPES]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown search types: {', '.join(unknown)}"
+            )
+    
+    hits = search_identifiers(db, q, names, selected, limit)
+    return ORJSONResponse({"query": q, "hits": hits})
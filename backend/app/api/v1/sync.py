@@ -0,0 +1,142 @@
+"""
+Edge-to-central sync API routes
+"""
+from typing import Any, Dict, List
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models.sync import SyncConflict
+from app.models.user import User, UserRole
+from app.schemas.sync import SyncPushResponse, SyncConflictResponse
+from app.api.deps import require_role
+from app.services.sync import apply_batch, build_pull, decode_batch
+from app.services.statements import get_by_id
+
+router = APIRouter()
+
+
+@router.post("/push", response_model=SyncPushResponse)
+async def push_changes(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(UserRole.MANAGER))
+):
+    """
+    Replay a batch of change journal entries from a local site
+    
+    The body is JSON ({"site_id": ..., "changes": [...]}), optionally
+    gzip-compressed with Content-Encoding: gzip.
+    
+    Args:
+        request: Incoming request
+        db: Database session
+        current_user: Current authenticated user (manager or admin)
+        
+    Returns:
+        Acknowledged sequence and replay counters
+        
+    Raises:
+        HTTPException: If the payload cannot be decoded
+    """
+    body = await request.body()
+    try:
+        payload = decode_batch(body, request.headers.get("content-encoding"))
+        site_id = payload["site_id"]
+        changes = payload["changes"]
+    except (ValueError, KeyError, OSError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync payload"
+        )
+    
+    return await run_in_threadpool(apply_batch, db, site_id, changes)
+
+
+@router.get("/pull")
+def pull_reference_data(
+    since: datetime = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(UserRole.MANAGER))
+) -> Dict[str, Any]:
+    """
+    Get companies, projects and drillholes changed since a watermark
+    
+    Args:
+        since: Watermark returned by the previous pull
+        db: Database session
+        current_user: Current authenticated user (manager or admin)
+        
+    Returns:
+        Changed rows and deleted ids per table and the new watermark
+    """
+    return build_pull(db, since)
+
+
+@router.get("/conflicts", response_model=List[SyncConflictResponse])
+def list_conflicts(
+    site_id: str = None,
+    include_resolved: bool = False,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(UserRole.MANAGER))
+):
+    """
+    List changes that could not be replayed cleanly
+    
+    Args:
+        site_id: Filter by originating site
+        include_resolved: Include conflicts already resolved
+        skip: Number of records to skip
+        limit: Maximum number of records to return
+        db: Database session
+        current_user: Current authenticated user (manager or admin)
+        
+    Returns:
+        List of sync conflicts
+    """
+    query = db.query(SyncConflict)
+    
+    if site_id:
+        query = query.filter(SyncConflict.site_id == site_id)
+    
+    if not include_resolved:
+        query = query.filter(SyncConflict.resolved.is_(False))
+    
+    return query.order_by(SyncConflict.id.desc()).offset(skip).limit(limit).all()
+
+
+@router.post("/conflicts/{conflict_id}/resolve", response_model=SyncConflictResponse)
+def resolve_conflict(
+    conflict_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(UserRole.MANAGER))
+):
+    """
+    Mark a sync conflict as resolved
+    
+    Args:
+        conflict_id: Conflict ID
+        db: Database session
+        current_user: Current authenticated user (manager or admin)
+        
+    Returns:
+        Updated conflict
+        
+    Raises:
+        HTTPException: If conflict not found
+    """
+    conflict = get_by_id(db, SyncConflict, conflict_id)
+    if not conflict:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conflict not found"
+        )
+    
+    conflict.resolved = True
+    db.commit()
+    db.refresh(conflict)
+    
+    return conflict
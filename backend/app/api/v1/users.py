@@ -1,8 +1,9 @@
 """
 Users API routes
 """
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User, UserRole
@@ -11,18 +12,24 @@ from app.schemas.user import (
     UserUpdate,
     UserResponse,
 )
-from app.api.deps import get_current_user, get_current_admin_user
+from app.api.deps import get_current_user, get_current_admin_user, conditional_get
 from app.utils.security import get_password_hash
+from app.utils.http_cache import cache_headers
+from app.utils.responses import ORJSONResponse, schema_columns, rows_to_dicts
+from app.services.statements import get_by_id, paginate
 
 router = APIRouter()
 
+USER_COLUMNS = schema_columns(UserResponse, User)
+
 
 @router.get("/", response_model=List[UserResponse])
 def list_users(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: User = Depends(get_current_admin_user),
+    etag: Optional[str] = Depends(conditional_get(User))
 ):
     """
     List all users (Admin only)
@@ -32,13 +39,15 @@ def list_users(
         limit: Maximum number of records to return
         db: Database session
         current_user: Current authenticated admin user
+        etag: ETag of the current data version
         
     Returns:
         List of users
     """
-    users = db.query(User).order_by(User.created_at.desc()).offset(skip).limit(limit).all()
+    stmt = lambda_stmt(lambda: select(*USER_COLUMNS).order_by(User.created_at.desc()))
+    rows = db.execute(paginate(stmt, skip, limit)).all()
     
-    return users
+    return ORJSONResponse(rows_to_dicts(rows), headers=cache_headers(etag))
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -125,7 +134,7 @@ def get_user(
     Raises:
         HTTPException: If user not found
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_by_id(db, User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -157,7 +166,7 @@ def update_user(
     Raises:
         HTTPException: If user not found
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_by_id(db, User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -205,7 +214,7 @@ def delete_user(
             detail="Cannot delete your own account"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_by_id(db, User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,5 +1,7 @@
 from pydantic_settings import BaseSettings
 from typing import List, Union
+from sqlalchemy.engine import make_url
+from app.utils import db_drivers
 import os
 import json
 
@@ -22,8 +24,16 @@ class Settings(BaseSettings):
     DATABASE_USER: str = os.getenv("DATABASE_USER", "avnadmin")
     DATABASE_PASSWORD: str = os.getenv("DATABASE_PASSWORD", "defaultpassword")
     DATABASE_NAME: str = "defaultdb"
+    # pymysql (default), mysqlclient/mysqldb or mysqlconnector (app/utils/db_drivers.py)
     DATABASE_DRIVER: str = "pymysql"
+    # DISABLED, REQUIRED (encrypt only), VERIFY_CA or VERIFY_IDENTITY
     DATABASE_SSL_MODE: str = "REQUIRED"
+    DATABASE_SSL_CA: str | None = None
+    # Offer the previous TLS session on new connections (pymysql)
+    DATABASE_TLS_SESSION_REUSE: bool = True
+    # Read CSV exports through a separate pool with MySQL protocol
+    # compression (mysqlclient and mysqlconnector only)
+    DATABASE_COMPRESS_EXPORTS: bool = False
     DATABASE_URL: str | None = None
 
 
@@ -32,6 +42,113 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = 10
     DB_POOL_RECYCLE: int = 3600
     DB_POOL_PRE_PING: bool = True
+    # Compiled statements kept per engine (SQLAlchemy's default is 500); each
+    # filter combination of a list endpoint is a separate entry
+    DB_QUERY_CACHE_SIZE: int = 1200
+    # Connections each worker opens at startup, so first requests do not
+    # wait for connect and the TLS handshake
+    DB_POOL_WARMUP: int = 2
+    # Connection limit of the database plan (e.g. Aiven). When set, the pool
+    # of each worker is capped so WEB_CONCURRENCY workers stay within it.
+    DB_MAX_CONNECTIONS: int | None = None
+    DB_RESERVED_CONNECTIONS: int = 5
+
+    # Production server (gunicorn.conf.py)
+    WEB_HOST: str = "0.0.0.0"
+    WEB_PORT: int = 8000
+    WEB_CONCURRENCY: int = 1
+    WEB_THREADPOOL_SIZE: int | None = None
+    WEB_KEEPALIVE: int = 5
+    WEB_BACKLOG: int = 2048
+    WEB_MAX_REQUESTS: int = 5000
+    WEB_MAX_REQUESTS_JITTER: int = 500
+    WEB_TIMEOUT: int = 60
+    WEB_GRACEFUL_TIMEOUT: int = 30
+
+    # Response compression (brotli needs the optional "brotli" package)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Admission control (per worker). ADMISSION_MAX_CONCURRENT=0 admits one
+    # request per database connection not used by job threads. Queued
+    # requests are admitted writes first, then reads, then reports; one
+    # whose wait would exceed its class budget gets 503 with Retry-After.
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENT: int = 0
+    ADMISSION_REPORT_SHARE: float = 0.5
+    ADMISSION_WRITE_WAIT_SECONDS: float = 10.0
+    ADMISSION_READ_WAIT_SECONDS: float = 3.0
+    ADMISSION_REPORT_WAIT_SECONDS: float = 2.0
+
+    # Per-user token bucket (per client address when anonymous); 0 disables
+    RATE_LIMIT_PER_MINUTE: int = 600
+    RATE_LIMIT_BURST: int = 120
+
+    # Company/project deletion: subtrees up to PURGE_INLINE_ROWS rows are
+    # deleted within the request, larger ones in the background
+    PURGE_BATCH_SIZE: int = 1000
+    PURGE_INLINE_ROWS: int = 5000
+
+    # Background jobs (jobs table). API workers run JOB_WORKER_THREADS
+    # in-process; scripts/job_worker.py runs a standalone worker.
+    JOB_WORKER_THREADS: int = 1
+    JOB_POLL_SECONDS: float = 2.0
+    JOB_HEARTBEAT_SECONDS: int = 10
+    JOB_STALE_SECONDS: int = 60
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: int = 30
+    JOB_ARTIFACT_DIR: str = "var/jobs"
+
+    # Add Server-Timing and X-Query-Count (SQL statements per request)
+    # headers; meant for benchmarks and staging, not public servers
+    QUERY_STATS_HEADERS: bool = False
+
+    # Request profiling: admins send X-Profile: 1 (or ?profile=1);
+    # PROFILE_SAMPLE_EVERY=N also profiles every Nth request
+    PROFILING_ENABLED: bool = True
+    PROFILE_SAMPLE_EVERY: int = 0
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_DIR: str = "var/profiles"
+    PROFILE_KEEP: int = 500
+
+    # Slow query log: statements taking SLOW_QUERY_MS or longer (0 = off) are
+    # appended to SLOW_QUERY_LOG with EXPLAIN output once per fingerprint
+    SLOW_QUERY_MS: float = 200.0
+    SLOW_QUERY_LOG: str = "var/slow_queries.jsonl"
+    SLOW_QUERY_LOG_MAX_MB: int = 20
+    SLOW_QUERY_EXPLAIN: bool = True
+
+    # Share one computation between concurrent identical report requests
+    REPORT_SINGLE_FLIGHT: bool = True
+
+    # Companies, projects and drillholes are cached per worker and
+    # revalidated against their data version at most this often
+    REFERENCE_CACHE_TTL_SECONDS: float = 5.0
+
+    # Drillholes whose sample interval trees each worker keeps
+    INTERVAL_CACHE_HOLES: int = 64
+
+    # Lab result files are imported this many rows per transaction
+    ASSAY_IMPORT_CHUNK_ROWS: int = 2000
+
+    # Downhole composites: large projects are split across this many worker
+    # processes per API worker (0 computes in the request thread; only
+    # worth it with spare cores); each API worker keeps the
+    # COMPOSITE_CACHE_RUNS most recent results per data version
+    COMPOSITE_PROCESSES: int = 0
+    COMPOSITE_CACHE_RUNS: int = 16
+
+    # Largest block of sample ids one reservation may take
+    SAMPLE_ID_BLOCK_MAX: int = 10000
+
+    # Edge-to-central sync (SITE_ID is only set on local site servers)
+    SITE_ID: str | None = None
+    SYNC_CENTRAL_URL: str | None = None
+    SYNC_USERNAME: str | None = None
+    SYNC_PASSWORD: str | None = None
+    SYNC_BATCH_SIZE: int = 500
+    SYNC_TIMEOUT_SECONDS: int = 60
 
 
  # Security / JWT
@@ -73,16 +190,51 @@ class Settings(BaseSettings):
                     origins.append("https://corepro.netlify.app")
                 self.CORS_ORIGINS = origins
 
+    @property
+    def db_connections_per_worker(self) -> int:
+        """Connections one worker may hold (pool plus overflow)"""
+        configured = self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW
+        if not self.DB_MAX_CONNECTIONS:
+            return configured
+        available = self.DB_MAX_CONNECTIONS - self.DB_RESERVED_CONNECTIONS
+        per_worker = available // max(1, self.WEB_CONCURRENCY) - self.db_export_connections
+        return max(1, min(configured, per_worker))
+
+    @property
+    def db_export_connections(self) -> int:
+        """Connections of the compressed export pool per worker (0 when exports use the main pool)"""
+        if not self.DATABASE_COMPRESS_EXPORTS:
+            return 0
+        url = make_url(self.database_url)
+        if url.get_backend_name() != "mysql" or not db_drivers.resolve(url.get_driver_name()).compress:
+            return 0
+        return 2
+
+    @property
+    def db_pool_size(self) -> int:
+        """Persistent pool size per worker"""
+        return min(self.DB_POOL_SIZE, self.db_connections_per_worker)
+
+    @property
+    def db_max_overflow(self) -> int:
+        """Overflow connections per worker"""
+        return self.db_connections_per_worker - self.db_pool_size
+
+    @property
+    def admission_capacity(self) -> int:
+        """Requests one worker admits concurrently"""
+        if self.ADMISSION_MAX_CONCURRENT:
+            return self.ADMISSION_MAX_CONCURRENT
+        return max(1, self.db_connections_per_worker - self.JOB_WORKER_THREADS)
+
     @property
     def database_url(self) -> str:
         """Construct database URL"""
         if self.DATABASE_URL:
             return self.DATABASE_URL
-        driver = self.DATABASE_DRIVER.strip()
-        base = f"mysql+{driver}://{self.DATABASE_USER}:{self.DATABASE_PASSWORD}@{self.DATABASE_HOST}:{self.DATABASE_PORT}/{self.DATABASE_NAME}"
-        if driver == "mysqlconnector" and self.DATABASE_SSL_MODE.upper() != "DISABLED":
-            return base + f"?ssl-mode={self.DATABASE_SSL_MODE.upper()}"
-        return base
+        # TLS options are passed as connect arguments (app/database.py)
+        driver = db_drivers.resolve(self.DATABASE_DRIVER).dialect
+        return f"mysql+{driver}://{self.DATABASE_USER}:{self.DATABASE_PASSWORD}@{self.DATABASE_HOST}:{self.DATABASE_PORT}/{self.DATABASE_NAME}"
 
     class Config:
         env_file = ".env"
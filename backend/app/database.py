@@ -1,34 +1,172 @@
 """
 Database connection and session management
 """
-from sqlalchemy import create_engine
+import logging
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import Any, Dict, Generator
 from app.config import settings
+from app.utils import db_drivers, query_stats, slow_queries
 
-# Create database engine
-connect_args = {}
-# Enable SSL for PyMySQL when required (Aiven requires TLS)
-try:
-    if settings.DATABASE_SSL_MODE.upper() != "DISABLED" and "pymysql" in settings.database_url:
-        connect_args = {"ssl": {"ssl": {}}}
-except Exception:
+logger = logging.getLogger("uvicorn")
+
+
+def create_db_engine(url: str, compress: bool = False, **overrides) -> Engine:
+    """
+    Create a database engine with the application's pool and TLS settings
+    
+    SQLite URLs (used for local sites and benchmarks) skip pool sizing and
+    get foreign key enforcement so ON DELETE rules behave like MySQL. The
+    driver's implicit transaction handling is replaced with explicit BEGIN
+    so SAVEPOINTs work. File databases use WAL journaling so an open read
+    (a streamed export, the job worker's queries) does not block writers.
+    Connections count fetched rows for query_stats.
+    
+    MySQL connections get the driver's TLS arguments for DATABASE_SSL_MODE
+    (app/utils/db_drivers.py); with pymysql, new connections resume the TLS
+    session of an earlier one.
+    
+    Args:
+        url: Database URL
+        compress: Use MySQL protocol compression if the driver supports it
+        overrides: Extra keyword arguments for create_engine
+        
+    Returns:
+        SQLAlchemy engine
+    """
+    if url.startswith("sqlite"):
+        kwargs = {
+            "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+            "connect_args": {"check_same_thread": False, "factory": query_stats.CountingConnection},
+        }
+        kwargs.update(overrides)
+        sqlite_engine = create_engine(url, **kwargs)
+
+        @event.listens_for(sqlite_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys=ON")
+            if ":memory:" not in url and url.rstrip("/") not in ("sqlite:", "sqlite+pysqlite:"):
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.close()
+
+        @event.listens_for(sqlite_engine, "begin")
+        def _on_begin(conn):
+            conn.exec_driver_sql("BEGIN")
+
+        return sqlite_engine
+
+    url_info = make_url(url)
     connect_args = {}
+    if url_info.get_backend_name() == "mysql":
+        driver = db_drivers.resolve(url_info.get_driver_name())
+        context = _tls_context() if driver.tls_session_reuse else None
+        connect_args = db_drivers.connect_args(
+            driver, settings.DATABASE_SSL_MODE, settings.DATABASE_SSL_CA, compress, context
+        )
+
+    kwargs = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+        "echo": settings.DEBUG,
+        "connect_args": connect_args,
+    }
+    kwargs.update(overrides)
+    mysql_engine = create_engine(url, **kwargs)
+    if isinstance(connect_args.get("ssl"), db_drivers.ResumingSSLContext):
+        db_drivers.install_session_reuse(mysql_engine, connect_args["ssl"])
+    return mysql_engine
+
+
+_shared_tls_context = None
+
 
-engine = create_engine(
-    settings.database_url,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_recycle=settings.DB_POOL_RECYCLE,
-    pool_pre_ping=settings.DB_POOL_PRE_PING,
-    echo=settings.DEBUG,
-    connect_args=connect_args,
-)
+def _tls_context():
+    # One context per process, so every engine (and every connection of
+    # its pool) can resume the session of the last handshake
+    global _shared_tls_context
+    if settings.DATABASE_SSL_MODE.upper() == "DISABLED":
+        return None
+    if _shared_tls_context is None:
+        _shared_tls_context = db_drivers.tls_context(
+            settings.DATABASE_SSL_MODE, settings.DATABASE_SSL_CA, settings.DATABASE_TLS_SESSION_REUSE
+        )
+    return _shared_tls_context
+
+
+def warm_pool(target_engine: Engine, connections: int) -> int:
+    """
+    Open pool connections ahead of the first requests
+    
+    Connections are opened one after another so that, with pymysql, all but
+    the first resume the TLS session of the one before. They go back to
+    the pool open. SQLite engines are skipped.
+    
+    Args:
+        target_engine: Engine to warm
+        connections: Number of connections (capped at the pool size)
+        
+    Returns:
+        Number of connections opened
+    """
+    if target_engine.dialect.name == "sqlite":
+        return 0
+    opened = []
+    try:
+        for _ in range(min(connections, settings.db_pool_size)):
+            opened.append(target_engine.connect())
+    except Exception as exc:
+        logger.warning(f"Database warm-up stopped after {len(opened)} connections: {exc}")
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+def connection_stats() -> Dict[str, Any]:
+    """Driver and TLS handshake counters of this process"""
+    url_info = make_url(settings.database_url)
+    return {
+        "driver": url_info.get_driver_name(),
+        "export_compression": export_engine is not engine,
+        "tls": _shared_tls_context.stats() if _shared_tls_context is not None else None,
+    }
+
+
+# Create database engine
+engine = create_db_engine(settings.database_url)
+query_stats.install(engine)
+slow_query_log = slow_queries.install(engine, slow_queries.SlowQueryLog(
+    settings.SLOW_QUERY_LOG,
+    settings.SLOW_QUERY_MS,
+    settings.SLOW_QUERY_LOG_MAX_MB * 1024 * 1024,
+    settings.SLOW_QUERY_EXPLAIN,
+)) if settings.SLOW_QUERY_MS > 0 else None
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# CSV exports stream whole tables; with DATABASE_COMPRESS_EXPORTS they read
+# through a small pool of compressed connections
+if settings.db_export_connections:
+    export_engine = create_db_engine(
+        settings.database_url, compress=True,
+        pool_size=settings.db_export_connections, max_overflow=0,
+    )
+    query_stats.install(export_engine)
+    if slow_query_log is not None:
+        slow_queries.install(export_engine, slow_query_log)
+else:
+    export_engine = engine
+ExportSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=export_engine)
+
 # Base class for models
 Base = declarative_base()
 
@@ -49,7 +187,15 @@ def get_db() -> Generator[Session, None, None]:
 
 def init_db() -> None:
     """
-    Initialize database - create all tables
+    Initialize database - apply all schema migrations (alembic upgrade head)
+    
+    This is a one-time deployment step; the API no longer creates tables
+    when a worker boots.
     """
-    Base.metadata.create_all(bind=engine)
+    from alembic import command
+    from alembic.config import Config
 
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config = Config(os.path.join(backend_dir, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(backend_dir, "alembic"))
+    command.upgrade(config, "head")
@@ -3,9 +3,18 @@ Main FastAPI application
 """
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
 from app.api.v1 import api_router
-from app.database import init_db
+from app.middleware.admission import AdmissionController, AdmissionMiddleware, PriorityClass, TokenBucketLimiter
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.slow_queries import SlowQueryRouteMiddleware
+from app.database import SessionLocal, engine, slow_query_log, warm_pool
+from app.services.jobs import JobWorker
+from app.services.process_pool import shutdown_pool
+from app.services.reference_cache import reference_cache
 import logging
 
 # Setup logger
@@ -34,6 +43,56 @@ app.add_middleware(
     max_age=3600,
 )
 
+# Compress JSON and CSV responses (gzip, or brotli when installed)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
+# Report SQL statements per request (benchmarks, staging)
+if settings.QUERY_STATS_HEADERS:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Attribute slow statements to the route that issued them
+if slow_query_log is not None:
+    app.add_middleware(SlowQueryRouteMiddleware)
+
+# Sampling profiler for requests flagged by an admin (and 1 in N when
+# PROFILE_SAMPLE_EVERY is set); inside admission so queueing is not profiled
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=settings.PROFILE_DIR,
+        interval=settings.PROFILE_INTERVAL_MS / 1000,
+        sample_every=settings.PROFILE_SAMPLE_EVERY,
+        keep=settings.PROFILE_KEEP,
+    )
+
+# Admit at most one request per DB connection and shed load with 503
+# instead of queueing on the pool; rate-limit each user
+if settings.ADMISSION_ENABLED:
+    capacity = settings.admission_capacity
+    app.state.admission = AdmissionController(capacity, [
+        PriorityClass("write", 0, capacity, settings.ADMISSION_WRITE_WAIT_SECONDS),
+        # One slot stays free for writes
+        PriorityClass("read", 1, max(1, capacity - 1), settings.ADMISSION_READ_WAIT_SECONDS),
+        PriorityClass("report", 2, max(1, int(capacity * settings.ADMISSION_REPORT_SHARE)),
+                      settings.ADMISSION_REPORT_WAIT_SECONDS),
+    ])
+    app.state.rate_limiter = (
+        TokenBucketLimiter(settings.RATE_LIMIT_PER_MINUTE, settings.RATE_LIMIT_BURST)
+        if settings.RATE_LIMIT_PER_MINUTE else None
+    )
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=app.state.admission,
+        limiter=app.state.rate_limiter,
+        report_prefixes=(f"{settings.API_V1_PREFIX}/reports/", f"{settings.API_V1_PREFIX}/assays/composites"),
+        exempt_prefixes=("/health", "/docs", "/redoc", "/openapi.json", f"{settings.API_V1_PREFIX}/admin/"),
+    )
+
 # Include API routes
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
@@ -57,11 +116,40 @@ async def cors_handler(request: Request, call_next):
 @app.on_event("startup")
 async def startup_event():
     """
-    Initialize database on startup
+    Size the threadpool that runs sync endpoints and log the DB pool budget
+    """
+    if settings.WEB_THREADPOOL_SIZE:
+        from anyio import to_thread
+
+        to_thread.current_default_thread_limiter().total_tokens = settings.WEB_THREADPOOL_SIZE
+    logger.info(
+        f"Worker ready: DB pool {settings.db_pool_size}+{settings.db_max_overflow}, "
+        f"threadpool {settings.WEB_THREADPOOL_SIZE or 'default'}"
+    )
+
+    # Open pool connections (connect plus TLS handshake) before traffic
+    # arrives, then load company, project and drillhole names for listings
+    # and reports
+    warmed = await run_in_threadpool(warm_pool, engine, settings.DB_POOL_WARMUP)
+    if warmed:
+        logger.info(f"Opened {warmed} database connections")
+    await run_in_threadpool(reference_cache.warm, SessionLocal)
+
+    # Run background jobs inside this worker unless they are handled by
+    # scripts/job_worker.py (JOB_WORKER_THREADS=0)
+    if settings.JOB_WORKER_THREADS > 0:
+        app.state.job_worker = JobWorker(SessionLocal, settings.JOB_WORKER_THREADS, settings.JOB_POLL_SECONDS)
+        app.state.job_worker.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """
+    Stop the background job worker and the compositing processes
     """
-    logger.info("Initializing database connection...")
-    init_db()
-    logger.info("Database initialized.")
+    job_worker = getattr(app.state, "job_worker", None)
+    if job_worker is not None:
+        job_worker.stop()
+    shutdown_pool()
 
 @app.get("/")
 async def root():
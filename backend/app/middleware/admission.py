@@ -0,0 +1,352 @@
+"""
+Admission control and per-user rate limiting
+
+Without admission control a burst queues inside the threadpool and then on
+the database pool checkout, and every client waits until its request times
+out. This middleware admits at most ``capacity`` requests per worker (one
+per database connection it may use) and queues the rest by priority class:
+writes first, then reads, then reports. A request whose expected queue wait
+exceeds its class budget is rejected at once with 503 and Retry-After, and
+one still queued when its budget runs out is rejected the same way, so an
+overloaded worker answers quickly instead of hanging.
+
+A token bucket per user (per client address for anonymous requests) answers
+429 with Retry-After once a caller exceeds its rate.
+
+State is per worker process and lives on the event loop thread, so no locks
+are needed.
+"""
+import asyncio
+import math
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, Iterable, NamedTuple, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.utils.security import decode_token
+
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class PriorityClass(NamedTuple):
+    """Admission class: lower priority values are admitted first"""
+    name: str
+    priority: int
+    limit: int
+    max_wait: float
+
+
+class _ClassState:
+    """Counters and wait queue of one priority class"""
+
+    def __init__(self, spec: PriorityClass):
+        self.spec = spec
+        self.in_flight = 0
+        self.queue: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.max_queue = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_seconds = 0.0
+
+
+class AdmissionController:
+    """
+    Bounded, prioritized admission of requests
+
+    Args:
+        capacity: Requests executing concurrently in this worker
+        classes: Priority classes; each limit caps that class on its own
+    """
+
+    def __init__(self, capacity: int, classes: Iterable[PriorityClass]):
+        self.capacity = max(1, capacity)
+        self.classes: Dict[str, _ClassState] = {
+            spec.name: _ClassState(spec) for spec in sorted(classes, key=lambda spec: spec.priority)
+        }
+        self.in_flight = 0
+        # Moving average of request service time, used to estimate waits
+        self.service_seconds = 0.05
+
+    def _runnable(self, state: _ClassState) -> bool:
+        return self.in_flight < self.capacity and state.in_flight < state.spec.limit
+
+    def _ahead(self, state: _ClassState) -> int:
+        return sum(
+            len(other.queue) for other in self.classes.values()
+            if other.spec.priority <= state.spec.priority
+        )
+
+    def _admit(self, state: _ClassState, waited: float) -> None:
+        self.in_flight += 1
+        state.in_flight += 1
+        state.admitted += 1
+        state.wait_seconds += waited
+
+    def estimated_wait(self, name: str) -> float:
+        """Seconds a request of the class would queue behind current waiters"""
+        state = self.classes[name]
+        return (self._ahead(state) + 1) * self.service_seconds / self.capacity
+
+    async def acquire(self, name: str) -> Optional[float]:
+        """
+        Wait for a slot
+
+        Args:
+            name: Priority class of the request
+
+        Returns:
+            None once admitted (call release afterwards), otherwise the
+            suggested Retry-After in seconds
+        """
+        state = self.classes[name]
+        if self._runnable(state) and not self._ahead(state):
+            self._admit(state, 0.0)
+            return None
+
+        estimate = self.estimated_wait(name)
+        if estimate > state.spec.max_wait:
+            state.rejected += 1
+            return estimate
+
+        waiter = asyncio.get_running_loop().create_future()
+        state.queue.append(waiter)
+        state.queued += 1
+        state.max_queue = max(state.max_queue, len(state.queue))
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, state.spec.max_wait)
+        except asyncio.TimeoutError:
+            state.timed_out += 1
+            return max(estimate, state.spec.max_wait)
+        except BaseException:
+            # Client went away: give back a slot granted meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release(name, 0.0)
+            raise
+        finally:
+            if waiter in state.queue:
+                state.queue.remove(waiter)
+        state.wait_seconds += time.monotonic() - started
+        return None
+
+    def release(self, name: str, service_seconds: float) -> None:
+        """
+        Free a slot and admit waiting requests by priority
+
+        Args:
+            name: Priority class of the finished request
+            service_seconds: Time the request held its slot
+        """
+        state = self.classes[name]
+        self.in_flight -= 1
+        state.in_flight -= 1
+        if service_seconds:
+            self.service_seconds += 0.1 * (service_seconds - self.service_seconds)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self.in_flight < self.capacity:
+            for state in self.classes.values():
+                while state.queue and state.queue[0].done():
+                    state.queue.popleft()
+                if state.queue and self._runnable(state):
+                    waiter = state.queue.popleft()
+                    self.in_flight += 1
+                    state.in_flight += 1
+                    state.admitted += 1
+                    waiter.set_result(True)
+                    break
+            else:
+                return
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Queue depths and counters since process start
+
+        Returns:
+            Capacity, in-flight total, estimated service time and per-class
+            in_flight, queue_depth, max_queue_depth, admitted, queued,
+            rejected (fast-failed), timed_out and avg_wait_ms
+        """
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "service_ms": round(self.service_seconds * 1000, 1),
+            "classes": {
+                name: {
+                    "limit": state.spec.limit,
+                    "max_wait_seconds": state.spec.max_wait,
+                    "in_flight": state.in_flight,
+                    "queue_depth": len(state.queue),
+                    "max_queue_depth": state.max_queue,
+                    "admitted": state.admitted,
+                    "queued": state.queued,
+                    "rejected": state.rejected,
+                    "timed_out": state.timed_out,
+                    "avg_wait_ms": round(state.wait_seconds * 1000 / state.admitted, 1) if state.admitted else 0.0,
+                }
+                for name, state in self.classes.items()
+            },
+        }
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket per caller
+
+    Args:
+        rate_per_minute: Sustained requests per minute
+        burst: Bucket size (requests allowed back to back)
+        max_keys: Buckets kept before full ones are discarded
+    """
+
+    def __init__(self, rate_per_minute: int, burst: int, max_keys: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self.allowed = 0
+        self.limited: Counter = Counter()
+
+    def take(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Take one token
+
+        Args:
+            key: Caller identity, e.g. "user:12"
+            now: Monotonic time (for tests)
+
+        Returns:
+            0 when allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            self.limited[key] += 1
+            return (1 - tokens) / self.rate
+        if len(self._buckets) >= self.max_keys and key not in self._buckets:
+            self._prune(now)
+        self._buckets[key] = (tokens - 1, now)
+        self.allowed += 1
+        return 0.0
+
+    def _prune(self, now: float) -> None:
+        # A bucket that has refilled is indistinguishable from a new one
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if tokens + (now - updated) * self.rate >= self.burst:
+                del self._buckets[key]
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Counters since process start
+
+        Returns:
+            Rate, burst, tracked callers, allowed and limited totals and the
+            most limited callers
+        """
+        return {
+            "rate_per_minute": round(self.rate * 60),
+            "burst": self.burst,
+            "callers": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": sum(self.limited.values()),
+            "top_limited": dict(self.limited.most_common(10)),
+        }
+
+
+def caller_key(scope: Scope) -> str:
+    """
+    Rate-limit identity of a request: the token subject, else the client address
+
+    The token signature is verified, so a forged subject cannot drain
+    another user's bucket.
+    """
+    authorization = Headers(scope=scope).get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        payload = decode_token(token)
+        if payload and payload.get("sub") is not None:
+            return f"user:{payload['sub']}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class AdmissionMiddleware:
+    """
+    Rate-limit callers, then admit requests through an AdmissionController
+
+    Requests are classified as "report" (paths under report_prefixes),
+    "write" (unsafe methods) or "read". Paths under exempt_prefixes and
+    OPTIONS requests bypass both checks.
+
+    Args:
+        app: ASGI application
+        controller: Admission controller with "write", "read" and "report" classes
+        limiter: Optional per-caller token bucket
+        report_prefixes: Path prefixes of report endpoints
+        exempt_prefixes: Path prefixes never limited (health, docs, metrics)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        limiter: Optional[TokenBucketLimiter] = None,
+        report_prefixes: Tuple[str, ...] = (),
+        exempt_prefixes: Tuple[str, ...] = (),
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.limiter = limiter
+        self.report_prefixes = report_prefixes
+        self.exempt_prefixes = exempt_prefixes
+
+    def classify(self, method: str, path: str) -> str:
+        """Priority class of a request"""
+        if path.startswith(self.report_prefixes):
+            return "report"
+        return "write" if method in UNSAFE_METHODS else "read"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or path in ("", "/")
+            or path.startswith(self.exempt_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if self.limiter is not None:
+            wait = self.limiter.take(caller_key(scope))
+            if wait:
+                response = _retry_response(429, "Rate limit exceeded", wait)
+                await response(scope, receive, send)
+                return
+
+        name = self.classify(scope["method"], path)
+        retry_after = await self.controller.acquire(name)
+        if retry_after is not None:
+            response = _retry_response(503, "Server busy, retry later", retry_after)
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name, time.monotonic() - started)
+
+
+def _retry_response(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
@@ -0,0 +1,203 @@
+"""
+Negotiated gzip/brotli response compression
+
+Pure ASGI middleware, so streaming responses (CSV exports) are compressed
+chunk by chunk instead of being buffered. Brotli is used when the client
+accepts it and the optional ``brotli`` package is installed; otherwise
+gzip. Bodies below the size threshold, already-encoded responses and
+non-text media types are passed through untouched.
+"""
+import zlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best supported content-coding from an Accept-Encoding header
+
+    Args:
+        accept_encoding: Raw header value
+
+    Returns:
+        "br", "gzip" or None for identity
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+
+    wildcard = weights.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_weight = None, 0.0
+    for name in candidates:
+        weight = weights.get(name, wildcard)
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+class _Encoder:
+    """Incremental compressor for one response body"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 writes a gzip header and trailer
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress a streamed chunk and flush it to the client"""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the final data and close the stream"""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compress HTTP responses with the best encoding the client accepts
+
+    Args:
+        app: ASGI application
+        minimum_size: Smallest complete body worth compressing, in bytes
+        gzip_level: zlib compression level (1-9)
+        brotli_quality: Brotli quality (0-11); mid values suit dynamic content
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-request state: holds the start message until the body is seen"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: Optional[str], send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.inner_send = send
+        self.start_message: Optional[Message] = None
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            return
+
+        if message_type != "http.response.body":
+            await self.inner_send(message)
+            return
+
+        if self.start_message is not None:
+            await self._first_body(message)
+            return
+
+        if self.passthrough:
+            await self.inner_send(message)
+            return
+
+        body = message.get("body", b"")
+        if message.get("more_body", False):
+            message["body"] = self.encoder.chunk(body)
+        else:
+            message["body"] = self.encoder.finish(body)
+        await self.inner_send(message)
+
+    async def _first_body(self, message: Message) -> None:
+        start, self.start_message = self.start_message, None
+        headers = MutableHeaders(raw=start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._compressible(start, headers):
+            headers.add_vary_header("Accept-Encoding")
+
+        if (
+            self.encoding is None
+            or not self._compressible(start, headers)
+            or (not more_body and len(body) < self.middleware.minimum_size)
+        ):
+            self.passthrough = True
+            await self.inner_send(start)
+            await self.inner_send(message)
+            return
+
+        self.encoder = _Encoder(
+            self.encoding,
+            self.middleware.gzip_level,
+            self.middleware.brotli_quality,
+        )
+        headers["Content-Encoding"] = self.encoding
+        etag = headers.get("etag")
+        if etag and etag.endswith('"') and not etag.startswith("W/"):
+            headers["ETag"] = f'{etag[:-1]}-{self.encoding}"'
+
+        if more_body:
+            del headers["Content-Length"]
+            message["body"] = self.encoder.chunk(body)
+        else:
+            message["body"] = self.encoder.finish(body)
+            headers["Content-Length"] = str(len(message["body"]))
+
+        await self.inner_send(start)
+        await self.inner_send(message)
+
+    @staticmethod
+    def _compressible(start: Message, headers: MutableHeaders) -> bool:
+        if start["status"] < 200 or start["status"] in (204, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES) or "+json" in content_type
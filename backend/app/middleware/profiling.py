@@ -0,0 +1,125 @@
+"""
+On-demand request profiling
+
+An admin profiles a request by sending ``X-Profile: 1`` or adding
+``?profile=1``; the request runs under the sampling profiler
+(app/utils/profiler.py) with every SQL statement logged, and the stored
+profile's id comes back in ``X-Profile-Id``. With ``sample_every`` set,
+every Nth request is profiled the same way without being asked, so slow
+production requests leave profiles behind.
+
+Profiles are written to a local directory and served by the
+/admin/profiles endpoints. Requests that are not profiled pass straight
+through: no sampler thread, no statement log.
+"""
+import itertools
+import logging
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.api.deps import get_current_admin_user, get_current_user
+from app.database import SessionLocal
+from app.utils import profiler, query_stats
+
+logger = logging.getLogger("uvicorn")
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+def _check_admin(authorization: str) -> None:
+    # Same checks as the get_current_admin_user dependency
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    db = SessionLocal()
+    try:
+        user = get_current_user(HTTPAuthorizationCredentials(scheme=scheme, credentials=token), db)
+        get_current_admin_user(user)
+    finally:
+        db.close()
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests flagged by an admin, and every Nth request
+
+    Args:
+        app: ASGI application
+        directory: Where profiles are written
+        interval: Seconds between stack samples
+        sample_every: Profile one request in this many (0 = only on request)
+        keep: Profiles kept in the directory
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        directory: str,
+        interval: float = 0.005,
+        sample_every: int = 0,
+        keep: int = 500,
+    ) -> None:
+        self.app = app
+        self.directory = directory
+        self.interval = interval
+        self.sample_every = sample_every
+        self.keep = keep
+        self._counter = itertools.count(1)
+
+    def _trigger(self, scope: Scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == b"x-profile" and value.decode("latin-1").lower() in TRUE_VALUES:
+                return "admin"
+        query = scope.get("query_string", b"")
+        if b"profile=" in query and QueryParams(query).get("profile", "").lower() in TRUE_VALUES:
+            return "admin"
+        if self.sample_every and next(self._counter) % self.sample_every == 0:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        if trigger == "admin":
+            try:
+                await run_in_threadpool(_check_admin, Headers(scope=scope).get("authorization", ""))
+            except HTTPException as exc:
+                response = JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+                await response(scope, receive, send)
+                return
+
+        profile = profiler.RequestProfile(scope["method"], scope["path"], trigger, self.interval)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile.id
+            await send(message)
+
+        token = profiler.activate(profile)
+        try:
+            with query_stats.track(log=True) as stats:
+                profile.start()
+                try:
+                    await self.app(scope, receive, send_with_id)
+                finally:
+                    profile.stop()
+        finally:
+            profiler.deactivate(token)
+
+        try:
+            await run_in_threadpool(
+                profiler.save_profile, self.directory, profile.to_dict(stats.log), self.keep
+            )
+        except OSError as exc:
+            logger.warning(f"Could not store profile {profile.id}: {exc}")
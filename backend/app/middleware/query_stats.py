@@ -0,0 +1,39 @@
+"""
+SQL statistics response headers
+
+Adds ``X-Query-Count``, ``X-Query-Rows`` and ``Server-Timing: db;dur=...``
+to every response,
+covering the statements executed before the response started (for a
+streamed body, only those issued before the first chunk).
+"""
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils import query_stats
+
+
+class QueryStatsMiddleware:
+    """
+    Count the SQL statements of each request and report them in headers
+
+    Args:
+        app: ASGI application
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with query_stats.track() as stats:
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Query-Count"] = str(stats.statements)
+                    headers["X-Query-Rows"] = str(stats.rows)
+                    headers.append("Server-Timing", f'db;dur={stats.milliseconds:.1f};desc="{stats.statements} queries"')
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
@@ -0,0 +1,33 @@
+"""
+Route attribution for the slow query log
+
+Makes the request's ASGI scope visible to the engine events of
+app/utils/slow_queries.py. The router adds the matched path parameters to
+the same scope object, so a slow statement is logged under its route
+template (``GET /api/v1/dispatches/{dispatch_id}``) rather than the raw path.
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.utils import slow_queries
+
+
+class SlowQueryRouteMiddleware:
+    """
+    Expose the current request to the slow query log
+
+    Args:
+        app: ASGI application
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = slow_queries.request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            slow_queries.request_scope.reset(token)
@@ -6,9 +6,15 @@ from app.models.project import Project, ProjectStatus
 from app.models.drillhole import Drillhole, DrillholeStatus
 from app.models.dispatch import Dispatch, DispatchStatus
 from app.models.sample import Sample, SampleType, SampleStatus
+from app.models.sample_sequence import SampleIdSequence
 from app.models.inventory import Inventory, BoxType
 from app.models.user import User, UserRole
 from app.models.audit_log import AuditLog, AuditAction
+from app.models.sync import ChangeJournal, SyncState, SyncIdMap, SyncTombstone, SyncConflict
+from app.models.job import Job, JobStatus
+from app.models.assay import AssayAnalyte, AssayBatch, AssayResult
+from app.models.counters import COUNTERS, COUNTER_FIELDS
+from app.models.table_version import TableVersion
 
 __all__ = [
     "Company",
@@ -21,11 +27,25 @@ __all__ = [
     "Sample",
     "SampleType",
     "SampleStatus",
+    "SampleIdSequence",
     "Inventory",
     "BoxType",
     "User",
     "UserRole",
     "AuditLog",
     "AuditAction",
+    "ChangeJournal",
+    "SyncState",
+    "SyncIdMap",
+    "SyncTombstone",
+    "SyncConflict",
+    "Job",
+    "JobStatus",
+    "AssayAnalyte",
+    "AssayBatch",
+    "AssayResult",
+    "COUNTERS",
+    "COUNTER_FIELDS",
+    "TableVersion",
 ]
 
@@ -0,0 +1,96 @@
+"""
+Assay result models
+
+Lab results are stored long and narrow: one assay_results row per sample,
+analyte and lab batch, with the analyte as an integer key instead of
+a column per element. Labs report different element suites, so new
+analytes are rows in assay_analytes rather than schema changes, and each
+row stays a few dozen bytes at tens of millions of values.
+"""
+from sqlalchemy import Column, Integer, String, TIMESTAMP, DateTime, Float, ForeignKey, JSON, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class AssayAnalyte(Base):
+    """
+    Element and unit as reported by labs (e.g. Au in ppm)
+
+    code is the column header form used by imports and the API ("Au_ppm").
+    """
+
+    __tablename__ = "assay_analytes"
+    __table_args__ = (
+        UniqueConstraint("code", name="uq_assay_analytes_code"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    code = Column(String(40), nullable=False)
+    element = Column(String(20), nullable=False)
+    unit = Column(String(20), nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
+
+
+class AssayBatch(Base):
+    """
+    One imported lab results file
+
+    Results are only added by imports, which touch their batch after every
+    chunk, and only removed with their samples, so the data version of
+    assay_batches and samples covers assay_results.
+    """
+
+    __tablename__ = "assay_batches"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    lab = Column(String(100), nullable=True)
+    certificate = Column(String(100), nullable=True, index=True)
+    filename = Column(String(255), nullable=False)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="SET NULL"), nullable=True)
+    rows_read = Column(Integer, nullable=False, default=0)
+    result_count = Column(Integer, nullable=False, default=0)
+    sample_count = Column(Integer, nullable=False, default=0)
+    samples_completed = Column(Integer, nullable=False, default=0)
+    unknown_count = Column(Integer, nullable=False, default=0)
+    # First unknown sample ids of the file, for the lab to correct
+    unknown_samples = Column(JSON, nullable=True)
+    analytes = Column(JSON, nullable=True)
+    # Naive UTC, set by the application when the import finishes
+    imported_at = Column(DateTime, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
+    updated_at = Column(
+        TIMESTAMP,
+        server_default=func.current_timestamp(),
+        onupdate=func.current_timestamp(),
+        nullable=False,
+        index=True
+    )
+
+
+class AssayResult(Base):
+    """
+    One analyte value of one sample from one lab batch
+
+    drillhole_id is copied from the sample at import so per-hole reads use
+    ix_assay_results_hole_analyte alone; per-analyte reads by grade use
+    ix_assay_results_analyte_value. A re-assay in a later batch adds rows;
+    readers take the value of the newest batch.
+    """
+
+    __tablename__ = "assay_results"
+    __table_args__ = (
+        Index("ix_assay_results_hole_analyte", "drillhole_id", "analyte_id", "sample_id"),
+        Index("ix_assay_results_analyte_value", "analyte_id", "value"),
+        Index("ix_assay_results_sample_analyte", "sample_id", "analyte_id"),
+    )
+
+    # No separate index on id: the table is large and id is the primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    batch_id = Column(Integer, ForeignKey("assay_batches.id", ondelete="CASCADE"), nullable=False, index=True)
+    sample_id = Column(Integer, ForeignKey("samples.id", ondelete="CASCADE"), nullable=False)
+    drillhole_id = Column(Integer, ForeignKey("drillholes.id", ondelete="CASCADE"), nullable=True)
+    analyte_id = Column(Integer, ForeignKey("assay_analytes.id"), nullable=False)
+    value = Column(Float(precision=53), nullable=False)
+    # "<" below the detection limit (value is the limit), ">" above the range
+    qualifier = Column(String(1), nullable=True)
@@ -21,10 +21,11 @@ class Company(Base):
         TIMESTAMP,
         server_default=func.current_timestamp(),
         onupdate=func.current_timestamp(),
-        nullable=False
+        nullable=False,
+        index=True
     )
     
     # Relationships
-    projects = relationship("Project", back_populates="company", cascade="all, delete-orphan")
-    dispatches = relationship("Dispatch", back_populates="company", cascade="all, delete-orphan")
+    projects = relationship("Project", back_populates="company", cascade="all, delete-orphan", passive_deletes=True)
+    dispatches = relationship("Dispatch", back_populates="company", cascade="all, delete-orphan", passive_deletes=True)
 
@@ -0,0 +1,85 @@
+"""
+Denormalized child counters
+
+Parents carry the number of their children (projects.drillhole_count,
+projects.dispatch_count, drillholes.dispatch_count,
+dispatches.sample_count) so listings return counts without loading the
+child collections. Mapper events adjust the parent with a relative
+UPDATE on the flush connection, so the counter commits or rolls back
+together with the child row.
+
+Counter UPDATEs keep the parent's updated_at unchanged: a new child is not
+an edit of its parent, and updated_at drives sync pulls and data versions.
+An ETag over a response carrying a counter must therefore also cover the
+child table (conditional_get(Dispatch, Sample, ...)).
+Bulk query.delete()/update() bypasses these events; run
+app.services.counters.rebuild_counters afterwards (or
+scripts/rebuild_counters.py).
+"""
+from collections import namedtuple
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import get_history, set_committed_value
+from sqlalchemy.orm.util import identity_key
+from app.models.project import Project
+from app.models.drillhole import Drillhole
+from app.models.dispatch import Dispatch
+from app.models.sample import Sample
+
+CounterSpec = namedtuple("CounterSpec", ["child", "foreign_key", "parent", "column"])
+
+COUNTERS = [
+    CounterSpec(Drillhole, "project_id", Project, "drillhole_count"),
+    CounterSpec(Dispatch, "project_id", Project, "dispatch_count"),
+    CounterSpec(Dispatch, "drillhole_id", Drillhole, "dispatch_count"),
+    CounterSpec(Sample, "dispatch_id", Dispatch, "sample_count"),
+]
+
+# Counter columns per model; they are derived locally and never synced
+COUNTER_FIELDS = frozenset(spec.column for spec in COUNTERS)
+
+
+def _adjust(connection, target, spec: CounterSpec, parent_id, delta: int) -> None:
+    if parent_id is None:
+        return
+    table = spec.parent.__table__
+    connection.execute(
+        table.update()
+        .where(table.c.id == parent_id)
+        .values({
+            spec.column: table.c[spec.column] + delta,
+            "updated_at": table.c.updated_at,
+        })
+    )
+
+    # Keep an already loaded parent consistent without marking it dirty
+    session = object_session(target)
+    if session is None:
+        return
+    parent = session.identity_map.get(identity_key(spec.parent, parent_id))
+    if parent is not None and spec.column in parent.__dict__:
+        set_committed_value(parent, spec.column, (parent.__dict__[spec.column] or 0) + delta)
+
+
+def _register(spec: CounterSpec) -> None:
+    @event.listens_for(spec.child, "after_insert")
+    def _after_insert(mapper, connection, target):
+        _adjust(connection, target, spec, getattr(target, spec.foreign_key), 1)
+
+    @event.listens_for(spec.child, "after_delete")
+    def _after_delete(mapper, connection, target):
+        _adjust(connection, target, spec, getattr(target, spec.foreign_key), -1)
+
+    @event.listens_for(spec.child, "after_update")
+    def _after_update(mapper, connection, target):
+        history = get_history(target, spec.foreign_key)
+        if not history.has_changes():
+            return
+        for old_id in history.deleted:
+            _adjust(connection, target, spec, old_id, -1)
+        for new_id in history.added:
+            _adjust(connection, target, spec, new_id, 1)
+
+
+for _spec in COUNTERS:
+    _register(_spec)
@@ -1,7 +1,7 @@
 """
 Dispatch model
 """
-from sqlalchemy import Column, Integer, String, TIMESTAMP, ForeignKey, Enum, DateTime, Text
+from sqlalchemy import Column, Integer, String, TIMESTAMP, ForeignKey, Enum, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -18,6 +18,15 @@ class Dispatch(Base):
     """Dispatch model"""
     
     __tablename__ = "dispatches"
+    # Search (services/dispatch_search.py): an equality filter followed by
+    # the dispatch_date, id page order. The primary key is part of every
+    # secondary index, so keyset paging reads the index in order.
+    __table_args__ = (
+        Index("ix_dispatches_project_date", "project_id", "dispatch_date"),
+        Index("ix_dispatches_drillhole_date", "drillhole_id", "dispatch_date"),
+        Index("ix_dispatches_company_date", "company_id", "dispatch_date"),
+        Index("ix_dispatches_status_date", "status", "dispatch_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -26,8 +35,8 @@ class Dispatch(Base):
     dispatch_date = Column(DateTime, nullable=False, index=True)
     hq_boxes = Column(Integer, nullable=False, default=0)
     nq_boxes = Column(Integer, nullable=False, default=0)
-    driver = Column(String(255), nullable=False)
-    technician = Column(String(255), nullable=False)
+    driver = Column(String(255), nullable=False, index=True)
+    technician = Column(String(255), nullable=False, index=True)
     samples_collected = Column(Integer, default=0)
     sample_type = Column(String(100), nullable=True)
     status = Column(Enum(DispatchStatus), default=DispatchStatus.OUTSTANDING, nullable=False, index=True)
@@ -36,17 +45,20 @@ class Dispatch(Base):
     returned_nq = Column(Integer, nullable=True)
     return_condition = Column(String(50), nullable=True)
     return_notes = Column(Text, nullable=True)
+    # Maintained by app.models.counters
+    sample_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
     updated_at = Column(
         TIMESTAMP,
         server_default=func.current_timestamp(),
         onupdate=func.current_timestamp(),
-        nullable=False
+        nullable=False,
+        index=True
     )
     
     # Relationships
     project = relationship("Project", back_populates="dispatches")
     drillhole = relationship("Drillhole", back_populates="dispatches")
     company = relationship("Company", back_populates="dispatches")
-    samples = relationship("Sample", back_populates="dispatch", cascade="all, delete-orphan")
+    samples = relationship("Sample", back_populates="dispatch", cascade="all, delete-orphan", passive_deletes=True)
 
@@ -25,15 +25,18 @@ class Drillhole(Base):
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
     depth = Column(DECIMAL(10, 2), nullable=True)
     status = Column(Enum(DrillholeStatus), default=DrillholeStatus.ACTIVE, nullable=False)
+    # Maintained by app.models.counters
+    dispatch_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
     updated_at = Column(
         TIMESTAMP,
         server_default=func.current_timestamp(),
         onupdate=func.current_timestamp(),
-        nullable=False
+        nullable=False,
+        index=True
     )
     
     # Relationships
     project = relationship("Project", back_populates="drillholes")
-    dispatches = relationship("Dispatch", back_populates="drillhole", cascade="all, delete-orphan")
+    dispatches = relationship("Dispatch", back_populates="drillhole", cascade="all, delete-orphan", passive_deletes=True)
 
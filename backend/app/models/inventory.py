@@ -25,6 +25,7 @@ class Inventory(Base):
         TIMESTAMP,
         server_default=func.current_timestamp(),
         onupdate=func.current_timestamp(),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
@@ -0,0 +1,65 @@
+"""
+Background job model
+"""
+from sqlalchemy import Column, Integer, String, TIMESTAMP, DateTime, ForeignKey, Enum, JSON, Text, Boolean, Index
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+
+
+class JobStatus(str, enum.Enum):
+    """Job status enumeration"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class Job(Base):
+    """
+    Persistent background job
+
+    Workers claim queued jobs with a conditional UPDATE, so any number of
+    worker threads or processes can share the table without a broker.
+    Running jobs refresh heartbeat_at; a job whose heartbeat goes stale
+    (its worker died) is queued again.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    kind = Column(String(50), nullable=False, index=True)
+    params = Column(JSON, nullable=True)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=True)
+    message = Column(String(255), nullable=True)
+    result = Column(JSON, nullable=True)
+    artifact_path = Column(String(500), nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    # Naive UTC, set by the application (datetime.utcnow)
+    run_after = Column(DateTime, nullable=False)
+    worker_id = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
+    updated_at = Column(
+        TIMESTAMP,
+        server_default=func.current_timestamp(),
+        onupdate=func.current_timestamp(),
+        nullable=False
+    )
+
+    @property
+    def has_artifact(self) -> bool:
+        """Whether the job produced a downloadable file"""
+        return self.artifact_path is not None
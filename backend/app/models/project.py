@@ -26,16 +26,20 @@ class Project(Base):
     company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
     location = Column(String(255), nullable=True)
     status = Column(Enum(ProjectStatus), default=ProjectStatus.ACTIVE, nullable=False)
+    # Maintained by app.models.counters
+    drillhole_count = Column(Integer, nullable=False, default=0, server_default="0")
+    dispatch_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
     updated_at = Column(
         TIMESTAMP,
         server_default=func.current_timestamp(),
         onupdate=func.current_timestamp(),
-        nullable=False
+        nullable=False,
+        index=True
     )
     
     # Relationships
     company = relationship("Company", back_populates="projects")
-    drillholes = relationship("Drillhole", back_populates="project", cascade="all, delete-orphan")
-    dispatches = relationship("Dispatch", back_populates="project", cascade="all, delete-orphan")
+    drillholes = relationship("Drillhole", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    dispatches = relationship("Dispatch", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
 
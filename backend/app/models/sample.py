@@ -1,10 +1,12 @@
 """
 Sample model
 """
-from sqlalchemy import Column, Integer, String, TIMESTAMP, ForeignKey, Enum, DECIMAL
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, TIMESTAMP, ForeignKey, Enum, DECIMAL, Index, event, select
+from sqlalchemy.orm import object_session, relationship
+from sqlalchemy.orm.util import identity_key
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.dispatch import Dispatch
 import enum
 
 
@@ -27,9 +29,15 @@ class Sample(Base):
     """Sample model"""
     
     __tablename__ = "samples"
+    __table_args__ = (
+        Index("ix_samples_drillhole_from_depth", "drillhole_id", "from_depth"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     dispatch_id = Column(Integer, ForeignKey("dispatches.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Copied from the dispatch on insert (a dispatch never changes hole) so
+    # depth queries per hole do not join dispatches
+    drillhole_id = Column(Integer, ForeignKey("drillholes.id", ondelete="CASCADE"), nullable=True)
     sample_id = Column(String(100), unique=True, nullable=False, index=True)
     sample_type = Column(Enum(SampleType), nullable=False, index=True)
     from_depth = Column(DECIMAL(10, 2), nullable=True)
@@ -40,9 +48,23 @@ class Sample(Base):
         TIMESTAMP,
         server_default=func.current_timestamp(),
         onupdate=func.current_timestamp(),
-        nullable=False
+        nullable=False,
+        index=True
     )
     
     # Relationships
     dispatch = relationship("Dispatch", back_populates="samples")
 
+
+
+@event.listens_for(Sample, "before_insert")
+def _copy_dispatch_drillhole(mapper, connection, target):
+    session = object_session(target)
+    dispatch = session.identity_map.get(identity_key(Dispatch, target.dispatch_id)) if session else None
+    if dispatch is not None and "drillhole_id" in dispatch.__dict__:
+        target.drillhole_id = dispatch.drillhole_id
+        return
+    # Filled in by the INSERT itself; the attribute is expired afterwards
+    target.drillhole_id = (
+        select(Dispatch.drillhole_id).where(Dispatch.id == target.dispatch_id).scalar_subquery()
+    )
@@ -0,0 +1,45 @@
+"""
+Sample ID sequence model
+
+A sequence hands out sample_ids made of a fixed prefix and a zero padded
+number ("GS-" and width 5 give GS-00001, GS-00002, ...). Clients reserve
+contiguous blocks with one relative UPDATE of next_value, so field crews
+can label bags offline from their block and inserts never race each
+other for the same sample_id.
+"""
+from typing import Optional
+from sqlalchemy import Column, Integer, BigInteger, String, TIMESTAMP, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class SampleIdSequence(Base):
+    """Counter for the sample_ids of one prefix"""
+
+    __tablename__ = "sample_id_sequences"
+    __table_args__ = (
+        UniqueConstraint("prefix", name="uq_sample_id_sequences_prefix"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    prefix = Column(String(80), nullable=False)
+    # Optional owner; a project may have several prefixes
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=True, index=True)
+    width = Column(Integer, nullable=False, default=5)
+    # First number of the next block
+    next_value = Column(BigInteger, nullable=False, default=1)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
+    # Time of the last reservation
+    updated_at = Column(
+        TIMESTAMP,
+        server_default=func.current_timestamp(),
+        onupdate=func.current_timestamp(),
+        nullable=False
+    )
+
+    @property
+    def next_sample_id(self) -> Optional[str]:
+        """Sample id the next block starts with, None once the width is used up"""
+        if self.next_value >= 10 ** self.width:
+            return None
+        return f"{self.prefix}{self.next_value:0{self.width}d}"
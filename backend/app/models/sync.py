@@ -0,0 +1,98 @@
+"""
+Edge-to-central sync models
+"""
+from sqlalchemy import Column, Integer, String, TIMESTAMP, DateTime, JSON, Boolean, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ChangeJournal(Base):
+    """Append-only journal of local mutations awaiting upload"""
+
+    __tablename__ = "change_journal"
+    __table_args__ = (
+        UniqueConstraint("site_id", "seq", name="uq_change_journal_site_seq"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    site_id = Column(String(64), nullable=False)
+    seq = Column(Integer, nullable=False)
+    entity = Column(String(50), nullable=False)
+    op = Column(String(20), nullable=False)
+    record_id = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
+
+
+class SyncState(Base):
+    """
+    Per-site sync bookkeeping
+
+    On a local site the row for its own SITE_ID tracks the journal sequence,
+    the highest sequence acknowledged by central and the reference-data pull
+    watermark. On central one row per remote site tracks the highest
+    sequence applied, which makes replays idempotent.
+    """
+
+    __tablename__ = "sync_state"
+
+    site_id = Column(String(64), primary_key=True)
+    last_seq = Column(Integer, nullable=False, default=0)
+    pushed_seq = Column(Integer, nullable=False, default=0)
+    applied_seq = Column(Integer, nullable=False, default=0)
+    pull_watermark = Column(DateTime, nullable=True)
+    updated_at = Column(
+        TIMESTAMP,
+        server_default=func.current_timestamp(),
+        onupdate=func.current_timestamp(),
+        nullable=False
+    )
+
+
+class SyncIdMap(Base):
+    """Central mapping of site-local record ids to central record ids"""
+
+    __tablename__ = "sync_id_map"
+    __table_args__ = (
+        UniqueConstraint("site_id", "entity", "local_id", name="uq_sync_id_map_local"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    site_id = Column(String(64), nullable=False)
+    entity = Column(String(50), nullable=False)
+    local_id = Column(Integer, nullable=False)
+    central_id = Column(Integer, nullable=False)
+
+
+class SyncTombstone(Base):
+    """
+    Central record of a deleted reference row (company, project, drillhole)
+
+    Pulls send the ids deleted since the site's watermark, so a site can
+    drop the rows without receiving every live id.
+    """
+
+    __tablename__ = "sync_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    entity = Column(String(50), nullable=False)
+    record_id = Column(Integer, nullable=False)
+    deleted_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False, index=True)
+
+
+class SyncConflict(Base):
+    """Replayed change that could not be applied cleanly on central"""
+
+    __tablename__ = "sync_conflicts"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    site_id = Column(String(64), nullable=False, index=True)
+    seq = Column(Integer, nullable=False)
+    entity = Column(String(50), nullable=False)
+    op = Column(String(20), nullable=False)
+    record_id = Column(Integer, nullable=True)
+    reason = Column(String(255), nullable=False)
+    local_values = Column(JSON, nullable=True)
+    central_values = Column(JSON, nullable=True)
+    resolved = Column(Boolean, default=False, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
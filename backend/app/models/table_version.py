@@ -0,0 +1,117 @@
+"""
+Per-table deletion counters
+
+Data versions (app/services/data_version.py) read MAX(id) and
+MAX(updated_at) of a table, which are index lookups, instead of counting
+its rows. Neither moves when a row is deleted, so every deletion bumps the
+table's counter here in the deleting transaction:
+
+- ORM deletes (session.delete) once per flush, from after_flush
+- bulk query.delete() / delete(Model) statements run through a session,
+  from do_orm_execute
+
+A deletion also bumps the tables whose foreign keys reference the deleted
+table with ON DELETE CASCADE or SET NULL, since the database changes their
+rows without firing either event. DELETEs issued on a bare connection
+bypass the counters; call count_deletions with the same connection.
+"""
+from functools import lru_cache
+from typing import Iterable, Tuple
+from sqlalchemy import Column, String, BigInteger, event, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.database import Base
+
+
+class TableVersion(Base):
+    """Number of deletions from one table"""
+
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    deletions = Column(BigInteger, nullable=False, default=0)
+
+
+@lru_cache(maxsize=None)
+def dependent_tables(table_name: str) -> Tuple[str, ...]:
+    """
+    Tables whose rows the database changes when rows of table_name are deleted
+
+    Args:
+        table_name: Name of the table rows are deleted from
+
+    Returns:
+        Names of the tables reached through ON DELETE rules (CASCADE is
+        followed transitively), sorted
+    """
+    found = set()
+    pending = [table_name]
+    while pending:
+        parent = pending.pop()
+        for table in Base.metadata.tables.values():
+            for fk in table.foreign_keys:
+                if fk.column.table.name != parent or not fk.ondelete or table.name in found:
+                    continue
+                found.add(table.name)
+                if fk.ondelete.upper() == "CASCADE":
+                    pending.append(table.name)
+    found.discard(table_name)
+    return tuple(sorted(found))
+
+
+def count_deletions(connection: Connection, table_names: Iterable[str]) -> None:
+    """
+    Bump the deletion counters of tables rows were deleted from
+
+    Runs on the caller's connection, so the counters commit or roll back
+    together with the deletion. Tables without a counter row yet (added to
+    the schema after table_versions was created) get one.
+
+    Args:
+        connection: Connection of the deleting transaction
+        table_names: Tables rows were deleted from; their dependent tables
+            are included
+    """
+    names = set()
+    for name in table_names:
+        names.add(name)
+        names.update(dependent_tables(name))
+    if not names:
+        return
+    names = sorted(names)
+    table = TableVersion.__table__
+    result = connection.execute(
+        table.update()
+        .where(table.c.table_name.in_(names))
+        .values(deletions=table.c.deletions + 1)
+    )
+    if result.rowcount == len(names):
+        return
+    present = set(connection.execute(
+        select(table.c.table_name).where(table.c.table_name.in_(names))
+    ).scalars())
+    connection.execute(
+        table.insert(),
+        [{"table_name": name, "deletions": 1} for name in names if name not in present],
+    )
+
+
+@event.listens_for(TableVersion.__table__, "after_create")
+def _seed(target, connection, **kw):
+    # Migration 0011 seeds the same rows on migrated databases
+    connection.execute(target.insert(), [
+        {"table_name": name, "deletions": 0} for name in sorted(Base.metadata.tables) if name != target.name
+    ])
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    # session.deleted still lists the objects this flush deleted
+    if session.deleted:
+        count_deletions(session.connection(), {obj.__table__.name for obj in session.deleted})
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _do_orm_execute(orm_execute_state):
+    if orm_execute_state.is_delete:
+        count_deletions(orm_execute_state.session.connection(), [orm_execute_state.statement.table.name])
@@ -0,0 +1,98 @@
+"""
+Assay schemas
+"""
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
+from decimal import Decimal
+
+
+class AssayAnalyteResponse(BaseModel):
+    """Schema for an analyte (element and unit)"""
+    id: int
+    code: str
+    element: str
+    unit: Optional[str] = None
+
+
+class AssayBatchResponse(BaseModel):
+    """Schema for an imported lab results file"""
+    id: int
+    lab: Optional[str] = None
+    certificate: Optional[str] = None
+    filename: str
+    job_id: Optional[int] = None
+    rows_read: int
+    result_count: int
+    sample_count: int
+    samples_completed: int
+    unknown_count: int
+    unknown_samples: Optional[List[str]] = None
+    analytes: Optional[List[str]] = None
+    imported_at: Optional[datetime] = None
+    created_by: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SampleAssays(BaseModel):
+    """Assay values of one sample, by analyte code"""
+    id: int
+    sample_id: str
+    from_depth: Optional[Decimal] = None
+    to_depth: Optional[Decimal] = None
+    values: Dict[str, float]
+    qualifiers: Dict[str, str] = {}
+
+
+class DrillholeAssays(BaseModel):
+    """Schema for the assay values of a drillhole's samples"""
+    drillhole_id: int
+    drillhole: str
+    analytes: List[str]
+    samples: List[SampleAssays]
+
+
+class AssayResultRow(BaseModel):
+    """Schema for one value of an analyte"""
+    id: int
+    sample_id: int
+    sample: str
+    drillhole_id: Optional[int] = None
+    drillhole: Optional[str] = None
+    from_depth: Optional[Decimal] = None
+    to_depth: Optional[Decimal] = None
+    value: float
+    qualifier: Optional[str] = None
+    batch_id: int
+
+
+class AssayResultPage(BaseModel):
+    """Schema for one page of an analyte's values"""
+    analyte: str
+    items: List[AssayResultRow]
+    next_cursor: Optional[str] = None
+
+
+class AssayComposite(BaseModel):
+    """Schema for one length-weighted composite"""
+    drillhole_id: int
+    drillhole: Optional[str] = None
+    from_depth: float
+    to_depth: float
+    sampled_length: float
+    samples: int
+    values: Dict[str, float]
+
+
+class AssayCompositeReport(BaseModel):
+    """Schema for the composites of a project"""
+    project_id: int
+    method: str
+    length: Optional[float] = None
+    min_coverage: float
+    analytes: List[str]
+    composites: List[AssayComposite]
@@ -2,7 +2,7 @@
 Dispatch schemas
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from app.models.dispatch import DispatchStatus
 
@@ -54,6 +54,7 @@ class DispatchResponse(DispatchBase):
     returned_nq: Optional[int] = None
     return_condition: Optional[str] = None
     return_notes: Optional[str] = None
+    sample_count: int = 0
     created_at: datetime
     updated_at: datetime
     
@@ -69,3 +70,9 @@ class DispatchWithDetails(DispatchResponse):
     days_out: Optional[int] = None
     is_match: Optional[bool] = None
 
+
+
+class DispatchSearchPage(BaseModel):
+    """Schema for one page of dispatch search results"""
+    items: List[DispatchWithDetails]
+    next_cursor: Optional[str] = None
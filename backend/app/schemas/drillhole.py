@@ -2,10 +2,11 @@
 Drillhole schemas
 """
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 from app.models.drillhole import DrillholeStatus
+from app.models.sample import SampleStatus, SampleType
 
 
 class DrillholeBase(BaseModel):
@@ -43,3 +44,58 @@ class DrillholeWithDetails(DrillholeResponse):
     project_name: Optional[str] = None
     project_project_id: Optional[str] = None
     dispatch_count: int = 0
+
+
+class SampleInterval(BaseModel):
+    """Sample of a drillhole depth query"""
+    id: int
+    sample_id: str
+    dispatch_id: int
+    sample_type: SampleType
+    status: SampleStatus
+    from_depth: Decimal
+    to_depth: Decimal
+
+
+class DepthRange(BaseModel):
+    """Depth range in metres"""
+    from_depth: float
+    to_depth: float
+
+
+class IntervalOverlap(DepthRange):
+    """Depth range sampled twice, with the two samples (sample_id)"""
+    sample_ids: List[str]
+
+
+class IntervalSummary(BaseModel):
+    """Sample coverage of a drillhole"""
+    intervals: int
+    unplaced: int
+    top: Optional[float] = None
+    bottom: Optional[float] = None
+    sampled_length: float = 0
+    gap_count: int = 0
+    gap_length: float = 0
+    overlap_count: int = 0
+    overlap_length: float = 0
+
+
+class DrillholeIntervalCheck(IntervalSummary):
+    """Gaps and overlaps between the samples of one drillhole"""
+    drillhole_id: int
+    gaps: List[DepthRange] = []
+    overlaps: List[IntervalOverlap] = []
+
+
+class HoleIntervalSummary(IntervalSummary):
+    """Coverage of one drillhole in a project check"""
+    drillhole_id: int
+    drillhole: Optional[str] = None
+
+
+class ProjectIntervalCheck(BaseModel):
+    """Coverage of the sampled drillholes of a project"""
+    holes_checked: int
+    holes_with_issues: int
+    holes: List[HoleIntervalSummary]
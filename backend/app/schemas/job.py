@@ -0,0 +1,45 @@
+"""
+Job schemas
+"""
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from datetime import datetime
+from app.models.job import JobStatus
+
+
+class JobCreate(BaseModel):
+    """Schema for queueing a job"""
+    kind: str
+    params: Dict[str, Any] = {}
+
+
+class JobResponse(BaseModel):
+    """Schema for job response"""
+    id: int
+    kind: str
+    params: Optional[Dict[str, Any]] = None
+    status: JobStatus
+    progress_done: int
+    progress_total: Optional[int] = None
+    message: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    has_artifact: bool = False
+    created_by: Optional[int] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class JobAccepted(BaseModel):
+    """Schema for a 202 response of an endpoint that queued a job"""
+    detail: str
+    job_id: int
+    rows: Optional[int] = None
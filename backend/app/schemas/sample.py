@@ -2,7 +2,7 @@
 Sample schemas
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 from app.models.sample import SampleType, SampleStatus
@@ -19,8 +19,9 @@ class SampleBase(BaseModel):
 
 
 class SampleCreate(SampleBase):
-    """Schema for creating a sample"""
-    pass
+    """Schema for creating a sample (sample_id given or taken from a sequence)"""
+    sample_id: Optional[str] = None
+    sequence_id: Optional[int] = None
 
 
 class SampleUpdate(BaseModel):
@@ -34,8 +35,67 @@ class SampleUpdate(BaseModel):
 class SampleResponse(SampleBase):
     """Schema for sample response"""
     id: int
+    drillhole_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
+
+
+class SampleBulkStatusUpdate(BaseModel):
+    """Schema for moving many samples to a status (one selector)"""
+    status: SampleStatus
+    from_status: Optional[SampleStatus] = None
+    ids: Optional[List[int]] = Field(None, max_length=10000)
+    dispatch_id: Optional[int] = None
+    sample_id_prefix: Optional[str] = None
+    sample_id_from: Optional[str] = None
+    sample_id_to: Optional[str] = None
+    audit: bool = False
+
+
+class SampleBulkStatusResult(BaseModel):
+    """Schema for the outcome of a bulk status change"""
+    status: SampleStatus
+    updated: int
+    audited: int
+
+
+class SampleIdSequenceCreate(BaseModel):
+    """Schema for creating a sample id sequence"""
+    prefix: str
+    width: int = 5
+    project_id: Optional[int] = None
+    start: Optional[int] = None
+
+
+class SampleIdSequenceResponse(BaseModel):
+    """Schema for sample id sequence response"""
+    id: int
+    prefix: str
+    width: int
+    project_id: Optional[int] = None
+    next_value: int
+    next_sample_id: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SampleIdReserve(BaseModel):
+    """Schema for reserving a block of sample ids"""
+    count: int = 1
+
+
+class SampleIdBlock(BaseModel):
+    """Schema for a reserved block of sample ids"""
+    sequence_id: int
+    prefix: str
+    first: int
+    last: int
+    count: int
+    first_sample_id: str
+    last_sample_id: str
@@ -0,0 +1,21 @@
+"""
+Search schemas
+"""
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class SearchHit(BaseModel):
+    """Schema for one search hit"""
+    type: str
+    id: Optional[int] = None
+    field: str
+    value: str
+    match: str
+    context: Optional[str] = None
+
+
+class SearchResponse(BaseModel):
+    """Schema for search results"""
+    query: str
+    hits: List[SearchHit]
@@ -0,0 +1,41 @@
+"""
+Sync schemas
+"""
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+
+class SyncConflictItem(BaseModel):
+    """Schema for a conflict reported in a push acknowledgement"""
+    seq: int
+    entity: str
+    op: str
+    reason: str
+
+
+class SyncPushResponse(BaseModel):
+    """Schema for a push acknowledgement"""
+    site_id: str
+    acked_seq: int
+    applied: int
+    duplicates: int
+    conflicts: List[SyncConflictItem] = []
+
+
+class SyncConflictResponse(BaseModel):
+    """Schema for a stored sync conflict"""
+    id: int
+    site_id: str
+    seq: int
+    entity: str
+    op: str
+    record_id: Optional[int] = None
+    reason: str
+    local_values: Optional[Dict[str, Any]] = None
+    central_values: Optional[Dict[str, Any]] = None
+    resolved: bool
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
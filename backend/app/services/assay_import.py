@@ -0,0 +1,378 @@
+"""
+Lab assay result import
+
+Labs return results as one row per sample, keyed by Sample.sample_id, with
+one column per analyte ("Au_ppm", "Cu %", "Ag (g/t)"). Certificate lines
+above the header row are skipped. Files are read as a stream in chunks of
+ASSAY_IMPORT_CHUNK_ROWS rows, and each chunk costs a fixed number of
+statements however many values it holds:
+
+- one SELECT ... WHERE sample_id IN (...) resolves the chunk's sample ids
+- one executemany INSERT adds its values to assay_results (long form)
+- one UPDATE of the batch row records progress, then the chunk commits
+
+A sample listed more than once in a file keeps, per analyte, the value of
+its last row that has one: repeats within a chunk are collapsed before the
+INSERT, and a repeat of a sample from an earlier chunk deletes the values
+it replaces (one more statement, only when it happens).
+
+When the file is done one UPDATE ... WHERE id IN (SELECT sample_id FROM
+assay_results WHERE batch_id = ...) marks the analysed samples completed.
+
+Values: "<0.005" is below the detection limit (stored as 0.005 with
+qualifier "<"), ">10" above the upper limit, and negative numbers follow
+the lab convention for below detection (-0.005 is "<0.005"). Blank cells
+and lab codes such as NS (not sampled) or IS (insufficient sample) are
+skipped. Excel workbooks (.xlsx) need the optional openpyxl package.
+"""
+import importlib.util
+import os
+import re
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.assay import AssayAnalyte, AssayBatch, AssayResult
+from app.models.sample import Sample, SampleStatus
+from app.services.sample_status import update_status
+from app.services.statements import get_by_id
+
+CSV_EXTENSIONS = (".csv", ".txt", ".tsv")
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+# Header cells naming the sample id column (lowercased, letters and digits only)
+SAMPLE_ID_HEADERS = {"sampleid", "sample", "sampleno", "samplenumber", "samplename", "clientid"}
+
+# Descriptive columns that are not analytes
+SKIP_HEADERS = {
+    "from", "to", "fromdepth", "todepth", "depth", "hole", "holeid", "drillhole",
+    "type", "sampletype", "status", "batch", "certificate", "job", "jobno",
+    "comment", "comments", "notes", "method", "date", "qc", "qctype",
+}
+
+# Cells meaning "no result" rather than a value
+MISSING_VALUES = {"", "-", "--", "na", "n/a", "ns", "is", "lnr", "nr", "nss", "x"}
+
+# Samples named in unknown_samples on the batch
+UNKNOWN_SAMPLES_KEPT = 100
+
+# Lines searched for the header row
+HEADER_SEARCH_ROWS = 50
+
+_ANALYTE_HEADER = re.compile(r"^([A-Za-z][A-Za-z0-9]{0,19})(?:[\s_\-]*\(?\s*([A-Za-z%/]{1,19})\s*\)?)?$")
+
+ProgressCallback = Callable[[int], None]
+
+
+def _header_key(cell: Any) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(cell or "").lower())
+
+
+def _cell_text(cell: Any) -> str:
+    # Workbooks hand back numeric sample ids as floats (12345.0)
+    if isinstance(cell, float) and cell.is_integer():
+        cell = int(cell)
+    return str(cell if cell is not None else "").strip()
+
+
+def parse_analyte(header: Any) -> Optional[Tuple[str, str, Optional[str]]]:
+    """
+    Read an analyte column header
+
+    Args:
+        header: Header cell, e.g. "Au_ppm", "Cu %", "AG (g/t)" or "S"
+
+    Returns:
+        (code, element, unit), e.g. ("Au_ppm", "Au", "ppm"), or None if the
+        header does not name an analyte
+    """
+    text = str(header or "").strip()
+    match = _ANALYTE_HEADER.match(text)
+    if not match or _header_key(text) in SKIP_HEADERS or _header_key(text) in SAMPLE_ID_HEADERS:
+        return None
+    element, unit = match.group(1), match.group(2)
+    # "AU"/"au" -> "Au"; mixed case (SiO2) is kept as written
+    if element.isalpha() and len(element) <= 2 and (element.isupper() or element.islower()):
+        element = element.capitalize()
+    if unit:
+        unit = "pct" if unit == "%" else unit.lower()
+    code = f"{element}_{unit}" if unit else element
+    return code, element, unit
+
+
+def parse_value(cell: Any) -> Optional[Tuple[float, Optional[str]]]:
+    """
+    Read one result cell
+
+    Args:
+        cell: Cell text or number
+
+    Returns:
+        (value, qualifier) with qualifier "<", ">" or None, or None when
+        the cell holds no result
+    """
+    if isinstance(cell, (int, float)) and not isinstance(cell, bool):
+        value = float(cell)
+        text = None
+    else:
+        text = str(cell or "").strip()
+        if text.lower() in MISSING_VALUES:
+            return None
+        qualifier = text[0] if text[0] in "<>" else None
+        try:
+            value = float(text[1:] if qualifier else text)
+        except ValueError:
+            return None
+        if qualifier:
+            return value, qualifier
+    if value != value:
+        return None
+    if value < 0:
+        return -value, "<"
+    return value, None
+
+
+def _csv_rows(path: str) -> Iterator[List[str]]:
+    # Imported here so API workers do not load it at startup
+    import csv
+
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as handle:
+        sample = handle.read(64 * 1024)
+        handle.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(handle, dialect)
+
+
+def _excel_rows(path: str) -> Iterator[List[Any]]:
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def supported_file(filename: str) -> Optional[str]:
+    """
+    Why a file cannot be imported
+
+    Args:
+        filename: Uploaded file name
+
+    Returns:
+        An error message, or None if the file type is supported
+    """
+    extension = os.path.splitext(filename.lower())[1]
+    if extension in CSV_EXTENSIONS:
+        return None
+    if extension in EXCEL_EXTENSIONS:
+        # find_spec checks the optional dependency without importing it
+        return None if importlib.util.find_spec("openpyxl") else "Excel import needs the openpyxl package; upload CSV instead"
+    return f"Unsupported file type {extension or '(none)'}; use CSV or XLSX"
+
+
+def read_rows(path: str) -> Iterator[List[Any]]:
+    """Rows of a CSV file or of the first sheet of a workbook"""
+    if os.path.splitext(path.lower())[1] in EXCEL_EXTENSIONS:
+        return _excel_rows(path)
+    return _csv_rows(path)
+
+
+def find_header(rows: Iterator[List[Any]]) -> Tuple[int, List[Tuple[int, str, str, Optional[str]]]]:
+    """
+    Skip to the header row and read its columns
+
+    Args:
+        rows: File rows; the header and anything above it are consumed
+
+    Returns:
+        (sample id column, [(column, code, element, unit)] of the analytes)
+
+    Raises:
+        ValueError: If no header row with a sample id column and at least
+            one analyte is found
+    """
+    for row in islice(rows, HEADER_SEARCH_ROWS):
+        keys = [_header_key(cell) for cell in row]
+        sample_column = next((i for i, key in enumerate(keys) if key in SAMPLE_ID_HEADERS), None)
+        if sample_column is None:
+            continue
+        analytes, seen = [], set()
+        for column, cell in enumerate(row):
+            parsed = parse_analyte(cell) if column != sample_column else None
+            if parsed and parsed[0] not in seen:
+                seen.add(parsed[0])
+                analytes.append((column, *parsed))
+        if analytes:
+            return sample_column, analytes
+    raise ValueError("No header row with a sample id column and analyte columns found")
+
+
+def resolve_analytes(db: Session, analytes: Sequence[Tuple[int, str, str, Optional[str]]]) -> Dict[str, int]:
+    """
+    Ids of the analytes of a file, adding the ones not seen before
+
+    Args:
+        db: Database session (committed here when analytes are added)
+        analytes: Columns from find_header
+
+    Returns:
+        Analyte id per code
+    """
+    codes = [code for _, code, _, _ in analytes]
+    known = dict(db.execute(select(AssayAnalyte.code, AssayAnalyte.id).where(AssayAnalyte.code.in_(codes))).all())
+    missing = [
+        {"code": code, "element": element, "unit": unit}
+        for _, code, element, unit in analytes if code not in known
+    ]
+    if missing:
+        db.execute(AssayAnalyte.__table__.insert(), missing)
+        db.commit()
+        known = dict(db.execute(select(AssayAnalyte.code, AssayAnalyte.id).where(AssayAnalyte.code.in_(codes))).all())
+    return known
+
+
+def mark_samples_completed(db: Session, batch_id: int) -> int:
+    """
+    Mark every sample with results in a batch as completed (not committed)
+
+    One set-based UPDATE (services/sample_status.py); on a local site each
+    changed sample is also journaled for sync.
+
+    Args:
+        db: Database session
+        batch_id: Assay batch ID
+
+    Returns:
+        Number of samples whose status changed
+    """
+    analysed = select(AssayResult.sample_id).where(AssayResult.batch_id == batch_id)
+    return update_status(db, SampleStatus.COMPLETED, Sample.id.in_(analysed))["updated"]
+
+
+def import_batch(
+    db: Session,
+    batch_id: int,
+    path: str,
+    chunk_rows: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Load a lab results file into a batch
+
+    Safe to re-run: results already stored for the batch are deleted first.
+    A sample listed twice keeps the last value given for each analyte.
+
+    Args:
+        db: Database session
+        batch_id: Assay batch ID
+        path: CSV or XLSX file
+        chunk_rows: File rows per transaction (default ASSAY_IMPORT_CHUNK_ROWS)
+        progress: Optional callback with the rows read so far, after every chunk
+
+    Returns:
+        Batch totals (rows_read, result_count, sample_count,
+        samples_completed, unknown_count)
+
+    Raises:
+        ValueError: If the file has no usable header row
+    """
+    chunk_rows = chunk_rows or settings.ASSAY_IMPORT_CHUNK_ROWS
+    db.execute(delete(AssayResult).where(AssayResult.batch_id == batch_id))
+    db.commit()
+
+    rows = read_rows(path)
+    sample_column, analytes = find_header(rows)
+    analyte_ids = resolve_analytes(db, analytes)
+    columns = [(column, analyte_ids[code]) for column, code, _, _ in analytes]
+
+    rows_read = result_count = unknown_count = 0
+    unknown: List[str] = []
+    samples = set()
+    while True:
+        lines = list(islice(rows, chunk_rows))
+        if not lines:
+            break
+        chunk = [
+            (code, row) for code, row in
+            ((_cell_text(row[sample_column]) if len(row) > sample_column else "", row) for row in lines)
+            if code
+        ]
+        codes = {code for code, _ in chunk}
+        known = {
+            code: (sample_id, drillhole_id)
+            for sample_id, code, drillhole_id in db.execute(
+                select(Sample.id, Sample.sample_id, Sample.drillhole_id).where(Sample.sample_id.in_(codes))
+            )
+        }
+        # (sample, analyte) -> row; a later row of the file replaces an earlier one
+        values: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        repeated = set()
+        chunk_samples = set()
+        for code, row in chunk:
+            match = known.get(code)
+            if match is None:
+                unknown_count += 1
+                if len(unknown) < UNKNOWN_SAMPLES_KEPT:
+                    unknown.append(code)
+                continue
+            sample_id, drillhole_id = match
+            chunk_samples.add(sample_id)
+            for column, analyte_id in columns:
+                parsed = parse_value(row[column]) if column < len(row) else None
+                if parsed is not None:
+                    if sample_id in samples:
+                        repeated.add((sample_id, analyte_id))
+                    values[(sample_id, analyte_id)] = {
+                        "batch_id": batch_id,
+                        "sample_id": sample_id,
+                        "drillhole_id": drillhole_id,
+                        "analyte_id": analyte_id,
+                        "value": parsed[0],
+                        "qualifier": parsed[1],
+                    }
+        samples |= chunk_samples
+        if repeated:
+            replaced = db.execute(
+                delete(AssayResult).where(
+                    AssayResult.batch_id == batch_id,
+                    tuple_(AssayResult.sample_id, AssayResult.analyte_id).in_(sorted(repeated)),
+                )
+            )
+            result_count -= replaced.rowcount
+        if values:
+            db.execute(AssayResult.__table__.insert(), list(values.values()))
+        rows_read += len(chunk)
+        result_count += len(values)
+        db.execute(
+            update(AssayBatch)
+            .where(AssayBatch.id == batch_id)
+            .values(rows_read=rows_read, result_count=result_count, unknown_count=unknown_count)
+        )
+        db.commit()
+        if progress is not None:
+            progress(rows_read)
+
+    completed = mark_samples_completed(db, batch_id)
+    totals = {
+        "rows_read": rows_read,
+        "result_count": result_count,
+        "sample_count": len(samples),
+        "samples_completed": completed,
+        "unknown_count": unknown_count,
+    }
+    batch = get_by_id(db, AssayBatch, batch_id)
+    for key, value in totals.items():
+        setattr(batch, key, value)
+    batch.unknown_samples = unknown
+    batch.analytes = [code for _, code, _, _ in analytes]
+    batch.imported_at = datetime.utcnow()
+    db.commit()
+    return totals
@@ -0,0 +1,230 @@
+"""
+Assay result queries
+
+Results are stored long (one row per sample, analyte and batch), so every
+read is an index range:
+
+- per drillhole: ix_assay_results_hole_analyte (drillhole_id, analyte_id,
+  sample_id), pivoted here into one row per sample with a value per analyte
+- per analyte: ix_assay_results_analyte_value (analyte_id, value), read in
+  value order; pages continue after the last (value, id) returned instead
+  of using OFFSET, so the thousandth page of a ten-million-value analyte
+  costs the same as the first
+
+A sample re-assayed in a later batch has a row per batch; only the newest
+row is returned, by (batch_id, id), so every read path agrees even on
+repeat rows stored within one batch.
+"""
+import base64
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, exists, lambda_stmt, or_, select
+from sqlalchemy.orm import Session, aliased
+from app.models.assay import AssayAnalyte, AssayResult
+from app.models.drillhole import Drillhole
+from app.models.sample import Sample
+from app.services.reference_cache import ReferenceNames
+
+_newer = aliased(AssayResult)
+
+
+def encode_cursor(value: float, result_id: int) -> str:
+    """Opaque cursor for the page after the given row"""
+    raw = f"{value!r}|{result_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Read a cursor from encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        value, result_id = raw.split("|")
+        return float(value), int(result_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def list_analytes(db: Session) -> List[Dict[str, Any]]:
+    """Every analyte imported so far, by code"""
+    rows = db.execute(
+        select(AssayAnalyte.id, AssayAnalyte.code, AssayAnalyte.element, AssayAnalyte.unit)
+        .order_by(AssayAnalyte.code)
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+def resolve_codes(db: Session, codes: Sequence[str]) -> Dict[str, int]:
+    """
+    Analyte ids of the given codes
+
+    Raises:
+        ValueError: If a code is not a known analyte
+    """
+    found = dict(db.execute(select(AssayAnalyte.code, AssayAnalyte.id).where(AssayAnalyte.code.in_(list(codes)))).all())
+    missing = [code for code in codes if code not in found]
+    if missing:
+        raise ValueError(f"Unknown analyte: {', '.join(missing)}")
+    return found
+
+
+def hole_assays(
+    db: Session,
+    drillhole_id: int,
+    analyte_ids: Optional[Sequence[int]] = None,
+    from_depth: Optional[float] = None,
+    to_depth: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Assay values of a drillhole's samples, one row per sample
+
+    Args:
+        db: Database session
+        drillhole_id: Drillhole primary key
+        analyte_ids: Analytes to return (default: all)
+        from_depth: Only samples overlapping the range from this depth
+        to_depth: Only samples overlapping the range to this depth
+
+    Returns:
+        {"analytes": [codes present], "samples": [{id, sample_id,
+        from_depth, to_depth, values: {code: value}, qualifiers: {code: "<"
+        or ">"}}]} with samples in from_depth order
+    """
+    samples = lambda_stmt(
+        lambda: select(Sample.id, Sample.sample_id, Sample.from_depth, Sample.to_depth)
+        .where(Sample.drillhole_id == drillhole_id)
+    )
+    results = lambda_stmt(
+        lambda: select(
+            AssayResult.sample_id, AssayResult.analyte_id, AssayResult.batch_id, AssayResult.id,
+            AssayResult.value, AssayResult.qualifier,
+        )
+        .where(AssayResult.drillhole_id == drillhole_id)
+    )
+    if analyte_ids is not None:
+        analytes = list(analyte_ids)
+        results += lambda s: s.where(AssayResult.analyte_id.in_(analytes))
+    if from_depth is not None or to_depth is not None:
+        # Read only the results of the samples in range
+        results += lambda s: s.join(Sample, Sample.id == AssayResult.sample_id)
+    if from_depth is not None:
+        low = from_depth
+        samples += lambda s: s.where(Sample.to_depth > low)
+        results += lambda s: s.where(Sample.to_depth > low)
+    if to_depth is not None:
+        high = to_depth
+        samples += lambda s: s.where(Sample.from_depth < high)
+        results += lambda s: s.where(Sample.from_depth < high)
+    samples += lambda s: s.order_by(Sample.from_depth, Sample.id)
+
+    # (sample, analyte) -> ((batch, id), value, qualifier); the newest row wins
+    latest: Dict[Tuple[int, int], Tuple[Tuple[int, int], float, Optional[str]]] = {}
+    for sample_id, analyte_id, batch_id, result_id, value, qualifier in db.execute(results):
+        current = latest.get((sample_id, analyte_id))
+        if current is None or (batch_id, result_id) > current[0]:
+            latest[(sample_id, analyte_id)] = ((batch_id, result_id), value, qualifier)
+
+    codes = dict(db.execute(select(AssayAnalyte.id, AssayAnalyte.code)).all()) if latest else {}
+    by_sample: Dict[int, Dict[str, Any]] = {}
+    for (sample_id, analyte_id), (_, value, qualifier) in latest.items():
+        entry = by_sample.setdefault(sample_id, {"values": {}, "qualifiers": {}})
+        code = codes[analyte_id]
+        entry["values"][code] = value
+        if qualifier:
+            entry["qualifiers"][code] = qualifier
+
+    rows = []
+    for row in db.execute(samples):
+        entry = by_sample.get(row.id)
+        if entry is not None:
+            rows.append({**row._mapping, **entry})
+    present = sorted({codes[analyte_id] for _, analyte_id in latest})
+    return {"analytes": present, "samples": rows}
+
+
+def analyte_results(
+    db: Session,
+    names: ReferenceNames,
+    analyte_id: int,
+    project_id: Optional[int] = None,
+    drillhole_id: Optional[int] = None,
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """
+    Values of one analyte, highest first
+
+    Args:
+        db: Database session
+        names: Reference name lookups
+        analyte_id: Analyte primary key
+        project_id: Only holes of this project
+        drillhole_id: Only this hole
+        min_value: Only values of at least this
+        max_value: Only values of at most this
+        cursor: next_cursor of the previous page
+        limit: Page size
+
+    Returns:
+        {"items": [result rows], "next_cursor": str or None}
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    after = decode_cursor(cursor) if cursor else None
+    stmt = lambda_stmt(
+        lambda: select(
+            AssayResult.id, AssayResult.sample_id, Sample.sample_id.label("sample"),
+            AssayResult.drillhole_id, Sample.from_depth, Sample.to_depth,
+            AssayResult.value, AssayResult.qualifier, AssayResult.batch_id,
+        )
+        .join(Sample, Sample.id == AssayResult.sample_id)
+        .where(
+            AssayResult.analyte_id == analyte_id,
+            ~exists().where(
+                _newer.sample_id == AssayResult.sample_id,
+                _newer.analyte_id == AssayResult.analyte_id,
+                or_(
+                    _newer.batch_id > AssayResult.batch_id,
+                    and_(_newer.batch_id == AssayResult.batch_id, _newer.id > AssayResult.id),
+                ),
+            ),
+        )
+    )
+    if drillhole_id is not None:
+        hole = drillhole_id
+        stmt += lambda s: s.where(AssayResult.drillhole_id == hole)
+    if project_id is not None:
+        project = project_id
+        stmt += lambda s: s.where(
+            AssayResult.drillhole_id.in_(select(Drillhole.id).where(Drillhole.project_id == project))
+        )
+    if min_value is not None:
+        low = min_value
+        stmt += lambda s: s.where(AssayResult.value >= low)
+    if max_value is not None:
+        high = max_value
+        stmt += lambda s: s.where(AssayResult.value <= high)
+    if after is not None:
+        after_value, after_id = after
+        stmt += lambda s: s.where(or_(
+            AssayResult.value < after_value,
+            and_(AssayResult.value == after_value, AssayResult.id < after_id),
+        ))
+    page = limit + 1
+    stmt += lambda s: s.order_by(AssayResult.value.desc(), AssayResult.id.desc()).limit(page)
+
+    rows = db.execute(stmt).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    items = [
+        {**row._mapping, "drillhole": names.drillhole(row.drillhole_id) if row.drillhole_id else None}
+        for row in rows
+    ]
+    next_cursor = encode_cursor(rows[-1].value, rows[-1].id) if more else None
+    return {"items": items, "next_cursor": next_cursor}
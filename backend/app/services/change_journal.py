@@ -0,0 +1,148 @@
+"""
+Change journal for local-site operation
+"""
+import enum
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from sqlalchemy import inspect, insert
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.sync import ChangeJournal, SyncState, SyncTombstone
+
+# Timestamps are assigned by each database, so they are not journaled
+SERVER_FIELDS = frozenset({"created_at", "updated_at"})
+
+# Reference tables sites pull from central; their deletions are tombstoned
+TOMBSTONE_TABLES = frozenset({"companies", "projects", "drillholes"})
+
+
+def serialize_row(obj: Any, exclude=frozenset()) -> Dict[str, Any]:
+    """
+    Convert an ORM object's column values into JSON-safe values
+    
+    Args:
+        obj: Mapped ORM instance
+        exclude: Column names to skip
+        
+    Returns:
+        Dictionary of column name to JSON-safe value
+    """
+    data = {}
+    for attr in inspect(obj).mapper.column_attrs:
+        if attr.key not in exclude:
+            data[attr.key] = to_json_value(getattr(obj, attr.key))
+    return data
+
+
+def serialize_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a dictionary of column values into JSON-safe values
+    
+    Args:
+        values: Column name to value
+        
+    Returns:
+        Dictionary of column name to JSON-safe value
+    """
+    return {key: to_json_value(value) for key, value in values.items()}
+
+
+def to_json_value(value: Any) -> Any:
+    """
+    Convert a single column value into a JSON-safe value
+    
+    Args:
+        value: Column value
+        
+    Returns:
+        JSON-safe value
+    """
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def next_sequence(db: Session, site_id: str) -> int:
+    """
+    Allocate the next journal sequence number for a site
+    
+    The sync state row is locked for the rest of the transaction so
+    concurrent writers on the same site get gap-free, ordered sequences.
+    
+    Args:
+        db: Database session
+        site_id: Local site identifier
+        
+    Returns:
+        Allocated sequence number
+    """
+    state = db.query(SyncState).filter(SyncState.site_id == site_id).with_for_update().first()
+    if state is None:
+        state = SyncState(site_id=site_id, last_seq=0, pushed_seq=0, applied_seq=0)
+        db.add(state)
+    state.last_seq = (state.last_seq or 0) + 1
+    return state.last_seq
+
+
+def record_change(
+    db: Session,
+    entity: str,
+    op: str,
+    record_id: int,
+    payload: Optional[Dict[str, Any]] = None,
+    site_id: Optional[str] = None,
+) -> Optional[ChangeJournal]:
+    """
+    Append a mutation to the change journal in the caller's transaction
+    
+    Does nothing on the central server, where SITE_ID is not configured.
+    
+    Args:
+        db: Database session
+        entity: Entity name ("dispatch" or "sample")
+        op: Operation ("create", "update", "return" or "delete")
+        record_id: Local record ID
+        payload: Values needed to replay the change
+        site_id: Site identifier (defaults to settings.SITE_ID)
+        
+    Returns:
+        Journal entry, or None when journaling is disabled
+    """
+    site_id = site_id or settings.SITE_ID
+    if not site_id:
+        return None
+
+    entry = ChangeJournal(
+        site_id=site_id,
+        seq=next_sequence(db, site_id),
+        entity=entity,
+        op=op,
+        record_id=record_id,
+        payload=payload,
+    )
+    db.add(entry)
+    return entry
+
+
+def record_deletions(db: Session, model: Any, record_ids: List[int]) -> None:
+    """
+    Tombstone deleted reference rows in the caller's transaction
+
+    Does nothing on a local site, whose reference data comes from central,
+    or for tables sites do not pull.
+
+    Args:
+        db: Database session
+        model: ORM model class of the deleted rows
+        record_ids: Deleted record IDs
+    """
+    if settings.SITE_ID or model.__tablename__ not in TOMBSTONE_TABLES or not record_ids:
+        return
+    db.execute(insert(SyncTombstone), [
+        {"entity": model.__tablename__, "record_id": record_id} for record_id in record_ids
+    ])
@@ -0,0 +1,537 @@
+"""
+Downhole compositing
+
+Length-weighted averages of assay values per drillhole, either over fixed
+length intervals (``length`` composites: 1 m, 2 m, ... counted down from
+the collar or from ``from_depth``) or over one depth range per hole
+(``interval`` composites: the whole sampled range, or from_depth to
+to_depth, e.g. a mineralised intercept).
+
+The samples of a project and their newest assay values are read in two
+queries and turned into NumPy columns: depths in integer centimetres, as
+in services/coverage.py, and a sample x analyte value matrix with NaN
+where a sample was not assayed. Compositing is then array arithmetic:
+
+- every sample is cut at the composite boundaries it crosses: np.repeat
+  expands it into one piece per composite it touches, and each piece's
+  weight is the length of the sample inside that composite
+- pieces are grouped by (hole, composite) with np.unique, and for each
+  analyte np.bincount sums weight x value and weight over the group
+- a composite value is the ratio of the two sums; an analyte assayed over
+  less than min_coverage of the composite length is left empty, so the
+  short residual at the bottom of a hole does not report a value taken
+  from a few centimetres of core
+
+Below detection values (qualifier "<") count as BELOW_DETECTION_FACTOR
+times the detection limit. Overlapping samples both contribute; GET
+/reports/coverage lists them.
+
+A project with PARALLEL_MIN_SAMPLES assayed samples or more is split into
+runs of whole holes that are composited in a pool of COMPOSITE_PROCESSES
+worker processes; the database reads stay in the calling thread. Each API
+worker keeps the COMPOSITE_CACHE_RUNS most recent results, tagged with the
+data version of the assay batches, samples and drillholes tables (an
+import finishes by updating its batch), and concurrent identical requests
+share one computation.
+"""
+import importlib.util
+import io
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import Float, case, select, type_coerce
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.assay import AssayAnalyte, AssayBatch, AssayResult
+from app.models.drillhole import Drillhole
+from app.models.sample import Sample
+from app.services.data_version import DataVersion, get_data_version
+from app.services.process_pool import get_pool, shutdown_pool
+from app.services.reference_cache import ReferenceNames
+from app.utils.single_flight import SingleFlight
+
+logger = logging.getLogger("uvicorn")
+
+COMPOSITE_METHODS = ("length", "interval")
+
+# Tables a composite run is built from
+COMPOSITE_MODELS = (AssayBatch, Sample, Drillhole)
+
+# Below detection values are composited at this fraction of the limit
+BELOW_DETECTION_FACTOR = 0.5
+
+# Smaller projects are composited in the request thread: shipping the
+# columns to the pool and back costs more than it saves
+PARALLEL_MIN_SAMPLES = 100_000
+
+# Sample pieces per run; keeps a tiny length on deep holes from exhausting memory
+MAX_PIECES = 5_000_000
+
+composite_flight = SingleFlight("assays.composites")
+
+
+def _centimetres(metres: np.ndarray) -> np.ndarray:
+    return np.rint(metres * 100).astype(np.int64)
+
+
+def _metres(centimetres: np.ndarray) -> np.ndarray:
+    return np.round(centimetres / 100, 2)
+
+
+def fetch_columns(
+    db: Session,
+    project_id: int,
+    analyte_ids: Optional[Sequence[int]] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[int]]:
+    """
+    Assayed samples of a project as columns, in two queries
+
+    Args:
+        db: Database session
+        project_id: Project primary key
+        analyte_ids: Analyte columns, in this order (default: every analyte
+            assayed in the project, by id)
+
+    Returns:
+        (drillhole ids, from_depth, to_depth in metres with NaN when
+        missing, sample x analyte values with NaN when not assayed,
+        analyte ids of the value columns); only samples with at least one
+        value are returned
+    """
+    holes = select(Drillhole.id).where(Drillhole.project_id == project_id)
+    # Executed on the session's connection: the ORM result layer costs more
+    # per row than the compositing does. Depths are read as floats, since
+    # building Decimals costs as much again.
+    connection = db.connection()
+    samples = connection.execute(
+        select(
+            Sample.id,
+            Sample.drillhole_id,
+            type_coerce(Sample.from_depth, Float),
+            type_coerce(Sample.to_depth, Float),
+        )
+        .where(Sample.drillhole_id.in_(holes))
+    ).all()
+    stmt = select(
+        AssayResult.sample_id,
+        AssayResult.analyte_id,
+        AssayResult.batch_id,
+        AssayResult.id,
+        case(
+            (AssayResult.qualifier == "<", AssayResult.value * BELOW_DETECTION_FACTOR),
+            else_=AssayResult.value,
+        ),
+    ).where(AssayResult.drillhole_id.in_(holes))
+    if analyte_ids is not None:
+        stmt = stmt.where(AssayResult.analyte_id.in_(list(analyte_ids)))
+    results = connection.execute(stmt).all()
+
+    empty = (np.empty(0, np.int64), np.empty(0), np.empty(0))
+    columns = list(analyte_ids) if analyte_ids is not None else []
+    if not samples or not results:
+        return (*empty, np.empty((0, len(columns))), columns)
+
+    ids, sample_holes, starts, ends = zip(*samples)
+    ids, sample_holes = np.array(ids, np.int64), np.array(sample_holes, np.int64)
+    starts, ends = np.array(starts, np.float64), np.array(ends, np.float64)
+    result_samples, result_analytes, batches, result_ids, values = zip(*results)
+    result_samples, result_analytes = np.array(result_samples, np.int64), np.array(result_analytes, np.int64)
+    batches, result_ids = np.array(batches, np.int64), np.array(result_ids, np.int64)
+    values = np.array(values, np.float64)
+    if analyte_ids is None:
+        columns = np.unique(result_analytes).tolist()
+
+    # Newest row per (sample, analyte), by (batch_id, id) as in
+    # services/assay_results.py: the last row of each group once sorted
+    # by batch and id within it
+    order = np.lexsort((result_ids, batches, result_analytes, result_samples))
+    result_samples, result_analytes, values = result_samples[order], result_analytes[order], values[order]
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = (result_samples[1:] != result_samples[:-1]) | (result_analytes[1:] != result_analytes[:-1])
+
+    by_id = np.argsort(ids)
+    position = np.searchsorted(ids[by_id], result_samples[last])
+    # Results copied to this project's holes whose sample has since moved
+    found = ids[by_id][np.minimum(position, len(ids) - 1)] == result_samples[last]
+    rows = by_id[np.minimum(position, len(ids) - 1)][found]
+    analyte_order = np.argsort(columns)
+    cols = analyte_order[np.searchsorted(np.asarray(columns)[analyte_order], result_analytes[last][found])]
+    matrix = np.full((len(ids), len(columns)), np.nan)
+    matrix[rows, cols] = values[last][found]
+
+    assayed = ~np.all(np.isnan(matrix), axis=1)
+    return sample_holes[assayed], starts[assayed], ends[assayed], matrix[assayed], columns
+
+
+def composite(
+    holes: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    values: np.ndarray,
+    length: Optional[float] = 2.0,
+    from_depth: Optional[float] = None,
+    to_depth: Optional[float] = None,
+    min_coverage: float = 0.5,
+) -> Dict[str, np.ndarray]:
+    """
+    Length-weighted composites of sample values
+
+    Args:
+        holes: Drillhole id of each sample
+        starts: from_depth of each sample in metres (NaN when missing)
+        ends: to_depth of each sample in metres (NaN when missing)
+        values: Sample x analyte values, NaN where not assayed
+        length: Composite length in metres; None for one composite per
+            hole (interval method)
+        from_depth: Composite from this depth (default: the collar for
+            length composites, the top sample for interval composites)
+        to_depth: Composite to this depth
+        min_coverage: Fraction of a composite's length an analyte must be
+            assayed over to get a value
+
+    Returns:
+        Columns per composite in hole and depth order: drillhole_id,
+        from_depth, to_depth, sampled_length (metres), samples, and values
+        (composite x analyte, NaN when empty); composites without any
+        value are left out
+
+    Raises:
+        ValueError: If the samples would be cut into more than MAX_PIECES pieces
+    """
+    analytes = values.shape[1]
+    placed = ~(np.isnan(starts) | np.isnan(ends))
+    placed[placed] = ends[placed] > starts[placed]
+    holes, values = holes[placed], values[placed]
+    start, end = _centimetres(starts[placed]), _centimetres(ends[placed])
+    low = int(round(from_depth * 100)) if from_depth is not None else None
+    high = int(round(to_depth * 100)) if to_depth is not None else None
+    if low is not None:
+        start = np.maximum(start, low)
+    if high is not None:
+        end = np.minimum(end, high)
+    inside = end > start
+    holes, values, start, end = holes[inside], values[inside], start[inside], end[inside]
+
+    if length is None:
+        first = np.zeros(len(start), np.int64)
+        count = np.ones(len(start), np.int64)
+    else:
+        step = max(1, int(round(length * 100)))
+        origin = low or 0
+        first = (start - origin) // step
+        count = (end - 1 - origin) // step - first + 1
+    total = int(count.sum())
+    if total > MAX_PIECES:
+        raise ValueError(f"Compositing needs {total} sample pieces; use a longer composite length")
+
+    # Piece p is the part of sample[p] inside composite index[p] of its hole
+    sample = np.repeat(np.arange(len(start)), count)
+    index = np.repeat(first, count) + (np.arange(total) - np.repeat(np.cumsum(count) - count, count))
+    if length is None:
+        piece_start, piece_end = start, end
+    else:
+        piece_start = np.maximum(start[sample], origin + index * step)
+        piece_end = np.minimum(end[sample], origin + (index + 1) * step)
+    weight = (piece_end - piece_start).astype(np.float64)
+
+    hole_ids, hole_rank = np.unique(holes, return_inverse=True)
+    # Samples above the collar have negative indexes; shift them so every
+    # hole's keys stay inside its own span
+    offset = int(index.min()) if total else 0
+    span = int(index.max()) - offset + 1 if total else 1
+    keys, group = np.unique(hole_rank[sample] * span + (index - offset), return_inverse=True)
+    k = len(keys)
+
+    if length is None:
+        top = np.full(k, np.iinfo(np.int64).max)
+        bottom = np.zeros(k, np.int64)
+        np.minimum.at(top, group, piece_start)
+        np.maximum.at(bottom, group, piece_end)
+        comp_from = np.full(k, low) if low is not None else top
+        comp_to = np.full(k, high) if high is not None else bottom
+    else:
+        comp_from = origin + (keys % span + offset) * step
+        comp_to = comp_from + step
+        if high is not None:
+            comp_to = np.minimum(comp_to, high)
+    comp_length = (comp_to - comp_from).astype(np.float64)
+
+    piece_values = values[sample]
+    composites = np.full((k, analytes), np.nan)
+    for column in range(analytes):
+        v = piece_values[:, column]
+        assayed = ~np.isnan(v)
+        weights = np.bincount(group[assayed], weights=weight[assayed], minlength=k)
+        sums = np.bincount(group[assayed], weights=weight[assayed] * v[assayed], minlength=k)
+        enough = (weights > 0) & (weights >= min_coverage * comp_length)
+        composites[enough, column] = sums[enough] / weights[enough]
+
+    filled = ~np.all(np.isnan(composites), axis=1) if analytes else np.zeros(k, dtype=bool)
+    sampled = np.minimum(np.bincount(group, weights=weight, minlength=k), comp_length)
+    return {
+        "drillhole_id": hole_ids[keys // span][filled],
+        "from_depth": _metres(comp_from[filled]),
+        "to_depth": _metres(comp_to[filled]),
+        "sampled_length": _metres(sampled[filled]),
+        "samples": np.bincount(group, minlength=k)[filled],
+        "values": composites[filled],
+    }
+
+
+def _hole_runs(holes: np.ndarray, runs: int) -> List[np.ndarray]:
+    """Sample positions split into up to ``runs`` groups of whole holes with similar sample counts"""
+    order = np.argsort(holes, kind="stable")
+    boundaries = np.flatnonzero(np.diff(holes[order])) + 1
+    cuts = np.searchsorted(boundaries, np.arange(1, runs) * len(order) / runs)
+    splits = np.unique(boundaries[np.minimum(cuts, len(boundaries) - 1)]) if len(boundaries) else []
+    return [part for part in np.split(order, splits) if len(part)]
+
+
+def composite_parallel(
+    holes: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    values: np.ndarray,
+    processes: Optional[int] = None,
+    **options: Any,
+) -> Dict[str, np.ndarray]:
+    """
+    composite() over runs of whole holes in the process pool
+
+    Args:
+        holes, starts, ends, values: As for composite()
+        processes: Runs to split into (default: COMPOSITE_PROCESSES); below
+            two, or under PARALLEL_MIN_SAMPLES samples, composites in this
+            thread
+        options: length, from_depth, to_depth and min_coverage for composite()
+
+    Returns:
+        composite() columns, in hole and depth order
+
+    Raises:
+        ValueError: If a run would be cut into more than MAX_PIECES pieces
+    """
+    processes = settings.COMPOSITE_PROCESSES if processes is None else processes
+    if processes < 2 or len(holes) < PARALLEL_MIN_SAMPLES:
+        return composite(holes, starts, ends, values, **options)
+
+    runs = _hole_runs(holes, processes)
+    try:
+        pool = get_pool(processes)
+        futures = [
+            pool.submit(composite, holes[run], starts[run], ends[run], values[run], **options)
+            for run in runs
+        ]
+        parts = [future.result() for future in futures]
+    except BrokenProcessPool:
+        logger.warning("Compositing process pool failed; compositing in the request thread")
+        shutdown_pool()
+        return composite(holes, starts, ends, values, **options)
+
+    # Runs hold ascending, disjoint hole ranges, so concatenation keeps the order
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+@dataclass(frozen=True)
+class CompositeRun:
+    """Composites of one project at one data version"""
+    token: str
+    settled: bool
+    project_id: int
+    analytes: List[str]
+    columns: Dict[str, np.ndarray] = field(repr=False)
+
+    def __len__(self) -> int:
+        return len(self.columns["drillhole_id"])
+
+
+def run_composites(
+    db: Session,
+    project_id: int,
+    version: DataVersion,
+    analyte_ids: Optional[Sequence[int]] = None,
+    **options: Any,
+) -> CompositeRun:
+    """
+    Read a project's assays and composite them
+
+    Args:
+        db: Database session
+        project_id: Project primary key
+        version: Data version of COMPOSITE_MODELS read before the rows
+        analyte_ids: Analytes to composite (default: all)
+        options: length, from_depth, to_depth and min_coverage for composite()
+
+    Returns:
+        CompositeRun
+
+    Raises:
+        ValueError: If the samples would be cut into more than MAX_PIECES pieces
+    """
+    holes, starts, ends, values, columns = fetch_columns(db, project_id, analyte_ids)
+    codes = dict(db.execute(select(AssayAnalyte.id, AssayAnalyte.code)).all()) if columns else {}
+    return CompositeRun(
+        token=version.token,
+        settled=version.settled,
+        project_id=project_id,
+        analytes=[codes[analyte_id] for analyte_id in columns],
+        columns=composite_parallel(holes, starts, ends, values, **options),
+    )
+
+
+class CompositeCache:
+    """
+    Recently computed composite runs
+
+    Args:
+        max_runs: Runs kept; the least recently used is dropped first
+    """
+
+    def __init__(self, max_runs: int):
+        self.max_runs = max_runs
+        self._runs: "OrderedDict[tuple, CompositeRun]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.computed = 0
+
+    def get(
+        self,
+        db: Session,
+        project_id: int,
+        analyte_ids: Optional[Sequence[int]] = None,
+        version: Optional[DataVersion] = None,
+        **options: Any,
+    ) -> CompositeRun:
+        """
+        Composites of a project at the current data version
+
+        Args:
+            db: Session for the version check and a recomputation
+            project_id: Project primary key
+            analyte_ids: Analytes to composite (default: all)
+            version: Data version of COMPOSITE_MODELS the request already
+                read (its ETag); read here when not given
+            options: length, from_depth, to_depth and min_coverage for composite()
+
+        Returns:
+            CompositeRun
+
+        Raises:
+            ValueError: If the samples would be cut into more than MAX_PIECES pieces
+        """
+        if version is None:
+            version = get_data_version(db, COMPOSITE_MODELS)
+        key = (project_id, tuple(analyte_ids) if analyte_ids is not None else None, tuple(sorted(options.items())))
+        with self._lock:
+            run = self._runs.get(key)
+            if run is not None and run.settled and version.settled and run.token == version.token:
+                self._runs.move_to_end(key)
+                self.hits += 1
+                return run
+
+        run = composite_flight.do(
+            (key, version.token),
+            lambda: run_composites(db, project_id, version, analyte_ids, **options),
+        )
+        with self._lock:
+            self.computed += 1
+            if run.settled and self.max_runs > 0:
+                self._runs[key] = run
+                self._runs.move_to_end(key)
+                while len(self._runs) > self.max_runs:
+                    self._runs.popitem(last=False)
+        return run
+
+    def clear(self) -> None:
+        """Drop every run"""
+        with self._lock:
+            self._runs.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cached runs and composites of this process"""
+        with self._lock:
+            runs = list(self._runs.values())
+        return {
+            "runs": len(runs),
+            "composites": sum(len(run) for run in runs),
+            "hits": self.hits,
+            "computed": self.computed,
+        }
+
+
+composite_cache = CompositeCache(settings.COMPOSITE_CACHE_RUNS)
+
+
+def composite_rows(run: CompositeRun, names: ReferenceNames, drillhole_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Composites as JSON-ready rows with values by analyte code
+
+    Args:
+        run: Composite run
+        names: Reference name lookups
+        drillhole_id: Only this hole's composites
+
+    Returns:
+        [{drillhole_id, drillhole, from_depth, to_depth, sampled_length,
+        samples, values: {code: value}}] without empty values
+    """
+    columns = run.columns
+    selected = np.flatnonzero(columns["drillhole_id"] == drillhole_id) if drillhole_id is not None else slice(None)
+    lists = {name: columns[name][selected].tolist() for name in columns if name != "values"}
+    matrix = columns["values"][selected]
+    filled = ~np.isnan(matrix)
+    values = matrix.tolist()
+    rows = []
+    for i, hole in enumerate(lists["drillhole_id"]):
+        rows.append({
+            "drillhole_id": hole,
+            "drillhole": names.drillhole(hole),
+            "from_depth": lists["from_depth"][i],
+            "to_depth": lists["to_depth"][i],
+            "sampled_length": lists["sampled_length"][i],
+            "samples": lists["samples"][i],
+            "values": {code: values[i][j] for j, code in enumerate(run.analytes) if filled[i, j]},
+        })
+    return rows
+
+
+def parquet_unavailable() -> Optional[str]:
+    """Why Parquet export is unavailable, or None"""
+    # find_spec checks the optional dependency without importing it
+    return None if importlib.util.find_spec("pyarrow") else "Parquet export needs the pyarrow package"
+
+
+def composite_parquet(run: CompositeRun, names: ReferenceNames) -> bytes:
+    """
+    Composites as a Parquet file, one column per analyte
+
+    Args:
+        run: Composite run
+        names: Reference name lookups
+
+    Returns:
+        Parquet file contents
+    """
+    import pyarrow
+    import pyarrow.parquet
+
+    columns = run.columns
+    table = {
+        "project_id": np.full(len(run), run.project_id, np.int64),
+        "drillhole_id": columns["drillhole_id"],
+        "drillhole": [names.drillhole(hole) for hole in columns["drillhole_id"].tolist()],
+        "from_depth": columns["from_depth"],
+        "to_depth": columns["to_depth"],
+        "sampled_length": columns["sampled_length"],
+        "samples": columns["samples"],
+    }
+    for j, code in enumerate(run.analytes):
+        # NaN becomes null, so empty composites read as missing values
+        table[code] = pyarrow.array(columns["values"][:, j], from_pandas=True)
+    buffer = io.BytesIO()
+    pyarrow.parquet.write_table(pyarrow.table(table), buffer)
+    return buffer.getvalue()
@@ -0,0 +1,113 @@
+"""
+Rebuild and verify denormalized child counters
+
+Counters are maintained incrementally by app.models.counters; these
+set-based statements recompute them from the child tables, for backfills
+and after bulk deletes that bypass ORM events.
+subtract_child_counts keeps them exact when such deletes are planned.
+"""
+from typing import Any, Dict, List
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.counters import COUNTERS, CounterSpec
+
+
+def _actual_count(spec: CounterSpec):
+    child = spec.child.__table__
+    parent = spec.parent.__table__
+    return (
+        select(func.count())
+        .select_from(child)
+        .where(child.c[spec.foreign_key] == parent.c.id)
+        .scalar_subquery()
+    )
+
+
+def verify_counters(db: Session, sample_size: int = 10) -> List[Dict[str, Any]]:
+    """
+    Compare every counter with a fresh COUNT of its children
+
+    Args:
+        db: Database session
+        sample_size: Number of drifted rows to report per counter
+
+    Returns:
+        One entry per counter with the number of drifted rows and examples
+    """
+    report = []
+    for spec in COUNTERS:
+        parent = spec.parent.__table__
+        actual = _actual_count(spec)
+        drift = parent.c[spec.column] != actual
+        drifted = db.execute(
+            select(func.count()).select_from(parent).where(drift)
+        ).scalar()
+        examples = db.execute(
+            select(parent.c.id, parent.c[spec.column], actual.label("actual"))
+            .where(drift)
+            .order_by(parent.c.id)
+            .limit(sample_size)
+        ).all()
+        report.append({
+            "counter": f"{parent.name}.{spec.column}",
+            "drifted": drifted,
+            "examples": [
+                {"id": row.id, "stored": row[1], "actual": row.actual}
+                for row in examples
+            ],
+        })
+    return report
+
+
+def rebuild_counters(db: Session) -> Dict[str, int]:
+    """
+    Recompute counters that differ from their children (does not commit)
+
+    Only drifted rows are written, and updated_at is left unchanged.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of corrected rows per counter
+    """
+    fixed = {}
+    for spec in COUNTERS:
+        parent = spec.parent.__table__
+        actual = _actual_count(spec)
+        result = db.execute(
+            parent.update()
+            .where(parent.c[spec.column] != actual)
+            .values({spec.column: actual, "updated_at": parent.c.updated_at})
+        )
+        fixed[f"{parent.name}.{spec.column}"] = result.rowcount
+    return fixed
+
+
+def subtract_child_counts(db: Session, model, condition) -> None:
+    """
+    Decrement parent counters for child rows about to be deleted in bulk
+
+    Call before a Core/bulk DELETE (or a DELETE whose rows go away through
+    ON DELETE CASCADE), in the same transaction.
+
+    Args:
+        db: Database session
+        model: Child model class whose rows will be deleted
+        condition: SQL expression selecting those rows
+    """
+    for spec in COUNTERS:
+        if spec.child is not model:
+            continue
+        foreign_key = getattr(model, spec.foreign_key)
+        groups = db.query(foreign_key, func.count()).filter(condition).group_by(foreign_key).all()
+        parent = spec.parent.__table__
+        for parent_id, count in groups:
+            db.execute(
+                parent.update()
+                .where(parent.c.id == parent_id)
+                .values({
+                    spec.column: parent.c[spec.column] - count,
+                    "updated_at": parent.c.updated_at,
+                })
+            )
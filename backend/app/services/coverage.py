@@ -0,0 +1,326 @@
+"""
+Downhole sampling coverage
+
+Per-drillhole and per-project sampling statistics for GET /reports/coverage:
+metres sampled against Drillhole.depth, gaps, double-sampled ranges and
+sampled metres by depth bin. The sample intervals of the selected holes
+are read in one query and turned into NumPy columns; every statistic is
+then an array operation over all holes at once:
+
+- depths become integer centimetres (DECIMAL(10,2) exactly), so
+  back-to-back samples compare equal and never produce hairline gaps
+- intervals are sorted by (hole, from_depth) with lexsort
+- a running maximum of to_depth per hole (np.maximum.accumulate over ends
+  offset by the hole's rank) gives each interval the deepest depth sampled
+  before it: starting below that is a gap, above it an overlap, and the
+  part past it is newly sampled
+- per-hole sums are np.bincount over the hole rank, per-project sums
+  np.bincount over the holes' project rank
+- metres per depth bin are differences of the cumulative sampled (or
+  drilled) length at the bin edges, found with np.searchsorted over the
+  sorted piece starts and ends
+
+Intervals are half-open [from_depth, to_depth) and gaps and overlaps are
+counted as in services/sample_intervals.py. Samples without both depths,
+or with to_depth shallower than from_depth, are counted as unplaced.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import Float, select, type_coerce
+from sqlalchemy.orm import Session
+from app.models.drillhole import Drillhole
+from app.models.project import Project
+from app.models.sample import Sample
+from app.services.reference_cache import ReferenceNames
+
+# Bins per report; keeps a bogus Drillhole.depth from exploding the output
+MAX_DEPTH_BINS = 5000
+
+
+class DepthBinsError(ValueError):
+    """The depth range needs more than MAX_DEPTH_BINS bins"""
+
+
+def _centimetres(metres: np.ndarray) -> np.ndarray:
+    return np.rint(metres * 100).astype(np.int64)
+
+
+def _metres(centimetres) -> Any:
+    return np.round(np.asarray(centimetres, dtype=np.float64) / 100, 2)
+
+
+def _values(column: np.ndarray) -> List[Optional[float]]:
+    """Array to JSON-ready list, NaN as None"""
+    return [None if value != value else value for value in column.tolist()]
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.round(np.where(denominator > 0, numerator / denominator, np.nan), 4)
+
+
+def _cumulative_length(starts: np.ndarray, ends: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Total length of the pieces [start, end) lying above each edge"""
+    starts, ends = np.sort(starts), np.sort(ends)
+    start_sums = np.concatenate(([0], np.cumsum(starts)))
+    end_sums = np.concatenate(([0], np.cumsum(ends)))
+    below_start = np.searchsorted(starts, edges)
+    below_end = np.searchsorted(ends, edges)
+    # Each piece contributes edge - start once started, minus edge - end once ended
+    return (below_start * edges - start_sums[below_start]) - (below_end * edges - end_sums[below_end])
+
+
+def fetch_holes(db: Session, project_id: Optional[int] = None, company_id: Optional[int] = None):
+    """
+    Drillholes of a project or of a company's projects
+
+    Returns:
+        (ids, codes, project ids, depths in metres with NaN when unknown)
+    """
+    stmt = select(Drillhole.id, Drillhole.drillhole_id, Drillhole.project_id, Drillhole.depth)
+    if project_id is not None:
+        stmt = stmt.where(Drillhole.project_id == project_id)
+    if company_id is not None:
+        stmt = stmt.where(Drillhole.project_id.in_(select(Project.id).where(Project.company_id == company_id)))
+    rows = db.execute(stmt.order_by(Drillhole.project_id, Drillhole.drillhole_id)).all()
+    if not rows:
+        return np.empty(0, np.int64), [], np.empty(0, np.int64), np.empty(0)
+    ids, codes, projects, depths = zip(*rows)
+    return np.array(ids, np.int64), list(codes), np.array(projects, np.int64), np.array(depths, np.float64)
+
+
+def fetch_intervals(db: Session, hole_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sample intervals of the given holes as columns, in one query
+
+    Returns:
+        (drillhole ids, from_depth, to_depth); missing depths are NaN
+    """
+    if not len(hole_ids):
+        return np.empty(0, np.int64), np.empty(0), np.empty(0)
+    # Read depths as floats: building 100k Decimals costs more than the statistics
+    rows = db.execute(
+        select(
+            Sample.drillhole_id,
+            type_coerce(Sample.from_depth, Float),
+            type_coerce(Sample.to_depth, Float),
+        )
+        .where(Sample.drillhole_id.in_(hole_ids.tolist()))
+    ).all()
+    if not rows:
+        return np.empty(0, np.int64), np.empty(0), np.empty(0)
+    holes, starts, ends = zip(*rows)
+    return np.array(holes, np.int64), np.array(starts, np.float64), np.array(ends, np.float64)
+
+
+def compute_coverage(
+    hole_ids: np.ndarray,
+    depths: np.ndarray,
+    sample_holes: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    bin_size: float = 10.0,
+    min_gap: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Coverage statistics per hole and per depth bin
+
+    Args:
+        hole_ids: Drillhole ids (the hole index of every result column)
+        depths: Drillhole.depth per hole in metres, NaN when unknown
+        sample_holes: Drillhole id of each sample
+        starts: from_depth of each sample in metres (NaN when missing)
+        ends: to_depth of each sample in metres (NaN when missing)
+        bin_size: Depth bin height in metres
+        min_gap: Gaps of at most this many metres are not counted
+
+    Returns:
+        {"holes": {column: array per hole}, "bins": {column: array per bin}}
+
+    Raises:
+        DepthBinsError: If the depth range needs more than MAX_DEPTH_BINS bins
+    """
+    k = len(hole_ids)
+    by_id = np.argsort(hole_ids)
+    rank = by_id[np.searchsorted(hole_ids[by_id], sample_holes)] if len(sample_holes) else np.empty(0, np.int64)
+
+    placed = ~(np.isnan(starts) | np.isnan(ends))
+    placed[placed] = ends[placed] >= starts[placed]
+    unplaced = np.bincount(rank[~placed], minlength=k)
+    rank = rank[placed]
+    start = _centimetres(starts[placed])
+    end = _centimetres(ends[placed])
+    order = np.lexsort((end, start, rank))
+    rank, start, end = rank[order], start[order], end[order]
+    n = len(rank)
+
+    intervals = np.bincount(rank, minlength=k)
+    top = np.full(k, np.nan)
+    bottom = np.full(k, np.nan)
+    sampled = np.zeros(k)
+    gap_count = gap_length = overlap_count = overlap_length = np.zeros(k)
+    pieces = (np.empty(0, np.int64), np.empty(0, np.int64))
+    if n:
+        # Running max of to_depth within each hole: shifting every hole
+        # above the previous one lets one accumulate run across all of them
+        span = int(end.max() - min(int(start.min()), 0)) + 1
+        offset = rank.astype(np.int64) * span
+        reach = np.maximum.accumulate(end + offset) - offset
+        first = np.ones(n, dtype=bool)
+        first[1:] = rank[1:] != rank[:-1]
+        last = np.ones(n, dtype=bool)
+        last[:-1] = first[1:]
+        # Deepest to_depth of the earlier samples of the same hole
+        before = np.empty(n, np.int64)
+        before[0] = 0
+        before[1:] = reach[:-1]
+
+        gap = np.where(~first & (start > before), start - before, 0)
+        is_gap = gap > round(min_gap * 100)
+        is_overlap = ~first & (start < before) & (end > start)
+        overlap = np.where(is_overlap, np.minimum(end, before) - start, 0)
+        covered_from = np.where(first, start, np.maximum(start, before))
+        covered = np.clip(end - covered_from, 0, None)
+
+        gap_count = np.bincount(rank, weights=is_gap, minlength=k)
+        gap_length = np.bincount(rank, weights=np.where(is_gap, gap, 0), minlength=k)
+        overlap_count = np.bincount(rank, weights=is_overlap, minlength=k)
+        overlap_length = np.bincount(rank, weights=overlap, minlength=k)
+        sampled = np.bincount(rank, weights=covered, minlength=k)
+        top[rank[first]] = start[first]
+        bottom[rank[last]] = reach[last]
+        newly = covered > 0
+        pieces = (covered_from[newly], end[newly])
+
+    # Holes without a recorded depth count as drilled to their deepest sample
+    drilled_cm = np.where(np.isnan(depths), bottom, np.rint(depths * 100))
+    drilled_cm = np.where(np.isnan(drilled_cm), 0, drilled_cm).astype(np.int64)
+
+    bin_cm = max(1, int(round(bin_size * 100)))
+    deepest = int(max(drilled_cm.max(initial=0), end.max(initial=0)))
+    bin_count = max(1, -(-deepest // bin_cm))
+    if bin_count > MAX_DEPTH_BINS:
+        raise DepthBinsError(f"Depth range needs {bin_count} bins of {bin_size} m; use a larger bin_size")
+    edges = np.arange(bin_count + 1, dtype=np.int64) * bin_cm
+    sampled_bins = np.diff(_cumulative_length(pieces[0], pieces[1], edges))
+    drilled = drilled_cm[drilled_cm > 0]
+    drilled_bins = np.diff(_cumulative_length(np.zeros(len(drilled), np.int64), drilled, edges))
+    holes_reaching = len(drilled) - np.searchsorted(np.sort(drilled), edges[:-1], side="right")
+    middles = (start + end) // 2
+    # Samples above the collar (negative depths) count in the first bin
+    samples_per_bin = np.bincount(np.clip(middles // bin_cm, 0, bin_count - 1), minlength=bin_count)
+
+    return {
+        "holes": {
+            "depth": depths,
+            "intervals": intervals,
+            "unplaced": unplaced,
+            "top": _metres(top),
+            "bottom": _metres(bottom),
+            "drilled_length": _metres(drilled_cm),
+            "sampled_length": _metres(sampled),
+            "coverage": _ratio(sampled, drilled_cm),
+            "gap_count": gap_count.astype(np.int64),
+            "gap_length": _metres(gap_length),
+            "overlap_count": overlap_count.astype(np.int64),
+            "overlap_length": _metres(overlap_length),
+            "samples_per_metre": _ratio(intervals * 100.0, sampled),
+        },
+        "bins": {
+            "from_depth": _metres(edges[:-1]),
+            "to_depth": _metres(edges[1:]),
+            "holes": holes_reaching,
+            "drilled_length": _metres(drilled_bins),
+            "sampled_length": _metres(sampled_bins),
+            "coverage": _ratio(sampled_bins, drilled_bins),
+            "samples": samples_per_bin,
+        },
+    }
+
+
+def _project_summaries(project_ids: np.ndarray, holes: Dict[str, np.ndarray], names: ReferenceNames) -> List[Dict[str, Any]]:
+    projects, project_rank = np.unique(project_ids, return_inverse=True)
+    count = len(projects)
+
+    def total(values) -> np.ndarray:
+        return np.bincount(project_rank, weights=values, minlength=count)
+
+    drilled = total(holes["drilled_length"])
+    sampled = total(holes["sampled_length"])
+    columns = {
+        "holes": np.bincount(project_rank, minlength=count),
+        "sampled_holes": total(holes["intervals"] > 0).astype(np.int64),
+        "intervals": total(holes["intervals"]).astype(np.int64),
+        "unplaced": total(holes["unplaced"]).astype(np.int64),
+        "drilled_length": np.round(drilled, 2),
+        "sampled_length": np.round(sampled, 2),
+        "coverage": _ratio(sampled, drilled),
+        "gap_count": total(holes["gap_count"]).astype(np.int64),
+        "gap_length": np.round(total(holes["gap_length"]), 2),
+        "overlap_count": total(holes["overlap_count"]).astype(np.int64),
+        "overlap_length": np.round(total(holes["overlap_length"]), 2),
+        "holes_with_gaps": total(holes["gap_count"] > 0).astype(np.int64),
+        "holes_with_overlaps": total(holes["overlap_count"] > 0).astype(np.int64),
+    }
+    lists = {name: _values(column) for name, column in columns.items()}
+    return [
+        {
+            "project_id": project_id,
+            "project_name": names.project(project_id),
+            **{name: values[i] for name, values in lists.items()},
+        }
+        for i, project_id in enumerate(projects.tolist())
+    ]
+
+
+def coverage_report(
+    db: Session,
+    names: ReferenceNames,
+    project_id: Optional[int] = None,
+    company_id: Optional[int] = None,
+    bin_size: float = 10.0,
+    min_gap: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Sampling coverage of a project's (or a company's) drillholes
+
+    Args:
+        db: Database session
+        names: Reference name lookups
+        project_id: Project to report on
+        company_id: Company whose projects to report on
+        bin_size: Depth bin height in metres
+        min_gap: Gaps of at most this many metres are not counted
+
+    Returns:
+        {"bin_size", "projects": [...], "holes": [...], "depth_bins": [...]}
+
+    Raises:
+        DepthBinsError: If the depth range needs more than MAX_DEPTH_BINS bins
+    """
+    hole_ids, codes, project_ids, depths = fetch_holes(db, project_id, company_id)
+    sample_holes, starts, ends = fetch_intervals(db, hole_ids)
+    result = compute_coverage(hole_ids, depths, sample_holes, starts, ends, bin_size, min_gap)
+
+    hole_lists = {name: _values(column) for name, column in result["holes"].items()}
+    ids, projects = hole_ids.tolist(), project_ids.tolist()
+    holes = [
+        {
+            "drillhole_id": ids[i],
+            "drillhole": codes[i],
+            "project_id": projects[i],
+            **{name: values[i] for name, values in hole_lists.items()},
+        }
+        for i in range(len(ids))
+    ]
+    bin_lists = {name: _values(column) for name, column in result["bins"].items()}
+    depth_bins = [
+        {name: values[i] for name, values in bin_lists.items()}
+        for i in range(len(bin_lists["from_depth"]))
+    ]
+    return {
+        "bin_size": bin_size,
+        "projects": _project_summaries(project_ids, result["holes"], names),
+        "holes": holes,
+        "depth_bins": depth_bins,
+    }
@@ -0,0 +1,86 @@
+"""
+Per-table data versions
+
+A table's version is its highest id, its deletion counter and its latest
+updated_at. Inserts move MAX(id), every ORM or Core UPDATE bumps
+updated_at and every deletion bumps the counter (app/models/table_version.py),
+so the triple changes whenever the rows do. All three are index lookups
+(the primary key, the table_versions row and the updated_at indexes of
+migration 0002), so a conditional GET never scans a table however large it
+is; all requested tables are read in a single round trip.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.table_version import TableVersion
+
+# TIMESTAMP columns have one-second resolution. A version whose newest row
+# is this recent may still change without moving MAX(updated_at), so it is
+# reported as unsettled and must not be used to answer 304s.
+SETTLE_SECONDS = 1
+
+
+@dataclass(frozen=True)
+class DataVersion:
+    """Combined version of one or more tables"""
+    # (table name, MAX(id), deletions, MAX(updated_at)) per table
+    tables: Tuple[Tuple[str, Optional[int], int, Optional[datetime]], ...]
+    checked_at: datetime
+
+    @property
+    def settled(self) -> bool:
+        """True when no table was modified within the last SETTLE_SECONDS"""
+        latest = [updated for _, _, _, updated in self.tables if updated is not None]
+        if not latest:
+            return True
+        return max(latest) <= self.checked_at - timedelta(seconds=SETTLE_SECONDS)
+
+    @property
+    def token(self) -> str:
+        """Stable hash of the table versions"""
+        raw = "|".join(
+            f"{name}:{max_id}:{deletions}:{updated.isoformat() if updated else ''}"
+            for name, max_id, deletions, updated in self.tables
+        )
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def get_data_version(db: Session, models: Iterable) -> DataVersion:
+    """
+    Read the data version of the tables behind the given models
+
+    Args:
+        db: Database session
+        models: ORM model classes with id and updated_at columns
+
+    Returns:
+        DataVersion for the tables, in the order given
+    """
+    models = list(models)
+    versions = TableVersion.__table__
+    columns = [func.current_timestamp()]
+    for model in models:
+        columns.append(select(func.max(model.id)).scalar_subquery())
+        columns.append(
+            select(versions.c.deletions)
+            .where(versions.c.table_name == model.__tablename__)
+            .scalar_subquery()
+        )
+        columns.append(select(func.max(model.updated_at)).scalar_subquery())
+    row = db.execute(select(*columns)).one()
+    checked_at = _as_datetime(row[0])
+    tables = tuple(
+        (model.__tablename__, row[1 + 3 * i], row[2 + 3 * i] or 0, _as_datetime(row[3 + 3 * i]))
+        for i, model in enumerate(models)
+    )
+    return DataVersion(tables=tables, checked_at=checked_at)
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    # SQLite hands back bare strings for scalar subqueries
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
@@ -0,0 +1,112 @@
+"""
+Dispatch listing queries
+
+Builds dispatch-with-details rows straight from one SQL projection of the
+dispatch columns instead of loading ORM objects and their relationships
+per row. Project, drillhole and company names are resolved from the
+reference cache (services/reference_cache.py) rather than joined.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from app.models.dispatch import Dispatch, DispatchStatus
+from app.schemas.dispatch import DispatchResponse
+from app.services.reference_cache import ReferenceNames, reference_cache
+from app.utils.helpers import calculate_days_out
+from app.utils.responses import schema_columns
+
+DISPATCH_COLUMNS = schema_columns(DispatchResponse, Dispatch)
+
+
+def dispatch_details_statement() -> StatementLambdaElement:
+    """
+    Cached statement selecting the dispatch columns of DispatchWithDetails
+    
+    Callers add filters, ordering and paging with ``stmt += lambda s: ...``
+    (see services/statements.py).
+    
+    Returns:
+        Lambda statement over dispatch columns (names come from
+        dispatch_detail_rows)
+    """
+    return lambda_stmt(lambda: select(*DISPATCH_COLUMNS))
+
+
+def dispatch_detail_rows(rows, names: ReferenceNames, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Turn projection rows into DispatchWithDetails dictionaries
+    
+    Args:
+        rows: Rows from dispatch_details_statement
+        names: Reference name lookups
+        now: Reference time for days_out of outstanding dispatches
+        
+    Returns:
+        List of dispatch dictionaries with names, days_out and is_match
+    """
+    now = now or datetime.utcnow()
+    result = []
+    for row in rows:
+        item = dict(row._mapping)
+        item["project_name"] = names.project(item["project_id"])
+        item["drillhole_name"] = names.drillhole(item["drillhole_id"])
+        item["company_name"] = names.company(item["company_id"])
+        item["days_out"] = calculate_days_out(item["dispatch_date"], item["return_date"] or now)
+        if item["status"] == DispatchStatus.RETURNED:
+            # A missing return count is 0 boxes, as in the reconciliation report
+            item["is_match"] = (
+                (item["returned_hq"] or 0) == item["hq_boxes"] and
+                (item["returned_nq"] or 0) == item["nq_boxes"]
+            )
+        else:
+            item["is_match"] = None
+        result.append(item)
+    return result
+
+
+EXPORT_HEADERS = [
+    "ID", "Project", "Drillhole", "Company", "Dispatch Date",
+    "HQ Boxes", "NQ Boxes", "Driver", "Technician",
+    "Samples Collected", "Sample Type", "Status",
+    "Return Date", "Returned HQ", "Returned NQ",
+    "Return Condition", "Return Notes"
+]
+
+
+def dispatch_export_rows(db: Session, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Stream dispatches as CSV export rows, newest first
+    
+    Args:
+        db: Database session (kept busy until the iterator is exhausted)
+        batch_size: Rows fetched per round trip
+        
+    Yields:
+        Dictionaries keyed by EXPORT_HEADERS
+    """
+    names = reference_cache.names(db, streaming=True)
+    stmt = dispatch_details_statement()
+    stmt += lambda s: s.order_by(Dispatch.dispatch_date.desc())
+    rows = db.execute(stmt, execution_options={"stream_results": True, "yield_per": batch_size})
+    for row in rows:
+        yield {
+            "ID": row.id,
+            "Project": names.project(row.project_id) or "",
+            "Drillhole": names.drillhole(row.drillhole_id) or "",
+            "Company": names.company(row.company_id) or "",
+            "Dispatch Date": row.dispatch_date.isoformat(),
+            "HQ Boxes": row.hq_boxes,
+            "NQ Boxes": row.nq_boxes,
+            "Driver": row.driver,
+            "Technician": row.technician,
+            "Samples Collected": row.samples_collected,
+            "Sample Type": row.sample_type or "",
+            "Status": row.status.value,
+            "Return Date": row.return_date.isoformat() if row.return_date else "",
+            "Returned HQ": row.returned_hq or "",
+            "Returned NQ": row.returned_nq or "",
+            "Return Condition": row.return_condition or "",
+            "Return Notes": row.return_notes or ""
+        }
@@ -0,0 +1,221 @@
+"""
+Dispatch search
+
+Builds one statement from any combination of the search filters. Each
+filter is its own lambda (services/statements.py), so a combination is
+compiled once and later requests only bind new values.
+
+The filters are written so that MySQL can answer them from an index:
+
+- project, drillhole, company and status are equality filters leading the
+  (column, dispatch_date) indexes, which also deliver the page order
+- driver and technician are prefix matches (``LIKE 'abc%'``), an index range
+- for outstanding dispatches a days-out range becomes a dispatch_date range
+  (days_out >= N means dispatched at least N days ago); returned dispatches
+  compare days_between(dispatch_date, return_date), evaluated on the rows
+  the other filters leave
+- pages continue after the last (dispatch_date, id) returned instead of
+  using OFFSET, so a deep page costs the same as the first
+"""
+import base64
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from app.models.dispatch import Dispatch, DispatchStatus
+from app.services.dispatch_listing import dispatch_details_statement, dispatch_detail_rows
+from app.services.reference_cache import ReferenceNames
+from app.utils.sql_functions import days_between, escape_like
+
+
+@dataclass
+class DispatchFilters:
+    """Search filters; None means not filtered"""
+    project_id: Optional[int] = None
+    drillhole_id: Optional[int] = None
+    company_id: Optional[int] = None
+    status: Optional[DispatchStatus] = None
+    driver: Optional[str] = None
+    technician: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    return_condition: Optional[str] = None
+    has_discrepancy: Optional[bool] = None
+    days_out_min: Optional[int] = None
+    days_out_max: Optional[int] = None
+    sample_type: Optional[str] = None
+
+
+def encode_cursor(dispatch_date: datetime, dispatch_id: int) -> str:
+    """Opaque cursor for the page after the given row"""
+    raw = f"{dispatch_date.isoformat()}|{dispatch_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Read a cursor from encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        dispatch_date, dispatch_id = raw.split("|")
+        return datetime.fromisoformat(dispatch_date), int(dispatch_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _days_out_filters(stmt: StatementLambdaElement, filters: DispatchFilters, now: datetime) -> StatementLambdaElement:
+    outstanding = DispatchStatus.OUTSTANDING
+    returned = DispatchStatus.RETURNED
+    only = filters.status
+
+    if filters.days_out_min is not None:
+        days_min = filters.days_out_min
+        # Outstanding: days_out >= N  <=>  dispatch_date <= now - N days
+        dispatched_before = now - timedelta(days=days_min)
+        if only == outstanding:
+            stmt += lambda s: s.where(Dispatch.dispatch_date <= dispatched_before)
+        elif only == returned:
+            stmt += lambda s: s.where(days_between(Dispatch.dispatch_date, Dispatch.return_date) >= days_min)
+        else:
+            stmt += lambda s: s.where(or_(
+                and_(Dispatch.status == outstanding, Dispatch.dispatch_date <= dispatched_before),
+                and_(Dispatch.status == returned, days_between(Dispatch.dispatch_date, Dispatch.return_date) >= days_min),
+            ))
+
+    if filters.days_out_max is not None:
+        days_max = filters.days_out_max
+        # Outstanding: days_out <= N  <=>  dispatch_date > now - (N + 1) days
+        dispatched_after = now - timedelta(days=days_max + 1)
+        if only == outstanding:
+            stmt += lambda s: s.where(Dispatch.dispatch_date > dispatched_after)
+        elif only == returned:
+            stmt += lambda s: s.where(days_between(Dispatch.dispatch_date, Dispatch.return_date) <= days_max)
+        else:
+            stmt += lambda s: s.where(or_(
+                and_(Dispatch.status == outstanding, Dispatch.dispatch_date > dispatched_after),
+                and_(Dispatch.status == returned, days_between(Dispatch.dispatch_date, Dispatch.return_date) <= days_max),
+            ))
+    return stmt
+
+
+def search_statement(
+    filters: DispatchFilters,
+    after: Optional[Tuple[datetime, int]],
+    limit: int,
+    now: datetime,
+) -> StatementLambdaElement:
+    """
+    Statement for one page of search results, newest first
+
+    Args:
+        filters: Search filters
+        after: (dispatch_date, id) of the last row of the previous page
+        limit: Rows to select
+        now: Reference time for days_out
+
+    Returns:
+        Lambda statement over dispatch_details_statement columns
+    """
+    stmt = dispatch_details_statement()
+
+    if filters.project_id is not None:
+        project_id = filters.project_id
+        stmt += lambda s: s.where(Dispatch.project_id == project_id)
+    if filters.drillhole_id is not None:
+        drillhole_id = filters.drillhole_id
+        stmt += lambda s: s.where(Dispatch.drillhole_id == drillhole_id)
+    if filters.company_id is not None:
+        company_id = filters.company_id
+        stmt += lambda s: s.where(Dispatch.company_id == company_id)
+    if filters.status is not None:
+        status = filters.status
+        stmt += lambda s: s.where(Dispatch.status == status)
+    if filters.driver:
+        driver = escape_like(filters.driver) + "%"
+        stmt += lambda s: s.where(Dispatch.driver.like(driver, escape="\\"))
+    if filters.technician:
+        technician = escape_like(filters.technician) + "%"
+        stmt += lambda s: s.where(Dispatch.technician.like(technician, escape="\\"))
+    if filters.date_from is not None:
+        date_from = filters.date_from
+        stmt += lambda s: s.where(Dispatch.dispatch_date >= date_from)
+    if filters.date_to is not None:
+        date_to = filters.date_to
+        stmt += lambda s: s.where(Dispatch.dispatch_date <= date_to)
+    if filters.return_condition is not None:
+        return_condition = filters.return_condition
+        stmt += lambda s: s.where(Dispatch.return_condition == return_condition)
+    if filters.sample_type is not None:
+        sample_type = filters.sample_type
+        stmt += lambda s: s.where(Dispatch.sample_type == sample_type)
+
+    # Only returned dispatches can have a discrepancy (is_match is None
+    # while outstanding); a missing return count is 0 boxes, as in the
+    # reconciliation report
+    if filters.has_discrepancy is True:
+        stmt += lambda s: s.where(
+            Dispatch.status == DispatchStatus.RETURNED,
+            or_(
+                func.coalesce(Dispatch.returned_hq, 0) != Dispatch.hq_boxes,
+                func.coalesce(Dispatch.returned_nq, 0) != Dispatch.nq_boxes,
+            ),
+        )
+    elif filters.has_discrepancy is False:
+        stmt += lambda s: s.where(
+            Dispatch.status == DispatchStatus.RETURNED,
+            func.coalesce(Dispatch.returned_hq, 0) == Dispatch.hq_boxes,
+            func.coalesce(Dispatch.returned_nq, 0) == Dispatch.nq_boxes,
+        )
+
+    stmt = _days_out_filters(stmt, filters, now)
+
+    if after is not None:
+        after_date, after_id = after
+        stmt += lambda s: s.where(or_(
+            Dispatch.dispatch_date < after_date,
+            and_(Dispatch.dispatch_date == after_date, Dispatch.id < after_id),
+        ))
+
+    stmt += lambda s: s.order_by(Dispatch.dispatch_date.desc(), Dispatch.id.desc()).limit(limit)
+    return stmt
+
+
+def search_dispatches(
+    db: Session,
+    filters: DispatchFilters,
+    names: ReferenceNames,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    One page of dispatches matching the filters
+
+    Args:
+        db: Database session
+        filters: Search filters
+        names: Reference name lookups
+        cursor: next_cursor of the previous page
+        limit: Page size
+        now: Reference time for days_out
+
+    Returns:
+        {"items": [DispatchWithDetails dicts], "next_cursor": str or None}
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    now = now or datetime.utcnow()
+    after = decode_cursor(cursor) if cursor else None
+    # One extra row tells whether another page follows
+    rows = db.execute(search_statement(filters, after, limit + 1, now)).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].dispatch_date, rows[-1].id) if more else None
+    return {"items": dispatch_detail_rows(rows, names, now), "next_cursor": next_cursor}
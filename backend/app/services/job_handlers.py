@@ -0,0 +1,117 @@
+"""
+Job handlers
+
+Each handler runs in a worker thread with its own sessions and reports
+progress through the JobContext; the return value is stored as the job
+result.
+"""
+from typing import Any, Dict
+from app.config import settings
+from app.services.assay_import import import_batch
+from app.models.user import UserRole
+from app.services.counters import rebuild_counters, verify_counters
+from app.services.dispatch_listing import EXPORT_HEADERS, dispatch_export_rows
+from app.services.jobs import JobContext, job_handler
+from app.services.purge import company_purge_plan, project_purge_plan, count_rows, run_purge
+from app.services.reference_cache import reference_cache
+from app.utils.helpers import iter_csv
+
+# Kinds users may queue directly through POST /jobs, with the minimum
+# role; purges and assay imports are only queued by their own endpoints
+# after their permission checks
+USER_JOB_KINDS = {
+    "export_dispatches": UserRole.OPERATOR,
+    "rebuild_counters": UserRole.MANAGER,
+}
+
+
+def _purge(context: JobContext, plan) -> Dict[str, int]:
+    db = context.session_factory()
+    try:
+        planned = count_rows(db, plan)
+        total = sum(planned.values())
+        finished = {"rows": 0}
+
+        def report(step: str, done: int, step_total: int) -> None:
+            # done is cumulative within a step; add the finished steps
+            context.progress(finished["rows"] + done, total, f"Deleting {step}")
+            if done >= step_total:
+                finished["rows"] += done
+
+        deleted = run_purge(db, plan, settings.PURGE_BATCH_SIZE, progress=report)
+    finally:
+        db.close()
+        reference_cache.invalidate()
+    context.progress(sum(deleted.values()), total, "Done", force=True)
+    return deleted
+
+
+@job_handler("purge_company")
+def purge_company(context: JobContext, params: Dict[str, Any]) -> Dict[str, int]:
+    """Delete a company subtree in batches (params: company_id)"""
+    return _purge(context, company_purge_plan(params["company_id"]))
+
+
+@job_handler("purge_project")
+def purge_project(context: JobContext, params: Dict[str, Any]) -> Dict[str, int]:
+    """Delete a project subtree in batches (params: project_id)"""
+    return _purge(context, project_purge_plan(params["project_id"]))
+
+
+@job_handler("rebuild_counters")
+def rebuild_child_counters(context: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Verify child counters and rewrite drifted rows (params: verify_only)"""
+    db = context.session_factory()
+    try:
+        context.progress(0, 2, "Verifying counters", force=True)
+        report = verify_counters(db)
+        db.rollback()
+        drifted = sum(entry["drifted"] for entry in report)
+        if params.get("verify_only") or not drifted:
+            return {"drifted": drifted, "fixed": {}}
+        context.progress(1, 2, "Rebuilding counters", force=True)
+        fixed = rebuild_counters(db)
+        db.commit()
+        return {"drifted": drifted, "fixed": fixed}
+    finally:
+        db.close()
+
+
+@job_handler("export_dispatches")
+def export_dispatches(context: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Write all dispatches to a CSV artifact"""
+    path = context.artifact_path("dispatches_export.csv")
+    rows = 0
+    db = context.session_factory()
+    try:
+        def counted():
+            nonlocal rows
+            for row in dispatch_export_rows(db):
+                rows += 1
+                if rows % 1000 == 0:
+                    context.progress(rows, message="Exporting dispatches")
+                yield row
+
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            for chunk in iter_csv(counted(), EXPORT_HEADERS):
+                handle.write(chunk)
+    finally:
+        db.close()
+    context.progress(rows, rows, "Done", force=True)
+    return {"rows": rows}
+
+
+@job_handler("import_assays")
+def import_assays(context: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Load an uploaded lab results file into its batch (params: batch_id, path)"""
+    db = context.session_factory()
+    try:
+        context.progress(0, message="Importing assay results", force=True)
+        totals = import_batch(
+            db, params["batch_id"], params["path"],
+            progress=lambda rows: context.progress(rows, message="Importing assay results"),
+        )
+    finally:
+        db.close()
+    context.progress(totals["rows_read"], totals["rows_read"], "Done", force=True)
+    return totals
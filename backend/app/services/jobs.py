@@ -0,0 +1,431 @@
+"""
+Background job runner
+
+Jobs live in the jobs table, so they survive API worker restarts and need
+no broker. Any number of worker threads (inside API workers or in
+scripts/job_worker.py) poll the table and claim a job with a conditional
+UPDATE ... WHERE status = 'queued'; only one claimant sees rowcount 1.
+
+Handlers are plain functions registered with @job_handler("kind"). They
+receive a JobContext for progress reporting, cancellation checks and
+artifact files, and return a JSON-serializable result.
+"""
+import logging
+import os
+import socket
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.job import Job, JobStatus
+from app.services.statements import get_by_id
+
+logger = logging.getLogger("uvicorn")
+
+JOB_HANDLERS: Dict[str, Callable[["JobContext", Dict[str, Any]], Any]] = {}
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when cancellation was requested"""
+
+
+def job_handler(kind: str):
+    """
+    Register a function as the handler for a job kind
+
+    Args:
+        kind: Job kind stored in jobs.kind
+
+    Returns:
+        Decorator
+    """
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def artifact_dir(job_id: int) -> str:
+    """Directory holding the artifacts of one job"""
+    root = settings.JOB_ARTIFACT_DIR
+    if not os.path.isabs(root):
+        root = os.path.join(BACKEND_DIR, root)
+    return os.path.join(root, str(job_id))
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    params: Optional[Dict[str, Any]] = None,
+    user_id: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """
+    Queue a job (committed by the caller)
+
+    Args:
+        db: Database session
+        kind: Registered job kind
+        params: JSON-serializable handler parameters
+        user_id: ID of the requesting user
+        max_attempts: Attempts before the job fails (default JOB_MAX_ATTEMPTS)
+
+    Returns:
+        The new job (flushed, so it has an id)
+    """
+    job = Job(
+        kind=kind,
+        params=params or {},
+        status=JobStatus.QUEUED,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow(),
+        created_by=user_id,
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def request_cancel(db: Session, job: Job) -> Job:
+    """
+    Cancel a queued job, or ask a running job to stop (committed by the caller)
+
+    Args:
+        db: Database session
+        job: Job to cancel
+
+    Returns:
+        The job with its updated status
+    """
+    cancelled = db.query(Job).filter(
+        Job.id == job.id,
+        Job.status == JobStatus.QUEUED
+    ).update({
+        Job.status: JobStatus.CANCELLED,
+        Job.cancel_requested: True,
+        Job.finished_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    if not cancelled and job.status == JobStatus.RUNNING:
+        job.cancel_requested = True
+    db.flush()
+    db.refresh(job)
+    return job
+
+
+def requeue_stale(db: Session, stale_seconds: Optional[int] = None) -> int:
+    """
+    Requeue running jobs whose worker stopped sending heartbeats
+
+    Jobs that already used all attempts are marked failed instead.
+
+    Args:
+        db: Database session
+        stale_seconds: Heartbeat age treated as dead (default JOB_STALE_SECONDS)
+
+    Returns:
+        Number of jobs requeued or failed
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_seconds or settings.JOB_STALE_SECONDS)
+    stale = (Job.status == JobStatus.RUNNING, Job.heartbeat_at < cutoff)
+    failed = db.query(Job).filter(*stale, Job.attempts >= Job.max_attempts).update({
+        Job.status: JobStatus.FAILED,
+        Job.error: "Worker stopped responding",
+        Job.finished_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    requeued = db.query(Job).filter(*stale).update({
+        Job.status: JobStatus.QUEUED,
+        Job.worker_id: None,
+        Job.run_after: datetime.utcnow(),
+        Job.message: "Requeued after worker stopped responding",
+    }, synchronize_session=False)
+    db.commit()
+    if failed or requeued:
+        logger.warning(f"Jobs: requeued {requeued} and failed {failed} stale jobs")
+    return failed + requeued
+
+
+def claim_next(db: Session, worker_id: str, kinds=None) -> Optional[Job]:
+    """
+    Atomically claim the oldest runnable job
+
+    Args:
+        db: Database session
+        worker_id: Identifier of the claiming worker thread
+        kinds: Job kinds this worker can run (default: all registered)
+
+    Returns:
+        The claimed job, or None if nothing is runnable
+    """
+    kinds = list(kinds or JOB_HANDLERS)
+    now = datetime.utcnow()
+    candidates = db.query(Job.id).filter(
+        Job.status == JobStatus.QUEUED,
+        Job.run_after <= now,
+        Job.kind.in_(kinds),
+    ).order_by(Job.id).limit(5).all()
+    db.rollback()
+
+    for (job_id,) in candidates:
+        claimed = db.query(Job).filter(
+            Job.id == job_id,
+            Job.status == JobStatus.QUEUED
+        ).update({
+            Job.status: JobStatus.RUNNING,
+            Job.worker_id: worker_id,
+            Job.attempts: Job.attempts + 1,
+            Job.started_at: now,
+            Job.heartbeat_at: now,
+        }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            return get_by_id(db, Job, job_id)
+    return None
+
+
+class JobContext:
+    """
+    Handle passed to job handlers
+
+    Attributes:
+        job_id: ID of the running job
+        session_factory: Callable returning a new database session
+    """
+
+    def __init__(self, job_id: int, session_factory: Callable[[], Session]):
+        self.job_id = job_id
+        self.session_factory = session_factory
+        self._last_report = None
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None, force: bool = False) -> None:
+        """
+        Record progress and stop if cancellation was requested
+
+        Writes are throttled to one per second unless force is set.
+
+        Raises:
+            JobCancelled: If the job was cancelled
+        """
+        now = datetime.utcnow()
+        if not force and self._last_report and (now - self._last_report).total_seconds() < 1:
+            return
+        self._last_report = now
+
+        db = self.session_factory()
+        try:
+            values = {Job.progress_done: done, Job.heartbeat_at: now}
+            if total is not None:
+                values[Job.progress_total] = total
+            if message is not None:
+                values[Job.message] = message[:255]
+            db.query(Job).filter(Job.id == self.job_id).update(values, synchronize_session=False)
+            db.commit()
+            cancel = db.query(Job.cancel_requested).filter(Job.id == self.job_id).scalar()
+        finally:
+            db.close()
+        if cancel:
+            raise JobCancelled()
+
+    def check_cancelled(self) -> None:
+        """Raise JobCancelled if cancellation was requested"""
+        db = self.session_factory()
+        try:
+            cancel = db.query(Job.cancel_requested).filter(Job.id == self.job_id).scalar()
+        finally:
+            db.close()
+        if cancel:
+            raise JobCancelled()
+
+    def artifact_path(self, filename: str) -> str:
+        """
+        Path for a result file of this job (its directory is created)
+
+        The first artifact path requested is recorded on the job and served
+        by GET /jobs/{id}/artifact.
+        """
+        directory = artifact_dir(self.job_id)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, os.path.basename(filename))
+        db = self.session_factory()
+        try:
+            db.query(Job).filter(
+                Job.id == self.job_id,
+                Job.artifact_path.is_(None)
+            ).update({Job.artifact_path: path}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        return path
+
+
+def run_job(session_factory: Callable[[], Session], job: Job) -> None:
+    """
+    Execute a claimed job and record its outcome
+
+    Failed attempts are retried with exponential backoff until
+    max_attempts is reached.
+
+    Args:
+        session_factory: Callable returning a new database session
+        job: Job claimed by this worker
+    """
+    handler = JOB_HANDLERS[job.kind]
+    context = JobContext(job.id, session_factory)
+    outcome: Dict[Any, Any]
+    try:
+        result = handler(context, job.params or {})
+        outcome = {
+            Job.status: JobStatus.SUCCEEDED,
+            Job.result: result,
+            Job.error: None,
+            Job.finished_at: datetime.utcnow(),
+        }
+        logger.info(f"Job {job.id} ({job.kind}) succeeded")
+    except JobCancelled:
+        outcome = {
+            Job.status: JobStatus.CANCELLED,
+            Job.message: "Cancelled",
+            Job.finished_at: datetime.utcnow(),
+        }
+        logger.info(f"Job {job.id} ({job.kind}) cancelled")
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+            outcome = {
+                Job.status: JobStatus.QUEUED,
+                Job.error: error,
+                Job.worker_id: None,
+                Job.run_after: datetime.utcnow() + timedelta(seconds=delay),
+                Job.message: f"Attempt {job.attempts} failed; retrying in {delay}s",
+            }
+        else:
+            outcome = {
+                Job.status: JobStatus.FAILED,
+                Job.error: error,
+                Job.message: f"Failed after {job.attempts} attempts",
+                Job.finished_at: datetime.utcnow(),
+            }
+        logger.exception(f"Job {job.id} ({job.kind}) attempt {job.attempts} failed")
+
+    db = session_factory()
+    try:
+        # A job requeued as stale may already belong to another worker
+        db.query(Job).filter(
+            Job.id == job.id,
+            Job.worker_id == job.worker_id
+        ).update(outcome, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+class JobWorker:
+    """
+    Pool of threads that claim and run jobs
+
+    A separate heartbeat thread refreshes heartbeat_at of the jobs this
+    worker is running, so long steps between progress reports are not
+    mistaken for a dead worker.
+
+    Args:
+        session_factory: Callable returning a new database session
+        threads: Number of jobs run concurrently
+        poll_seconds: Sleep between polls when the queue is empty
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], threads: int = 1, poll_seconds: float = 2.0):
+        self.session_factory = session_factory
+        self.threads = threads
+        self.poll_seconds = poll_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stop = threading.Event()
+        self._running: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self) -> None:
+        """Requeue stale jobs, then start the worker and heartbeat threads"""
+        # Handlers register themselves on import
+        import app.services.job_handlers  # noqa: F401
+
+        db = self.session_factory()
+        try:
+            requeue_stale(db)
+        finally:
+            db.close()
+
+        for index in range(self.threads):
+            thread = threading.Thread(
+                target=self._work, args=(f"{self.worker_id}/{index}",),
+                name=f"job-worker-{index}", daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        logger.info(f"Job worker {self.worker_id} started with {self.threads} threads")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop claiming jobs and wait briefly for running ones
+
+        Jobs still running when the timeout expires keep their status and
+        are requeued by the next worker once their heartbeat is stale.
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _work(self, thread_id: str) -> None:
+        while not self._stop.is_set():
+            job = None
+            try:
+                db = self.session_factory()
+                try:
+                    job = claim_next(db, thread_id)
+                finally:
+                    db.close()
+            except Exception:
+                logger.exception("Job worker could not poll the jobs table")
+
+            if job is None:
+                self._stop.wait(self.poll_seconds)
+                continue
+
+            with self._lock:
+                self._running[thread_id] = job.id
+            try:
+                run_job(self.session_factory, job)
+            finally:
+                with self._lock:
+                    self._running.pop(thread_id, None)
+
+    def _heartbeat(self) -> None:
+        ticks = 0
+        while not self._stop.wait(settings.JOB_HEARTBEAT_SECONDS):
+            ticks += 1
+            with self._lock:
+                job_ids = list(self._running.values())
+            try:
+                db = self.session_factory()
+                try:
+                    if job_ids:
+                        db.query(Job).filter(
+                            Job.id.in_(job_ids),
+                            Job.status == JobStatus.RUNNING
+                        ).update({Job.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+                        db.commit()
+                    # Pick up jobs orphaned by workers that died meanwhile
+                    if ticks * settings.JOB_HEARTBEAT_SECONDS >= settings.JOB_STALE_SECONDS:
+                        ticks = 0
+                        requeue_stale(db)
+                finally:
+                    db.close()
+            except Exception:
+                logger.exception("Job heartbeat failed")
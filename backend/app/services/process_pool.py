@@ -0,0 +1,46 @@
+"""
+Shared worker process pool
+
+One spawn-context ProcessPoolExecutor per API worker, started on first use
+(downhole compositing) and stopped on application shutdown. It lives
+apart from the code that submits to it so the shutdown hook can stop it
+without importing NumPy into workers that never started one.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(processes: int) -> ProcessPoolExecutor:
+    """
+    The worker pool, started with this many processes on first use
+
+    Args:
+        processes: Worker processes if the pool is not running yet
+
+    Returns:
+        Process pool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: forking a threaded server copies locks held
+            # by other threads into the child
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes (on application shutdown, or after a failure)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,145 @@
+"""
+Batched deletion of company and project subtrees
+
+Relationships use passive deletes, so deleting a parent row would leave the
+whole subtree to ON DELETE CASCADE in a single statement that locks every
+child row until it finishes. A purge instead deletes leaves first (assay
+results, samples, dispatches, drillholes, projects, then the root row) in
+bounded batches, committing after each one so locks stay short and
+progress is visible.
+Counters of surviving parents are adjusted batch by batch, and deleted
+companies, projects and drillholes are tombstoned for site sync.
+"""
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+from app.models.assay import AssayResult
+from app.models.company import Company
+from app.models.dispatch import Dispatch
+from app.models.drillhole import Drillhole
+from app.models.project import Project
+from app.models.sample import Sample
+from app.services.change_journal import record_deletions
+from app.services.counters import subtract_child_counts
+
+PurgeStep = namedtuple("PurgeStep", ["name", "model", "condition"])
+
+# progress(step name, rows deleted in step, rows planned for step)
+ProgressCallback = Callable[[str, int, int], None]
+
+
+def company_purge_plan(company_id: int) -> List[PurgeStep]:
+    """
+    Deletion steps for a company and everything that cascades from it
+
+    Args:
+        company_id: Company ID
+
+    Returns:
+        Steps in leaf-first order
+    """
+    projects = select(Project.id).where(Project.company_id == company_id)
+    drillholes = select(Drillhole.id).where(Drillhole.project_id.in_(projects))
+    dispatch_condition = or_(
+        Dispatch.company_id == company_id,
+        Dispatch.project_id.in_(projects),
+        Dispatch.drillhole_id.in_(drillholes),
+    )
+    dispatches = select(Dispatch.id).where(dispatch_condition)
+    samples = select(Sample.id).where(Sample.dispatch_id.in_(dispatches))
+    return [
+        PurgeStep("assay_results", AssayResult, AssayResult.sample_id.in_(samples)),
+        PurgeStep("samples", Sample, Sample.dispatch_id.in_(dispatches)),
+        PurgeStep("dispatches", Dispatch, dispatch_condition),
+        PurgeStep("drillholes", Drillhole, Drillhole.project_id.in_(projects)),
+        PurgeStep("projects", Project, Project.company_id == company_id),
+        PurgeStep("companies", Company, Company.id == company_id),
+    ]
+
+
+def project_purge_plan(project_id: int) -> List[PurgeStep]:
+    """
+    Deletion steps for a project and everything that cascades from it
+
+    Args:
+        project_id: Project ID
+
+    Returns:
+        Steps in leaf-first order
+    """
+    drillholes = select(Drillhole.id).where(Drillhole.project_id == project_id)
+    dispatch_condition = or_(
+        Dispatch.project_id == project_id,
+        Dispatch.drillhole_id.in_(drillholes),
+    )
+    dispatches = select(Dispatch.id).where(dispatch_condition)
+    samples = select(Sample.id).where(Sample.dispatch_id.in_(dispatches))
+    return [
+        PurgeStep("assay_results", AssayResult, AssayResult.sample_id.in_(samples)),
+        PurgeStep("samples", Sample, Sample.dispatch_id.in_(dispatches)),
+        PurgeStep("dispatches", Dispatch, dispatch_condition),
+        PurgeStep("drillholes", Drillhole, Drillhole.project_id == project_id),
+        PurgeStep("projects", Project, Project.id == project_id),
+    ]
+
+
+def count_rows(db: Session, plan: List[PurgeStep]) -> Dict[str, int]:
+    """
+    Count the rows each step will delete
+
+    Args:
+        db: Database session
+        plan: Purge steps
+
+    Returns:
+        Row count per step name
+    """
+    return {
+        step.name: db.query(func.count(step.model.id)).filter(step.condition).scalar()
+        for step in plan
+    }
+
+
+def run_purge(
+    db: Session,
+    plan: List[PurgeStep],
+    batch_size: int,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, int]:
+    """
+    Delete the rows of a plan in committed batches
+
+    Safe to re-run after an interruption: each step selects whatever rows
+    still match its condition.
+
+    Args:
+        db: Database session
+        plan: Purge steps in leaf-first order
+        batch_size: Maximum rows deleted per transaction
+        progress: Optional callback invoked after every batch
+
+    Returns:
+        Rows deleted per step name
+    """
+    planned = count_rows(db, plan)
+    deleted = {}
+    for step in plan:
+        deleted[step.name] = 0
+        while True:
+            ids = [
+                row_id for (row_id,) in
+                db.query(step.model.id).filter(step.condition).order_by(step.model.id).limit(batch_size)
+            ]
+            if not ids:
+                break
+            batch = step.model.id.in_(ids)
+            subtract_child_counts(db, step.model, batch)
+            db.query(step.model).filter(batch).delete(synchronize_session=False)
+            record_deletions(db, step.model, ids)
+            db.commit()
+            deleted[step.name] += len(ids)
+            if progress is not None:
+                progress(step.name, deleted[step.name], max(planned[step.name], deleted[step.name]))
+    return deleted
+
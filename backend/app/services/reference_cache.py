@@ -0,0 +1,254 @@
+"""
+Process-local reference data cache
+
+Companies, projects and drillholes change rarely but their names are
+attached to every dispatch row. Each worker keeps a snapshot of them: the
+company and project rows served by their list endpoints, and id -> name
+dictionaries that dispatch listings, reports and exports resolve names
+from instead of joining three tables per row.
+
+A snapshot is tagged with the data version of the three tables
+(services/data_version.py). Within REFERENCE_CACHE_TTL_SECONDS it is used
+without a round trip; after that, one version query either confirms it or
+triggers a reload. Writes through the API call ``invalidate()`` so the
+worker that made the change revalidates on its next read; other workers
+see it within the TTL. A snapshot loaded while a table was modified within
+the last second (unsettled version) is revalidated on every read until the
+version settles.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.company import Company
+from app.models.drillhole import Drillhole
+from app.models.project import Project
+from app.schemas.company import CompanyResponse
+from app.schemas.project import ProjectResponse
+from app.services.data_version import DataVersion, get_data_version
+from app.utils.http_cache import make_etag
+from app.utils.responses import rows_to_dicts, schema_columns
+
+logger = logging.getLogger("uvicorn")
+
+REFERENCE_MODELS = (Company, Project, Drillhole)
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """Reference rows and id -> name lookups at one data version"""
+    token: str
+    settled: bool
+    tables: Dict[str, Tuple[Optional[int], int, Optional[datetime]]]
+    companies: List[Dict[str, Any]] = field(repr=False)
+    projects: List[Dict[str, Any]] = field(repr=False)
+    company_names: Dict[int, str] = field(repr=False)
+    project_names: Dict[int, str] = field(repr=False)
+    project_codes: Dict[int, str] = field(repr=False)
+    drillhole_names: Dict[int, str] = field(repr=False)
+
+    def etag(self, *parts: str) -> Optional[str]:
+        """ETag of a representation built from this snapshot (None while unsettled)"""
+        if not self.settled:
+            return None
+        return make_etag("reference", self.token, *parts)
+
+    def matches(self, version: DataVersion) -> Optional[bool]:
+        """
+        Compare with a data version read by the request
+
+        Returns:
+            None if the version covers no reference table, else whether the
+            tables it covers are at the snapshot's version
+        """
+        covered = {name: tuple(state) for name, *state in version.tables if name in self.tables}
+        if not covered:
+            return None
+        return all(self.tables[name] == state for name, state in covered.items())
+
+
+class ReferenceNames:
+    """
+    Name lookups for one request
+
+    An id missing from the snapshot (a record created in another worker
+    since it was validated) revalidates the cache once, so fresh rows do not
+    come back without names.
+
+    Args:
+        cache: Reference cache
+        snapshot: Snapshot to resolve from
+        db: Session used to revalidate on a miss (None: never revalidate)
+    """
+
+    def __init__(self, cache: "ReferenceCache", snapshot: ReferenceSnapshot, db: Optional[Session]):
+        self.cache = cache
+        self.snapshot = snapshot
+        self.db = db
+        self._revalidated = db is None
+
+    def _lookup(self, table: str, key: Optional[int]) -> Optional[str]:
+        if key is None:
+            return None
+        value = getattr(self.snapshot, table).get(key)
+        if value is None and not self._revalidated:
+            self._revalidated = True
+            self.snapshot = self.cache.get(self.db, revalidate=True)
+            value = getattr(self.snapshot, table).get(key)
+        return value
+
+    def company(self, company_id: Optional[int]) -> Optional[str]:
+        """Company name"""
+        return self._lookup("company_names", company_id)
+
+    def project(self, project_id: Optional[int]) -> Optional[str]:
+        """Project name"""
+        return self._lookup("project_names", project_id)
+
+    def project_code(self, project_id: Optional[int]) -> Optional[str]:
+        """Project code (Project.project_id)"""
+        return self._lookup("project_codes", project_id)
+
+    def drillhole(self, drillhole_id: Optional[int]) -> Optional[str]:
+        """Drillhole name (Drillhole.drillhole_id)"""
+        return self._lookup("drillhole_names", drillhole_id)
+
+
+class ReferenceCache:
+    """
+    Versioned snapshot of companies, projects and drillholes
+
+    Args:
+        ttl: Seconds a validated snapshot is used without a version check
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._validated_at = 0.0
+        self._fresh_until = float("-inf")
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.validations = 0
+
+    def get(self, db: Session, revalidate: bool = False, version: Optional[DataVersion] = None) -> ReferenceSnapshot:
+        """
+        Current snapshot, validated or reloaded as needed
+
+        Args:
+            db: Session for the version check and a reload
+            revalidate: Check the data version even within the TTL
+            version: Settled data version the request already read (its
+                ETag); a snapshot at that version is used as is, any other
+                is revalidated, so names never lag behind the ETag
+
+        Returns:
+            ReferenceSnapshot
+        """
+        snapshot = self._snapshot
+        if version is not None and version.settled and snapshot is not None and snapshot.settled:
+            matches = snapshot.matches(version)
+            if matches:
+                return snapshot
+            if matches is False:
+                revalidate = True
+        if (
+            not revalidate
+            and snapshot is not None
+            and snapshot.settled
+            and time.monotonic() < self._fresh_until
+        ):
+            return snapshot
+
+        with self._lock:
+            # Another thread may have validated while this one waited
+            snapshot = self._snapshot
+            if (
+                not revalidate
+                and snapshot is not None
+                and snapshot.settled
+                and time.monotonic() < self._fresh_until
+            ):
+                return snapshot
+            current = get_data_version(db, REFERENCE_MODELS)
+            self.validations += 1
+            if snapshot is None or not snapshot.settled or not current.settled or current.token != snapshot.token:
+                snapshot = self._load(db, current)
+                self._snapshot = snapshot
+                self.loads += 1
+            self._validated_at = time.monotonic()
+            self._fresh_until = self._validated_at + self.ttl
+            return snapshot
+
+    def names(self, db: Session, version: Optional[DataVersion] = None, streaming: bool = False) -> ReferenceNames:
+        """
+        Name lookups over the current snapshot
+
+        Args:
+            db: Request session
+            version: Data version behind the request's ETag, if any
+            streaming: The session will be busy reading a streamed result,
+                so validate now instead of on a miss
+
+        Returns:
+            ReferenceNames
+        """
+        if streaming:
+            return ReferenceNames(self, self.get(db, revalidate=True), None)
+        return ReferenceNames(self, self.get(db, version=version), db)
+
+    def invalidate(self) -> None:
+        """Make the next read check the data version (call after a write commits)"""
+        self._fresh_until = float("-inf")
+
+    def warm(self, session_factory) -> None:
+        """Load the snapshot at startup; failures are logged and retried on first use"""
+        db = session_factory()
+        try:
+            self.get(db)
+        except Exception as exc:
+            logger.warning(f"Could not preload reference data: {exc}")
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot size and load counters of this process"""
+        snapshot = self._snapshot
+        return {
+            "ttl_seconds": self.ttl,
+            "loads": self.loads,
+            "validations": self.validations,
+            "age_seconds": round(time.monotonic() - self._validated_at, 1) if snapshot else None,
+            "companies": len(snapshot.companies) if snapshot else 0,
+            "projects": len(snapshot.projects) if snapshot else 0,
+            "drillholes": len(snapshot.drillhole_names) if snapshot else 0,
+        }
+
+    @staticmethod
+    def _load(db: Session, version: DataVersion) -> ReferenceSnapshot:
+        companies = rows_to_dicts(
+            db.query(*schema_columns(CompanyResponse, Company)).order_by(Company.id).all()
+        )
+        projects = rows_to_dicts(
+            db.query(*schema_columns(ProjectResponse, Project))
+            .order_by(Project.created_at.desc()).all()
+        )
+        drillholes = db.query(Drillhole.id, Drillhole.drillhole_id).all()
+        return ReferenceSnapshot(
+            token=version.token,
+            settled=version.settled,
+            tables={name: tuple(state) for name, *state in version.tables},
+            companies=companies,
+            projects=projects,
+            company_names={row["id"]: row["name"] for row in companies},
+            project_names={row["id"]: row["name"] for row in projects},
+            project_codes={row["id"]: row["project_id"] for row in projects},
+            drillhole_names=dict(drillholes),
+        )
+
+
+reference_cache = ReferenceCache(settings.REFERENCE_CACHE_TTL_SECONDS)
@@ -0,0 +1,237 @@
+"""
+Server-side sample_id allocation
+
+Sequences (app.models.sample_sequence) hand out contiguous blocks of
+sample_ids. A reservation is one relative UPDATE of the sequence row
+followed by a read of the new counter in the same transaction: InnoDB
+holds the row lock until commit, so concurrent reservations queue on the
+row and always get disjoint blocks, without a SELECT ... FOR UPDATE round
+trip or retries.
+
+Reservations are made on the central server only. A local site has its
+own copy of the tables, and blocks handed out there could overlap blocks
+handed out by central or by another site.
+
+A sample_id of a sequence's form entered by hand must already have been
+reserved, so a later block can never contain it. Samples replayed from
+local sites cannot be refused, so they move the sequence past their
+number instead.
+"""
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.project import Project
+from app.models.sample import Sample
+from app.models.sample_sequence import SampleIdSequence
+
+MAX_WIDTH = 12
+
+# Samples read per page when looking for the highest existing number
+SCAN_PAGE_ROWS = 1000
+
+
+def format_sample_id(prefix: str, width: int, value: int) -> str:
+    return f"{prefix}{value:0{width}d}"
+
+
+def _require_central() -> None:
+    if settings.SITE_ID:
+        raise ValueError("Sample ids are reserved on the central server")
+
+
+def highest_existing(db: Session, prefix: str, width: int) -> int:
+    """
+    Highest number already used by a sample_id of the sequence's form
+
+    Walks the unique sample_id index down from the top of the prefix range
+    and stops at the first id that is the prefix plus width digits, so ids
+    of another form under the same prefix are skipped, not parsed.
+
+    Args:
+        db: Database session
+        prefix: Sample id prefix
+        width: Digits after the prefix
+
+    Returns:
+        Highest number, 0 if none
+    """
+    stmt = (
+        select(Sample.sample_id)
+        .where(Sample.sample_id.startswith(prefix, autoescape=True))
+        .order_by(Sample.sample_id.desc())
+        .limit(SCAN_PAGE_ROWS)
+    )
+    below = None
+    while True:
+        page = db.execute(stmt if below is None else stmt.where(Sample.sample_id < below)).scalars().all()
+        for code in page:
+            digits = code[len(prefix):]
+            if len(digits) == width and digits.isdigit():
+                return int(digits)
+        if len(page) < SCAN_PAGE_ROWS:
+            return 0
+        below = page[-1]
+
+
+def create_sequence(
+    db: Session,
+    prefix: str,
+    width: int = 5,
+    project_id: Optional[int] = None,
+    start: Optional[int] = None,
+) -> SampleIdSequence:
+    """
+    Add a sequence for a prefix (not committed)
+
+    Without start, numbering continues after the highest sample_id of the
+    same form already entered by hand, so the first block cannot collide
+    with existing samples.
+
+    Args:
+        db: Database session
+        prefix: Sample id prefix, e.g. "GS-"
+        width: Digits after the prefix
+        project_id: Project the sequence belongs to
+        start: First number to hand out
+
+    Returns:
+        New sequence
+
+    Raises:
+        ValueError: On a local site, if the prefix, width, project or start
+            is invalid, or the prefix is taken (also by a concurrent create)
+    """
+    _require_central()
+    if not prefix:
+        raise ValueError("prefix must not be empty")
+    if not 1 <= width <= MAX_WIDTH:
+        raise ValueError(f"width must be between 1 and {MAX_WIDTH}")
+    if len(prefix) + width > Sample.sample_id.type.length:
+        raise ValueError(f"prefix and width exceed {Sample.sample_id.type.length} characters")
+    if project_id is not None and db.get(Project, project_id) is None:
+        raise ValueError("Project not found")
+    # "GS-" and "GS-0" would both hand out GS-00001; the table is small
+    for (other,) in db.execute(select(SampleIdSequence.prefix)):
+        if prefix.startswith(other) or other.startswith(prefix):
+            raise ValueError(f"prefix overlaps the sequence for {other}")
+    used = highest_existing(db, prefix, width)
+    if start is None:
+        start = used + 1
+    elif start < 1 or start <= used:
+        raise ValueError(f"start must be positive and above {used}, the highest number in use")
+    if start >= 10 ** width:
+        raise ValueError(f"No {width} digit numbers are left after {prefix}{'9' * width}")
+
+    sequence = SampleIdSequence(prefix=prefix, width=width, project_id=project_id, next_value=start)
+    db.add(sequence)
+    try:
+        db.flush()
+    except IntegrityError:
+        # A concurrent request created the same prefix after the check above
+        raise ValueError(f"A sequence for {prefix} already exists")
+    return sequence
+
+
+def _sequence_number(db: Session, sample_id: str) -> Optional[Tuple[int, str, int, int]]:
+    """(sequence id, prefix, next_value, number) of the sequence whose form sample_id has"""
+    # Prefixes never overlap, so at most one sequence matches
+    sequences = select(
+        SampleIdSequence.id, SampleIdSequence.prefix, SampleIdSequence.width, SampleIdSequence.next_value
+    )
+    for sequence_id, prefix, width, next_value in db.execute(sequences):
+        digits = sample_id[len(prefix):]
+        if sample_id.startswith(prefix) and len(digits) == width and digits.isdigit():
+            return sequence_id, prefix, next_value, int(digits)
+    return None
+
+
+def check_manual_sample_id(db: Session, sample_id: str) -> None:
+    """
+    Refuse a hand-made sample_id that a sequence has not handed out yet
+
+    Args:
+        db: Database session
+        sample_id: Sample id entered by hand
+
+    Raises:
+        ValueError: If sample_id has a sequence's form and a number the
+            sequence has not reserved
+    """
+    match = _sequence_number(db, sample_id)
+    if match is not None and match[3] >= match[2]:
+        raise ValueError(
+            f"{sample_id} has not been reserved from the {match[1]} sequence; "
+            "reserve it first or create the sample with sequence_id"
+        )
+
+
+def claim_sample_id(db: Session, sample_id: str) -> None:
+    """
+    Move a sequence past a sample_id created elsewhere (not committed)
+
+    Args:
+        db: Database session
+        sample_id: Sample id replayed from a local site
+    """
+    match = _sequence_number(db, sample_id)
+    if match is None or match[3] < match[2]:
+        return
+    sequence_id, _, _, number = match
+    db.execute(
+        update(SampleIdSequence)
+        .where(SampleIdSequence.id == sequence_id, SampleIdSequence.next_value <= number)
+        .values(next_value=number + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reserve_block(db: Session, sequence_id: int, count: int) -> Optional[Dict[str, Any]]:
+    """
+    Reserve the next count sample_ids of a sequence (not committed)
+
+    Commit straight away: the sequence row stays locked until then.
+
+    Args:
+        db: Database session
+        sequence_id: Sequence ID
+        count: Number of ids
+
+    Returns:
+        The block (first and last number and sample_id), None if the
+        sequence does not exist
+
+    Raises:
+        ValueError: On a local site, if count is out of range or the block
+            would run past the sequence's width (the caller rolls back)
+    """
+    _require_central()
+    if not 1 <= count <= settings.SAMPLE_ID_BLOCK_MAX:
+        raise ValueError(f"count must be between 1 and {settings.SAMPLE_ID_BLOCK_MAX}")
+
+    result = db.execute(
+        update(SampleIdSequence)
+        .where(SampleIdSequence.id == sequence_id)
+        .values(next_value=SampleIdSequence.next_value + count)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        return None
+    prefix, width, next_value = db.execute(
+        select(SampleIdSequence.prefix, SampleIdSequence.width, SampleIdSequence.next_value)
+        .where(SampleIdSequence.id == sequence_id)
+    ).one()
+
+    first, last = next_value - count, next_value - 1
+    if last >= 10 ** width:
+        raise ValueError(f"Only {max(0, 10 ** width - first)} ids are left in {prefix}")
+    return {
+        "sequence_id": sequence_id,
+        "prefix": prefix,
+        "first": first,
+        "last": last,
+        "count": count,
+        "first_sample_id": format_sample_id(prefix, width, first),
+        "last_sample_id": format_sample_id(prefix, width, last),
+    }
@@ -0,0 +1,286 @@
+"""
+Sample depth intervals per drillhole
+
+Samples carry their drillhole (samples.drillhole_id) and are indexed on
+(drillhole_id, from_depth), so all intervals of a hole are one index range
+with no join through dispatches.
+
+Each worker keeps an interval tree (utils/interval_tree.py) for the
+INTERVAL_CACHE_HOLES most recently queried holes, tagged with the data
+version of the samples table. A request that already read the version for
+its ETag reuses a tree at that version and rebuilds any other; trees built
+while the version was unsettled are never reused. Depth range queries then
+cost O(log n + hits) however many intervals the hole has.
+
+Intervals are half-open [from_depth, to_depth). Samples without both
+depths, or with to_depth shallower than from_depth, are left out and
+counted as unplaced. Coverage checks across the holes of a project stream
+rows in index order and build no trees.
+"""
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.drillhole import Drillhole
+from app.models.sample import Sample
+from app.services.data_version import DataVersion, get_data_version
+from app.services.reference_cache import ReferenceNames
+from app.utils.interval_tree import IntervalTree, gaps_and_overlaps
+from app.utils.responses import rows_to_dicts
+
+INTERVAL_MATCHES = ("overlaps", "within", "contains")
+
+INTERVAL_COLUMNS = (
+    Sample.id,
+    Sample.sample_id,
+    Sample.dispatch_id,
+    Sample.sample_type,
+    Sample.status,
+    Sample.from_depth,
+    Sample.to_depth,
+)
+
+
+@dataclass(frozen=True)
+class HoleIntervals:
+    """Interval tree of one drillhole's samples at one data version"""
+    drillhole_id: int
+    token: str
+    settled: bool
+    tree: IntervalTree
+    unplaced: int
+
+
+def _placed(depths: Iterable[Tuple[Any, Any, Any]]) -> Tuple[List[Tuple[float, float, Any]], int]:
+    """(from_depth, to_depth, key) triples with usable depths, and how many were not"""
+    intervals, unplaced = [], 0
+    for from_depth, to_depth, key in depths:
+        if from_depth is None or to_depth is None or to_depth < from_depth:
+            unplaced += 1
+            continue
+        intervals.append((float(from_depth), float(to_depth), key))
+    return intervals, unplaced
+
+
+def load_hole(db: Session, drillhole_id: int, version: DataVersion) -> HoleIntervals:
+    """
+    Read a hole's samples and build their interval tree
+
+    Args:
+        db: Database session
+        drillhole_id: Drillhole primary key
+        version: Data version of the samples table read before the rows
+
+    Returns:
+        HoleIntervals
+    """
+    stmt = lambda_stmt(
+        lambda: select(*INTERVAL_COLUMNS)
+        .where(Sample.drillhole_id == drillhole_id)
+        .order_by(Sample.from_depth)
+    )
+    rows = rows_to_dicts(db.execute(stmt))
+    intervals, unplaced = _placed((row["from_depth"], row["to_depth"], row) for row in rows)
+    return HoleIntervals(
+        drillhole_id=drillhole_id,
+        token=version.token,
+        settled=version.settled,
+        tree=IntervalTree(intervals),
+        unplaced=unplaced,
+    )
+
+
+class IntervalCache:
+    """
+    Interval trees of recently queried drillholes
+
+    Args:
+        max_holes: Trees kept; the least recently used is dropped first
+    """
+
+    def __init__(self, max_holes: int):
+        self.max_holes = max_holes
+        self._holes: "OrderedDict[int, HoleIntervals]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, db: Session, drillhole_id: int, version: Optional[DataVersion] = None) -> HoleIntervals:
+        """
+        Tree of a hole at the current data version
+
+        Args:
+            db: Session for the version check and a reload
+            drillhole_id: Drillhole primary key
+            version: Data version of the samples table the request already
+                read (its ETag); read here when not given
+
+        Returns:
+            HoleIntervals
+        """
+        if version is None:
+            version = get_data_version(db, [Sample])
+        with self._lock:
+            hole = self._holes.get(drillhole_id)
+            if hole is not None and hole.settled and version.settled and hole.token == version.token:
+                self._holes.move_to_end(drillhole_id)
+                return hole
+
+        hole = load_hole(db, drillhole_id, version)
+        with self._lock:
+            self.loads += 1
+            if hole.settled and self.max_holes > 0:
+                self._holes[drillhole_id] = hole
+                self._holes.move_to_end(drillhole_id)
+                while len(self._holes) > self.max_holes:
+                    self._holes.popitem(last=False)
+        return hole
+
+    def clear(self) -> None:
+        """Drop every tree"""
+        with self._lock:
+            self._holes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cached holes and intervals of this process"""
+        with self._lock:
+            holes = list(self._holes.values())
+        return {
+            "holes": len(holes),
+            "intervals": sum(len(hole.tree) for hole in holes),
+            "loads": self.loads,
+        }
+
+
+interval_cache = IntervalCache(settings.INTERVAL_CACHE_HOLES)
+
+
+def samples_in_range(
+    hole: HoleIntervals,
+    from_depth: Optional[float] = None,
+    to_depth: Optional[float] = None,
+    match: str = "overlaps",
+) -> List[Dict[str, Any]]:
+    """
+    Samples of a hole relative to a depth range, in from_depth order
+
+    Args:
+        hole: Hole intervals from IntervalCache.get
+        from_depth: Range top (default: unbounded)
+        to_depth: Range bottom (default: unbounded)
+        match: overlaps (share any depth with the range), within (lie
+            inside it) or contains (span all of it; from_depth == to_depth
+            finds the samples at one depth)
+
+    Returns:
+        Sample rows (INTERVAL_COLUMNS)
+    """
+    tree = hole.tree
+    low = from_depth if from_depth is not None else -math.inf
+    high = to_depth if to_depth is not None else math.inf
+    positions = tree.overlapping(low, high) if high > low or match == "contains" else []
+    starts, ends, keys = tree.starts, tree.ends, tree.keys
+    if match == "within":
+        positions = [i for i in positions if starts[i] >= low and ends[i] <= high]
+    elif match == "contains":
+        positions = [i for i in positions if starts[i] <= low and ends[i] >= high]
+    return [keys[i] for i in positions]
+
+
+def _depth(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def _summary(result: Dict[str, Any], unplaced: int) -> Dict[str, Any]:
+    gap_length = sum(end - start for start, end in result["gaps"])
+    overlap_length = sum(end - start for start, end, _, _ in result["overlaps"])
+    return {
+        "intervals": result["intervals"],
+        "unplaced": unplaced,
+        "top": _depth(result["top"]),
+        "bottom": _depth(result["bottom"]),
+        "sampled_length": _depth(result["covered_length"]),
+        "gap_count": len(result["gaps"]),
+        "gap_length": _depth(gap_length),
+        "overlap_count": len(result["overlaps"]),
+        "overlap_length": _depth(overlap_length),
+    }
+
+
+def check_hole(hole: HoleIntervals, min_gap: float = 0.0) -> Dict[str, Any]:
+    """
+    Gaps and overlaps between the samples of one hole
+
+    Args:
+        hole: Hole intervals from IntervalCache.get
+        min_gap: Gaps no longer than this (metres) are ignored
+
+    Returns:
+        Summary with the gap and overlap depth ranges; each overlap names
+        the two samples (sample_id) involved
+    """
+    tree = hole.tree
+    result = gaps_and_overlaps(zip(tree.starts, tree.ends, tree.keys), min_gap)
+    check = {"drillhole_id": hole.drillhole_id, **_summary(result, hole.unplaced)}
+    check["gaps"] = [
+        {"from_depth": _depth(start), "to_depth": _depth(end)}
+        for start, end in result["gaps"]
+    ]
+    check["overlaps"] = [
+        {
+            "from_depth": _depth(start),
+            "to_depth": _depth(end),
+            "sample_ids": [earlier["sample_id"], later["sample_id"]],
+        }
+        for start, end, earlier, later in result["overlaps"]
+    ]
+    return check
+
+
+def check_project(
+    db: Session,
+    project_id: int,
+    names: ReferenceNames,
+    min_gap: float = 0.0,
+    issues_only: bool = True,
+) -> Dict[str, Any]:
+    """
+    Gap and overlap counts for every sampled hole of a project
+
+    Streams rows in (drillhole_id, from_depth) index order and checks each
+    hole as its rows go by, so memory stays at one hole.
+
+    Args:
+        db: Database session
+        project_id: Project primary key
+        names: Reference name lookups
+        min_gap: Gaps no longer than this (metres) are ignored
+        issues_only: List only holes with gaps or overlaps
+
+    Returns:
+        {"holes_checked", "holes_with_issues", "holes": [summaries]}
+    """
+    holes = select(Drillhole.id).where(Drillhole.project_id == project_id)
+    stmt = (
+        select(Sample.drillhole_id, Sample.from_depth, Sample.to_depth)
+        .where(Sample.drillhole_id.in_(holes))
+        .order_by(Sample.drillhole_id, Sample.from_depth)
+    )
+    rows = db.execute(stmt, execution_options={"stream_results": True, "yield_per": 5000})
+    checked, with_issues, summaries = 0, 0, []
+    for drillhole_id, hole_rows in groupby(rows, key=lambda row: row.drillhole_id):
+        intervals, unplaced = _placed((row.from_depth, row.to_depth, None) for row in hole_rows)
+        summary = _summary(gaps_and_overlaps(intervals, min_gap), unplaced)
+        checked += 1
+        has_issues = bool(summary["gap_count"] or summary["overlap_count"])
+        with_issues += has_issues
+        if has_issues or not issues_only:
+            summaries.append({"drillhole_id": drillhole_id, **summary})
+    # Names are resolved once the stream is drained (a lookup miss may query)
+    for summary in summaries:
+        summary["drillhole"] = names.drillhole(summary["drillhole_id"])
+    return {"holes_checked": checked, "holes_with_issues": with_issues, "holes": summaries}
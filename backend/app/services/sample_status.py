@@ -0,0 +1,126 @@
+"""
+Set-based sample status changes
+
+Moves any number of samples to a status with one UPDATE, instead of the
+SELECT, update and refresh per sample of PUT /samples/{id}. Samples are
+chosen by id list, by dispatch, by sample_id prefix or by sample_id range;
+the prefix and range are ranges of the unique sample_id index. Samples
+already at the target status are not touched, so the row count is the
+number of samples that changed.
+
+With audit, an INSERT ... SELECT over the same rows first writes one
+audit_logs row per sample with its old and new status, in the same
+transaction (InnoDB locks the selected rows, so the UPDATE changes exactly
+the rows audited). On a local site each changed sample is also journaled
+for sync.
+"""
+import json
+from typing import Any, Dict, Optional, Sequence
+from sqlalchemy import String, and_, case, insert, literal, select, type_coerce, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.audit_log import AuditAction, AuditLog
+from app.models.sample import Sample, SampleStatus
+from app.services.change_journal import record_change
+
+
+def _status_json(status: SampleStatus) -> str:
+    return json.dumps({"status": status.value})
+
+
+def sample_selection(
+    ids: Optional[Sequence[int]] = None,
+    dispatch_id: Optional[int] = None,
+    prefix: Optional[str] = None,
+    first: Optional[str] = None,
+    last: Optional[str] = None,
+):
+    """
+    WHERE clause selecting samples by exactly one criterion
+
+    Args:
+        ids: Sample primary keys
+        dispatch_id: Every sample of this dispatch
+        prefix: Samples whose sample_id starts with this
+        first: Samples whose sample_id sorts at or after this (with last)
+        last: Samples whose sample_id sorts at or before this (with first)
+
+    Returns:
+        SQL expression
+
+    Raises:
+        ValueError: If not exactly one criterion is given, or a range is
+            incomplete or reversed
+    """
+    given = [ids is not None, dispatch_id is not None, prefix is not None, first is not None or last is not None]
+    if sum(given) != 1:
+        raise ValueError("Give exactly one of ids, dispatch_id, sample_id_prefix or a sample_id range")
+    if ids is not None:
+        return Sample.id.in_(list(ids))
+    if dispatch_id is not None:
+        return Sample.dispatch_id == dispatch_id
+    if prefix is not None:
+        if not prefix:
+            raise ValueError("sample_id_prefix must not be empty")
+        return Sample.sample_id.startswith(prefix, autoescape=True)
+    if first is None or last is None:
+        raise ValueError("A sample_id range needs both sample_id_from and sample_id_to")
+    if last < first:
+        raise ValueError("sample_id_to must not sort before sample_id_from")
+    return and_(Sample.sample_id >= first, Sample.sample_id <= last)
+
+
+def update_status(
+    db: Session,
+    status: SampleStatus,
+    where,
+    from_status: Optional[SampleStatus] = None,
+    audit_user_id: Optional[int] = None,
+    audit: bool = False,
+) -> Dict[str, Any]:
+    """
+    Move the selected samples to a status (not committed)
+
+    Args:
+        db: Database session
+        status: New status
+        where: Selection, e.g. from sample_selection()
+        from_status: Only change samples currently at this status
+        audit_user_id: User recorded in the audit rows
+        audit: Write an audit_logs row per changed sample
+
+    Returns:
+        {"updated": samples changed, "audited": audit rows written}
+    """
+    pending = [where, Sample.status != status]
+    if from_status is not None:
+        pending.append(Sample.status == from_status)
+
+    audited = 0
+    if audit:
+        old_values = case(*[(Sample.status == member, _status_json(member)) for member in SampleStatus])
+        captured = db.execute(
+            insert(AuditLog).from_select(
+                ["user_id", "table_name", "record_id", "action", "old_values", "new_values"],
+                select(
+                    literal(audit_user_id, AuditLog.user_id.type),
+                    literal(Sample.__tablename__, AuditLog.table_name.type),
+                    Sample.id,
+                    literal(AuditAction.UPDATE, AuditLog.action.type),
+                    type_coerce(old_values, String),
+                    literal(_status_json(status), String),
+                ).where(*pending),
+            )
+        )
+        audited = captured.rowcount
+
+    journaled = [row_id for (row_id,) in db.execute(select(Sample.id).where(*pending))] if settings.SITE_ID else []
+    result = db.execute(
+        update(Sample)
+        .where(*pending)
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+    for sample_id in journaled:
+        record_change(db, "sample", "update", sample_id, {"status": status.value})
+    return {"updated": result.rowcount, "audited": audited}
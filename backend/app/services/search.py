@@ -0,0 +1,175 @@
+"""
+Identifier search
+
+Finds samples, drillholes, projects, companies and drivers whose code or
+name contains the query. Where each kind is looked up depends on its size:
+
+- companies and projects (thousands of rows) come from an in-process
+  trigram index (utils/ngram_index.py) over the reference cache snapshot.
+  When the snapshot is reloaded after a write, only the rows that changed
+  are re-indexed.
+- samples and drillholes (up to millions) are read from the database:
+  a prefix is a B-tree range on the unique/indexed code column, any other
+  substring a FULLTEXT ngram phrase search on MySQL (alembic 0006). SQLite
+  databases fall back to a LIKE scan.
+- drivers are distinct prefixes over ix_dispatches_driver.
+
+Hits are ranked exact match, then prefix, then substring.
+"""
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.dispatch import Dispatch
+from app.models.drillhole import Drillhole
+from app.models.sample import Sample
+from app.services.reference_cache import ReferenceNames, ReferenceSnapshot
+from app.utils.ngram_index import MATCH_RANK, NgramIndex, match_kind
+from app.utils.sql_functions import contains_text, like_prefix
+
+HIT_TYPES = ("sample", "drillhole", "project", "company", "driver")
+
+# Shortest query; equal to MySQL's default ngram_token_size
+MIN_QUERY_LENGTH = 2
+
+
+class ReferenceSearchIndex:
+    """Trigram index over company names and project codes and names"""
+
+    def __init__(self):
+        self._index = NgramIndex()
+        self._documents: Dict[Hashable, str] = {}
+        self._project_companies: Dict[int, int] = {}
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _documents_of(snapshot: ReferenceSnapshot) -> Dict[Hashable, str]:
+        documents: Dict[Hashable, str] = {}
+        for company_id, name in snapshot.company_names.items():
+            documents[("company", company_id, "name")] = name
+        for project_id, code in snapshot.project_codes.items():
+            documents[("project", project_id, "project_id")] = code
+        for project_id, name in snapshot.project_names.items():
+            documents[("project", project_id, "name")] = name
+        return documents
+
+    def sync(self, snapshot: ReferenceSnapshot) -> None:
+        """Apply the differences between the indexed snapshot and this one"""
+        if snapshot is self._snapshot:
+            return
+        with self._lock:
+            if snapshot is self._snapshot:
+                return
+            documents = self._documents_of(snapshot)
+            for key in self._documents.keys() - documents.keys():
+                self._index.remove(key)
+            for key, text in documents.items():
+                if self._documents.get(key) != text:
+                    self._index.set(key, text)
+            self._documents = documents
+            self._project_companies = {project["id"]: project["company_id"] for project in snapshot.projects}
+            self._snapshot = snapshot
+
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Company and project hits"""
+        with self._lock:
+            matches = self._index.search(query, limit)
+            snapshot = self._snapshot
+            documents = self._documents
+            project_companies = self._project_companies
+        hits, seen = [], set()
+        for (kind, record_id, field), match in matches:
+            # A project matching by code and by name is listed once
+            if (kind, record_id) in seen:
+                continue
+            seen.add((kind, record_id))
+            context = None
+            if kind == "project":
+                context = snapshot.company_names.get(project_companies.get(record_id))
+            hits.append(_hit(kind, record_id, field, documents[(kind, record_id, field)], match, context))
+        return hits
+
+
+reference_search_index = ReferenceSearchIndex()
+
+
+def _hit(kind: str, record_id: Optional[int], field: str, value: str, match: str, context: Optional[str]) -> Dict[str, Any]:
+    return {"type": kind, "id": record_id, "field": field, "value": value, "match": match, "context": context}
+
+
+def _code_hits(db: Session, kind: str, stmt, column, query: str, limit: int, describe) -> List[Dict[str, Any]]:
+    """Prefix hits in code order, then substring hits, up to limit"""
+    dialect = db.get_bind().dialect.name
+    rows = db.execute(stmt.where(like_prefix(column, query)).order_by(column).limit(limit)).all()
+    seen = {row[0] for row in rows}
+    if len(rows) < limit:
+        more = db.execute(stmt.where(contains_text(column, query, dialect)).limit(limit + len(rows))).all()
+        rows.extend(row for row in more if row[0] not in seen)
+    lowered = query.lower()
+    return [
+        _hit(kind, row[0], column.key, row[1], match_kind(row[1].lower(), lowered), describe(row))
+        for row in rows[:limit]
+        # FULLTEXT phrase matches are token based; keep true substrings only
+        if lowered in row[1].lower()
+    ]
+
+
+def search_identifiers(
+    db: Session,
+    query: str,
+    names: ReferenceNames,
+    types: Sequence[str] = HIT_TYPES,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Search codes and names
+
+    Args:
+        db: Database session
+        query: Text to find, at least MIN_QUERY_LENGTH characters
+        names: Reference name lookups (also the snapshot to search)
+        types: Hit types to include
+        limit: Maximum hits
+
+    Returns:
+        Hits ({type, id, field, value, match, context}), best first; none
+        if the query is shorter than MIN_QUERY_LENGTH once trimmed
+    """
+    query = query.strip()
+    # A blank query is a prefix of every code
+    if len(query) < MIN_QUERY_LENGTH:
+        return []
+    hits: List[Dict[str, Any]] = []
+
+    if "sample" in types:
+        hits += _code_hits(
+            db, "sample",
+            select(Sample.id, Sample.sample_id, Sample.drillhole_id),
+            Sample.sample_id, query, limit,
+            lambda row: names.drillhole(row.drillhole_id),
+        )
+    if "drillhole" in types:
+        hits += _code_hits(
+            db, "drillhole",
+            select(Drillhole.id, Drillhole.drillhole_id, Drillhole.project_id),
+            Drillhole.drillhole_id, query, limit,
+            lambda row: names.project(row.project_id),
+        )
+    if "project" in types or "company" in types:
+        reference_search_index.sync(names.snapshot)
+        hits += [
+            hit for hit in reference_search_index.search(query, limit * 2)
+            if hit["type"] in types
+        ]
+    if "driver" in types:
+        drivers = db.execute(
+            select(Dispatch.driver).distinct().where(like_prefix(Dispatch.driver, query))
+            .order_by(Dispatch.driver).limit(limit)
+        ).scalars().all()
+        lowered = query.lower()
+        hits += [_hit("driver", None, "driver", driver, match_kind(driver.lower(), lowered), None) for driver in drivers]
+
+    order = {kind: position for position, kind in enumerate(HIT_TYPES)}
+    hits.sort(key=lambda hit: (MATCH_RANK[hit["match"]], order[hit["type"]], hit["value"].lower()))
+    return hits[:limit]
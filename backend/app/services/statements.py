@@ -0,0 +1,51 @@
+"""
+Cached statements for hot paths
+
+A ``db.query(...).filter(...)`` chain is rebuilt on every call, and
+SQLAlchemy derives a cache key from the whole structure before it can reuse
+the compiled SQL. A lambda statement is keyed by the code location of its
+lambdas instead: after the first call, construction and key generation are
+skipped and only the closure values (ids, filters, offsets) are extracted
+as bound parameters. Lambdas appended conditionally (``stmt += lambda s:
+...``) are part of the key, so each filter combination gets its own entry.
+
+Closure variables must be plain values or mapped classes; anything else
+that changes the SQL belongs in a separate lambda.
+"""
+from typing import Any, Optional, Type
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+
+
+def get_by_id(db: Session, model: Type, ident: Any) -> Optional[Any]:
+    """
+    Load one ORM object by id
+
+    Args:
+        db: Database session
+        model: ORM model class with an ``id`` column
+        ident: Primary key value
+
+    Returns:
+        Object, or None if there is no such row
+    """
+    stmt = lambda_stmt(lambda: select(model))
+    stmt += lambda s: s.where(model.id == ident)
+    return db.execute(stmt).scalars().first()
+
+
+def paginate(stmt: StatementLambdaElement, skip: int, limit: int) -> StatementLambdaElement:
+    """
+    Add OFFSET/LIMIT to a lambda statement
+
+    Args:
+        stmt: Lambda statement
+        skip: Number of rows to skip
+        limit: Maximum number of rows
+
+    Returns:
+        The statement with the page applied
+    """
+    stmt += lambda s: s.offset(skip).limit(limit)
+    return stmt
@@ -0,0 +1,574 @@
+"""
+Edge-to-central sync engine
+
+A local site journals its dispatch, sample and return mutations (see
+app.services.change_journal). The engine pushes the journal to central in
+gzip-compressed batches and pulls reference data (companies, projects,
+drillholes) back as deltas since the last watermark. Deletions travel in
+the same delta as ids tombstoned on central (SyncTombstone).
+
+Central applies each batch in one transaction and acknowledges the highest
+sequence applied for the site. Sequences at or below that mark are skipped,
+so a batch can be resent any number of times, and an interrupted upload
+resumes from the last acknowledged sequence.
+"""
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import DateTime, Enum, Numeric, func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.company import Company
+from app.models.project import Project
+from app.models.drillhole import Drillhole
+from app.models.dispatch import Dispatch, DispatchStatus
+from app.models.sample import Sample
+from app.models.sync import ChangeJournal, SyncState, SyncIdMap, SyncTombstone, SyncConflict
+from app.models.counters import COUNTER_FIELDS
+from app.services.change_journal import serialize_row, to_json_value
+from app.services.counters import rebuild_counters
+from app.services.sample_ids import claim_sample_id
+from app.services.statements import get_by_id
+
+# Reference tables pulled from central, in foreign key order
+REFERENCE_MODELS = [
+    ("companies", Company),
+    ("projects", Project),
+    ("drillholes", Drillhole),
+]
+
+# Ids per DELETE when a site applies the deletions of a pull
+PULL_DELETE_CHUNK = 1000
+
+# Columns owned by the database on each side (child counters are derived
+# from each side's own rows)
+LOCAL_ONLY_FIELDS = {"id", "created_at", "updated_at"} | COUNTER_FIELDS
+
+DISPATCH_UPDATE_FIELDS = {
+    "hq_boxes", "nq_boxes", "driver", "technician", "samples_collected", "sample_type",
+}
+SAMPLE_UPDATE_FIELDS = {"sample_type", "from_depth", "to_depth", "status"}
+RETURN_FIELDS = ("returned_hq", "returned_nq", "return_condition", "return_notes")
+
+
+def encode_batch(payload: Dict[str, Any]) -> bytes:
+    """
+    Serialize and gzip-compress a sync payload
+
+    Args:
+        payload: JSON-safe payload
+
+    Returns:
+        Compressed bytes
+    """
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return gzip.compress(raw, compresslevel=6)
+
+
+def decode_batch(body: bytes, content_encoding: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Decode a (possibly gzip-compressed) sync payload
+
+    Args:
+        body: Request body
+        content_encoding: Value of the Content-Encoding header
+
+    Returns:
+        Decoded payload
+    """
+    if content_encoding and content_encoding.lower() == "gzip":
+        body = gzip.decompress(body)
+    return json.loads(body.decode("utf-8"))
+
+
+def row_values(model, data: Dict[str, Any], exclude=frozenset()) -> Dict[str, Any]:
+    """
+    Convert a serialized row back into column values for a model
+
+    Args:
+        model: ORM model class
+        data: Serialized row (see serialize_row)
+        exclude: Column names to skip
+
+    Returns:
+        Dictionary of column name to Python value
+    """
+    values = {}
+    for column in model.__table__.columns:
+        if column.key in exclude or column.key not in data:
+            continue
+        value = data[column.key]
+        if value is not None:
+            if isinstance(column.type, Enum) and column.type.enum_class is not None:
+                value = column.type.enum_class(value)
+            elif isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Numeric) and not isinstance(value, Decimal):
+                value = Decimal(str(value))
+        values[column.key] = value
+    return values
+
+
+# ==========================================================
+# CENTRAL SIDE
+# ==========================================================
+class ReplayConflict(Exception):
+    """Raised when a replayed change conflicts with central state"""
+
+    def __init__(self, reason: str, record_id: Optional[int] = None, central_values=None):
+        super().__init__(reason)
+        self.reason = reason
+        self.record_id = record_id
+        self.central_values = central_values
+
+
+def _get_site_state(db: Session, site_id: str) -> SyncState:
+    state = db.query(SyncState).filter(SyncState.site_id == site_id).with_for_update().first()
+    if state is None:
+        state = SyncState(site_id=site_id, last_seq=0, pushed_seq=0, applied_seq=0)
+        db.add(state)
+        db.flush()
+    return state
+
+
+def _load_id_map(db: Session, site_id: str, changes: List[Dict[str, Any]]) -> Dict[tuple, int]:
+    """Resolve every local id referenced by a batch in one query"""
+    local_ids = set()
+    for change in changes:
+        local_ids.add(change["record_id"])
+        payload = change.get("payload") or {}
+        if change["entity"] == "sample" and payload.get("dispatch_id") is not None:
+            local_ids.add(payload["dispatch_id"])
+    if not local_ids:
+        return {}
+    rows = db.query(SyncIdMap.entity, SyncIdMap.local_id, SyncIdMap.central_id).filter(
+        SyncIdMap.site_id == site_id,
+        SyncIdMap.local_id.in_(local_ids),
+    ).all()
+    return {(entity, local_id): central_id for entity, local_id, central_id in rows}
+
+
+def _map_id(db: Session, site_id: str, id_map: Dict[tuple, int], entity: str, local_id: int, central_id: int) -> None:
+    db.add(SyncIdMap(site_id=site_id, entity=entity, local_id=local_id, central_id=central_id))
+    id_map[(entity, local_id)] = central_id
+
+
+def _mapped_record(db: Session, id_map: Dict[tuple, int], entity: str, model, local_id: int):
+    central_id = id_map.get((entity, local_id))
+    if central_id is None:
+        return None
+    return get_by_id(db, model, central_id)
+
+
+def _apply_dispatch(db: Session, site_id: str, id_map: Dict[tuple, int], change: Dict[str, Any]) -> None:
+    op = change["op"]
+    payload = change.get("payload") or {}
+
+    if op == "create":
+        dispatch = Dispatch(**row_values(Dispatch, payload, exclude=LOCAL_ONLY_FIELDS))
+        db.add(dispatch)
+        db.flush()
+        _map_id(db, site_id, id_map, "dispatch", change["record_id"], dispatch.id)
+        return
+
+    dispatch = _mapped_record(db, id_map, "dispatch", Dispatch, change["record_id"])
+    if dispatch is None:
+        if op == "delete":
+            return
+        raise ReplayConflict("Dispatch not found on central")
+
+    if op == "update":
+        values = row_values(Dispatch, payload)
+        for field in DISPATCH_UPDATE_FIELDS.intersection(values):
+            setattr(dispatch, field, values[field])
+    elif op == "return":
+        values = row_values(Dispatch, payload)
+        if dispatch.status == DispatchStatus.RETURNED:
+            central_values = {field: getattr(dispatch, field) for field in RETURN_FIELDS}
+            if all(central_values[field] == values.get(field) for field in RETURN_FIELDS):
+                return
+            raise ReplayConflict(
+                "Dispatch already returned with different values",
+                record_id=dispatch.id,
+                central_values=central_values,
+            )
+        dispatch.status = DispatchStatus.RETURNED
+        dispatch.return_date = values.get("return_date") or datetime.utcnow()
+        for field in RETURN_FIELDS:
+            setattr(dispatch, field, values.get(field))
+    elif op == "delete":
+        db.delete(dispatch)
+    else:
+        raise ReplayConflict(f"Unsupported dispatch operation: {op}")
+
+
+def _apply_sample(db: Session, site_id: str, id_map: Dict[tuple, int], change: Dict[str, Any]) -> None:
+    op = change["op"]
+    payload = change.get("payload") or {}
+
+    if op == "create":
+        values = row_values(Sample, payload, exclude=LOCAL_ONLY_FIELDS)
+        dispatch_id = id_map.get(("dispatch", values["dispatch_id"]))
+        if dispatch_id is None:
+            raise ReplayConflict("Parent dispatch not found on central")
+        existing = db.query(Sample).filter(Sample.sample_id == values["sample_id"]).first()
+        if existing is not None:
+            raise ReplayConflict(
+                "Sample ID already exists on central",
+                record_id=existing.id,
+                central_values=serialize_row(existing),
+            )
+        values["dispatch_id"] = dispatch_id
+        claim_sample_id(db, values["sample_id"])
+        sample = Sample(**values)
+        db.add(sample)
+        db.flush()
+        _map_id(db, site_id, id_map, "sample", change["record_id"], sample.id)
+        return
+
+    sample = _mapped_record(db, id_map, "sample", Sample, change["record_id"])
+    if sample is None:
+        if op == "delete":
+            return
+        raise ReplayConflict("Sample not found on central")
+
+    if op == "update":
+        values = row_values(Sample, payload)
+        for field in SAMPLE_UPDATE_FIELDS.intersection(values):
+            setattr(sample, field, values[field])
+    elif op == "delete":
+        db.delete(sample)
+    else:
+        raise ReplayConflict(f"Unsupported sample operation: {op}")
+
+
+CHANGE_HANDLERS: Dict[str, Callable[[Session, str, Dict[tuple, int], Dict[str, Any]], None]] = {
+    "dispatch": _apply_dispatch,
+    "sample": _apply_sample,
+}
+
+
+def apply_batch(db: Session, site_id: str, changes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Replay a batch of journal entries from a site on central
+
+    Entries already applied are skipped. Replay stops at the first gap in
+    the sequence so the site resends from the acknowledged sequence. Each
+    change runs in a savepoint; a conflicting change is recorded in
+    sync_conflicts and does not block the rest of the batch.
+
+    Args:
+        db: Central database session
+        site_id: Originating site
+        changes: Journal entries ordered by sequence
+
+    Returns:
+        Acknowledged sequence and replay counters
+    """
+    state = _get_site_state(db, site_id)
+    applied = duplicates = 0
+    conflicts = []
+    pending = [change for change in changes if change["seq"] > state.applied_seq]
+    id_map = _load_id_map(db, site_id, pending)
+
+    for change in sorted(changes, key=lambda c: c["seq"]):
+        seq = change["seq"]
+        if seq <= state.applied_seq:
+            duplicates += 1
+            continue
+        if seq != state.applied_seq + 1:
+            break
+
+        handler = CHANGE_HANDLERS.get(change["entity"])
+        try:
+            with db.begin_nested():
+                if handler is None:
+                    raise ReplayConflict(f"Unsupported entity: {change['entity']}")
+                handler(db, site_id, id_map, change)
+        except ReplayConflict as conflict:
+            conflicts.append(_record_conflict(db, site_id, change, conflict))
+        else:
+            applied += 1
+        state.applied_seq = seq
+
+    db.commit()
+
+    return {
+        "site_id": site_id,
+        "acked_seq": state.applied_seq,
+        "applied": applied,
+        "duplicates": duplicates,
+        "conflicts": conflicts,
+    }
+
+
+def _record_conflict(db: Session, site_id: str, change: Dict[str, Any], conflict: ReplayConflict) -> Dict[str, Any]:
+    central_values = conflict.central_values
+    if central_values is not None:
+        central_values = {key: to_json_value(value) for key, value in central_values.items()}
+    db.add(SyncConflict(
+        site_id=site_id,
+        seq=change["seq"],
+        entity=change["entity"],
+        op=change["op"],
+        record_id=conflict.record_id,
+        reason=conflict.reason,
+        local_values=change.get("payload"),
+        central_values=central_values,
+    ))
+    return {"seq": change["seq"], "entity": change["entity"], "op": change["op"], "reason": conflict.reason}
+
+
+def build_pull(db: Session, since: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Collect reference data changed or deleted since a watermark
+
+    Rows updated or tombstoned at the watermark itself are sent again,
+    which is harmless because the site applies them idempotently. A full
+    pull sends every tombstone, so a site seeded from an older copy still
+    drops rows deleted since.
+
+    Args:
+        db: Central database session
+        since: Watermark from the previous pull (None for a full pull)
+
+    Returns:
+        Changed rows and deleted ids per table and the new watermark
+    """
+    result: Dict[str, Any] = {"tables": {}, "deleted_ids": {}}
+    watermark = since
+
+    for name, model in REFERENCE_MODELS:
+        query = db.query(model)
+        if since is not None:
+            query = query.filter(model.updated_at >= since)
+        rows = query.order_by(model.id).all()
+        result["tables"][name] = [serialize_row(row) for row in rows]
+
+        latest = db.query(func.max(model.updated_at)).scalar()
+        if latest is not None and (watermark is None or latest > watermark):
+            watermark = latest
+
+    tombstones = db.query(SyncTombstone.entity, SyncTombstone.record_id, SyncTombstone.deleted_at)
+    if since is not None:
+        tombstones = tombstones.filter(SyncTombstone.deleted_at >= since)
+    for entity, record_id, deleted_at in tombstones.order_by(SyncTombstone.id):
+        result["deleted_ids"].setdefault(entity, []).append(record_id)
+        if watermark is None or deleted_at > watermark:
+            watermark = deleted_at
+
+    result["watermark"] = watermark.isoformat() if watermark else None
+    return result
+
+
+# ==========================================================
+# SITE SIDE
+# ==========================================================
+class HttpTransport:
+    """Talks to the central API over HTTP"""
+
+    def __init__(self, base_url: str, username: str, password: str, timeout: int = 60):
+        import httpx
+
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.password = password
+        self.client = httpx.Client(timeout=timeout)
+        self._token: Optional[str] = None
+
+    def _login(self) -> str:
+        response = self.client.post(
+            f"{self.base_url}/auth/login",
+            json={"username": self.username, "password": self.password},
+        )
+        response.raise_for_status()
+        self._token = response.json()["access_token"]
+        return self._token
+
+    def _request(self, method: str, path: str, **kwargs):
+        for attempt in range(2):
+            token = self._token or self._login()
+            headers = {**kwargs.pop("headers", {}), "Authorization": f"Bearer {token}"}
+            response = self.client.request(method, f"{self.base_url}{path}", headers=headers, **kwargs)
+            if response.status_code == 401 and attempt == 0:
+                self._token = None
+                kwargs["headers"] = {k: v for k, v in headers.items() if k != "Authorization"}
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def push(self, body: bytes) -> Dict[str, Any]:
+        return self._request(
+            "POST",
+            "/sync/push",
+            content=body,
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        )
+
+    def pull(self, since: Optional[str]) -> Dict[str, Any]:
+        params = {"since": since} if since else {}
+        return self._request("GET", "/sync/pull", params=params)
+
+
+class LocalTransport:
+    """Applies batches directly to a central database (benchmarks, co-located sites)"""
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+
+    def push(self, body: bytes) -> Dict[str, Any]:
+        payload = decode_batch(body, "gzip")
+        db = self.session_factory()
+        try:
+            return apply_batch(db, payload["site_id"], payload["changes"])
+        finally:
+            db.close()
+
+    def pull(self, since: Optional[str]) -> Dict[str, Any]:
+        db = self.session_factory()
+        try:
+            return build_pull(db, datetime.fromisoformat(since) if since else None)
+        finally:
+            db.close()
+
+
+class SyncEngine:
+    """Pushes the local change journal and pulls reference data"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        transport,
+        site_id: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.transport = transport
+        self.site_id = site_id or settings.SITE_ID
+        self.batch_size = batch_size or settings.SYNC_BATCH_SIZE
+        if not self.site_id:
+            raise ValueError("SITE_ID must be configured to run sync")
+
+    def _state(self, db: Session) -> SyncState:
+        state = db.query(SyncState).filter(SyncState.site_id == self.site_id).first()
+        if state is None:
+            state = SyncState(site_id=self.site_id, last_seq=0, pushed_seq=0, applied_seq=0)
+            db.add(state)
+            db.commit()
+        return state
+
+    def push(self) -> Dict[str, Any]:
+        """
+        Upload pending journal entries in compressed batches
+
+        The acknowledged sequence is stored after every batch, so an
+        interrupted push resumes where central left off.
+
+        Returns:
+            Push statistics
+        """
+        stats = {"batches": 0, "changes": 0, "raw_bytes": 0, "sent_bytes": 0, "conflicts": []}
+        db = self.session_factory()
+        try:
+            state = self._state(db)
+            while True:
+                entries = db.query(ChangeJournal).filter(
+                    ChangeJournal.site_id == self.site_id,
+                    ChangeJournal.seq > state.pushed_seq,
+                ).order_by(ChangeJournal.seq).limit(self.batch_size).all()
+                if not entries:
+                    break
+
+                payload = {
+                    "site_id": self.site_id,
+                    "changes": [
+                        {
+                            "seq": entry.seq,
+                            "entity": entry.entity,
+                            "op": entry.op,
+                            "record_id": entry.record_id,
+                            "payload": entry.payload,
+                        }
+                        for entry in entries
+                    ],
+                }
+                body = encode_batch(payload)
+                ack = self.transport.push(body)
+
+                stats["batches"] += 1
+                stats["raw_bytes"] += len(json.dumps(payload, separators=(",", ":")))
+                stats["sent_bytes"] += len(body)
+                stats["conflicts"].extend(ack.get("conflicts", []))
+
+                acked = ack["acked_seq"]
+                if acked < state.pushed_seq:
+                    # Central is behind (e.g. restored from backup): resend from its mark
+                    state.pushed_seq = acked
+                elif acked == state.pushed_seq:
+                    break
+                else:
+                    stats["changes"] += acked - state.pushed_seq
+                    state.pushed_seq = acked
+                db.commit()
+            db.commit()
+            stats["pushed_seq"] = state.pushed_seq
+            return stats
+        finally:
+            db.close()
+
+    def pull(self) -> Dict[str, Any]:
+        """
+        Apply reference data deltas from central
+
+        Rows deleted on central are only removed once every local change
+        has been pushed, so unsynced dispatches are never cascaded away.
+        Until then the watermark is kept, and the next pull sends the
+        deletions again.
+
+        Returns:
+            Pull statistics
+        """
+        db = self.session_factory()
+        try:
+            state = self._state(db)
+            since = state.pull_watermark.isoformat() if state.pull_watermark else None
+            data = self.transport.pull(since)
+
+            stats = {"upserted": 0, "deleted": 0, "deferred": 0}
+            for name, model in REFERENCE_MODELS:
+                for row in data["tables"].get(name, []):
+                    db.merge(model(**row_values(model, row, exclude=COUNTER_FIELDS)))
+                    stats["upserted"] += 1
+            db.flush()
+
+            deleted_ids = data.get("deleted_ids", {})
+            if state.pushed_seq >= state.last_seq:
+                for name, model in reversed(REFERENCE_MODELS):
+                    ids = deleted_ids.get(name, [])
+                    for start in range(0, len(ids), PULL_DELETE_CHUNK):
+                        stats["deleted"] += db.query(model).filter(
+                            model.id.in_(ids[start:start + PULL_DELETE_CHUNK])
+                        ).delete(synchronize_session=False)
+                if stats["deleted"]:
+                    # Bulk deletes skip the counter events
+                    rebuild_counters(db)
+            else:
+                stats["deferred"] = sum(len(ids) for ids in deleted_ids.values())
+
+            if data.get("watermark") and not stats["deferred"]:
+                state.pull_watermark = datetime.fromisoformat(data["watermark"])
+            db.commit()
+            return stats
+        finally:
+            db.close()
+
+    def sync(self) -> Dict[str, Any]:
+        """
+        Push local changes, then pull reference data
+
+        Returns:
+            Combined push and pull statistics
+        """
+        return {"push": self.push(), "pull": self.pull()}
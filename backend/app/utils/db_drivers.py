@@ -0,0 +1,197 @@
+"""
+MySQL driver support
+
+The API runs on one of three synchronous DB-API drivers, chosen with
+DATABASE_DRIVER:
+
+- ``pymysql`` (default): pure Python, always installed
+- ``mysqldb`` (``mysqlclient`` on PyPI): C extension over libmysqlclient;
+  far less CPU per row fetched, which matters for exports and reports
+- ``mysqlconnector`` (``mysql-connector-python``): Oracle's connector
+
+``connect_args()`` translates DATABASE_SSL_MODE / DATABASE_SSL_CA and
+protocol compression into each driver's own arguments. Async drivers
+(aiomysql, asyncmy) are measured by scripts/benchmark_drivers.py only; the
+API's sessions are synchronous.
+
+TLS session reuse: with pymysql every new connection (pool growth, overflow,
+recycling, a worker restart) would otherwise pay a full TLS handshake to the
+server. ``ResumingSSLContext`` remembers the session of the last connection
+and offers it on the next one, so the server can resume it (MySQL 8.0.29+
+with ``ssl_session_cache_mode=ON``) and skip the certificate exchange.
+mysqlclient and mysql-connector do the handshake inside their own TLS stack
+and do not expose sessions.
+"""
+import ssl
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass(frozen=True)
+class DriverInfo:
+    """What a DB-API driver supports"""
+    dialect: str
+    module: str
+    package: str
+    native: bool
+    compress: bool
+    tls_session_reuse: bool
+
+
+DRIVERS: Dict[str, DriverInfo] = {
+    "pymysql": DriverInfo("pymysql", "pymysql", "PyMySQL", native=False, compress=False, tls_session_reuse=True),
+    "mysqldb": DriverInfo("mysqldb", "MySQLdb", "mysqlclient", native=True, compress=True, tls_session_reuse=False),
+    "mysqlconnector": DriverInfo(
+        "mysqlconnector", "mysql.connector", "mysql-connector-python",
+        native=False, compress=True, tls_session_reuse=False,
+    ),
+}
+
+# Accepted DATABASE_DRIVER spellings
+ALIASES = {"mysqlclient": "mysqldb", "mysql-connector": "mysqlconnector"}
+
+VERIFY_MODES = ("VERIFY_CA", "VERIFY_IDENTITY")
+
+
+def resolve(driver: str) -> DriverInfo:
+    """
+    Look up a driver by DATABASE_DRIVER value
+
+    Raises:
+        ValueError: If the driver is not supported
+    """
+    name = driver.strip().lower()
+    name = ALIASES.get(name, name)
+    if name not in DRIVERS:
+        raise ValueError(f"Unsupported DATABASE_DRIVER {driver!r}; use one of {', '.join(DRIVERS)}")
+    return DRIVERS[name]
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """
+    Client SSLContext that offers the last TLS session on new connections
+
+    Shared by all connections of an engine. ``remember()`` is called once a
+    connection is established; the counters show how many handshakes were
+    resumed. With ``reuse`` off, sessions are counted but never offered.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.reuse = True
+        self.session: Optional[ssl.SSLSession] = None
+        self.handshakes = 0
+        self.resumed = 0
+        self._lock = threading.Lock()
+
+    def wrap_socket(self, sock, *args, **kwargs):
+        if self.reuse and kwargs.get("session") is None and self.session is not None:
+            kwargs["session"] = self.session
+        return super().wrap_socket(sock, *args, **kwargs)
+
+    def remember(self, sock: ssl.SSLSocket) -> None:
+        """Record a completed handshake and keep its session for the next one"""
+        with self._lock:
+            self.handshakes += 1
+            if sock.session_reused:
+                self.resumed += 1
+            # TLS 1.3 tickets arrive after the handshake; by now the
+            # authentication exchange has read them
+            if sock.session is not None:
+                self.session = sock.session
+
+    def stats(self) -> Dict[str, Any]:
+        """Handshake counters of this process"""
+        return {"session_reuse": self.reuse, "handshakes": self.handshakes, "resumed": self.resumed}
+
+
+def tls_context(ssl_mode: str, ca: Optional[str] = None, reuse: bool = True) -> ResumingSSLContext:
+    """
+    Build the client TLS context for DATABASE_SSL_MODE
+
+    REQUIRED (and PREFERRED) encrypt without verifying the server, as the
+    connection always has; VERIFY_CA checks the certificate chain against
+    DATABASE_SSL_CA (or the system store) and VERIFY_IDENTITY the host name
+    too.
+
+    Args:
+        ssl_mode: MySQL ssl-mode
+        ca: CA bundle path
+        reuse: Offer earlier sessions on new connections
+
+    Returns:
+        ResumingSSLContext
+    """
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.reuse = reuse
+    mode = ssl_mode.upper()
+    if mode in VERIFY_MODES:
+        if ca:
+            context.load_verify_locations(cafile=ca)
+        else:
+            context.load_default_certs()
+        context.verify_mode = ssl.CERT_REQUIRED
+        context.check_hostname = mode == "VERIFY_IDENTITY"
+    else:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def connect_args(
+    driver: DriverInfo,
+    ssl_mode: str,
+    ca: Optional[str] = None,
+    compress: bool = False,
+    context: Optional[ssl.SSLContext] = None,
+) -> Dict[str, Any]:
+    """
+    DB-API connect arguments for TLS and compression
+
+    Args:
+        driver: Driver in use
+        ssl_mode: MySQL ssl-mode (DISABLED turns TLS off)
+        ca: CA bundle path for the VERIFY_* modes
+        compress: Enable protocol compression (ignored if unsupported)
+        context: Shared TLS context (pymysql only; built if omitted)
+
+    Returns:
+        Keyword arguments for the driver's connect()
+    """
+    mode = ssl_mode.upper()
+    args: Dict[str, Any] = {}
+    if compress and driver.compress:
+        args["compress"] = True
+    if mode == "DISABLED":
+        if driver.dialect == "mysqldb":
+            args["ssl_mode"] = "DISABLED"
+        elif driver.dialect == "mysqlconnector":
+            args["ssl_disabled"] = True
+        return args
+
+    if driver.dialect == "pymysql":
+        args["ssl"] = context or tls_context(mode, ca)
+    elif driver.dialect == "mysqldb":
+        args["ssl_mode"] = mode if mode in VERIFY_MODES else "REQUIRED"
+        if ca:
+            args["ssl"] = {"ca": ca}
+    elif driver.dialect == "mysqlconnector":
+        args["ssl_disabled"] = False
+        args["ssl_verify_cert"] = mode in VERIFY_MODES
+        args["ssl_verify_identity"] = mode == "VERIFY_IDENTITY"
+        if ca:
+            args["ssl_ca"] = ca
+    return args
+
+
+def install_session_reuse(engine: Engine, context: ResumingSSLContext) -> None:
+    """Keep the TLS session of each new pymysql connection in ``context``"""
+
+    @event.listens_for(engine, "connect")
+    def _remember_session(dbapi_connection, connection_record):
+        sock = getattr(dbapi_connection, "_sock", None)
+        if isinstance(sock, ssl.SSLSocket):
+            context.remember(sock)
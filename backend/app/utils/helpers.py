@@ -2,9 +2,7 @@
 Helper utility functions
 """
 from datetime import datetime
-from typing import Any, Dict, List
-import csv
-import io
+from typing import Any, Dict, Iterable, Iterator, List
 
 
 def format_datetime(dt: datetime) -> str:
@@ -47,6 +45,9 @@ def export_to_csv(data: List[Dict[str, Any]], headers: List[str]) -> str:
     Returns:
         CSV string
     """
+    import csv
+    import io
+
     output = io.StringIO()
     writer = csv.DictWriter(output, fieldnames=headers)
     
@@ -56,6 +57,42 @@ def export_to_csv(data: List[Dict[str, Any]], headers: List[str]) -> str:
     return output.getvalue()
 
 
+def iter_csv(
+    rows: Iterable[Dict[str, Any]],
+    headers: List[str],
+    batch_size: int = 500
+) -> Iterator[str]:
+    """
+    Stream data as CSV in chunks of rows
+    
+    Args:
+        rows: Iterable of dictionaries containing data
+        headers: List of column headers
+        batch_size: Rows written per yielded chunk
+        
+    Yields:
+        CSV text chunks, starting with the header row
+    """
+    import csv
+    import io
+
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=headers)
+    writer.writeheader()
+    
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= batch_size:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+            pending = 0
+    
+    yield output.getvalue()
+
+
 def calculate_match_rate(total_returns: int, perfect_matches: int) -> float:
     """
     Calculate match rate percentage
@@ -0,0 +1,77 @@
+"""
+ETag helpers for conditional GET
+"""
+import hashlib
+from typing import Dict, Optional
+
+# Suffixes the compression middleware appends to a strong ETag so each
+# content-coding has its own validator (as Apache's mod_deflate does).
+# They are stripped again when comparing If-None-Match.
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def make_etag(*parts: str) -> str:
+    """
+    Build a quoted strong ETag from its parts
+
+    Args:
+        parts: Values the representation depends on
+
+    Returns:
+        Quoted ETag, e.g. "3f2a..."
+    """
+    digest = hashlib.sha1("\x1f".join(parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def strip_encoding_suffix(etag: str) -> str:
+    """Undo the content-coding suffix the compression middleware adds"""
+    for suffix in ENCODING_SUFFIXES:
+        if etag.endswith(suffix + '"'):
+            return etag[:-len(suffix) - 1] + '"'
+    return etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison)
+
+    Args:
+        if_none_match: Raw If-None-Match header value
+        etag: Current quoted ETag
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if strip_encoding_suffix(candidate) == etag:
+            return True
+    return False
+
+
+def cache_headers(etag: Optional[str], max_age: int = 0) -> Dict[str, str]:
+    """
+    Response headers for an ETag-validated representation
+
+    Responses are per-user (bearer auth), so shared caches must not store
+    them. Clients revalidate before reuse unless a max_age is given.
+
+    Args:
+        etag: Quoted ETag, or None when the data is not settled yet
+        max_age: Seconds the client may reuse the response without asking
+
+    Returns:
+        Header dictionary (empty without an ETag)
+    """
+    if etag is None:
+        return {}
+    if max_age > 0:
+        return {"ETag": etag, "Cache-Control": f"private, max-age={max_age}"}
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
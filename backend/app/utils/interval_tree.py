@@ -0,0 +1,148 @@
+"""
+Static interval tree
+
+Intervals are half-open ``[start, end)`` so that back-to-back intervals
+(120-125 and 125-130) do not overlap. They are kept in three parallel lists
+sorted by start; the lists double as an implicit balanced binary tree
+(the layout of cgranges): the node at index ``i`` on level ``k`` has its
+lowest ``k`` bits set, and ``maxes[i]`` holds the largest end in its
+subtree. An overlap query descends only into subtrees whose largest end
+passes the query start, so it costs O(log n + hits) however long the
+intervals are.
+
+Built once from all intervals; rebuild it to change them. gaps_and_overlaps
+checks coverage in one pass over intervals in start order.
+"""
+import math
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Subtrees with at most 2**(_SCAN_LEVEL + 1) nodes are scanned linearly
+_SCAN_LEVEL = 3
+
+
+class IntervalTree:
+    """Immutable interval tree over (start, end, key) triples"""
+
+    def __init__(self, intervals: Iterable[Tuple[float, float, Any]]):
+        ordered = sorted(intervals, key=lambda interval: (interval[0], interval[1]))
+        self.starts: List[float] = [interval[0] for interval in ordered]
+        self.ends: List[float] = [interval[1] for interval in ordered]
+        self.keys: List[Any] = [interval[2] for interval in ordered]
+        self._maxes: List[float] = list(self.ends)
+        self._root_level = self._index()
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _index(self) -> int:
+        n = len(self.starts)
+        if n == 0:
+            return -1
+        ends, maxes = self.ends, self._maxes
+        # Leaves are the even indices; track the right-most one whose
+        # subtree may be cut off by the end of the array
+        last_i = (n - 1) & ~1
+        last = maxes[last_i]
+        k = 1
+        while 1 << k <= n:
+            x = 1 << (k - 1)
+            for i in range((x << 1) - 1, n, x << 2):
+                right = maxes[i + x] if i + x < n else last
+                maxes[i] = max(ends[i], maxes[i - x], right)
+            last_i = last_i - x if (last_i >> k) & 1 else last_i + x
+            if last_i < n and maxes[last_i] > last:
+                last = maxes[last_i]
+            k += 1
+        return k - 1
+
+    def overlapping(self, start: float, end: float) -> List[int]:
+        """
+        Positions of the intervals overlapping [start, end)
+
+        A zero-length query (start == end) finds the intervals containing
+        that point.
+
+        Args:
+            start: Query start
+            end: Query end
+
+        Returns:
+            Positions into starts/ends/keys, in start order
+        """
+        n = len(self.starts)
+        if n == 0:
+            return []
+        if end == start:
+            # A point: [p, p) overlaps nothing, so widen by the smallest step
+            end = math.nextafter(start, math.inf)
+        starts, ends, maxes = self.starts, self.ends, self._maxes
+        found: List[int] = []
+        # (node, level, left child done)
+        stack = [((1 << self._root_level) - 1, self._root_level, False)]
+        while stack:
+            node, level, left_done = stack.pop()
+            if level <= _SCAN_LEVEL:
+                first = node >> level << level
+                last = min(n, first + (1 << (level + 1)) - 1)
+                i = first
+                while i < last and starts[i] < end:
+                    if ends[i] > start:
+                        found.append(i)
+                    i += 1
+            elif not left_done:
+                child = node - (1 << (level - 1))
+                stack.append((node, level, True))
+                if child >= n or maxes[child] > start:
+                    stack.append((child, level - 1, False))
+            elif node < n and starts[node] < end:
+                if ends[node] > start:
+                    found.append(node)
+                stack.append((node + (1 << (level - 1)), level - 1, False))
+        return found
+
+
+def gaps_and_overlaps(intervals: Iterable[Tuple[float, float, Any]], min_gap: float = 0.0) -> Dict[str, Any]:
+    """
+    Walk intervals in start order and report where coverage breaks
+
+    Keeps the furthest end reached so far: an interval starting past it
+    opens a gap, one starting before it overlaps the interval that reached
+    it (one pair per overlapping interval).
+
+    Args:
+        intervals: (start, end, key) triples sorted by start
+        min_gap: Gaps no longer than this are not listed
+
+    Returns:
+        {"intervals", "top", "bottom", "covered_length", "gaps": [(start, end)],
+        "overlaps": [(start, end, earlier key, key)]}
+    """
+    gaps: List[Tuple[float, float]] = []
+    overlaps: List[Tuple[float, float, Any, Any]] = []
+    count = 0
+    top = reach = reach_key = run_start = None
+    covered = 0.0
+    for start, end, key in intervals:
+        count += 1
+        if reach is None:
+            top, reach, reach_key, run_start = start, end, key, start
+            continue
+        if start > reach:
+            if start - reach > min_gap:
+                gaps.append((reach, start))
+            covered += reach - run_start
+            run_start = start
+        elif start < reach and end > start:
+            overlaps.append((start, min(end, reach), reach_key, key))
+        if end > reach:
+            reach, reach_key = end, key
+    if reach is not None:
+        covered += reach - run_start
+    return {
+        "intervals": count,
+        "top": top,
+        "bottom": reach,
+        "covered_length": covered,
+        "gaps": gaps,
+        "overlaps": overlaps,
+    }
@@ -0,0 +1,95 @@
+"""
+In-memory substring index
+
+Each text is split into trigrams of its lowercased form padded with ``^``
+and ``$``. A query of three or more characters is answered by intersecting
+the postings of its trigrams and checking the few candidates left; a
+two-character query uses the ``^xy`` trigram, so it matches prefixes only.
+Texts can be added, changed and removed one at a time.
+
+Meant for thousands of short names and codes; postings are Python sets, so
+memory grows with the number of distinct (trigram, text) pairs.
+"""
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+EXACT, PREFIX, CONTAINS = "exact", "prefix", "contains"
+MATCH_RANK = {EXACT: 0, PREFIX: 1, CONTAINS: 2}
+
+
+def _grams(padded: str) -> Set[str]:
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def match_kind(text: str, query: str) -> str:
+    """exact, prefix or contains (both arguments lowercased)"""
+    if text == query:
+        return EXACT
+    if text.startswith(query):
+        return PREFIX
+    return CONTAINS
+
+
+class NgramIndex:
+    """Trigram index from keys to texts"""
+
+    def __init__(self):
+        self._texts: Dict[Hashable, str] = {}
+        self._postings: Dict[str, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def set(self, key: Hashable, text: str) -> None:
+        """Index text under key, replacing its previous text"""
+        text = text.lower()
+        if self._texts.get(key) == text:
+            return
+        self.remove(key)
+        self._texts[key] = text
+        for gram in _grams(f"^{text}$"):
+            self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        """Drop key from the index (no-op if absent)"""
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        for gram in _grams(f"^{text}$"):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def update(self, items: Iterable[Tuple[Hashable, str]]) -> None:
+        """set() for each (key, text)"""
+        for key, text in items:
+            self.set(key, text)
+
+    def search(self, query: str, limit: int) -> List[Tuple[Hashable, str]]:
+        """
+        Keys whose text contains the query
+
+        Args:
+            query: At least two characters
+            limit: Maximum results
+
+        Returns:
+            (key, match kind) pairs, exact matches first, then prefixes,
+            then other substrings, each ordered by text
+        """
+        query = query.lower()
+        if len(query) < 2:
+            return []
+        if len(query) == 2:
+            candidates = self._postings.get(f"^{query}", set())
+        else:
+            postings = sorted((self._postings.get(gram, set()) for gram in _grams(query)), key=len)
+            candidates = set.intersection(*postings) if postings else set()
+        hits = [
+            (key, match_kind(self._texts[key], query))
+            for key in candidates
+            if query in self._texts[key]
+        ]
+        hits.sort(key=lambda hit: (MATCH_RANK[hit[1]], self._texts[hit[0]]))
+        return hits[:limit]
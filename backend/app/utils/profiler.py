@@ -0,0 +1,322 @@
+"""
+Sampling profiler for single requests
+
+A profiled request gets a ``RequestProfile`` in a context variable and a
+sampler thread that reads ``sys._current_frames()`` every few
+milliseconds. Only stacks doing that request's work are kept:
+
+* threadpool threads (sync endpoints and dependencies) while they run a
+  call whose contextvars Context carries the profile; anyio's worker loop
+  holds that Context in its ``context`` local
+* the event loop thread while it is running the request's own task
+
+Samples are aggregated as folded stacks ("frame;frame;frame count"), the
+input format of flamegraph.pl and speedscope, and can be rendered to SVG
+with ``render_flamegraph``. Requests that are not profiled never touch
+this module.
+"""
+import asyncio
+import html
+import json
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from contextvars import Context, ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9]+-[0-9]+$")
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+_sequence = iter(range(1, sys.maxsize))
+
+_WORKER_IDLE_FILES = ("queue.py", os.path.join("asyncio", "base_events.py"))
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename
+    if "site-packages" + os.sep in path:
+        path = path.split("site-packages" + os.sep, 1)[1]
+    elif path.startswith(BACKEND_DIR + os.sep):
+        path = path[len(BACKEND_DIR) + 1:]
+    else:
+        path = os.path.basename(path)
+    # ';' separates frames in the folded format
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})".replace(";", ",")
+
+
+class RequestProfile:
+    """
+    Samples and SQL statements of one request
+
+    Args:
+        method: HTTP method
+        path: Request path
+        trigger: "admin" (header or query flag) or "sampled" (1-in-N)
+        interval: Seconds between samples
+    """
+
+    def __init__(self, method: str, path: str, trigger: str, interval: float):
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{os.getpid()}-{next(_sequence):06d}"
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.status: Optional[int] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling; call from the request's task on the event loop"""
+        self._loop_thread = threading.get_ident()
+        self._task = asyncio.current_task()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread"""
+        self.duration = time.perf_counter() - self.started
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        loop = self._task.get_loop() if self._task else None
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident == self._loop_thread:
+                    if loop is None or asyncio.tasks._current_tasks.get(loop) is not self._task:
+                        continue
+                    stack = _stack_above(frame, _is_loop_handle)
+                    root = "event loop"
+                else:
+                    stack = self._worker_stack(frame)
+                    root = "threadpool"
+                if stack:
+                    self.samples[";".join([f"{self.method} {self.path}", root] + stack)] += 1
+                    self.sample_count += 1
+
+    def _worker_stack(self, frame) -> Optional[List[str]]:
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            if code.co_name == "run" and "context" in code.co_varnames:
+                context = frame.f_locals.get("context")
+                # A worker waiting for work, or handing back a result, still
+                # holds the Context of its last call
+                if not isinstance(context, Context) or context.get(_active) is not self or not frames:
+                    return None
+                if frames[-1].f_code.co_filename.endswith(_WORKER_IDLE_FILES):
+                    return None
+                return [_frame_label(f) for f in reversed(frames)]
+            frames.append(frame)
+            frame = frame.f_back
+        return None
+
+    def folded(self) -> str:
+        """Samples in folded-stack format, one "stack count" line each"""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+    def to_dict(self, statements: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Serializable profile document
+
+        Args:
+            statements: Statement log of the request (query_stats)
+
+        Returns:
+            Metadata, folded stacks and SQL statements
+        """
+        return {
+            "id": self.id,
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "trigger": self.trigger,
+            "duration_ms": round(self.duration * 1000, 1),
+            "interval_ms": round(self.interval * 1000, 2),
+            "samples": self.sample_count,
+            "sql_count": len(statements),
+            "sql_ms": round(sum(statement["ms"] for statement in statements), 1),
+            "sql_rows": sum(statement["rows"] for statement in statements),
+            "statements": statements,
+            "folded": self.folded(),
+        }
+
+
+def _is_loop_handle(frame) -> bool:
+    # asyncio.events.Handle._run invokes the task step; frames below it are
+    # the event loop itself
+    return frame.f_code.co_name == "_run" and frame.f_code.co_filename.endswith(os.path.join("asyncio", "events.py"))
+
+
+def _stack_above(frame, is_base) -> Optional[List[str]]:
+    # Without a base frame (uvloop runs callbacks from C) the whole stack is kept
+    frames = []
+    while frame is not None and not is_base(frame):
+        frames.append(frame)
+        frame = frame.f_back
+    return [_frame_label(f) for f in reversed(frames)] or None
+
+
+def activate(profile: RequestProfile):
+    """Mark the current context (and threadpool calls made from it) as profiled"""
+    return _active.set(profile)
+
+
+def deactivate(token) -> None:
+    """Undo activate"""
+    _active.reset(token)
+
+
+def save_profile(directory: str, document: Dict[str, Any], keep: int) -> str:
+    """
+    Write a profile document and prune the oldest beyond keep
+
+    Args:
+        directory: Profile directory
+        document: Output of RequestProfile.to_dict
+        keep: Profiles kept in the directory
+
+    Returns:
+        Path of the written file
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{document['id']}.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(document, f)
+    os.replace(tmp_path, path)
+
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+    for name in names[:max(0, len(names) - keep)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+    return path
+
+
+def load_profile(directory: str, profile_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a stored profile
+
+    Args:
+        directory: Profile directory
+        profile_id: Profile ID
+
+    Returns:
+        Profile document, or None if there is no such profile
+    """
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(directory, f"{profile_id}.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def list_profiles(directory: str, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Summaries of the newest stored profiles
+
+    Args:
+        directory: Profile directory
+        limit: Maximum number of profiles
+
+    Returns:
+        Profile documents without statements and stacks, newest first
+    """
+    if not os.path.isdir(directory):
+        return []
+    names = sorted((name for name in os.listdir(directory) if name.endswith(".json")), reverse=True)
+    summaries = []
+    for name in names[:limit]:
+        document = load_profile(directory, name[:-len(".json")])
+        if document is not None:
+            document.pop("statements", None)
+            document.pop("folded", None)
+            summaries.append(document)
+    return summaries
+
+
+def render_flamegraph(folded: str, title: str = "", width: int = 1200) -> str:
+    """
+    Render folded stacks as a self-contained SVG flame graph
+
+    Args:
+        folded: Folded stacks ("frame;frame count" lines)
+        title: Heading drawn above the graph
+        width: Image width in pixels
+
+    Returns:
+        SVG document
+    """
+    root: Dict[str, Any] = {"count": 0, "children": {}}
+    for line in folded.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if not stack or not count.isdigit():
+            continue
+        node = root
+        node["count"] += int(count)
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"count": 0, "children": {}})
+            node["count"] += int(count)
+
+    frame_height, top = 16, 28
+    total = root["count"] or 1
+    scale = (width - 20) / total
+    rects = []
+
+    def depth_of(node) -> int:
+        return 1 + max((depth_of(child) for child in node["children"].values()), default=0)
+
+    depth = depth_of(root) - 1
+    height = top + depth * frame_height + 10
+
+    def place(node, x: float, level: int) -> None:
+        for name, child in sorted(node["children"].items()):
+            w = child["count"] * scale
+            if w >= 0.5:
+                y = top + (depth - level - 1) * frame_height
+                hue = zlib.crc32(name.encode()) % 55
+                label = html.escape(name)
+                chars = int(w / 7)
+                text = html.escape(name[:chars - 2] + "..") if len(name) > chars else label
+                rects.append(
+                    f'<g><title>{label} ({child["count"]} samples, {child["count"] * 100 / total:.1f}%)</title>'
+                    f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{frame_height - 1}" '
+                    f'fill="hsl({hue},85%,60%)" rx="2"/>'
+                    + (f'<text x="{x + 3:.1f}" y="{y + 12}">{text}</text>' if chars > 3 else "")
+                    + "</g>"
+                )
+                place(child, x, level + 1)
+            x += w
+
+    place(root, 10, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="Verdana,sans-serif" font-size="11">'
+        f'<rect width="100%" height="100%" fill="#fafafa"/>'
+        f'<text x="10" y="18" font-size="13">{html.escape(title)} ({root["count"]} samples)</text>'
+        + "".join(rects)
+        + "</svg>"
+    )
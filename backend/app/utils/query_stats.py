@@ -0,0 +1,159 @@
+"""
+Per-request SQL statement statistics
+
+Engine events add every statement to the QueryStats object of the current
+context. A request (or any block of code) opts in with ``track()``; code
+running outside a tracked block, such as the job worker, is not counted.
+Starlette copies the context into the threadpool thread that runs a sync
+endpoint, so statements issued there are attributed to the request.
+
+Rows fetched are counted too. MySQL's buffered cursors report the result
+size as ``rowcount``; SQLite cursors do not, so SQLite engines connect
+through ``CountingConnection`` whose cursors count rows as they are fetched.
+Streaming (unbuffered) MySQL cursors are not counted.
+
+Tracked blocks nest: statements count towards every enclosing block. A
+block opened with ``log=True`` also records each statement with its
+duration and rows (used by the request profiler).
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Longest statement text kept in a statement log
+MAX_LOGGED_SQL = 4000
+
+
+class QueryStats:
+    """Statement count, rows fetched and total execution time"""
+
+    __slots__ = ("statements", "rows", "seconds", "parent", "log")
+
+    def __init__(self, parent: Optional["QueryStats"] = None, log: bool = False):
+        self.statements = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.parent = parent
+        self.log: Optional[List[Dict[str, Any]]] = [] if log else None
+
+    @property
+    def milliseconds(self) -> float:
+        """Total execution time in milliseconds"""
+        return self.seconds * 1000
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current() -> Optional[QueryStats]:
+    """Stats of the innermost tracked block, or None"""
+    return _current.get()
+
+
+def _chain(stats: Optional[QueryStats]) -> Iterator[QueryStats]:
+    while stats is not None:
+        yield stats
+        stats = stats.parent
+
+
+@contextmanager
+def track(log: bool = False) -> Iterator[QueryStats]:
+    """
+    Count the statements executed inside the block
+
+    Args:
+        log: Also record every statement (sql, ms, rows) in ``stats.log``
+
+    Yields:
+        QueryStats filled in as statements run
+    """
+    stats = QueryStats(_current.get(), log)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+class CountingCursor(sqlite3.Cursor):
+    """SQLite cursor adding fetched rows to the current QueryStats"""
+
+    # Statement log entries of the statement this cursor executed last
+    _query_stats_entries = ()
+
+    def _count(self, count):
+        if count:
+            for stats in _chain(_current.get()):
+                stats.rows += count
+            for entry in self._query_stats_entries:
+                entry["rows"] += count
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self._count(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._count(len(rows))
+        return rows
+
+
+class CountingConnection(sqlite3.Connection):
+    """SQLite connection whose cursors are CountingCursors (``factory`` connect arg)"""
+
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+
+def install(engine: Engine) -> None:
+    """
+    Attach the counting listeners to an engine
+
+    Args:
+        engine: Engine whose statements should be counted
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and _current.get() is not None:
+            context._query_stats_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        if stats is None:
+            return
+        started = getattr(context, "_query_stats_started", None)
+        seconds = time.perf_counter() - started if started is not None else 0.0
+        counting = isinstance(cursor, CountingCursor)
+        rows = 0
+        if cursor.description is not None and not counting and 0 <= cursor.rowcount < 2 ** 32:
+            rows = cursor.rowcount
+        entries = []
+        for tracked in _chain(stats):
+            tracked.statements += 1
+            tracked.rows += rows
+            tracked.seconds += seconds
+            if tracked.log is not None:
+                entry = {
+                    "sql": statement[:MAX_LOGGED_SQL],
+                    "ms": round(seconds * 1000, 3),
+                    "rows": rows,
+                    "executemany": executemany,
+                }
+                tracked.log.append(entry)
+                entries.append(entry)
+        if counting:
+            # Rows are counted as they are fetched, after this event
+            cursor._query_stats_entries = entries
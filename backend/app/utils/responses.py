@@ -0,0 +1,54 @@
+"""
+Fast JSON responses for list endpoints
+
+List endpoints select exactly the columns of their response schema, so the
+rows are trusted and can skip pydantic validation. They are serialized
+once with orjson. The route keeps its response_model for the OpenAPI docs;
+FastAPI does not re-validate a Response returned directly.
+"""
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    # Match pydantic's JSON output for Decimal (a string, e.g. "12.50")
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def schema_columns(schema, model) -> List[Any]:
+    """
+    Columns of a model that appear in a response schema, in schema order
+    
+    Args:
+        schema: Pydantic response schema
+        model: ORM model class
+        
+    Returns:
+        List of table columns
+    """
+    table_columns = model.__table__.c
+    return [table_columns[name] for name in schema.model_fields if name in table_columns]
+
+
+def rows_to_dicts(rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    Convert result rows into plain dictionaries
+    
+    Args:
+        rows: Rows from a column projection query
+        
+    Returns:
+        List of dictionaries keyed by column label
+    """
+    return [dict(row._mapping) for row in rows]
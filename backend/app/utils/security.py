@@ -1,18 +1,28 @@
 """
 Security utilities for password hashing and JWT token handling.
+
+passlib (with its bcrypt backend) and jose are imported on first use rather
+than at module import, which keeps them off the worker boot path.
 """
 import hashlib
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Dict, Any
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from app.config import settings
 
+
 # ==========================================================
 # PASSWORD HASHING SETUP
 # ==========================================================
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    """
+    Build the bcrypt password context on first use.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def get_password_hash(password: str) -> str:
@@ -21,7 +31,7 @@ def get_password_hash(password: str) -> str:
     SHA256 pre-hashing avoids bcrypt's 72-byte length limitation.
     """
     prehashed = hashlib.sha256(password.encode("utf-8")).hexdigest()
-    return pwd_context.hash(prehashed)
+    return get_pwd_context().hash(prehashed)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -31,7 +41,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     prehashed = hashlib.sha256(plain_password.encode("utf-8")).hexdigest()
     try:
-        return pwd_context.verify(prehashed, hashed_password)
+        return get_pwd_context().verify(prehashed, hashed_password)
     except Exception as e:
         # Avoid crashing the app; log and return False
         print(f"Password verification error: {e}")
@@ -46,6 +56,8 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     Create JWT access token.
     Ensures the `sub` claim is a string as required by jose.
     """
+    from jose import jwt
+
     to_encode = data.copy()
     if "sub" in to_encode:
         to_encode["sub"] = str(to_encode["sub"])
@@ -62,6 +74,8 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     Create JWT refresh token.
     Ensures the `sub` claim is a string.
     """
+    from jose import jwt
+
     to_encode = data.copy()
     if "sub" in to_encode:
         to_encode["sub"] = str(to_encode["sub"])
@@ -76,6 +90,8 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
     Decode and verify JWT token.
     Returns None if invalid.
     """
+    from jose import JWTError, jwt
+
     try:
         return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
@@ -0,0 +1,131 @@
+"""
+Single-flight coalescing of identical concurrent computations
+
+When several threads ask for the same key while a computation for it is
+running, only the first (the leader) runs it; the others wait and receive
+the leader's result or exception. Nothing is cached: once the leader
+finishes, the next call for the key computes afresh.
+
+Results are shared between requests, so callers must treat them as
+read-only.
+"""
+import threading
+from typing import Any, Callable, Dict, Optional
+from starlette.requests import Request
+
+# Every SingleFlight by name, for the admin metrics endpoint
+FLIGHTS: Dict[str, "SingleFlight"] = {}
+
+
+class _Call:
+    """One in-flight computation and the threads waiting for it"""
+
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with equal keys into one execution
+
+    Args:
+        name: Name reported in metrics, e.g. "reports.dashboard"
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, _Call] = {}
+        self._executions = 0
+        self._coalesced = 0
+        self._errors = 0
+        self._largest_group = 0
+        FLIGHTS[name] = self
+
+    def do(self, key: Any, func: Callable[[], Any]) -> Any:
+        """
+        Run func for key, or wait for the run already in progress
+
+        Args:
+            key: Hashable identity of the computation
+            func: Zero-argument callable computing the result
+
+        Returns:
+            The (possibly shared) result of func
+
+        Raises:
+            Exception: Whatever the leader's func raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executions += 1
+            else:
+                call.waiters += 1
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self._largest_group = max(self._largest_group, call.waiters + 1)
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters since process start
+
+        Returns:
+            calls, executions, coalesced (calls served by another call's
+            execution), errors, in_flight and largest_group
+        """
+        with self._lock:
+            return {
+                "calls": self._executions + self._coalesced,
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+                "errors": self._errors,
+                "in_flight": len(self._calls),
+                "largest_group": self._largest_group,
+            }
+
+
+def flight_key(request: Request, scope: str, version: Optional[str] = None) -> tuple:
+    """
+    Key identifying a read request for coalescing
+
+    Query parameters are sorted so their order does not matter. Including
+    the data version (the request's ETag) keeps a request from receiving a
+    result computed from data older than the version it was validated
+    against.
+
+    Args:
+        request: Incoming request
+        scope: Authorization scope the result depends on, e.g. the role
+        version: Data version or ETag seen by the request, if any
+
+    Returns:
+        Hashable key
+    """
+    params = tuple(sorted(request.query_params.multi_items()))
+    return (request.url.path, params, scope, version)
@@ -0,0 +1,259 @@
+"""
+Slow query log
+
+Engine events time every statement. One that runs longer than the
+threshold is appended to a JSON-lines file with its normalized SQL, a
+fingerprint of that SQL, a fingerprint of its parameters (values are never
+written), the route that issued it and, the first time a fingerprint is
+seen by this process, the database's EXPLAIN output. The file rolls over
+to ``<path>.1`` at a size limit; ``aggregate`` reads both for the
+/admin/slow-queries view.
+
+The EXPLAIN runs on the statement's own DBAPI connection, right after the
+statement, through a raw cursor (no engine events fire for it). Streamed
+statements are not explained, since their result is still being read.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("uvicorn")
+
+# Scope of the request being served (set by SlowQueryRouteMiddleware)
+request_scope: ContextVar[Optional[dict]] = ContextVar("slow_query_scope", default=None)
+
+# Fingerprints explained per process before EXPLAIN capture stops
+MAX_EXPLAINED = 10000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_REPEATED_LISTS = re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+")
+_WHITESPACE = re.compile(r"\s+")
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Reduce a statement to its shape
+
+    Literals become ``?``, placeholder lists of any length (expanded IN
+    lists, multi-row VALUES) become ``(?+)`` and whitespace is collapsed,
+    so executions that differ only in values share a fingerprint.
+    """
+    sql = _STRING.sub("?", statement)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?+)", sql)
+    sql = _REPEATED_LISTS.sub("(?+), ...", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def fingerprint(text: str) -> str:
+    """Short stable hash of a string"""
+    return hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()[:16]
+
+
+def route_label(scope: Optional[dict]) -> Optional[str]:
+    """
+    "METHOD /route/{param}" of a request scope
+
+    Path parameter values are put back as their names so requests for
+    different records share a label.
+    """
+    if scope is None:
+        return None
+    path = scope.get("path", "")
+    for name, value in (scope.get("path_params") or {}).items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return f"{scope.get('method', '')} {path}"
+
+
+class SlowQueryLog:
+    """
+    Rolling JSON-lines file of slow statements
+
+    Args:
+        path: Log file
+        threshold_ms: Statements at least this slow are logged
+        max_bytes: Size at which the file rolls over to path + ".1"
+        explain: Capture EXPLAIN once per fingerprint
+    """
+
+    def __init__(self, path: str, threshold_ms: float, max_bytes: int, explain: bool = True):
+        self.path = path
+        self.threshold = threshold_ms / 1000
+        self.max_bytes = max_bytes
+        self.explain = explain
+        self.logged = 0
+        self.explained: set = set()
+        self._lock = threading.Lock()
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Append one entry, rolling the file over when it is too large"""
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+                # One write per entry on an O_APPEND file, so workers sharing
+                # the file do not interleave lines
+                fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+                try:
+                    os.write(fd, line.encode("utf-8"))
+                finally:
+                    os.close(fd)
+                self.logged += 1
+            except OSError as exc:
+                logger.warning(f"Could not write slow query log: {exc}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Threshold and counters of this process"""
+        return {
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "logged": self.logged,
+            "explained_fingerprints": len(self.explained),
+            "path": self.path,
+        }
+
+
+def _explain(dialect_name: str, dbapi_connection, statement: str, parameters) -> List[Dict[str, Any]]:
+    prefix = "EXPLAIN QUERY PLAN " if dialect_name == "sqlite" else "EXPLAIN "
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        # A plain cursor, so the plan rows are not counted as fetched rows
+        cursor = dbapi_connection.cursor(sqlite3.Cursor)
+    else:
+        cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters or ())
+        columns = [column[0] for column in cursor.description or ()]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def install(engine: Engine, log: SlowQueryLog) -> SlowQueryLog:
+    """
+    Attach the timing listeners to an engine
+
+    Args:
+        engine: Engine whose statements should be timed
+        log: Where slow statements are written
+
+    Returns:
+        The log, for metrics
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed < log.threshold:
+            return
+
+        normalized = normalize_sql(statement)
+        key = fingerprint(normalized)
+        entry = {
+            "ts": datetime.utcnow().isoformat(timespec="milliseconds"),
+            "ms": round(elapsed * 1000, 2),
+            "fingerprint": key,
+            "sql": normalized,
+            "params_fingerprint": fingerprint(repr(parameters)),
+            "param_count": len(parameters) if hasattr(parameters, "__len__") else None,
+            "executemany": executemany,
+            "route": route_label(request_scope.get()) or "background",
+        }
+        if (
+            log.explain
+            and key not in log.explained
+            and len(log.explained) < MAX_EXPLAINED
+            and not executemany
+            and statement.lstrip().upper().startswith(EXPLAINABLE)
+            and not context.execution_options.get("stream_results")
+        ):
+            log.explained.add(key)
+            try:
+                entry["explain"] = _explain(conn.dialect.name, conn.connection.dbapi_connection, statement, parameters)
+            except Exception as exc:
+                entry["explain_error"] = str(exc)[:500]
+        log.record(entry)
+
+    return log
+
+
+def _read_entries(path: str) -> List[Dict[str, Any]]:
+    entries = []
+    for name in (path + ".1", path):
+        try:
+            with open(name) as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # Partial last line of a file being written
+                        continue
+        except FileNotFoundError:
+            continue
+    return entries
+
+
+def aggregate(path: str, limit: int = 50, route: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Summarize the log by fingerprint
+
+    Args:
+        path: Log file (its rolled-over predecessor is read too)
+        limit: Number of fingerprints returned
+        route: Only entries issued by this route label
+
+    Returns:
+        Per fingerprint: count, total/mean/p95/max milliseconds, first and
+        last occurrence, top routes, normalized SQL and the latest EXPLAIN,
+        ordered by total time
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for entry in _read_entries(path):
+        if route is None or entry.get("route") == route:
+            groups[entry["fingerprint"]].append(entry)
+
+    summaries = []
+    for key, entries in groups.items():
+        durations = sorted(entry["ms"] for entry in entries)
+        explained = [entry for entry in entries if "explain" in entry or "explain_error" in entry]
+        latest_plan = explained[-1] if explained else {}
+        summaries.append({
+            "fingerprint": key,
+            "count": len(entries),
+            "total_ms": round(sum(durations), 1),
+            "mean_ms": round(sum(durations) / len(durations), 1),
+            "p95_ms": durations[min(len(durations) - 1, int(0.95 * len(durations)))],
+            "max_ms": durations[-1],
+            "first_seen": entries[0]["ts"],
+            "last_seen": entries[-1]["ts"],
+            "routes": dict(Counter(entry.get("route") for entry in entries).most_common(5)),
+            "sql": entries[-1]["sql"],
+            "explain": latest_plan.get("explain"),
+            "explain_error": latest_plan.get("explain_error"),
+        })
+    summaries.sort(key=lambda summary: summary["total_ms"], reverse=True)
+    return summaries[:limit]
@@ -0,0 +1,66 @@
+"""
+Portable SQL functions
+
+Expressions whose SQL differs between MySQL (production) and SQLite (local
+sites, benchmarks, the query budget check), plus LIKE and substring match
+helpers that keep user input from acting as wildcards.
+"""
+from sqlalchemy import Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.functions import FunctionElement
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards (use with escape="\\")"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def like_prefix(column, value: str) -> ColumnElement:
+    """column starts with value; an index range on MySQL"""
+    return column.like(escape_like(value) + "%", escape="\\")
+
+
+def contains_text(column, value: str, dialect: str) -> ColumnElement:
+    """
+    column contains value
+
+    On MySQL this is a FULLTEXT phrase search, which needs an ngram FULLTEXT
+    index on the column (see alembic 0006); elsewhere a LIKE scan.
+
+    Args:
+        column: String column
+        value: Text to find (at least ngram_token_size characters on MySQL)
+        dialect: Dialect name of the session's engine
+
+    Returns:
+        Boolean SQL expression
+    """
+    if dialect == "mysql":
+        phrase = value.replace('"', " ")
+        return column.match(f'"{phrase}"')
+    return column.like("%" + escape_like(value) + "%", escape="\\")
+
+
+class days_between(FunctionElement):
+    """
+    Whole days from the first datetime to the second
+
+    Matches ``(end - start).days`` in Python (utils.helpers.calculate_days_out)
+    for non-negative spans: both dialects truncate the fractional day.
+    """
+    type = Integer()
+    name = "days_between"
+    inherit_cache = True
+
+
+@compiles(days_between)
+def _days_between_mysql(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"TIMESTAMPDIFF(DAY, {compiler.process(start, **kw)}, {compiler.process(end, **kw)})"
+
+
+@compiles(days_between, "sqlite")
+def _days_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"CAST(julianday({compiler.process(end, **kw)}) - julianday({compiler.process(start, **kw)}) AS INTEGER)"
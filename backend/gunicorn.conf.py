@@ -0,0 +1,39 @@
+"""
+Gunicorn configuration for production
+
+Runs WEB_CONCURRENCY uvicorn workers. Workers are recycled after
+WEB_MAX_REQUESTS (plus jitter) requests and get WEB_GRACEFUL_TIMEOUT
+seconds to finish in-flight requests on shutdown. Each worker's database
+pool is sized by app.config so that all workers together stay within
+DB_MAX_CONNECTIONS.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app.main:app
+"""
+from app.config import settings
+
+bind = f"{settings.WEB_HOST}:{settings.WEB_PORT}"
+workers = settings.WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+
+backlog = settings.WEB_BACKLOG
+keepalive = settings.WEB_KEEPALIVE
+timeout = settings.WEB_TIMEOUT
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+max_requests = settings.WEB_MAX_REQUESTS
+max_requests_jitter = settings.WEB_MAX_REQUESTS_JITTER
+
+accesslog = "-"
+errorlog = "-"
+loglevel = settings.LOG_LEVEL.lower()
+
+
+def when_ready(server):
+    per_worker = settings.db_connections_per_worker + settings.db_export_connections
+    total = settings.WEB_CONCURRENCY * per_worker
+    export = f" (+{settings.db_export_connections} export)" if settings.db_export_connections else ""
+    server.log.info(
+        f"{settings.WEB_CONCURRENCY} workers x {settings.db_pool_size}+{settings.db_max_overflow}{export} "
+        f"DB connections = {total} max"
+        + (f" (limit {settings.DB_MAX_CONNECTIONS})" if settings.DB_MAX_CONNECTIONS else "")
+    )
@@ -0,0 +1,108 @@
+"""
+Assay import and query benchmark
+Builds a local SQLite database, writes a lab results CSV with --analytes
+columns for every sample and times:
+
+- the import (app/services/assay_import.py): values per second, statements
+  per chunk stay constant
+- per drillhole reads, all analytes and one analyte
+- per analyte pages, highest values first: the first page and a deep
+  page reached through the keyset cursor
+"""
+import sys
+import os
+import argparse
+import csv
+import random
+import tempfile
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, create_db_engine
+from app.models import AssayBatch, AssayResult, Sample
+from app.services.assay_import import import_batch
+from app.services.assay_results import analyte_results, hole_assays, resolve_codes
+from app.services.reference_cache import reference_cache
+from generate_data import generate
+
+ELEMENTS = ["Au", "Ag", "Cu", "Pb", "Zn", "As", "Sb", "Bi", "Mo", "W", "Sn", "Ni", "Co", "Cr",
+            "Fe", "Mn", "S", "Te", "Se", "Hg", "Cd", "In", "Tl", "Ba", "Sr", "Li", "Be", "V", "Ti", "Zr"]
+
+
+def ms(fn, runs: int = 5) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark assay import and queries")
+    parser.add_argument("--samples", type=int, default=50_000, help="Samples (one results row each)")
+    parser.add_argument("--analytes", type=int, default=20, help="Analyte columns in the file")
+    parser.add_argument("--depth-pages", type=int, default=200, help="Page reached for the deep page timing")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    analytes = [f"{element}_ppm" for element in ELEMENTS[:args.analytes]]
+    volumes = dict(companies=1, projects=5, drillholes=max(1, args.samples // 200),
+                   dispatches=max(1, args.samples // 5), samples=args.samples)
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as connection:
+            generate(connection, volumes, args.seed, datetime(2025, 10, 1), 3, 5000)
+        db = sessionmaker(bind=engine)()
+
+        path = os.path.join(tmp, "lab.csv")
+        with open(path, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["Certificate:", "BENCH-0001"])
+            writer.writerow(["Sample ID"] + analytes)
+            for (code,) in db.execute(select(Sample.sample_id).order_by(Sample.id)):
+                writer.writerow([code] + [
+                    "<0.01" if rng.random() < 0.1 else f"{rng.lognormvariate(0, 1.5):.3f}" for _ in analytes
+                ])
+
+        batch = AssayBatch(filename="lab.csv")
+        db.add(batch)
+        db.commit()
+        started = time.perf_counter()
+        totals = import_batch(db, batch.id, path)
+        seconds = time.perf_counter() - started
+        print(f"import: {totals['result_count']:,} values of {totals['sample_count']:,} samples in "
+              f"{seconds:.1f} s ({totals['result_count'] / seconds:,.0f} values/s)")
+
+        names = reference_cache.names(db)
+        hole = db.execute(
+            select(AssayResult.drillhole_id).group_by(AssayResult.drillhole_id).order_by(func.count().desc()).limit(1)
+        ).scalar()
+        first = resolve_codes(db, [analytes[0]])[analytes[0]]
+        rows = hole_assays(db, hole)["samples"]
+        print(f"drillhole {names.drillhole(hole)}: {len(rows)} samples")
+        print(f"  all analytes        {ms(lambda: hole_assays(db, hole)):8.2f} ms")
+        print(f"  one analyte         {ms(lambda: hole_assays(db, hole, [first])):8.2f} ms")
+
+        page_size = 100
+        print(f"{analytes[0]} pages of {page_size}, highest first")
+        print(f"  first page          {ms(lambda: analyte_results(db, names, first, limit=page_size)):8.2f} ms")
+        cursor = None
+        for _ in range(args.depth_pages):
+            cursor = analyte_results(db, names, first, cursor=cursor, limit=page_size)["next_cursor"]
+        print(f"  page {args.depth_pages + 1} (cursor)    "
+              f"{ms(lambda: analyte_results(db, names, first, cursor=cursor, limit=page_size)):8.2f} ms")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
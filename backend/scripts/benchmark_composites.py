@@ -0,0 +1,134 @@
+"""
+Downhole compositing benchmark
+Builds a local SQLite database with --samples samples in one project,
+imports --analytes assay values for each and times the parts of a
+composite run (app/services/compositing.py): the columnar fetch, the NumPy
+compositing in this process and across --processes worker processes, and
+for comparison the same composites computed with Python loops over the
+samples. The results are checked against each other.
+"""
+import sys
+import os
+import argparse
+import csv
+import math
+import random
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, create_db_engine
+from app.models import AssayBatch, Project, Sample
+from app.services import compositing
+from app.services.assay_import import import_batch
+from generate_data import generate
+
+ELEMENTS = ["Au", "Ag", "Cu", "Pb", "Zn", "As", "Sb", "Bi", "Mo", "W", "Sn", "Ni", "Co", "Cr",
+            "Fe", "Mn", "S", "Te", "Se", "Hg", "Cd", "In", "Tl", "Ba", "Sr", "Li", "Be", "V", "Ti", "Zr"]
+
+
+def python_composites(holes, starts, ends, values, length, min_coverage):
+    """Fixed length composites with loops over the samples and the composites they cross"""
+    sums = defaultdict(lambda: [[0.0] * values.shape[1], [0.0] * values.shape[1]])
+    step = round(length * 100)
+    for hole, start, end, row in zip(holes.tolist(), starts.tolist(), ends.tolist(), values.tolist()):
+        if start != start or end != end or end <= start:
+            continue
+        start, end = round(start * 100), round(end * 100)
+        for index in range(start // step, (end - 1) // step + 1):
+            weight = min(end, (index + 1) * step) - max(start, index * step)
+            weights, totals = sums[(hole, index)]
+            for column, value in enumerate(row):
+                if value == value:
+                    weights[column] += weight
+                    totals[column] += weight * value
+    result = {}
+    for key in sorted(sums):
+        weights, totals = sums[key]
+        row = [total / weight if weight > 0 and weight >= min_coverage * step else math.nan
+               for weight, total in zip(weights, totals)]
+        if not all(value != value for value in row):
+            result[key] = row
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark downhole compositing")
+    parser.add_argument("--samples", type=int, default=50_000, help="Samples in the project")
+    parser.add_argument("--holes", type=int, default=250, help="Drillholes")
+    parser.add_argument("--analytes", type=int, default=20, help="Assayed analytes per sample")
+    parser.add_argument("--length", type=float, default=1.0, help="Composite length in metres")
+    parser.add_argument("--processes", type=int, default=4, help="Worker processes for the pool timing")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs (best is reported)")
+    args = parser.parse_args()
+
+    analytes = [f"{element}_ppm" for element in ELEMENTS[:args.analytes]]
+    volumes = dict(companies=1, projects=1, drillholes=args.holes,
+                   dispatches=max(1, args.samples // 5), samples=args.samples)
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as connection:
+            generate(connection, volumes, 42, datetime(2025, 10, 1), 3, 5000)
+        db = sessionmaker(bind=engine)()
+        project_id = db.query(Project.id).scalar()
+
+        path = os.path.join(tmp, "lab.csv")
+        with open(path, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["Sample ID"] + analytes)
+            for (code,) in db.execute(select(Sample.sample_id).order_by(Sample.id)):
+                writer.writerow([code] + [f"{rng.lognormvariate(0, 1.5):.3f}" for _ in analytes])
+        batch = AssayBatch(filename="lab.csv")
+        db.add(batch)
+        db.commit()
+        import_batch(db, batch.id, path)
+
+        def best(fn, runs=args.runs):
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                value = fn()
+                timings.append((time.perf_counter() - started) * 1000)
+            return min(timings), value
+
+        options = dict(length=args.length, min_coverage=0.5)
+        fetch_ms, (holes, starts, ends, values, _) = best(lambda: compositing.fetch_columns(db, project_id))
+        numpy_ms, result = best(lambda: compositing.composite(holes, starts, ends, values, **options))
+        compositing.PARALLEL_MIN_SAMPLES = 0
+        # The first call starts the worker processes
+        startup_ms, _ = best(lambda: compositing.composite_parallel(
+            holes, starts, ends, values, args.processes, **options), runs=1)
+        pool_ms, pooled = best(lambda: compositing.composite_parallel(
+            holes, starts, ends, values, args.processes, **options))
+        compositing.shutdown_pool()
+        python_ms, expected = best(lambda: python_composites(holes, starts, ends, values, args.length, 0.5), runs=1)
+
+        for name in result:
+            assert np.array_equal(result[name], pooled[name], equal_nan=True), name
+        assert len(expected) == len(result["drillhole_id"])
+        for i, (hole, from_depth) in enumerate(zip(result["drillhole_id"].tolist(), result["from_depth"].tolist())):
+            row = expected[(hole, round(from_depth / args.length))]
+            assert np.allclose(row, result["values"][i], equal_nan=True), (hole, from_depth)
+
+        print(f"{len(holes):,} samples x {values.shape[1]} analytes in {args.holes} holes, "
+              f"{args.length} m composites: {len(result['drillhole_id']):,}, best of {args.runs}")
+        print(f"  fetch (columnar)             {fetch_ms:8.1f} ms")
+        print(f"  NumPy, this process          {numpy_ms:8.1f} ms")
+        print(f"  NumPy, {args.processes} processes          {pool_ms:8.1f} ms  (pool start {startup_ms:.0f} ms)")
+        print(f"  Python loops                 {python_ms:8.1f} ms  ({python_ms / numpy_ms:.0f}x)")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
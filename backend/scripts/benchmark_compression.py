@@ -0,0 +1,102 @@
+"""
+Compression and conditional GET benchmark
+Calls list, report and export endpoints against a seeded SQLite database
+with identity, gzip and brotli encodings and with a matching ETag, and
+reports bytes on the wire, p50 server latency and the estimated transfer
+time over a slow link
+"""
+import sys
+import os
+import argparse
+import statistics
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+ENDPOINTS = [
+    "/api/v1/dispatches/?limit=1000",
+    "/api/v1/dispatches/outstanding",
+    "/api/v1/reports/reconciliation",
+    "/api/v1/reports/export",
+]
+
+
+def measure(client, path, headers, runs):
+    timings = []
+    response = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        response.read()
+        timings.append((time.perf_counter() - started) * 1000)
+    return response, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response compression and ETags")
+    parser.add_argument("--rows", type=int, default=5000, help="Dispatches to seed")
+    parser.add_argument("--runs", type=int, default=15, help="Requests per measurement")
+    parser.add_argument("--link-kbps", type=float, default=1000.0,
+                        help="Link speed used to estimate transfer time")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+    from fastapi.testclient import TestClient
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+    from app.middleware.compression import brotli
+    from app.models.user import User, UserRole
+    from app.utils.security import create_access_token, get_password_hash
+    from benchmark_serialization import seed
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    seed(db, args.rows)
+    user = User(
+        username="bench",
+        email="bench@example.com",
+        password_hash=get_password_hash("bench"),
+        full_name="Benchmark",
+        role=UserRole.ADMIN,
+    )
+    db.add(user)
+    db.commit()
+    token = create_access_token({"sub": str(user.id)})
+    db.close()
+    # ETags are only issued once the newest row is older than one second
+    time.sleep(1.1)
+
+    client = TestClient(app)
+    auth = {"Authorization": f"Bearer {token}"}
+    modes = [("identity", "identity"), ("gzip", "gzip")]
+    if brotli is not None:
+        modes.append(("br", "br"))
+
+    print(f"{'endpoint':34} {'mode':9} {'status':>6} {'body bytes':>10} {'p50 ms':>8} {'link ms':>9}")
+    for path in ENDPOINTS:
+        etag = None
+        for label, encoding in modes:
+            response, p50 = measure(client, path, {**auth, "Accept-Encoding": encoding}, args.runs)
+            wire = response.num_bytes_downloaded
+            etag = response.headers.get("etag") or etag
+            link_ms = wire * 8 / args.link_kbps
+            print(f"{path:34} {label:9} {response.status_code:>6} {wire:>10,} {p50:>8.1f} {link_ms:>9.0f}")
+        if etag:
+            response, p50 = measure(
+                client, path,
+                {**auth, "Accept-Encoding": modes[-1][1], "If-None-Match": etag},
+                args.runs,
+            )
+            wire = response.num_bytes_downloaded
+            link_ms = wire * 8 / args.link_kbps
+            print(f"{path:34} {'304':9} {response.status_code:>6} {wire:>10,} {p50:>8.1f} {link_ms:>9.0f}")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
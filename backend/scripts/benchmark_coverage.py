@@ -0,0 +1,104 @@
+"""
+Coverage report benchmark
+Builds a local SQLite database with --samples intervals (default 100k) in
+one project and times the parts of the coverage report
+(app/services/coverage.py): the columnar fetch, the NumPy computation, and
+for comparison the same per-hole statistics and depth bins computed with
+Python loops over the rows (the per-hole sweep of utils/interval_tree.py).
+Both results are checked against each other.
+"""
+import sys
+import os
+import argparse
+import math
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, create_db_engine
+from app.models import Project
+from app.services.coverage import compute_coverage, fetch_holes, fetch_intervals
+from app.utils.interval_tree import gaps_and_overlaps
+from generate_data import generate
+
+
+def python_coverage(hole_ids, depths, sample_holes, starts, ends, bin_size):
+    """Per-hole gaps/overlaps/sampled metres and sampled metres per bin with loops"""
+    by_hole = defaultdict(list)
+    for hole, start, end in zip(sample_holes.tolist(), starts.tolist(), ends.tolist()):
+        if start == start and end == end and end >= start:
+            by_hole[hole].append((start, end, None))
+    holes, bins = {}, defaultdict(float)
+    for hole in hole_ids.tolist():
+        intervals = sorted(by_hole.get(hole, []))
+        result = gaps_and_overlaps(intervals)
+        holes[hole] = (len(result["gaps"]), len(result["overlaps"]), result["covered_length"])
+        reach = -math.inf
+        for start, end, _ in intervals:
+            piece_from = max(start, reach)
+            if end > piece_from:
+                depth = piece_from
+                while depth < end:
+                    bin_end = (math.floor(depth / bin_size + 1e-9) + 1) * bin_size
+                    bins[int(depth // bin_size + 1e-9)] += min(end, bin_end) - depth
+                    depth = min(end, bin_end)
+            reach = max(reach, end)
+    return holes, bins
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy coverage report")
+    parser.add_argument("--samples", type=int, default=100_000, help="Sample intervals")
+    parser.add_argument("--holes", type=int, default=500, help="Drillholes")
+    parser.add_argument("--bin-size", type=float, default=10.0, help="Depth bin height in metres")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs (best is reported)")
+    args = parser.parse_args()
+
+    volumes = dict(companies=1, projects=1, drillholes=args.holes,
+                   dispatches=args.samples // 5, samples=args.samples)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as connection:
+            generate(connection, volumes, 42, datetime(2025, 10, 1), 3, 5000)
+        db = sessionmaker(bind=engine)()
+        project_id = db.query(Project.id).scalar()
+
+        def best(fn):
+            timings = []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                value = fn()
+                timings.append((time.perf_counter() - started) * 1000)
+            return min(timings), value
+
+        holes_ms, (hole_ids, _, _, depths) = best(lambda: fetch_holes(db, project_id))
+        fetch_ms, columns = best(lambda: fetch_intervals(db, hole_ids))
+        numpy_ms, result = best(lambda: compute_coverage(hole_ids, depths, *columns, args.bin_size))
+        python_ms, (expected, expected_bins) = best(lambda: python_coverage(hole_ids, depths, *columns, args.bin_size))
+
+        per_hole = result["holes"]
+        for i, hole in enumerate(hole_ids.tolist()):
+            gaps, overlaps, covered = expected[hole]
+            assert per_hole["gap_count"][i] == gaps and per_hole["overlap_count"][i] == overlaps
+            assert abs(per_hole["sampled_length"][i] - covered) < 0.01
+        for i, sampled in enumerate(result["bins"]["sampled_length"].tolist()):
+            assert abs(sampled - expected_bins.get(i, 0.0)) < 0.05, (i, sampled, expected_bins.get(i))
+
+        print(f"{len(columns[0]):,} intervals in {len(hole_ids)} holes, {args.bin_size} m bins, best of {args.runs}")
+        print(f"  fetch holes                  {holes_ms:8.1f} ms")
+        print(f"  fetch intervals (columnar)   {fetch_ms:8.1f} ms")
+        print(f"  NumPy statistics             {numpy_ms:8.1f} ms")
+        print(f"  Python loops                 {python_ms:8.1f} ms  ({python_ms / numpy_ms:.0f}x)")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
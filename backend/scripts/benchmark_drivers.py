@@ -0,0 +1,204 @@
+"""
+MySQL driver benchmark
+Runs the same workload through each installed driver against the configured
+MySQL server (DATABASE_HOST etc. from .env, or --url):
+
+- connect: new connection plus SELECT 1, full TLS handshake every time
+- resumed: the same with TLS session reuse (pymysql only)
+- SELECT 1: p50 round trip on an open connection
+- fetch: reading --rows dispatches, without and with protocol compression
+
+Sync drivers: pymysql, mysqldb (mysqlclient), mysqlconnector. Async drivers
+(aiomysql, asyncmy) are measured for comparison only; the API's sessions
+are synchronous. Drivers that are not installed are skipped.
+
+Usage:
+    python scripts/benchmark_drivers.py --rows 20000
+    pip install mysqlclient aiomysql asyncmy   # to include them
+"""
+import sys
+import os
+import argparse
+import asyncio
+import importlib
+import statistics
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+from app.config import settings
+from app.utils import db_drivers
+
+SYNC_DRIVERS = ["pymysql", "mysqldb", "mysqlconnector"]
+ASYNC_DRIVERS = {"aiomysql": "aiomysql", "asyncmy": "asyncmy"}
+
+
+def installed(module: str) -> bool:
+    try:
+        importlib.import_module(module)
+        return True
+    except ImportError:
+        return False
+
+
+def p50(timings):
+    return statistics.median(timings) if timings else None
+
+
+def fmt(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def sync_engine(url, driver, compress=False, context=None):
+    connect_args = db_drivers.connect_args(
+        driver, settings.DATABASE_SSL_MODE, settings.DATABASE_SSL_CA, compress, context
+    )
+    engine = create_engine(url.set(drivername=f"mysql+{driver.dialect}"), poolclass=NullPool, connect_args=connect_args)
+    if isinstance(connect_args.get("ssl"), db_drivers.ResumingSSLContext):
+        db_drivers.install_session_reuse(engine, connect_args["ssl"])
+    return engine
+
+
+def time_connects(engine, count):
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        with engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1").scalar()
+        timings.append((time.perf_counter() - started) * 1000)
+    return p50(timings)
+
+
+def time_round_trips(engine, count):
+    timings = []
+    with engine.connect() as connection:
+        for _ in range(count):
+            started = time.perf_counter()
+            connection.exec_driver_sql("SELECT 1").scalar()
+            timings.append((time.perf_counter() - started) * 1000)
+    return p50(timings)
+
+
+def time_fetch(engine, rows, runs):
+    timings = []
+    with engine.connect() as connection:
+        for _ in range(runs):
+            started = time.perf_counter()
+            connection.exec_driver_sql(f"SELECT * FROM dispatches LIMIT {int(rows)}").fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+    return p50(timings)
+
+
+def bench_sync(url, name, args):
+    driver = db_drivers.resolve(name)
+    tls = settings.DATABASE_SSL_MODE.upper() != "DISABLED"
+    result = {"driver": name, "native": "yes" if driver.native else "no"}
+
+    full = db_drivers.tls_context(settings.DATABASE_SSL_MODE, settings.DATABASE_SSL_CA, reuse=False) if tls else None
+    engine = sync_engine(url, driver, context=full)
+    result["connect"] = time_connects(engine, args.connects)
+    result["select1"] = time_round_trips(engine, args.queries)
+    result["fetch"] = time_fetch(engine, args.rows, args.runs)
+
+    if tls and driver.tls_session_reuse:
+        resuming = db_drivers.tls_context(settings.DATABASE_SSL_MODE, settings.DATABASE_SSL_CA)
+        resumed_engine = sync_engine(url, driver, context=resuming)
+        time_connects(resumed_engine, 1)
+        result["resumed"] = time_connects(resumed_engine, args.connects)
+        result["resumed_ratio"] = f"{resuming.resumed}/{resuming.handshakes}"
+    if driver.compress:
+        result["fetch_compressed"] = time_fetch(sync_engine(url, driver, compress=True, context=full), args.rows, args.runs)
+    return result
+
+
+async def bench_async(url, name, args):
+    module = importlib.import_module(ASYNC_DRIVERS[name])
+    tls = settings.DATABASE_SSL_MODE.upper() != "DISABLED"
+    context = db_drivers.tls_context(settings.DATABASE_SSL_MODE, settings.DATABASE_SSL_CA, reuse=False) if tls else None
+    params = dict(
+        host=url.host, port=url.port or 3306, user=url.username,
+        password=url.password, db=url.database, ssl=context,
+    )
+    result = {"driver": name, "native": "async"}
+
+    timings = []
+    for _ in range(args.connects):
+        started = time.perf_counter()
+        connection = await module.connect(**params)
+        async with connection.cursor() as cursor:
+            await cursor.execute("SELECT 1")
+            await cursor.fetchall()
+        connection.close()
+        timings.append((time.perf_counter() - started) * 1000)
+    result["connect"] = p50(timings)
+
+    connection = await module.connect(**params)
+    try:
+        async with connection.cursor() as cursor:
+            timings = []
+            for _ in range(args.queries):
+                started = time.perf_counter()
+                await cursor.execute("SELECT 1")
+                await cursor.fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            result["select1"] = p50(timings)
+            timings = []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                await cursor.execute(f"SELECT * FROM dispatches LIMIT {int(args.rows)}")
+                await cursor.fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            result["fetch"] = p50(timings)
+    finally:
+        connection.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MySQL drivers, TLS resumption and compression")
+    parser.add_argument("--url", help="MySQL URL (default: settings); the driver part is replaced per run")
+    parser.add_argument("--drivers", default=",".join(SYNC_DRIVERS + list(ASYNC_DRIVERS)),
+                        help="Comma-separated drivers to run")
+    parser.add_argument("--connects", type=int, default=10, help="New connections per measurement")
+    parser.add_argument("--queries", type=int, default=200, help="SELECT 1 round trips")
+    parser.add_argument("--rows", type=int, default=10000, help="Dispatch rows per fetch")
+    parser.add_argument("--runs", type=int, default=5, help="Fetches per measurement")
+    args = parser.parse_args()
+
+    url = make_url(args.url or settings.database_url)
+    if url.get_backend_name() != "mysql":
+        parser.error("the driver benchmark needs a MySQL database")
+
+    results = []
+    for name in [driver.strip() for driver in args.drivers.split(",") if driver.strip()]:
+        if name in ASYNC_DRIVERS:
+            if not installed(ASYNC_DRIVERS[name]):
+                print(f"skip {name}: not installed")
+                continue
+            results.append(asyncio.run(bench_async(url, name, args)))
+            continue
+        driver = db_drivers.resolve(name)
+        if not installed(driver.module):
+            print(f"skip {name}: not installed (pip install {driver.package})")
+            continue
+        results.append(bench_sync(url, name, args))
+
+    print(f"\nTLS {settings.DATABASE_SSL_MODE}, {args.rows} rows per fetch, p50 milliseconds")
+    print(f"{'driver':<16}{'native':>7}{'connect':>9}{'resumed':>9}{'SELECT 1':>10}{'fetch':>9}{'compressed':>12}")
+    for result in results:
+        print(
+            f"{result['driver']:<16}{result['native']:>7}{fmt(result.get('connect')):>9}"
+            f"{fmt(result.get('resumed')):>9}{fmt(result.get('select1')):>10}"
+            f"{fmt(result.get('fetch')):>9}{fmt(result.get('fetch_compressed')):>12}"
+        )
+    for result in results:
+        if "resumed_ratio" in result:
+            print(f"{result['driver']}: {result['resumed_ratio']} handshakes resumed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Endpoint benchmark suite
+Drives every GET endpoint under /api/v1 (and, with --writes, the dispatch
+create/return/delete path) at fixed concurrency and records p50/p95/p99
+latency, throughput and SQL statements per request into a JSON baseline.
+A later run with --compare reports regressions against that baseline.
+
+SQL counts come from the X-Query-Count header, so the server must run with
+QUERY_STATS_HEADERS=true; --serve starts gunicorn that way (and without
+rate limits) against the configured database. Load a dataset first with
+scripts/generate_data.py.
+"""
+import sys
+import os
+import argparse
+import asyncio
+import json
+import logging
+import re
+import signal
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from loadtest import percentile, start_server, wait_until_ready
+
+API_PREFIX = "/api/v1"
+
+# List endpoint that yields ids for each path parameter
+ID_SOURCES = {
+    "company_id": "/companies/",
+    "project_id": "/projects/",
+    "drillhole_id": "/drillholes/",
+    "dispatch_id": "/dispatches/",
+    "sample_id": "/samples/",
+    "user_id": "/users/",
+    "job_id": "/jobs/",
+}
+
+SKIPPED = {
+    "/api/v1/jobs/{job_id}/artifact": "needs a finished export job",
+}
+
+# Query strings cycled through for endpoints with required parameters
+QUERIES = {
+    "/api/v1/search/": ["q=SMP-0000012", "q=DH-00003", "q=0012", "q=Ashanti", "q=Kwa"],
+}
+
+# Endpoints that read whole tables run a tenth of the requests
+HEAVY = {"/api/v1/reports/export"}
+
+
+def discover_routes():
+    """GET routes of the API, as path templates"""
+    from app.main import app
+
+    return sorted({
+        route.path for route in app.routes
+        if route.path.startswith(API_PREFIX) and "GET" in getattr(route, "methods", ())
+    })
+
+
+async def resolve_ids(client):
+    """Up to 50 ids per path parameter, read from the list endpoints"""
+    ids = {}
+    for param, path in ID_SOURCES.items():
+        response = await client.get(f"{API_PREFIX}{path}", params={"limit": 50})
+        if response.status_code == 200:
+            ids[param] = [row["id"] for row in response.json() if "id" in row]
+    return ids
+
+
+async def measure(client, requests, concurrency, method="GET", paths=None, bodies=None):
+    """
+    Send requests with fixed concurrency
+
+    Args:
+        client: httpx.AsyncClient
+        requests: Number of requests
+        concurrency: Requests in flight at once
+        method: HTTP method
+        paths: Callable index -> path
+        bodies: Optional callable index -> JSON body
+
+    Returns:
+        Latency, throughput, error and SQL statistics, plus the responses;
+        connection failures are counted under status 0
+    """
+    import httpx
+
+    latencies, statements, rows, db_ms, statuses = [], [], [], [], {}
+    responses = [None] * requests
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(
+                    method, paths(index), json=bodies(index) if bodies else None
+                )
+                await response.aread()
+            except httpx.HTTPError:
+                # Dropped connection (e.g. the server failed mid-response)
+                statuses[0] = statuses.get(0, 0) + 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            responses[index] = response
+            if "x-query-count" in response.headers:
+                statements.append(int(response.headers["x-query-count"]))
+            if "x-query-rows" in response.headers:
+                rows.append(int(response.headers["x-query-rows"]))
+            timing = re.search(r"db;dur=([\d.]+)", response.headers.get("server-timing", ""))
+            if timing:
+                db_ms.append(float(timing.group(1)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "errors": sum(count for code, count in statuses.items() if not 200 <= code < 400),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "sql_statements": statistics.median(statements) if statements else None,
+        "sql_statements_max": max(statements) if statements else None,
+        "sql_rows": statistics.median(rows) if rows else None,
+        "db_ms_p50": round(statistics.median(db_ms), 1) if db_ms else None,
+    }, responses
+
+
+async def run_suite(base_url, token, concurrency, requests, warmup, include, writes):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"}
+    results, skipped = {}, {}
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=120.0) as client:
+        ids = await resolve_ids(client)
+
+        for template in discover_routes():
+            if include and not re.search(include, template):
+                continue
+            if template in SKIPPED:
+                skipped[template] = SKIPPED[template]
+                continue
+            params = re.findall(r"{(\w+)}", template)
+            missing = [param for param in params if not ids.get(param)]
+            if missing:
+                skipped[template] = f"no ids for {', '.join(missing)}"
+                continue
+
+            def path(index, template=template, params=params):
+                values = {param: ids[param][index % len(ids[param])] for param in params}
+                queries = QUERIES.get(template)
+                query = f"?{queries[index % len(queries)]}" if queries else ""
+                return template.format(**values) + query
+
+            count = max(concurrency, requests // 10) if template in HEAVY else requests
+            if warmup:
+                await measure(client, warmup, concurrency, paths=path)
+            stats, _ = await measure(client, count, concurrency, paths=path)
+            results[f"GET {template}"] = stats
+            print(_format_row(f"GET {template}", stats), flush=True)
+
+        if writes and ids.get("dispatch_id"):
+            template = (await client.get(f"{API_PREFIX}/dispatches/{ids['dispatch_id'][0]}")).json()
+            body = {
+                "project_id": template["project_id"],
+                "drillhole_id": template["drillhole_id"],
+                "company_id": template["company_id"],
+                "hq_boxes": 4,
+                "nq_boxes": 2,
+                "driver": "Benchmark Driver",
+                "technician": "Benchmark Technician",
+                "samples_collected": 0,
+            }
+            stats, responses = await measure(
+                client, requests, concurrency, "POST",
+                paths=lambda i: f"{API_PREFIX}/dispatches/", bodies=lambda i: body,
+            )
+            results["POST /api/v1/dispatches/"] = stats
+            print(_format_row("POST /api/v1/dispatches/", stats), flush=True)
+            created = [r.json()["id"] for r in responses if r is not None and r.status_code == 201]
+            if created:
+                stats, _ = await measure(
+                    client, len(created), concurrency, "POST",
+                    paths=lambda i: f"{API_PREFIX}/dispatches/{created[i]}/return",
+                    bodies=lambda i: {"returned_hq": 4, "returned_nq": 2, "return_condition": "Good"},
+                )
+                results["POST /api/v1/dispatches/{dispatch_id}/return"] = stats
+                print(_format_row("POST /api/v1/dispatches/{dispatch_id}/return", stats), flush=True)
+                stats, _ = await measure(
+                    client, len(created), concurrency, "DELETE",
+                    paths=lambda i: f"{API_PREFIX}/dispatches/{created[i]}",
+                )
+                results["DELETE /api/v1/dispatches/{dispatch_id}"] = stats
+                print(_format_row("DELETE /api/v1/dispatches/{dispatch_id}", stats), flush=True)
+
+    return results, skipped
+
+
+def _format_row(name, stats):
+    sql = "-" if stats["sql_statements"] is None else f"{stats['sql_statements']:g}"
+    return (f"{name:52} {stats['rps']:>8.1f} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+            f"{stats['p99_ms']:>8.1f} {sql:>5} {stats['errors']:>6}")
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Print regressions against a baseline file
+
+    Returns:
+        Number of regressions (p95 slower than tolerance allows, or more
+        SQL statements per request)
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["endpoints"]
+
+    regressions = 0
+    print(f"\n{'endpoint':52} {'p95 base':>9} {'p95 now':>9} {'sql base':>9} {'sql now':>8}")
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if not before:
+            print(f"{name:52} {'new':>9}")
+            continue
+        flags = []
+        if before["p95_ms"] and stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            flags.append("SLOWER")
+        if (before.get("sql_statements") is not None and stats["sql_statements"] is not None
+                and stats["sql_statements"] > before["sql_statements"]):
+            flags.append("MORE SQL")
+        regressions += bool(flags)
+        print(f"{name:52} {before['p95_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+              f"{str(before.get('sql_statements')):>9} {str(stats['sql_statements']):>8}  {' '.join(flags)}")
+    return regressions
+
+
+def login(base_url, username, password):
+    import httpx
+
+    response = httpx.post(f"{base_url}{API_PREFIX}/auth/login",
+                          json={"username": username, "password": password}, timeout=30.0)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__), text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every API endpoint and record a baseline")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--serve", default=None, metavar="WORKERSxTHREADS",
+                        help="Start gunicorn with this configuration instead of using --base-url")
+    parser.add_argument("--port", type=int, default=8100, help="Port for --serve")
+    parser.add_argument("--username", default="bench_admin")
+    parser.add_argument("--password", default="benchmark")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per endpoint first")
+    parser.add_argument("--include", default=None, help="Regex; only benchmark matching path templates")
+    parser.add_argument("--writes", action="store_true",
+                        help="Also create, return and delete --requests dispatches "
+                             "(SQLite allows one writer at a time; expect errors there)")
+    parser.add_argument("--output", default="benchmark_baseline.json", help="Write results as JSON here")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95 slowdown for --compare")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    server = None
+    base_url = args.base_url
+    if args.serve:
+        workers, threads = (int(part) for part in args.serve.lower().split("x"))
+        os.environ.update(QUERY_STATS_HEADERS="true", RATE_LIMIT_PER_MINUTE="0")
+        server = start_server(workers, threads, args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        if server:
+            wait_until_ready(base_url)
+        token = login(base_url, args.username, args.password)
+        print(f"{'endpoint':52} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sql':>5} {'errors':>6}")
+        results, skipped = asyncio.run(run_suite(
+            base_url, token, args.concurrency, args.requests, args.warmup, args.include, args.writes,
+        ))
+    finally:
+        if server:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    for template, reason in skipped.items():
+        print(f"skipped {template}: {reason}")
+
+    regressions = compare(results, args.compare, args.tolerance) if args.compare else 0
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+                    "commit": git_commit(),
+                    "base_url": base_url,
+                    "serve": args.serve,
+                    "concurrency": args.concurrency,
+                    "requests": args.requests,
+                },
+                "endpoints": results,
+                "skipped": skipped,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Depth interval benchmark
+Times "which samples of hole X overlap a 15 m window" three ways on a
+local SQLite database with a few deeply sampled holes:
+
+- join: samples joined to dispatches on the dispatch's drillhole (the only
+  way before samples.drillhole_id)
+- indexed: samples.drillhole_id with the (drillhole_id, from_depth) index
+- tree: the per-worker interval tree (app/services/sample_intervals.py)
+
+and reports the tree build time and the gap/overlap check per hole.
+"""
+import sys
+import os
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, create_db_engine
+from app.models import Dispatch, Drillhole, Sample
+from app.services.data_version import get_data_version
+from app.services.sample_intervals import check_hole, load_hole, samples_in_range
+from generate_data import generate
+
+
+def join_query(db, drillhole_id, low, high):
+    return db.execute(
+        select(Sample.id, Sample.sample_id, Sample.from_depth, Sample.to_depth)
+        .join(Dispatch, Dispatch.id == Sample.dispatch_id)
+        .where(Dispatch.drillhole_id == drillhole_id, Sample.from_depth < high, Sample.to_depth > low)
+        .order_by(Sample.from_depth)
+    ).all()
+
+
+def indexed_query(db, drillhole_id, low, high):
+    return db.execute(
+        select(Sample.id, Sample.sample_id, Sample.from_depth, Sample.to_depth)
+        .where(Sample.drillhole_id == drillhole_id, Sample.from_depth < high, Sample.to_depth > low)
+        .order_by(Sample.from_depth)
+    ).all()
+
+
+def ms_per_call(fn, windows) -> float:
+    started = time.perf_counter()
+    for window in windows:
+        fn(*window)
+    return (time.perf_counter() - started) / len(windows) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sample depth interval queries")
+    parser.add_argument("--holes", type=int, default=5, help="Drillholes")
+    parser.add_argument("--samples-per-hole", type=int, default=20000, help="Average samples per hole")
+    parser.add_argument("--queries", type=int, default=200, help="Windows queried per hole")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    volumes = dict(
+        companies=1, projects=1, drillholes=args.holes,
+        dispatches=args.holes * 50, samples=args.holes * args.samples_per_hole,
+    )
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as connection:
+            generate(connection, volumes, args.seed, datetime(2025, 10, 1), 3, 5000)
+        db = sessionmaker(bind=engine)()
+        version = get_data_version(db, [Sample])
+        holes = db.execute(
+            select(Sample.drillhole_id, func.count(), Drillhole.depth)
+            .join(Drillhole, Drillhole.id == Sample.drillhole_id)
+            .group_by(Sample.drillhole_id, Drillhole.depth)
+            .order_by(func.count().desc())
+        ).all()
+
+        print(f"ms per 15 m window query, {args.queries} windows per hole")
+        print(f"{'hole':>6}{'samples':>9}{'build':>9}{'check':>9}{'join':>9}{'indexed':>9}{'tree':>9}{'hits':>7}")
+        for drillhole_id, count, depth in holes:
+            depth = float(depth)
+            windows = []
+            for _ in range(args.queries):
+                low = rng.uniform(0, max(0.0, depth - 15))
+                windows.append((low, low + 15))
+
+            started = time.perf_counter()
+            hole = load_hole(db, drillhole_id, version)
+            build_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            check_hole(hole)
+            check_ms = (time.perf_counter() - started) * 1000
+
+            hits = [len(samples_in_range(hole, low, high)) for low, high in windows]
+            expected = [len(indexed_query(db, drillhole_id, low, high)) for low, high in windows]
+            assert hits == expected, "interval tree disagrees with SQL"
+
+            join_ms = ms_per_call(lambda low, high: join_query(db, drillhole_id, low, high), windows)
+            indexed_ms = ms_per_call(lambda low, high: indexed_query(db, drillhole_id, low, high), windows)
+            tree_ms = ms_per_call(lambda low, high: samples_in_range(hole, low, high), windows)
+            print(f"{drillhole_id:>6}{count:>9}{build_ms:>9.1f}{check_ms:>9.1f}"
+                  f"{join_ms:>9.2f}{indexed_ms:>9.2f}{tree_ms:>9.3f}{sum(hits) / len(hits):>7.0f}")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
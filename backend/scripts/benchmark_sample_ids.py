@@ -0,0 +1,126 @@
+"""
+Sample id allocation benchmark
+Builds a local SQLite database and has --workers threads create --samples
+samples between them, two ways:
+
+- client-made ids, as field tablets do today: each worker takes the
+  highest sample_id in use plus one and retries on IntegrityError (or,
+  on SQLite, a lock conflict)
+- reserved blocks (app/services/sample_ids.py): each worker reserves
+  --block ids with one counter update and bulk inserts them
+
+Reports the time, the collisions and the reservations, and checks that
+the reserved blocks are disjoint and cover the sequence without gaps.
+"""
+import sys
+import os
+import argparse
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, create_db_engine
+from app.models import Dispatch, Sample, SampleType
+from app.services.sample_ids import create_sequence, reserve_block
+from generate_data import generate
+
+
+def run_workers(workers, target):
+    threads = [threading.Thread(target=target, args=(worker,)) for worker in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sample id allocation")
+    parser.add_argument("--samples", type=int, default=5_000, help="Samples created per method")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent workers")
+    parser.add_argument("--block", type=int, default=500, help="Ids per reservation")
+    args = parser.parse_args()
+
+    per_worker = args.samples // args.workers
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as connection:
+            generate(connection, dict(companies=1, projects=1, drillholes=10, dispatches=10, samples=0),
+                     42, datetime(2025, 10, 1), 3, 5000)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            dispatch_id = db.execute(select(Dispatch.id).limit(1)).scalar()
+
+        def row(sample_id):
+            return {"dispatch_id": dispatch_id, "sample_id": sample_id, "sample_type": SampleType.CORE}
+
+        collisions = [0] * args.workers
+
+        def client_made(worker):
+            with Session() as db:
+                for _ in range(per_worker):
+                    while True:
+                        top = db.execute(
+                            select(func.max(Sample.sample_id)).where(Sample.sample_id.startswith("CL-"))
+                        ).scalar()
+                        code = f"CL-{int(top[3:]) + 1 if top else 1:06d}"
+                        try:
+                            db.execute(insert(Sample), [row(code)])
+                            db.commit()
+                            break
+                        # SQLite reports a writer that read an older snapshot as locked
+                        except (IntegrityError, OperationalError):
+                            db.rollback()
+                            collisions[worker] += 1
+
+        with Session() as db:
+            sequence_id = create_sequence(db, "RS-", 6).id
+            db.commit()
+        blocks = []
+
+        def reserved(worker):
+            with Session() as db:
+                left = per_worker
+                while left:
+                    block = reserve_block(db, sequence_id, min(args.block, left))
+                    db.commit()
+                    blocks.append((block["first"], block["last"]))
+                    db.execute(insert(Sample), [
+                        row(f"RS-{value:06d}") for value in range(block["first"], block["last"] + 1)
+                    ])
+                    db.commit()
+                    left -= block["count"]
+
+        client_seconds = run_workers(args.workers, client_made)
+        reserved_seconds = run_workers(args.workers, reserved)
+
+        blocks.sort()
+        assert blocks[0][0] == 1
+        for (_, last), (first, _) in zip(blocks, blocks[1:]):
+            assert first == last + 1, (last, first)
+        total = per_worker * args.workers
+        with Session() as db:
+            for prefix in ("CL-", "RS-"):
+                count = db.query(func.count(Sample.id)).filter(Sample.sample_id.startswith(prefix)).scalar()
+                assert count == total, (prefix, count)
+
+        print(f"{total:,} samples by {args.workers} workers")
+        print(f"  {'client-made ids, retry on collision':38} {client_seconds * 1000:9.1f} ms  "
+              f"{sum(collisions):,} retries")
+        print(f"  {f'reserved blocks of {args.block}':38} {reserved_seconds * 1000:9.1f} ms  "
+              f"{len(blocks)} reservations, 0 retries")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
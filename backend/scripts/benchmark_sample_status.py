@@ -0,0 +1,106 @@
+"""
+Bulk sample status benchmark
+Builds a local SQLite database and moves --samples samples through
+collected -> processing -> completed:
+
+- per sample, as PUT /samples/{id} does it: SELECT, set the attribute,
+  commit and refresh (timed on --per-row samples and extrapolated)
+- set-based (app/services/sample_status.py): one UPDATE per transition,
+  selected by id list, by sample_id range and by dispatch, with and
+  without the INSERT ... SELECT audit capture
+
+Row counts are checked against the selection after every step.
+"""
+import sys
+import os
+import argparse
+import tempfile
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, create_db_engine
+from app.models import AuditLog, Sample, SampleStatus
+from app.services.sample_status import sample_selection, update_status
+from app.services.statements import get_by_id
+from generate_data import generate
+
+
+def per_row(db, ids, status):
+    for sample_id in ids:
+        sample = get_by_id(db, Sample, sample_id)
+        sample.status = status
+        db.commit()
+        db.refresh(sample)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk sample status changes")
+    parser.add_argument("--samples", type=int, default=10_000, help="Samples moved per transition")
+    parser.add_argument("--per-row", type=int, default=500, help="Samples timed one by one")
+    args = parser.parse_args()
+
+    volumes = dict(companies=1, projects=5, drillholes=200,
+                   dispatches=max(1, args.samples // 5), samples=args.samples * 2)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as connection:
+            generate(connection, volumes, 42, datetime(2025, 10, 1), 3, 5000)
+        db = sessionmaker(bind=engine)()
+
+        ids = db.execute(select(Sample.id).order_by(Sample.id).limit(args.samples)).scalars().all()
+        codes = db.execute(
+            select(Sample.sample_id).order_by(Sample.sample_id).limit(args.samples)
+        ).scalars().all()
+        dispatch_id, dispatch_samples = db.execute(
+            select(Sample.dispatch_id, func.count()).group_by(Sample.dispatch_id).order_by(func.count().desc()).limit(1)
+        ).one()
+        # Start every selected sample from collected
+        update_status(db, SampleStatus.COLLECTED, Sample.id.in_(ids))
+        db.commit()
+
+        started = time.perf_counter()
+        per_row(db, ids[:args.per_row], SampleStatus.PROCESSING)
+        row_ms = (time.perf_counter() - started) * 1000 / args.per_row
+        update_status(db, SampleStatus.COLLECTED, Sample.id.in_(ids))
+        db.commit()
+
+        def bulk(label, status, where, expected, **options):
+            started = time.perf_counter()
+            counts = update_status(db, status, where, **options)
+            db.commit()
+            elapsed = (time.perf_counter() - started) * 1000
+            assert counts["updated"] == expected, (label, counts, expected)
+            assert counts["audited"] == (expected if options.get("audit") else 0), (label, counts)
+            print(f"  {label:38} {counts['updated']:7,} rows {elapsed:9.1f} ms")
+
+        print(f"{args.samples:,} samples, collected -> processing -> completed")
+        print(f"  per sample (SELECT, commit, refresh) {row_ms:7.2f} ms each, "
+              f"{row_ms * args.samples / 1000:,.1f} s per transition")
+        bulk("ids -> processing", SampleStatus.PROCESSING, sample_selection(ids=ids), len(ids))
+        bulk("ids -> completed", SampleStatus.COMPLETED, sample_selection(ids=ids), len(ids),
+             from_status=SampleStatus.PROCESSING)
+        bulk("ids -> collected, audited", SampleStatus.COLLECTED, sample_selection(ids=ids), len(ids), audit=True)
+        range_where = sample_selection(first=codes[0], last=codes[-1])
+        # The range may hold samples outside the id list; start them all from collected
+        update_status(db, SampleStatus.COLLECTED, range_where)
+        db.commit()
+        bulk("sample_id range -> processing", SampleStatus.PROCESSING, range_where, len(codes))
+        bulk("sample_id range -> completed, audited", SampleStatus.COMPLETED, range_where, len(codes), audit=True)
+        update_status(db, SampleStatus.COLLECTED, sample_selection(dispatch_id=dispatch_id))
+        db.commit()
+        bulk("dispatch -> processing", SampleStatus.PROCESSING, sample_selection(dispatch_id=dispatch_id),
+             dispatch_samples, audit=True)
+        print(f"  audit rows written: {db.query(func.count(AuditLog.id)).scalar():,}")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
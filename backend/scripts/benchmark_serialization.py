@@ -0,0 +1,169 @@
+"""
+List serialization benchmark
+Compares the legacy dispatch list path (ORM objects, relationship loads,
+pydantic validation and json.dumps) with the SQL projection plus orjson
+path on a local SQLite database
+"""
+import sys
+import os
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import sessionmaker
+from starlette.responses import JSONResponse
+from app.database import Base, create_db_engine
+from app.models import Company, Project, Drillhole, Dispatch, DispatchStatus
+from app.schemas.dispatch import DispatchResponse, DispatchWithDetails
+from app.services.dispatch_listing import dispatch_details_statement, dispatch_detail_rows
+from app.services.reference_cache import reference_cache
+from app.services.statements import paginate
+from app.utils.helpers import calculate_days_out
+from app.utils.responses import ORJSONResponse
+
+
+def seed(db, rows: int) -> None:
+    rng = random.Random(42)
+    companies = [Company(name=f"Company {i}") for i in range(5)]
+    db.add_all(companies)
+    db.flush()
+    projects = [
+        Project(project_id=f"BP-{i:04d}", name=f"Project {i}", company_id=companies[i % 5].id)
+        for i in range(20)
+    ]
+    db.add_all(projects)
+    db.flush()
+    holes = [
+        Drillhole(drillhole_id=f"DH-{i:05d}", project_id=projects[i % 20].id)
+        for i in range(500)
+    ]
+    db.add_all(holes)
+    db.flush()
+    start = datetime(2024, 1, 1)
+    for i in range(rows):
+        hole = holes[rng.randrange(len(holes))]
+        project = projects[(hole.id - 1) % 20]
+        returned = rng.random() < 0.6
+        hq, nq = rng.randint(0, 40), rng.randint(0, 40)
+        dispatch_date = start + timedelta(minutes=37 * i)
+        db.add(Dispatch(
+            project_id=project.id,
+            drillhole_id=hole.id,
+            company_id=project.company_id,
+            hq_boxes=hq,
+            nq_boxes=nq,
+            driver=f"Driver {i % 17}",
+            technician=f"Tech {i % 11}",
+            samples_collected=rng.randint(0, 20),
+            dispatch_date=dispatch_date,
+            status=DispatchStatus.RETURNED if returned else DispatchStatus.OUTSTANDING,
+            return_date=dispatch_date + timedelta(days=rng.randint(1, 30)) if returned else None,
+            returned_hq=hq if returned else None,
+            returned_nq=nq - (i % 7 == 0) if returned else None,
+            return_condition="Good" if returned else None,
+        ))
+    db.commit()
+
+
+def legacy_body(db, limit: int) -> bytes:
+    """Old list_dispatches body plus FastAPI's response_model handling"""
+    dispatches = db.query(Dispatch).order_by(Dispatch.dispatch_date.desc()).limit(limit).all()
+    result = []
+    for dispatch in dispatches:
+        dispatch_dict = {
+            **DispatchResponse.from_orm(dispatch).model_dump(),
+            "project_name": dispatch.project.name if dispatch.project else None,
+            "drillhole_name": dispatch.drillhole.drillhole_id if dispatch.drillhole else None,
+            "company_name": dispatch.company.name if dispatch.company else None,
+            "days_out": calculate_days_out(dispatch.dispatch_date, dispatch.return_date),
+        }
+        if dispatch.status == DispatchStatus.RETURNED:
+            dispatch_dict["is_match"] = (
+                dispatch.returned_hq == dispatch.hq_boxes and
+                dispatch.returned_nq == dispatch.nq_boxes
+            )
+        result.append(DispatchWithDetails(**dispatch_dict))
+    adapter = TypeAdapter(List[DispatchWithDetails])
+    content = adapter.dump_python(adapter.validate_python(result), mode="json")
+    return JSONResponse(content).body
+
+
+def fast_body(db, limit: int, now: datetime) -> bytes:
+    stmt = dispatch_details_statement()
+    stmt += lambda s: s.order_by(Dispatch.dispatch_date.desc())
+    rows = db.execute(paginate(stmt, 0, limit)).all()
+    return ORJSONResponse(dispatch_detail_rows(rows, reference_cache.names(db), now=now)).body
+
+
+def timed(fn, repeat: int):
+    best = None
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dispatch list serialization")
+    parser.add_argument("--rows", type=int, default=10000, help="Dispatch rows to list")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        db = session_factory()
+        seed(db, args.rows)
+        db.close()
+
+        def run_legacy():
+            session = session_factory()
+            try:
+                return legacy_body(session, args.rows)
+            finally:
+                session.close()
+
+        # days_out of outstanding rows is measured against "now"; pin it so
+        # both paths can be compared byte for byte after decoding
+        now = datetime.utcnow()
+
+        def run_fast():
+            session = session_factory()
+            try:
+                return fast_body(session, args.rows, now)
+            finally:
+                session.close()
+
+        legacy_ms, legacy = timed(run_legacy, args.repeat)
+        fast_ms, fast = timed(run_fast, args.repeat)
+        engine.dispose()
+
+    legacy_items = json.loads(legacy)
+    fast_items = json.loads(fast)
+    # The legacy path omitted is_match for non-returned rows (rendered null)
+    mismatches = sum(1 for a, b in zip(legacy_items, fast_items) if a != b)
+
+    print(f"Rows:        {len(fast_items)}")
+    print(f"Legacy path: {legacy_ms:8.1f} ms  {len(legacy):>10,} bytes")
+    print(f"Fast path:   {fast_ms:8.1f} ms  {len(fast):>10,} bytes")
+    print(f"Speed-up:    {legacy_ms / fast_ms:8.1f}x")
+    print(f"Mismatched rows: {mismatches}")
+    if mismatches or len(legacy_items) != len(fast_items):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Startup-time benchmark
+Imports app.main in fresh interpreters with -X importtime and reports the
+total import time, the slowest modules and any heavy modules that were
+supposed to be deferred until first use.
+
+A deferred module fails the check if booting the API loads it while the
+framework alone (BASELINE_IMPORTS) does not, or if an app module loaded
+at boot imports it at module level. The second check catches modules such as csv
+that the framework already loads (importlib.metadata imports it), where
+an app-level import costs nothing today but would once the framework stops
+loading it.
+"""
+import sys
+import os
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules that must not be imported just by booting the API
+DEFERRED_MODULES = ["passlib", "jose", "alembic", "httpx", "numpy", "pyarrow", "csv", "openpyxl"]
+
+# Imported by app.main no matter what; deferred modules they load are not
+# the API's doing
+BASELINE_IMPORTS = ["fastapi", "sqlalchemy", "pydantic_settings"]
+
+PROBE = (
+    "import sys, json, {modules}; "
+    "print(json.dumps([[m for m in {deferred!r} if m in sys.modules], "
+    "[m for m in sys.modules if m == 'app' or m.startswith('app.')]]))"
+)
+
+
+def module_level_imports(app_modules, deferred):
+    """
+    "path:line module" for every deferred module imported at module level
+    (including class bodies and module-level if/try blocks) of the given
+    app modules
+    """
+    def walk(nodes):
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            if isinstance(node, ast.Import):
+                yield from ((node.lineno, alias.name) for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                yield node.lineno, node.module
+            else:
+                yield from walk(ast.iter_child_nodes(node))
+
+    found = []
+    for name in sorted(app_modules):
+        base = os.path.join(BACKEND_DIR, *name.split("."))
+        path = base + ".py" if os.path.exists(base + ".py") else os.path.join(base, "__init__.py")
+        with open(path) as handle:
+            tree = ast.parse(handle.read(), path)
+        for lineno, module in walk(tree.body):
+            if module.split(".")[0] in deferred:
+                found.append(f"{os.path.relpath(path, BACKEND_DIR)}:{lineno} {module}")
+    return found
+
+
+def loaded_by(modules):
+    """Deferred and app modules in sys.modules after importing these modules"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(modules=", ".join(modules), deferred=DEFERRED_MODULES)],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def parse_importtime(stderr: str):
+    """
+    Parse -X importtime output into (module, self_us, cumulative_us, depth) rows
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def run_once():
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(modules="app.main", deferred=DEFERRED_MODULES)],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = parse_importtime(result.stderr)
+    total_us = next(cumulative for name, _, cumulative, _ in rows if name == "app.main")
+    loaded_deferred, app_modules = json.loads(result.stdout.strip().splitlines()[-1])
+    return total_us, rows, loaded_deferred, app_modules
+
+
+def run_benchmark(runs: int, top: int, budget_ms: float = None, output: str = None):
+    totals = []
+    rows = []
+    loaded_deferred = []
+    app_modules = []
+    for _ in range(runs):
+        total_us, rows, loaded_deferred, app_modules = run_once()
+        totals.append(total_us)
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"app.main import time over {runs} runs: median {median_ms:.1f} ms, "
+          f"min {min(totals) / 1000:.1f} ms, max {max(totals) / 1000:.1f} ms")
+
+    print("\nSlowest top-level imports (cumulative, last run):")
+    top_level = sorted((r for r in rows if r[3] <= 2), key=lambda r: r[2], reverse=True)
+    for name, self_us, cumulative_us, _ in top_level[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    print("\nSlowest modules by self time (last run):")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    baseline, _ = loaded_by(BASELINE_IMPORTS)
+    loaded_deferred = [name for name in loaded_deferred if name not in baseline]
+    if loaded_deferred:
+        print(f"\nFAIL: deferred modules imported at boot: {', '.join(loaded_deferred)}")
+        failed = True
+    module_level = module_level_imports(app_modules, DEFERRED_MODULES)
+    if module_level:
+        print("\nFAIL: deferred modules imported at module level:")
+        for line in module_level:
+            print(f"  {line}")
+        failed = True
+    if budget_ms is not None and median_ms > budget_ms:
+        print(f"\nFAIL: median import time {median_ms:.1f} ms exceeds budget {budget_ms:.1f} ms")
+        failed = True
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({
+                "median_ms": median_ms,
+                "runs_ms": [t / 1000 for t in totals],
+                "deferred_loaded": loaded_deferred,
+                "deferred_module_level": module_level,
+                "top_modules": [
+                    {"module": name, "self_ms": s / 1000, "cumulative_ms": c / 1000}
+                    for name, s, c, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+                ],
+            }, f, indent=2)
+        print(f"\nResults written to {output}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure API import/startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreter runs")
+    parser.add_argument("--top", type=int, default=15, help="Number of modules to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if the median exceeds this")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    args = parser.parse_args()
+    sys.exit(run_benchmark(args.runs, args.top, args.budget_ms, args.output))
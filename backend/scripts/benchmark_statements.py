@@ -0,0 +1,157 @@
+"""
+Statement construction benchmark
+Measures the Python-side cost per call of the hot queries (auth user
+lookup, get-by-id, dashboard aggregates, a filtered dispatch page) built as
+legacy ORM Query chains and as cached lambda statements (app/services/
+statements.py), on a local SQLite database. Time spent inside the database
+driver's execute is measured with query_stats and subtracted, so the
+numbers are what SQLAlchemy and the application spend in Python.
+
+The legacy path is run twice: with the compiled cache disabled
+(query_cache_size=0, every call recompiles) and with DB_QUERY_CACHE_SIZE.
+"""
+import sys
+import os
+import argparse
+import tempfile
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.database import Base, create_db_engine
+from app.models import Dispatch, DispatchStatus, User
+from app.models.inventory import Inventory
+from app.api.v1.reports import _dashboard_stats
+from app.schemas.dispatch import DispatchResponse
+from app.services.dispatch_listing import dispatch_details_statement
+from app.services.statements import get_by_id, paginate
+from app.utils import query_stats
+from app.utils.responses import schema_columns
+from generate_data import PRESETS, create_users, generate
+
+
+def legacy_dashboard(db):
+    base = dict(db.query(Inventory.box_type, Inventory.base_quantity).all())
+    totals = db.query(
+        Dispatch.status,
+        func.count(Dispatch.id).label("dispatches"),
+        func.sum(Dispatch.hq_boxes).label("hq"),
+        func.sum(Dispatch.nq_boxes).label("nq"),
+        func.sum(Dispatch.samples_collected).label("samples"),
+        func.sum(case(
+            (and_(Dispatch.returned_hq == Dispatch.hq_boxes, Dispatch.returned_nq == Dispatch.nq_boxes), 1),
+            else_=0,
+        )).label("matches"),
+    ).group_by(Dispatch.status).all()
+    return base, totals
+
+
+def legacy_page(db, status, company_id, skip, limit):
+    return db.query(*schema_columns(DispatchResponse, Dispatch)).filter(
+        Dispatch.status == status
+    ).filter(
+        Dispatch.company_id == company_id
+    ).order_by(Dispatch.dispatch_date.desc()).offset(skip).limit(limit).all()
+
+
+def cached_page(db, status, company_id, skip, limit):
+    stmt = dispatch_details_statement()
+    stmt += lambda s: s.where(Dispatch.status == status)
+    stmt += lambda s: s.where(Dispatch.company_id == company_id)
+    stmt += lambda s: s.order_by(Dispatch.dispatch_date.desc())
+    return db.execute(paginate(stmt, skip, limit)).all()
+
+
+def cases(user_ids, dispatch_ids):
+    """(name, legacy, cached) callables taking (db, i)"""
+    statuses = [DispatchStatus.OUTSTANDING, DispatchStatus.RETURNED]
+    return [
+        (
+            "auth user lookup",
+            lambda db, i: db.query(User).filter(User.id == user_ids[i % len(user_ids)]).first(),
+            lambda db, i: get_by_id(db, User, user_ids[i % len(user_ids)]),
+        ),
+        (
+            "dispatch by id",
+            lambda db, i: db.query(Dispatch).filter(Dispatch.id == dispatch_ids[i % len(dispatch_ids)]).first(),
+            lambda db, i: get_by_id(db, Dispatch, dispatch_ids[i % len(dispatch_ids)]),
+        ),
+        (
+            "dashboard aggregates",
+            lambda db, i: legacy_dashboard(db),
+            lambda db, i: _dashboard_stats(db),
+        ),
+        (
+            "dispatch page (2 filters)",
+            lambda db, i: legacy_page(db, statuses[i % 2], 1 + i % 3, 0, 20),
+            lambda db, i: cached_page(db, statuses[i % 2], 1 + i % 3, 0, 20),
+        ),
+    ]
+
+
+def python_us_per_call(session_factory, fn, iterations: int, warmup: int) -> float:
+    db = session_factory()
+    try:
+        for i in range(warmup):
+            fn(db, i)
+            db.expunge_all()
+        with query_stats.track() as stats:
+            started = time.perf_counter()
+            for i in range(iterations):
+                fn(db, i)
+                # Objects are not reused between calls, as between requests
+                db.expunge_all()
+            elapsed = time.perf_counter() - started
+        return (elapsed - stats.seconds) / iterations * 1e6
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cached statement construction")
+    parser.add_argument("--iterations", type=int, default=2000, help="Timed calls per path")
+    parser.add_argument("--warmup", type=int, default=100, help="Untimed calls per path")
+    parser.add_argument("--dispatches", type=int, default=2000, help="Dispatches in the test database")
+    args = parser.parse_args()
+
+    volumes = dict(PRESETS["small"], dispatches=args.dispatches, samples=args.dispatches)
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        uncached = create_db_engine(url, query_cache_size=0)
+        cached = create_db_engine(url)
+        Base.metadata.create_all(bind=cached)
+        with cached.connect() as connection:
+            generate(connection, volumes, 42, datetime(2025, 10, 1), 3, 5000)
+            create_users(connection, "benchmark")
+        for engine in (uncached, cached):
+            query_stats.install(engine)
+
+        factories = {
+            "uncached": sessionmaker(autocommit=False, autoflush=False, bind=uncached),
+            "cached": sessionmaker(autocommit=False, autoflush=False, bind=cached),
+        }
+        db = factories["cached"]()
+        user_ids = [row.id for row in db.query(User.id)]
+        dispatch_ids = [row.id for row in db.query(Dispatch.id).limit(500)]
+        db.close()
+
+        print(f"Python-side time per call (us), {args.iterations} calls, "
+              f"DB_QUERY_CACHE_SIZE={settings.DB_QUERY_CACHE_SIZE}")
+        print(f"{'query':<28}{'Query, no cache':>17}{'Query, cache':>14}{'lambda':>10}{'speed-up':>10}")
+        for name, legacy, lambda_path in cases(user_ids, dispatch_ids):
+            recompiled = python_us_per_call(factories["uncached"], legacy, args.iterations, args.warmup)
+            legacy_us = python_us_per_call(factories["cached"], legacy, args.iterations, args.warmup)
+            lambda_us = python_us_per_call(factories["cached"], lambda_path, args.iterations, args.warmup)
+            print(f"{name:<28}{recompiled:>17.0f}{legacy_us:>14.0f}{lambda_us:>10.0f}{legacy_us / lambda_us:>9.1f}x")
+
+        uncached.dispose()
+        cached.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Sync throughput benchmark
+Replays a site's change journal into a central database using two local
+SQLite databases and reports changes per second and bytes on the wire
+"""
+import sys
+import os
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, create_db_engine
+from app.models import Company, Project, Drillhole, Dispatch, DispatchStatus, Sample, SampleType
+from app.services.change_journal import record_change, serialize_row, serialize_values, SERVER_FIELDS
+from app.services.sync import LocalTransport, SyncEngine
+
+SITE_ID = "bench-site"
+
+
+def make_session_factory(path):
+    engine = create_db_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def seed_central(session_factory, projects: int, holes_per_project: int):
+    db = session_factory()
+    company = Company(name="Benchmark Mining")
+    db.add(company)
+    db.flush()
+    for p in range(projects):
+        project = Project(project_id=f"BP-{p:04d}", name=f"Project {p}", company_id=company.id)
+        db.add(project)
+        db.flush()
+        for h in range(holes_per_project):
+            db.add(Drillhole(drillhole_id=f"DH-{p:04d}-{h:03d}", project_id=project.id, depth=Decimal("250.00")))
+    db.commit()
+    db.close()
+
+
+def generate_site_changes(session_factory, dispatches: int, samples_per_dispatch: int, seed: int):
+    """Create dispatches, samples and returns on the site, journaling each one"""
+    rng = random.Random(seed)
+    db = session_factory()
+    holes = db.query(Drillhole.id, Drillhole.project_id).all()
+    company_id = db.query(Company.id).scalar()
+    start = datetime(2025, 1, 1)
+
+    for n in range(dispatches):
+        hole_id, project_id = rng.choice(holes)
+        dispatch = Dispatch(
+            project_id=project_id,
+            drillhole_id=hole_id,
+            company_id=company_id,
+            dispatch_date=start + timedelta(hours=n),
+            hq_boxes=rng.randint(0, 20),
+            nq_boxes=rng.randint(0, 20),
+            driver=f"Driver {rng.randint(1, 15)}",
+            technician=f"Technician {rng.randint(1, 8)}",
+            samples_collected=samples_per_dispatch,
+            sample_type="core",
+        )
+        db.add(dispatch)
+        db.flush()
+        record_change(db, "dispatch", "create", dispatch.id,
+                      serialize_row(dispatch, exclude=SERVER_FIELDS), site_id=SITE_ID)
+
+        for s in range(samples_per_dispatch):
+            sample = Sample(
+                dispatch_id=dispatch.id,
+                sample_id=f"GS-{n:06d}-{s:02d}",
+                sample_type=SampleType.CORE,
+                from_depth=Decimal(s),
+                to_depth=Decimal(s + 1),
+            )
+            db.add(sample)
+            db.flush()
+            record_change(db, "sample", "create", sample.id,
+                          serialize_row(sample, exclude=SERVER_FIELDS), site_id=SITE_ID)
+
+        if rng.random() < 0.5:
+            dispatch.status = DispatchStatus.RETURNED
+            dispatch.return_date = dispatch.dispatch_date + timedelta(days=rng.randint(1, 30))
+            dispatch.returned_hq = dispatch.hq_boxes
+            dispatch.returned_nq = dispatch.nq_boxes - rng.choice([0, 0, 0, 1]) if dispatch.nq_boxes else 0
+            dispatch.return_condition = "good"
+            record_change(db, "dispatch", "return", dispatch.id, serialize_values({
+                "return_date": dispatch.return_date,
+                "returned_hq": dispatch.returned_hq,
+                "returned_nq": dispatch.returned_nq,
+                "return_condition": dispatch.return_condition,
+                "return_notes": None,
+            }), site_id=SITE_ID)
+        db.commit()
+    db.close()
+
+
+def run_benchmark(dispatches: int, samples_per_dispatch: int, batch_size: int, seed: int):
+    workdir = tempfile.mkdtemp(prefix="sync-bench-")
+    central = make_session_factory(os.path.join(workdir, "central.db"))
+    site = make_session_factory(os.path.join(workdir, "site.db"))
+
+    seed_central(central, projects=10, holes_per_project=20)
+    transport = LocalTransport(central)
+    engine = SyncEngine(site, transport, site_id=SITE_ID, batch_size=batch_size)
+
+    started = time.perf_counter()
+    pull = engine.pull()
+    pull_seconds = time.perf_counter() - started
+    print(f"Initial pull: {pull['upserted']} reference rows in {pull_seconds:.2f}s")
+
+    generate_site_changes(site, dispatches, samples_per_dispatch, seed)
+
+    started = time.perf_counter()
+    push = engine.push()
+    push_seconds = time.perf_counter() - started
+    rate = push["changes"] / push_seconds if push_seconds else 0.0
+    ratio = push["raw_bytes"] / push["sent_bytes"] if push["sent_bytes"] else 0.0
+    print(f"Push: {push['changes']} changes in {push['batches']} batches, {push_seconds:.2f}s "
+          f"({rate:,.0f} changes/s)")
+    print(f"Bytes: {push['raw_bytes']:,} raw, {push['sent_bytes']:,} sent (compression {ratio:.1f}x)")
+    print(f"Conflicts: {len(push['conflicts'])}")
+
+    # Replaying the whole journal again must not apply anything twice
+    db = site()
+    from app.models.sync import SyncState
+    db.query(SyncState).filter(SyncState.site_id == SITE_ID).update({"pushed_seq": 0})
+    db.commit()
+    db.close()
+    started = time.perf_counter()
+    replay = engine.push()
+    replay_seconds = time.perf_counter() - started
+
+    db = central()
+    central_dispatches = db.query(Dispatch).count()
+    central_samples = db.query(Sample).count()
+    db.close()
+    print(f"Idempotent replay: {replay['batches']} batches in {replay_seconds:.2f}s, "
+          f"central has {central_dispatches} dispatches and {central_samples} samples")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark site-to-central sync throughput")
+    parser.add_argument("--dispatches", type=int, default=2000)
+    parser.add_argument("--samples-per-dispatch", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run_benchmark(args.dispatches, args.samples_per_dispatch, args.batch_size, args.seed)
@@ -0,0 +1,39 @@
+"""
+Per-endpoint query and latency budgets
+Runs tests/test_query_budgets.py, where every route under /api/v1 declares
+its budget (SQL statements, rows fetched, milliseconds), against the
+deterministic generate_data.py dataset in a fresh SQLite database, and
+prints the measured value of each call next to its budget.
+
+Exits with status 1 if a statement or row budget is exceeded, a call
+returns an unexpected status, or a route has no budget (new routes must
+declare one). Latency budgets are only enforced with --ms-factor. Same as
+
+    pytest tests/test_query_budgets.py [--preset P] [--budget-runs N] [--ms-factor F]
+"""
+import sys
+import os
+import argparse
+
+import pytest
+
+TESTS = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tests', 'test_query_budgets.py'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check per-endpoint SQL and latency budgets")
+    parser.add_argument("--preset", default="small",
+                        help="generate_data.py preset; row and latency budgets apply to 'small' only")
+    parser.add_argument("--runs", type=int, default=3, help="Measured calls per read step (median latency)")
+    parser.add_argument("--ms-factor", type=float, default=0.0,
+                        help="Enforce latency budgets scaled by this factor; 0 (default) only reports them")
+    args = parser.parse_args()
+
+    sys.exit(pytest.main([
+        TESTS, "-q", "-p", "no:cacheprovider",
+        "--preset", args.preset, "--budget-runs", str(args.runs), "--ms-factor", str(args.ms_factor),
+    ]))
+
+
+if __name__ == "__main__":
+    main()
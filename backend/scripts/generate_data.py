@@ -0,0 +1,334 @@
+"""
+Synthetic data generator
+Bulk-loads a deterministic, production-shaped dataset for benchmarks:
+companies, projects, drillholes, dispatches and samples with skewed
+(log-normal) fan-out, drilling campaigns that move down each hole over
+time, mostly-matching returns and contiguous sample intervals with
+occasional gaps and overlaps. The same --seed always produces the same rows.
+
+Rows are written with multi-row Core INSERTs in chunks, parents before
+children, with explicit ids and child counters filled in, so nothing is
+read back while loading.
+"""
+import sys
+import os
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, text
+from app.database import Base, engine
+from app.models import Company, Dispatch, Drillhole, Inventory, Project, Sample, User
+from app.models.dispatch import DispatchStatus
+from app.models.drillhole import DrillholeStatus
+from app.models.inventory import BoxType
+from app.models.project import ProjectStatus
+from app.models.sample import SampleStatus, SampleType
+from app.models.user import UserRole
+from app.utils.security import get_password_hash
+
+PRESETS = {
+    "small": dict(companies=5, projects=50, drillholes=500, dispatches=10_000, samples=50_000),
+    "medium": dict(companies=20, projects=500, drillholes=10_000, dispatches=200_000, samples=1_000_000),
+    "production": dict(companies=50, projects=5_000, drillholes=100_000, dispatches=2_000_000, samples=10_000_000),
+}
+
+NAME_PARTS = (
+    ["Ashanti", "Volta", "Tarkwa", "Obuasi", "Prestea", "Bibiani", "Damang", "Akyem", "Wassa", "Chirano",
+     "Kibi", "Asante", "Bogoso", "Nzema", "Sefwi", "Konongo", "Ayanfuri", "Esaase", "Edikan", "Namdini"],
+    ["Gold", "Minerals", "Mining", "Resources", "Exploration", "Metals", "Drilling", "Geoscience"],
+    ["Ltd", "Corp", "Group", "Inc", "Co", "Holdings"],
+)
+PEOPLE = [
+    f"{first} {last}"
+    for first in ["Kwame", "Ama", "Kofi", "Akosua", "Yaw", "Efua", "Kojo", "Adwoa", "Kwaku", "Abena"]
+    for last in ["Mensah", "Owusu", "Boateng", "Asante", "Osei", "Appiah", "Darko", "Addo"]
+]
+SAMPLE_TYPES = list(SampleType)
+DISPATCH_SAMPLE_TYPES = ["Core", "Assay", "Geochemical", "Mineralogy"]
+RETURN_CONDITIONS = ["Good", "Good", "Good", "Fair", "Damaged"]
+
+
+def split(total: int, weights, rng: random.Random, sigma: float = 1.0):
+    """
+    Divide total into len(weights) integer parts with log-normal skew
+
+    Parts are proportional to weight times log-normal noise, rounded with
+    the largest-remainder method so they sum to total exactly. A zero
+    weight always gets zero.
+    """
+    scaled = [w * rng.lognormvariate(0, sigma) if w else 0.0 for w in weights]
+    norm = sum(scaled)
+    if not norm:
+        return [0] * len(weights)
+    exact = [total * w / norm for w in scaled]
+    parts = [int(x) for x in exact]
+    remainder = total - sum(parts)
+    order = sorted(range(len(exact)), key=lambda i: exact[i] - parts[i], reverse=True)
+    for i in order[:remainder]:
+        parts[i] += 1
+    return parts
+
+
+class Loader:
+    """Buffers rows per table and writes them parents-first in chunks"""
+
+    def __init__(self, connection, chunk_size: int):
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.tables = [Company.__table__, Project.__table__, Drillhole.__table__,
+                       Dispatch.__table__, Sample.__table__]
+        self.buffers = {table.name: [] for table in self.tables}
+        self.written = {table.name: 0 for table in self.tables}
+        self.started = time.perf_counter()
+
+    def add(self, table_name: str, row: dict) -> None:
+        buffer = self.buffers[table_name]
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        with self.connection.begin():
+            for table in self.tables:
+                rows = self.buffers[table.name]
+                if rows:
+                    self.connection.execute(table.insert(), rows)
+                    self.written[table.name] += len(rows)
+                    self.buffers[table.name] = []
+        elapsed = time.perf_counter() - self.started
+        summary = ", ".join(f"{name} {count:,}" for name, count in self.written.items())
+        print(f"\r  {summary} ({elapsed:.0f}s)", end="", flush=True)
+
+
+def company_names(count: int, rng: random.Random):
+    names, seen = [], set()
+    while len(names) < count:
+        name = " ".join(rng.choice(part) for part in NAME_PARTS)
+        if name in seen:
+            name = f"{name} {len(names) + 1}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def generate(connection, volumes: dict, seed: int, end_date: datetime, years: int, chunk_size: int) -> dict:
+    """
+    Generate and insert the dataset
+
+    Returns:
+        Rows written per table
+    """
+    rng = random.Random(seed)
+    loader = Loader(connection, chunk_size)
+    start_date = end_date - timedelta(days=365 * years)
+    span_days = (end_date - start_date).days
+
+    # Fan-out, decided top-down so every parent's counters are known
+    # before it is written
+    projects_per_company = split(volumes["projects"], [1] * volumes["companies"], rng, 0.8)
+    drillholes_per_project = split(volumes["drillholes"], [1] * volumes["projects"], rng, 0.9)
+    dispatches_per_drillhole = split(volumes["dispatches"], [1] * volumes["drillholes"], rng, 0.7)
+    samples_per_drillhole = split(volumes["samples"], dispatches_per_drillhole, rng, 0.3)
+
+    project_id = drillhole_id = dispatch_id = sample_id = 0
+    outstanding = {"hq": 0, "nq": 0}
+
+    for company_index, name in enumerate(company_names(volumes["companies"], rng)):
+        company_id = company_index + 1
+        loader.add("companies", {
+            "id": company_id,
+            "name": name,
+            "contact_email": f"contact{company_id}@example.com",
+            "contact_phone": f"+233 20 {rng.randrange(1000000, 9999999)}",
+        })
+        crew = rng.sample(PEOPLE, 6)
+
+        for _ in range(projects_per_company[company_index]):
+            project_index = project_id
+            project_id += 1
+            holes = drillholes_per_project[project_index]
+            hole_ids = range(drillhole_id, drillhole_id + holes)
+            loader.add("projects", {
+                "id": project_id,
+                "project_id": f"PRJ-{project_id:05d}",
+                "name": f"{rng.choice(NAME_PARTS[0])} {rng.choice(['North', 'South', 'East', 'West', 'Central'])} {project_id}",
+                "company_id": company_id,
+                "location": f"{rng.uniform(4.7, 11.1):.4f}, {rng.uniform(-3.2, 1.2):.4f}",
+                "status": rng.choices(list(ProjectStatus), [0.7, 0.1, 0.2])[0],
+                "drillhole_count": holes,
+                "dispatch_count": sum(dispatches_per_drillhole[i] for i in hole_ids),
+            })
+
+            for hole_number in range(1, holes + 1):
+                hole_index = drillhole_id
+                drillhole_id += 1
+                dispatches = dispatches_per_drillhole[hole_index]
+                depth = round(rng.uniform(80, 650), 2)
+                loader.add("drillholes", {
+                    "id": drillhole_id,
+                    "drillhole_id": f"DH-{project_id:05d}-{hole_number:03d}",
+                    "project_id": project_id,
+                    "depth": Decimal(f"{depth:.2f}"),
+                    "status": rng.choices(list(DrillholeStatus), [0.3, 0.65, 0.05])[0],
+                    "dispatch_count": dispatches,
+                })
+                if not dispatches:
+                    continue
+
+                # One drilling campaign per hole; dispatches move down the
+                # hole as the campaign proceeds
+                campaign_days = rng.randint(14, 180)
+                campaign_start = start_date + timedelta(days=rng.randint(0, max(0, span_days - campaign_days)))
+                offsets = sorted(rng.uniform(0, campaign_days) for _ in range(dispatches))
+                samples_per_dispatch = split(samples_per_drillhole[hole_index], [1] * dispatches, rng, 0.5)
+                # Slack for gaps; the last intervals are clamped to the hole depth
+                interval = depth / (1.1 * max(1, samples_per_drillhole[hole_index]))
+                cursor = 0.0
+
+                for offset, sample_total in zip(offsets, samples_per_dispatch):
+                    dispatch_id += 1
+                    dispatch_date = campaign_start + timedelta(days=offset, hours=rng.randint(6, 17))
+                    hq = rng.randint(0, 30)
+                    nq = rng.randint(0, 30) if hq else rng.randint(1, 30)
+                    age_days = (end_date - dispatch_date).days
+                    # Recent dispatches are mostly still out; a few old ones are overdue
+                    returned = rng.random() < (0.2 if age_days < 21 else 0.97)
+                    row = {
+                        "id": dispatch_id,
+                        "project_id": project_id,
+                        "drillhole_id": drillhole_id,
+                        "company_id": company_id,
+                        "dispatch_date": dispatch_date,
+                        "hq_boxes": hq,
+                        "nq_boxes": nq,
+                        "driver": rng.choice(crew),
+                        "technician": rng.choice(crew),
+                        "samples_collected": sample_total,
+                        "sample_type": rng.choice(DISPATCH_SAMPLE_TYPES),
+                        "status": DispatchStatus.OUTSTANDING,
+                        "return_date": None,
+                        "returned_hq": None,
+                        "returned_nq": None,
+                        "return_condition": None,
+                        "return_notes": None,
+                        "sample_count": sample_total,
+                    }
+                    if returned:
+                        matched = rng.random() < 0.9
+                        row.update({
+                            "status": DispatchStatus.RETURNED,
+                            "return_date": min(end_date, dispatch_date + timedelta(days=rng.lognormvariate(2.3, 0.6))),
+                            "returned_hq": hq if matched else max(0, hq - rng.randint(1, 3)),
+                            "returned_nq": nq if matched else max(0, nq - rng.randint(0, 2)),
+                            "return_condition": rng.choice(RETURN_CONDITIONS),
+                            "return_notes": None if matched else "Boxes missing on return",
+                        })
+                    else:
+                        outstanding["hq"] += hq
+                        outstanding["nq"] += nq
+                    loader.add("dispatches", row)
+
+                    for _ in range(sample_total):
+                        sample_id += 1
+                        roll = rng.random()
+                        if roll < 0.03:
+                            cursor += interval * rng.uniform(0.5, 3)  # unsampled gap
+                        elif roll < 0.04:
+                            cursor = max(0.0, cursor - interval * 0.5)  # resampled overlap
+                        from_depth = min(cursor, depth)
+                        cursor += interval * rng.uniform(0.8, 1.2)
+                        loader.add("samples", {
+                            "id": sample_id,
+                            "dispatch_id": dispatch_id,
+                            "drillhole_id": drillhole_id,
+                            "sample_id": f"SMP-{sample_id:08d}",
+                            "sample_type": rng.choices(SAMPLE_TYPES, [0.5, 0.3, 0.15, 0.05])[0],
+                            "from_depth": Decimal(f"{from_depth:.2f}"),
+                            "to_depth": Decimal(f"{min(cursor, depth):.2f}"),
+                            "status": SampleStatus.COMPLETED if returned else
+                            rng.choice([SampleStatus.COLLECTED, SampleStatus.PROCESSING]),
+                        })
+
+    loader.flush()
+    print()
+
+    with connection.begin():
+        connection.execute(Inventory.__table__.insert(), [
+            {"box_type": BoxType.HQ, "base_quantity": outstanding["hq"] + 500},
+            {"box_type": BoxType.NQ, "base_quantity": outstanding["nq"] + 500},
+        ])
+    return loader.written
+
+
+def create_users(connection, password: str) -> None:
+    """Create one admin, two managers and five operators sharing a password"""
+    password_hash = get_password_hash(password)
+    users = [("bench_admin", UserRole.ADMIN)]
+    users += [(f"bench_manager{i}", UserRole.MANAGER) for i in range(1, 3)]
+    users += [(f"bench_operator{i}", UserRole.OPERATOR) for i in range(1, 6)]
+    with connection.begin():
+        connection.execute(User.__table__.insert(), [
+            {
+                "username": username,
+                "email": f"{username}@example.com",
+                "password_hash": password_hash,
+                "full_name": username.replace("_", " ").title(),
+                "role": role,
+                "is_active": True,
+            }
+            for username, role in users
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load a deterministic synthetic dataset")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    for name in PRESETS["small"]:
+        parser.add_argument(f"--{name}", type=int, default=None, help=f"Number of {name} (overrides the preset)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", default="2025-10-01", help="Date of the newest dispatch (YYYY-MM-DD)")
+    parser.add_argument("--years", type=int, default=3, help="Years of dispatch history")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per INSERT batch")
+    parser.add_argument("--password", default="benchmark", help="Password of the bench_* users")
+    parser.add_argument("--reset", action="store_true",
+                        help="Drop and recreate all tables first (destroys existing data)")
+    args = parser.parse_args()
+
+    volumes = dict(PRESETS[args.preset])
+    for name in volumes:
+        if getattr(args, name) is not None:
+            volumes[name] = getattr(args, name)
+    if volumes["companies"] < 1:
+        parser.error("at least one company is required")
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as connection:
+        if connection.execute(func.count(Company.id).select()).scalar():
+            print("Database already contains companies; use --reset to replace them")
+            sys.exit(1)
+        if connection.dialect.name == "mysql":
+            # Rows are generated consistent; skip per-row checks while loading
+            connection.execute(text("SET unique_checks = 0, foreign_key_checks = 0"))
+
+        print(f"Generating {', '.join(f'{count:,} {name}' for name, count in volumes.items())} (seed {args.seed})")
+        started = time.perf_counter()
+        written = generate(
+            connection, volumes, args.seed,
+            datetime.strptime(args.end_date, "%Y-%m-%d"), args.years, args.chunk_size,
+        )
+        create_users(connection, args.password)
+        print(f"Wrote {sum(written.values()):,} rows in {time.perf_counter() - started:.1f}s; "
+              f"users bench_admin, bench_manager1-2, bench_operator1-5 (password '{args.password}')")
+
+
+if __name__ == "__main__":
+    main()
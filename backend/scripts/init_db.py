@@ -1,6 +1,9 @@
 """
 Database initialization script
-Creates all tables in the database
+Applies all schema migrations (alembic upgrade head)
+
+Run once per deployment before starting the API; workers do not create
+or alter tables when they boot.
 """
 import sys
 import os
@@ -8,34 +11,23 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.database import engine, Base
-from app.models import (
-    Company,
-    Project,
-    Drillhole,
-    Dispatch,
-    Sample,
-    Inventory,
-    User,
-    AuditLog,
-)
+from app.database import Base, init_db
+import app.models  # noqa: F401
 
 
 def init_database():
     """
-    Initialize database by creating all tables
+    Initialize database by applying migrations
     """
-    print("Creating database tables...")
+    print("Applying database migrations...")
     
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+    init_db()
     
-    print("Database tables created successfully!")
-    print("\nCreated tables:")
+    print("Database migrations applied successfully!")
+    print("\nManaged tables:")
     for table in Base.metadata.sorted_tables:
         print(f"  - {table.name}")
 
 
 if __name__ == "__main__":
     init_database()
-
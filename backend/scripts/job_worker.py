@@ -0,0 +1,45 @@
+"""
+Background job worker script
+Runs queued jobs from the jobs table until interrupted; use it with
+JOB_WORKER_THREADS=0 to keep long jobs out of the API workers
+"""
+import sys
+import os
+import argparse
+import signal
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.jobs import JobWorker
+
+
+def run_worker(threads: int = None, poll_seconds: float = None):
+    """
+    Run a job worker until SIGINT or SIGTERM
+    """
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    worker = JobWorker(
+        SessionLocal,
+        threads or max(settings.JOB_WORKER_THREADS, 1),
+        poll_seconds or settings.JOB_POLL_SECONDS,
+    )
+    worker.start()
+    print(f"Job worker {worker.worker_id} running with {worker.threads} threads; Ctrl+C to stop")
+    stop.wait()
+    print("Stopping; running jobs are requeued if they do not finish in time")
+    worker.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument("--threads", type=int, default=None, help="Jobs run concurrently")
+    parser.add_argument("--poll", type=float, default=None, help="Seconds between polls of an empty queue")
+    args = parser.parse_args()
+    run_worker(threads=args.threads, poll_seconds=args.poll)
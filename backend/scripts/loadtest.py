@@ -0,0 +1,160 @@
+"""
+Load-test harness for server configurations
+Starts gunicorn once per configuration, drives it at fixed concurrency and
+reports requests per second and latency percentiles for each one
+
+Configurations are given as WORKERSxTHREADS, e.g. "1x40,2x20,4x10".
+Any other server setting can be passed through the environment.
+"""
+import sys
+import os
+import argparse
+import asyncio
+import json
+import signal
+import subprocess
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def start_server(workers: int, threads: int, port: int):
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        WEB_THREADPOOL_SIZE=str(threads),
+        WEB_PORT=str(port),
+        WEB_HOST="127.0.0.1",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app",
+         "--access-logfile", "/dev/null"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(base_url: str, timeout: float = 30.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+
+async def drive(base_url: str, paths, concurrency: int, duration: float, headers):
+    import httpx
+
+    latencies = []
+    errors = 0
+    # Load shed by admission control (503) and rate-limited (429)
+    shed = 0
+    limited = 0
+    stop_at = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30.0) as client:
+        async def user(n: int):
+            nonlocal errors, shed, limited
+            i = n
+            while time.perf_counter() < stop_at:
+                path = paths[i % len(paths)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code == 503:
+                        shed += 1
+                    elif response.status_code == 429:
+                        limited += 1
+                    elif response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "shed": shed,
+        "limited": limited,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def run_loadtest(configs, paths, concurrency, duration, warmup, port, token, output):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    results = []
+
+    for config in configs:
+        workers, threads = (int(part) for part in config.lower().split("x"))
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(workers, threads, port)
+        try:
+            wait_until_ready(base_url)
+            if warmup:
+                asyncio.run(drive(base_url, paths, concurrency, warmup, headers))
+            stats = asyncio.run(drive(base_url, paths, concurrency, duration, headers))
+        finally:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+        stats.update({"config": config, "workers": workers, "threads": threads, "concurrency": concurrency})
+        results.append(stats)
+        print(f"{config:>8}  {stats['rps']:9.1f} req/s  p50 {stats['p50_ms']:7.1f} ms  "
+              f"p99 {stats['p99_ms']:7.1f} ms  errors {stats['errors']}  "
+              f"503 {stats['shed']}  429 {stats['limited']}")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({"paths": paths, "duration": duration, "results": results}, f, indent=2)
+        print(f"\nResults written to {output}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare server configurations under load")
+    parser.add_argument("--configs", default="1x40,2x20,4x10", help="Comma-separated WORKERSxTHREADS list")
+    parser.add_argument("--path", action="append", dest="paths", help="Path to request (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of unmeasured load first")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--token", default=os.getenv("LOADTEST_TOKEN"), help="Bearer token for authenticated paths")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    args = parser.parse_args()
+    run_loadtest(
+        [c.strip() for c in args.configs.split(",") if c.strip()],
+        args.paths or ["/health"],
+        args.concurrency,
+        args.duration,
+        args.warmup,
+        args.port,
+        args.token,
+        args.output,
+    )
@@ -0,0 +1,48 @@
+"""
+Company/project purge script
+Deletes a company or project subtree in bounded batches with progress
+output; safe to re-run after an interruption
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.purge import company_purge_plan, project_purge_plan, count_rows, run_purge
+
+
+def purge(company_id: int = None, project_id: int = None, batch_size: int = None, dry_run: bool = False):
+    """
+    Purge one company or project and print progress per batch
+    """
+    plan = company_purge_plan(company_id) if company_id else project_purge_plan(project_id)
+    db = SessionLocal()
+    try:
+        planned = count_rows(db, plan)
+        for name, rows in planned.items():
+            print(f"{name:12} {rows:>10} rows")
+        if dry_run:
+            return
+
+        def show(step: str, done: int, total: int):
+            print(f"\r{step:12} {done:>10}/{total}", end="" if done < total else "\n", flush=True)
+
+        deleted = run_purge(db, plan, batch_size or settings.PURGE_BATCH_SIZE, progress=show)
+        print(f"Deleted {sum(deleted.values())} rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete a company or project subtree in batches")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--company", type=int, help="Company ID")
+    target.add_argument("--project", type=int, help="Project ID")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the rows")
+    args = parser.parse_args()
+    purge(company_id=args.company, project_id=args.project, batch_size=args.batch_size, dry_run=args.dry_run)
@@ -0,0 +1,52 @@
+"""
+Child counter maintenance script
+Verifies the denormalized drillhole/dispatch/sample counters against the
+child tables and optionally rebuilds the drifted ones
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.services.counters import rebuild_counters, verify_counters
+
+
+def run(verify_only: bool = False):
+    """
+    Report counter drift, then rebuild unless verify_only is set
+
+    Exits with status 1 when --verify finds drift, so it can run in cron
+    or CI.
+    """
+    db = SessionLocal()
+    try:
+        report = verify_counters(db)
+        total = 0
+        for entry in report:
+            total += entry["drifted"]
+            print(f"{entry['counter']:28} {entry['drifted']:>8} drifted")
+            for example in entry["examples"]:
+                print(f"    id={example['id']} stored={example['stored']} actual={example['actual']}")
+
+        if verify_only:
+            sys.exit(1 if total else 0)
+
+        if total:
+            fixed = rebuild_counters(db)
+            db.commit()
+            for counter, rows in fixed.items():
+                print(f"Rebuilt {counter}: {rows} rows")
+        else:
+            print("All counters are consistent")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify and rebuild child counters")
+    parser.add_argument("--verify", action="store_true", help="Only report drift (exit 1 if any)")
+    args = parser.parse_args()
+    run(verify_only=args.verify)
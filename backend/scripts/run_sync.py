@@ -0,0 +1,53 @@
+"""
+Site sync script
+Pushes the local change journal to central and pulls reference data
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.sync import HttpTransport, SyncEngine
+
+
+def run_sync(push_only: bool = False, pull_only: bool = False):
+    """
+    Run one sync round against SYNC_CENTRAL_URL
+    """
+    if not settings.SITE_ID or not settings.SYNC_CENTRAL_URL:
+        print("SITE_ID and SYNC_CENTRAL_URL must be configured")
+        sys.exit(1)
+    
+    transport = HttpTransport(
+        settings.SYNC_CENTRAL_URL,
+        settings.SYNC_USERNAME,
+        settings.SYNC_PASSWORD,
+        timeout=settings.SYNC_TIMEOUT_SECONDS,
+    )
+    engine = SyncEngine(SessionLocal, transport)
+    
+    if not pull_only:
+        push = engine.push()
+        print(f"Pushed {push['changes']} changes in {push['batches']} batches "
+              f"({push['raw_bytes']} bytes raw, {push['sent_bytes']} bytes sent), "
+              f"acknowledged up to seq {push['pushed_seq']}")
+        for conflict in push["conflicts"]:
+            print(f"  Conflict at seq {conflict['seq']} ({conflict['entity']} {conflict['op']}): {conflict['reason']}")
+    
+    if not push_only:
+        pull = engine.pull()
+        print(f"Pulled reference data: {pull['upserted']} upserted, {pull['deleted']} deleted")
+        if pull["deferred"]:
+            print(f"  {pull['deferred']} deletions wait until local changes are pushed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync this site with central")
+    parser.add_argument("--push-only", action="store_true", help="Only upload the change journal")
+    parser.add_argument("--pull-only", action="store_true", help="Only download reference data")
+    args = parser.parse_args()
+    run_sync(push_only=args.push_only, pull_only=args.pull_only)
@@ -0,0 +1,145 @@
+"""
+Shared test fixtures
+
+Settings are read when app.config is first imported, so the environment
+is pointed at a throwaway SQLite database (and admission control, rate
+limiting and job workers are switched off) here, before any test imports
+the application.
+"""
+import sys
+import os
+import tempfile
+from datetime import datetime
+import pytest
+
+# generate_data.py and the benchmark helpers live in scripts/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+TEST_DIR = tempfile.mkdtemp(prefix="coretrack-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}",
+    QUERY_STATS_HEADERS="true",
+    ADMISSION_ENABLED="false",
+    RATE_LIMIT_PER_MINUTE="0",
+    JOB_WORKER_THREADS="0",
+    JOB_ARTIFACT_DIR=os.path.join(TEST_DIR, "jobs"),
+    PROFILE_DIR=os.path.join(TEST_DIR, "profiles"),
+    SLOW_QUERY_LOG=os.path.join(TEST_DIR, "slow_queries.jsonl"),
+)
+
+# Analytes seeded by assayed_project
+ASSAY_ANALYTES = ["Au_ppm", "Ag_ppm", "Cu_pct", "As_ppm"]
+
+# Titled sections printed after the test run: {title: [lines]}
+SUMMARY = pytest.StashKey[dict]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("coretrack")
+    group.addoption("--preset", default="small",
+                    help="generate_data.py preset for seeded_db; row and latency budgets apply to 'small' only")
+    group.addoption("--budget-runs", type=int, default=3,
+                    help="Measured calls per read in the query budget tests (median latency)")
+    group.addoption("--ms-factor", type=float, default=0.0,
+                    help="Enforce latency budgets scaled by this factor (e.g. 1 on a quiet machine); "
+                         "0, the default, only reports them")
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    for title, lines in config.stash.get(SUMMARY, {}).items():
+        terminalreporter.write_sep("=", title)
+        for line in lines:
+            terminalreporter.write_line(line)
+
+
+@pytest.fixture(scope="session")
+def summary(request):
+    """Add a line to a titled section of the end-of-run summary"""
+    sections = request.config.stash.setdefault(SUMMARY, {})
+
+    def add(title, line):
+        sections.setdefault(title, []).append(line)
+
+    return add
+
+
+@pytest.fixture(scope="session")
+def preset(request):
+    return request.config.getoption("--preset")
+
+
+@pytest.fixture(scope="session")
+def seeded_db(preset):
+    """
+    Session factory for the test database, loaded with the deterministic
+    generate_data.py dataset (seed 42) and the bench_* users (password
+    "benchmark")
+    """
+    from app.database import Base, SessionLocal, engine
+    from generate_data import PRESETS, create_users, generate
+
+    if preset not in PRESETS:
+        raise pytest.UsageError(f"unknown preset {preset}")
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        generate(connection, PRESETS[preset], 42, datetime(2025, 10, 1), 3, 5000)
+        create_users(connection, "benchmark")
+    yield SessionLocal
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def assayed_project(seeded_db, tmp_path_factory):
+    """
+    Id of the project with the most drillholes, with ASSAY_ANALYTES results
+    for every one of its samples imported through the assay importer
+    """
+    import csv
+    import random
+    from app.models.assay import AssayBatch
+    from app.models.drillhole import Drillhole
+    from app.models.project import Project
+    from app.models.sample import Sample
+    from app.services.assay_import import import_batch
+
+    db = seeded_db()
+    try:
+        project_id = db.query(Project.id).order_by(Project.drillhole_count.desc(), Project.id).first()[0]
+        rng = random.Random(42)
+        path = os.path.join(str(tmp_path_factory.mktemp("assays")), "seed_assays.csv")
+        codes = db.query(Sample.sample_id).join(Drillhole, Drillhole.id == Sample.drillhole_id).filter(
+            Drillhole.project_id == project_id).order_by(Sample.id)
+        with open(path, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["Sample ID"] + ASSAY_ANALYTES)
+            for (code,) in codes:
+                writer.writerow([code] + [f"{rng.lognormvariate(0, 1.5):.3f}" for _ in ASSAY_ANALYTES])
+        batch = AssayBatch(lab="Test Lab", filename="seed_assays.csv")
+        db.add(batch)
+        db.commit()
+        import_batch(db, batch.id, path)
+    finally:
+        db.close()
+    return project_id
+
+
+@pytest.fixture(scope="session")
+def client(seeded_db):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def admin_headers(seeded_db):
+    """Bearer token of bench_admin"""
+    from app.models.user import User
+    from app.utils.security import create_access_token
+
+    db = seeded_db()
+    try:
+        admin_id = db.query(User.id).filter(User.username == "bench_admin").scalar()
+    finally:
+        db.close()
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(admin_id)})}"}
@@ -0,0 +1,60 @@
+"""
+Length-weighted compositing (app/services/compositing.py)
+"""
+import numpy as np
+import pytest
+from app.services.compositing import composite
+from tests.conftest import ASSAY_ANALYTES
+
+
+def test_samples_above_the_collar_stay_in_their_hole():
+    # Hole 2's -1 to 0 m sample has a negative composite index
+    result = composite(
+        holes=np.array([1, 1, 2]),
+        starts=np.array([0.0, 1.0, -1.0]),
+        ends=np.array([1.0, 2.0, 0.0]),
+        values=np.array([[1.0], [2.0], [100.0]]),
+        length=1.0,
+    )
+
+    assert result["drillhole_id"].tolist() == [1, 1, 2]
+    assert result["from_depth"].tolist() == [0.0, 1.0, -1.0]
+    assert result["to_depth"].tolist() == [1.0, 2.0, 0.0]
+    assert result["samples"].tolist() == [1, 1, 1]
+    assert result["values"][:, 0].tolist() == [1.0, 2.0, 100.0]
+
+
+def test_length_composites_are_weighted_by_length():
+    result = composite(
+        holes=np.array([1, 1]),
+        starts=np.array([0.0, 0.5]),
+        ends=np.array([0.5, 2.0]),
+        values=np.array([[4.0], [1.0]]),
+        length=2.0,
+    )
+
+    assert result["from_depth"].tolist() == [0.0]
+    assert result["to_depth"].tolist() == [2.0]
+    assert result["samples"].tolist() == [2]
+    assert result["values"][0, 0] == (0.5 * 4.0 + 1.5 * 1.0) / 2.0
+
+
+def test_parquet_export_reads_back(client, admin_headers, assayed_project):
+    import io
+    import pyarrow.parquet
+
+    params = {"project_id": assayed_project, "length": 5}
+    response = client.get("/api/v1/assays/composites/export", params=params, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    table = pyarrow.parquet.read_table(io.BytesIO(response.content)).to_pylist()
+
+    expected = client.get("/api/v1/assays/composites", params=params, headers=admin_headers).json()
+    assert expected["analytes"] == ASSAY_ANALYTES
+    assert len(table) == len(expected["composites"]) > 0
+    for row, composite in zip(table, expected["composites"]):
+        assert row["project_id"] == assayed_project
+        for field in ("drillhole_id", "drillhole", "from_depth", "to_depth", "sampled_length", "samples"):
+            assert row[field] == pytest.approx(composite[field])
+        for code in ASSAY_ANALYTES:
+            assert row[code] == pytest.approx(composite["values"].get(code), nan_ok=True)
@@ -0,0 +1,95 @@
+"""
+Data versions (app/services/data_version.py) and the deletion counters
+behind them (app/models/table_version.py)
+"""
+import pytest
+from sqlalchemy import event
+from app.models.company import Company
+from app.models.project import Project
+from app.models.sample import Sample
+from app.services.data_version import get_data_version
+
+
+@pytest.fixture
+def db(seeded_db):
+    db = seeded_db()
+    yield db
+    db.rollback()
+    db.query(Company).filter(Company.name.like("Data Version %")).delete(synchronize_session=False)
+    db.commit()
+    db.close()
+
+
+def add_companies(db, *names):
+    companies = [Company(name=f"Data Version {name}") for name in names]
+    db.add_all(companies)
+    db.commit()
+    return companies
+
+
+def token(db, *models):
+    return get_data_version(db, models).token
+
+
+def test_version_is_read_without_counting_rows(db):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        # SQLite connections issue their own BEGIN
+        if statement != "BEGIN":
+            statements.append(statement.lower())
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        get_data_version(db, [Sample, Company])
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(statements) == 1
+    assert "count(" not in statements[0]
+
+
+def test_deleting_a_row_below_the_highest_id_changes_the_version(db):
+    first, _ = add_companies(db, "first", "second")
+    before = token(db, Company)
+
+    db.delete(first)
+    db.commit()
+
+    assert token(db, Company) != before
+
+
+def test_bulk_delete_changes_the_version(db):
+    first, _ = add_companies(db, "first", "second")
+    before = token(db, Company)
+
+    db.query(Company).filter(Company.id == first.id).delete(synchronize_session=False)
+    db.commit()
+
+    assert token(db, Company) != before
+
+
+def test_cascaded_delete_changes_the_child_version(db):
+    company, other = add_companies(db, "parent", "other")
+    db.add(Project(project_id="DATA-VERSION-1", name="Data Version project", company_id=company.id))
+    db.add(Project(project_id="DATA-VERSION-2", name="Data Version project", company_id=other.id))
+    db.commit()
+    before = token(db, Project)
+
+    db.delete(company)
+    db.commit()
+
+    assert db.query(Project).filter(Project.project_id == "DATA-VERSION-1").count() == 0
+    assert token(db, Project) != before
+
+
+def test_rolled_back_delete_keeps_the_version(db):
+    first, _ = add_companies(db, "first", "second")
+    before = token(db, Company)
+
+    db.delete(first)
+    db.flush()
+    db.rollback()
+
+    assert token(db, Company) == before
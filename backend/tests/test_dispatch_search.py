@@ -0,0 +1,55 @@
+"""
+Dispatch search (app/services/dispatch_search.py)
+"""
+from datetime import datetime
+import pytest
+from app.models.dispatch import Dispatch, DispatchStatus
+
+
+@pytest.fixture
+def null_returns(seeded_db):
+    """Two returned dispatches without an HQ return count: 3 HQ boxes out, and none"""
+    db = seeded_db()
+    template = db.query(Dispatch).order_by(Dispatch.id).first()
+    dispatches = [
+        Dispatch(
+            project_id=template.project_id,
+            drillhole_id=template.drillhole_id,
+            company_id=template.company_id,
+            dispatch_date=datetime(2025, 9, 1),
+            hq_boxes=hq_boxes,
+            nq_boxes=2,
+            driver="Null Return Driver",
+            technician="Null Return Technician",
+            status=DispatchStatus.RETURNED,
+            return_date=datetime(2025, 9, 3),
+            returned_hq=None,
+            returned_nq=2,
+        )
+        for hq_boxes in (3, 0)
+    ]
+    db.add_all(dispatches)
+    db.commit()
+    ids = {"short": dispatches[0].id, "matching": dispatches[1].id}
+    yield ids
+    for dispatch in dispatches:
+        db.delete(dispatch)
+    db.commit()
+    db.close()
+
+
+def test_missing_return_count_is_zero_boxes(client, admin_headers, null_returns):
+    def search(has_discrepancy):
+        response = client.get("/api/v1/dispatches/search", headers=admin_headers, params={
+            "driver": "Null Return", "has_discrepancy": has_discrepancy,
+        })
+        assert response.status_code == 200
+        return {item["id"]: item["is_match"] for item in response.json()["items"]}
+
+    assert search("true") == {null_returns["short"]: False}
+    assert search("false") == {null_returns["matching"]: True}
+
+    report = client.get("/api/v1/reports/reconciliation", headers=admin_headers).json()
+    reported = {item["id"] for item in report["discrepancies"]}
+    assert null_returns["short"] in reported
+    assert null_returns["matching"] not in reported
@@ -0,0 +1,330 @@
+"""
+Per-endpoint query and latency budgets
+
+Calls every route under /api/v1 once, in STEPS order (reads first, then
+create/update/delete of throwaway records), against the seeded_db dataset
+and compares the SQL statements, rows fetched and latency of each call
+with the budget declared for it. An N+1 query shows up as extra
+statements, an accidental full-table load as extra rows. A route without
+a step fails test_every_route_has_a_budget, so new routes must declare a
+budget.
+
+Statement and row budgets are the gate. Statement budgets hold for any
+data size; row budgets are for the "small" preset and are only reported
+with another --preset. Wall-clock latency depends on the machine and its
+load, so latency budgets are reported and only enforced with --ms-factor
+(on the median of --budget-runs calls for reads, a single call for
+writes). The steps share captured ids, so run the module as a whole.
+"""
+import re
+import statistics
+import time
+from typing import NamedTuple, Optional, Tuple
+import pytest
+
+pytestmark = pytest.mark.integration
+
+BUDGET_PRESET = "small"
+
+
+class Budget(NamedTuple):
+    """Upper bounds for one call"""
+    statements: int
+    rows: int
+    ms: float
+
+
+class Step(NamedTuple):
+    """
+    One call of the check
+
+    path is relative to /api/v1 and formatted with the collected ids; body
+    is formatted the same way. capture stores a field of the response (of
+    its first element for lists) under an id name for later steps. With
+    files the call is a multipart upload and body its form fields.
+    """
+    method: str
+    path: str
+    budget: Budget
+    body: Optional[dict] = None
+    expect: int = 200
+    capture: Optional[Tuple[str, str]] = None
+    files: Optional[dict] = None
+
+
+DISPATCH_BODY = {
+    "project_id": "{new_project_id}",
+    "drillhole_id": "{new_drillhole_id}",
+    "company_id": "{company_id}",
+    "hq_boxes": 4,
+    "nq_boxes": 2,
+    "driver": "Budget Driver",
+    "technician": "Budget Technician",
+}
+
+PUSH_BODY = {
+    "site_id": "budget-check",
+    "changes": [
+        {"seq": 1, "entity": "dispatch", "op": "create", "record_id": 1, "payload": {
+            "project_id": "{project_id}", "drillhole_id": "{drillhole_id}", "company_id": "{company_id}",
+            "dispatch_date": "2025-10-01T08:00:00", "hq_boxes": 1, "nq_boxes": 1,
+            "driver": "Site Driver", "technician": "Site Technician",
+        }},
+        # Unknown record: recorded as a conflict for the resolve step
+        {"seq": 2, "entity": "dispatch", "op": "update", "record_id": 99, "payload": {"hq_boxes": 2}},
+    ],
+}
+
+ASSAY_FILE = {"file": ("budget_assays.csv", "Sample ID,Au_ppm,Cu_pct\nSMP-00000001,0.52,<0.01\n", "text/csv")}
+
+STEPS = [
+    # Reads, against the ids of the largest records
+    Step("GET", "/auth/me", Budget(2, 1, 50)),
+    Step("GET", "/users/me", Budget(2, 1, 50)),
+    Step("GET", "/users/", Budget(4, 12, 50)),
+    Step("GET", "/users/{user_id}", Budget(3, 2, 50)),
+    # Served from the reference cache (one more statement when it revalidates)
+    Step("GET", "/companies/", Budget(3, 10, 50)),
+    Step("GET", "/companies/{company_id}", Budget(3, 2, 50)),
+    Step("GET", "/projects/", Budget(3, 60, 80)),
+    Step("GET", "/projects/{project_id}", Budget(4, 3, 50)),
+    Step("GET", "/drillholes/", Budget(4, 110, 100)),
+    Step("GET", "/drillholes/{drillhole_id}", Budget(4, 3, 50)),
+    Step("GET", "/drillholes/{drillhole_id}/samples?from_depth=120&to_depth=135", Budget(4, 3, 50)),
+    Step("GET", "/drillholes/{drillhole_id}/intervals/check", Budget(4, 3, 50)),
+    Step("GET", "/drillholes/intervals/check?project_id={project_id}", Budget(5, 5000, 150)),
+    Step("GET", "/dispatches/", Budget(4, 110, 100)),
+    # Every outstanding dispatch (about 3% of the dataset)
+    Step("GET", "/dispatches/outstanding", Budget(4, 400, 150)),
+    Step("GET", "/dispatches/{dispatch_id}", Budget(3, 2, 50)),
+    # Keyset pages: the second page reads as few rows as the first
+    Step("GET", "/dispatches/search", Budget(4, 110, 100), capture=("search_cursor", "next_cursor")),
+    Step("GET", "/dispatches/search?cursor={search_cursor}", Budget(4, 110, 100)),
+    Step("GET", "/dispatches/search?project_id={project_id}&days_out_min=30&driver=A", Budget(4, 110, 100)),
+    Step("GET", "/dispatches/search?status_filter=returned&has_discrepancy=true&limit=50", Budget(4, 60, 150)),
+    Step("GET", "/samples/", Budget(4, 110, 100)),
+    # Prefix (index range) and substring lookups across all hit types
+    Step("GET", "/search/?q=SMP-0000012", Budget(8, 60, 100)),
+    # Assays of the largest project (seeded through the importer)
+    Step("GET", "/assays/analytes", Budget(5, 10, 50)),
+    Step("GET", "/assays/batches", Budget(3, 2, 50), capture=("batch_id", "id")),
+    Step("GET", "/assays/batches/{batch_id}", Budget(3, 2, 50)),
+    Step("GET", "/assays/drillholes/{drillhole_id}", Budget(6, 1400, 100)),
+    Step("GET", "/assays/results?analyte=Au_ppm&project_id={project_id}", Budget(6, 110, 100)),
+    # Composites are cached per data version; the warm-up call computes them
+    Step("GET", "/assays/composites?project_id={project_id}", Budget(4, 5, 150)),
+    Step("GET", "/assays/composites/export?project_id={project_id}", Budget(4, 5, 100), ),
+    Step("GET", "/search/?q=0012&types=sample,drillhole", Budget(7, 50, 150)),
+    Step("GET", "/samples/{sample_id}", Budget(3, 2, 50)),
+    Step("GET", "/reports/dashboard", Budget(5, 10, 150)),
+    # Lists every outstanding dispatch and every discrepancy
+    Step("GET", "/reports/reconciliation", Budget(5, 1400, 300)),
+    Step("GET", "/reports/analytics", Budget(5, 20, 100)),
+    # Every sample interval of the project in one columnar read
+    Step("GET", "/reports/coverage?project_id={project_id}", Budget(5, 5000, 150)),
+    # Streams every dispatch after revalidating the reference cache; the
+    # headers only cover the first batch
+    Step("GET", "/reports/export", Budget(5, 1100, 2000)),
+    # Full reference snapshot (companies, projects, drillholes and their ids)
+    Step("GET", "/sync/pull", Budget(11, 1200, 250)),
+    Step("GET", "/admin/metrics", Budget(2, 1, 50)),
+    # Profiled with ?profile=1
+    Step("GET", "/companies/?profile=1", Budget(4, 10, 100)),
+    Step("GET", "/admin/profiles", Budget(2, 1, 50), capture=("profile_id", "id")),
+    Step("GET", "/admin/profiles/{profile_id}", Budget(2, 1, 50)),
+    Step("GET", "/admin/profiles/{profile_id}/folded", Budget(2, 1, 50)),
+    Step("GET", "/admin/profiles/{profile_id}/flamegraph", Budget(2, 1, 50)),
+    Step("GET", "/admin/slow-queries", Budget(2, 1, 50)),
+
+    # Authentication (password hashing dominates the latency)
+    Step("POST", "/auth/login", Budget(2, 1, 1000),
+         body={"username": "bench_admin", "password": "benchmark"}, capture=("refresh_token", "refresh_token")),
+    Step("POST", "/auth/refresh", Budget(2, 1, 50), body={"refresh_token": "{refresh_token}"}),
+    Step("POST", "/auth/register", Budget(6, 2, 1000), expect=201,
+         body={"username": "budget_register", "email": "register@budget.example.com", "password": "budget-pass"}),
+
+    # Create, update and delete a throwaway hierarchy
+    Step("POST", "/companies/", Budget(6, 2, 100), expect=201,
+         body={"name": "Budget Company"}, capture=("new_company_id", "id")),
+    Step("PUT", "/companies/{new_company_id}", Budget(6, 3, 100), body={"contact_phone": "555-0100"}),
+    Step("POST", "/projects/", Budget(6, 2, 100), expect=201,
+         body={"project_id": "BUDGET-P1", "name": "Budget Project", "company_id": "{company_id}"},
+         capture=("new_project_id", "id")),
+    Step("PUT", "/projects/{new_project_id}", Budget(6, 3, 100), body={"location": "Budget Ridge"}),
+    Step("POST", "/drillholes/", Budget(6, 2, 100), expect=201,
+         body={"drillhole_id": "BUDGET-DH1", "project_id": "{new_project_id}", "depth": 250},
+         capture=("new_drillhole_id", "id")),
+    Step("PUT", "/drillholes/{new_drillhole_id}", Budget(6, 3, 100), body={"depth": 300}),
+    Step("POST", "/dispatches/", Budget(7, 2, 100), expect=201, body=DISPATCH_BODY,
+         capture=("new_dispatch_id", "id")),
+    Step("PUT", "/dispatches/{new_dispatch_id}", Budget(6, 3, 100), body={"hq_boxes": 5}),
+    # Includes the read of the (small) sequence table for the id check
+    Step("POST", "/samples/", Budget(7, 2, 100), expect=201,
+         body={"dispatch_id": "{new_dispatch_id}", "sample_id": "BUDGET-S1", "sample_type": "core",
+               "from_depth": 10, "to_depth": 11},
+         capture=("new_sample_id", "id")),
+    Step("PUT", "/samples/{new_sample_id}", Budget(6, 3, 100), body={"status": "processing"}),
+    # One INSERT ... SELECT for the audit rows and one UPDATE, whatever the count
+    Step("POST", "/samples/bulk-status", Budget(4, 1, 100),
+         body={"status": "completed", "ids": ["{new_sample_id}"], "audit": True}),
+    # Every delete also bumps the deletion counters behind data versions
+    Step("DELETE", "/samples/{new_sample_id}", Budget(6, 2, 100), expect=204),
+    # Sequence removed with the project below
+    Step("POST", "/samples/id-sequences", Budget(8, 3, 100), expect=201,
+         body={"prefix": "BUDGET-ID-", "width": 5, "project_id": "{new_project_id}"},
+         capture=("sequence_id", "id")),
+    Step("GET", "/samples/id-sequences?project_id={new_project_id}", Budget(3, 2, 50)),
+    # One counter UPDATE and one read, whatever the count
+    Step("POST", "/samples/id-sequences/{sequence_id}/reserve", Budget(4, 2, 50), body={"count": 500}),
+    Step("POST", "/dispatches/{new_dispatch_id}/return", Budget(6, 3, 100),
+         body={"returned_hq": 5, "returned_nq": 2, "return_condition": "Good"}),
+    Step("DELETE", "/dispatches/{new_dispatch_id}", Budget(7, 2, 100), expect=204),
+    Step("DELETE", "/drillholes/{new_drillhole_id}", Budget(9, 2, 100), expect=204),
+    # Purge plan: one count per table of the subtree, then batched deletes
+    Step("DELETE", "/projects/{new_project_id}", Budget(23, 13, 150), expect=204),
+    Step("DELETE", "/companies/{new_company_id}", Budget(26, 15, 150), expect=204),
+    Step("POST", "/users/", Budget(7, 2, 1000), expect=201,
+         body={"username": "budget_user", "email": "user@budget.example.com", "password": "budget-pass"},
+         capture=("new_user_id", "id")),
+    Step("PUT", "/users/{new_user_id}", Budget(6, 3, 100), body={"full_name": "Budget User"}),
+    Step("DELETE", "/users/{new_user_id}", Budget(6, 2, 100), expect=204),
+
+    # Site sync
+    Step("POST", "/sync/push", Budget(16, 4, 150), body=PUSH_BODY),
+    Step("GET", "/sync/conflicts", Budget(3, 2, 50), capture=("conflict_id", "id")),
+    Step("POST", "/sync/conflicts/{conflict_id}/resolve", Budget(6, 3, 50)),
+
+    # Jobs (no worker runs, so the job stays queued and has no artifact)
+    Step("POST", "/jobs/", Budget(5, 2, 100), expect=202,
+         body={"kind": "export_dispatches", "params": {}}, capture=("job_id", "id")),
+    Step("GET", "/jobs/", Budget(3, 2, 50)),
+    Step("GET", "/jobs/{job_id}", Budget(3, 2, 50)),
+    Step("GET", "/jobs/{job_id}/artifact", Budget(3, 2, 50), expect=404),
+    Step("POST", "/jobs/{job_id}/cancel", Budget(7, 4, 50)),
+    # Queues the import job (no worker runs it)
+    Step("POST", "/assays/import", Budget(8, 2, 100), expect=202,
+         body={"lab": "Budget Lab"}, files=ASSAY_FILE),
+]
+
+
+def _template(path):
+    return re.sub(r"{\w+}", "{}", path.split("?")[0])
+
+
+def _format(value, ids):
+    if isinstance(value, str):
+        formatted = value.format(**ids)
+        return int(formatted) if value.startswith("{") and formatted.isdigit() else formatted
+    if isinstance(value, dict):
+        return {key: _format(item, ids) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_format(item, ids) for item in value]
+    return value
+
+
+def largest_ids(db):
+    """Ids of the records with the most children, so detail calls see the worst case"""
+    from sqlalchemy import func
+    from app.models.company import Company
+    from app.models.dispatch import Dispatch
+    from app.models.drillhole import Drillhole
+    from app.models.project import Project
+    from app.models.sample import Sample
+    from app.models.user import User
+
+    busiest_company = db.query(Project.company_id).group_by(Project.company_id).order_by(
+        func.count(Project.id).desc()).first()
+    return {
+        "company_id": busiest_company[0] if busiest_company else db.query(func.min(Company.id)).scalar(),
+        "project_id": db.query(Project.id).order_by(Project.drillhole_count.desc(), Project.id).first()[0],
+        "drillhole_id": db.query(Drillhole.id).order_by(Drillhole.dispatch_count.desc(), Drillhole.id).first()[0],
+        "dispatch_id": db.query(Dispatch.id).order_by(Dispatch.sample_count.desc(), Dispatch.id).first()[0],
+        "sample_id": db.query(func.min(Sample.id)).scalar(),
+        "user_id": db.query(User.id).filter(User.username == "bench_operator1").scalar(),
+    }
+
+
+def step_name(step):
+    return f"{step.method} {step.path}"
+
+
+@pytest.fixture(scope="module")
+def ids(seeded_db, assayed_project):
+    """Ids used by the steps; captured ids are added as the steps run"""
+    from app.services.data_version import SETTLE_SECONDS
+
+    db = seeded_db()
+    try:
+        ids = largest_ids(db)
+    finally:
+        db.close()
+    assert ids["project_id"] == assayed_project
+    # The import marks samples completed; until that settles (data_version.py)
+    # cached reads such as interval trees would be rebuilt on every call
+    time.sleep(SETTLE_SECONDS + 1)
+    return ids
+
+
+def test_every_route_has_a_budget():
+    from app.main import app
+
+    # Steps name their placeholders after the ids they use (new_company_id)
+    covered = {(step.method, _template("/api/v1" + step.path)) for step in STEPS}
+    missing = [
+        f"{method} {route.path}"
+        for route in app.routes if route.path.startswith("/api/v1")
+        for method in sorted(route.methods - {"HEAD", "OPTIONS"})
+        if (method, _template(route.path)) not in covered
+    ]
+    assert not missing, f"no budget declared for {', '.join(missing)}"
+
+
+@pytest.mark.parametrize("step", STEPS, ids=step_name)
+def test_query_budget(step, client, admin_headers, ids, preset, request, summary):
+    needed = set(re.findall(r"{(\w+)}", step.path + repr(step.body)))
+    if needed - ids.keys():
+        pytest.skip(f"needs {', '.join(sorted(needed - ids.keys()))} captured by an earlier step")
+    path = "/api/v1" + step.path.format(**ids)
+    body = _format(step.body, ids) if step.body is not None else None
+    enforce_size = preset == BUDGET_PRESET
+    # Reads are repeated for a stable latency; writes run once
+    runs = request.config.getoption("--budget-runs") if step.method == "GET" else 1
+    if step.method == "GET":
+        client.get(path, headers=admin_headers)
+    timings, statements, rows = [], 0, 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        if step.files:
+            response = client.request(step.method, path, data=body, files=step.files, headers=admin_headers)
+        else:
+            response = client.request(step.method, path, json=body, headers=admin_headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        statements = max(statements, int(response.headers.get("x-query-count", 0)))
+        rows = max(rows, int(response.headers.get("x-query-rows", 0)))
+    ms = statistics.median(timings)
+
+    budget = step.budget
+    ms_factor = request.config.getoption("--ms-factor")
+    ms_budget = budget.ms * (ms_factor or 1)
+    problems = []
+    if response.status_code != step.expect:
+        problems.append(f"status {response.status_code}, expected {step.expect}: {response.text[:200]}")
+    if statements > budget.statements:
+        problems.append(f"{statements} statements > {budget.statements}")
+    if enforce_size and rows > budget.rows:
+        problems.append(f"{rows} rows > {budget.rows}")
+    if enforce_size and ms_factor and ms > ms_budget:
+        problems.append(f"{ms:.0f} ms > {ms_budget:.0f}")
+
+    title = "query budgets: status, sql, rows, ms (measured/budget)"
+    summary(title, f"{step_name(step):48} {response.status_code:>6} {statements:>3}/{budget.statements:<3} "
+                   f"{rows:>5}/{budget.rows:<5} {ms:>6.0f}/{ms_budget:<6.0f}{'  FAIL' if problems else ''}")
+
+    if step.capture and response.status_code < 300:
+        key, field = step.capture
+        data = response.json()
+        if isinstance(data, list):
+            data = data[0] if data else {}
+        ids[key] = data.get(field)
+
+    assert not problems, "; ".join(problems)
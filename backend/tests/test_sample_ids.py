@@ -0,0 +1,81 @@
+"""
+Sample id sequences (app/services/sample_ids.py)
+"""
+import pytest
+from sqlalchemy import insert
+from app.models.dispatch import Dispatch
+from app.models.sample_sequence import SampleIdSequence
+from app.services import sample_ids
+from app.services.sample_ids import claim_sample_id, create_sequence
+
+
+@pytest.fixture(scope="module")
+def sequence(client, admin_headers):
+    response = client.post("/api/v1/samples/id-sequences", headers=admin_headers,
+                           json={"prefix": "TEST-SEQ-", "width": 5, "start": 1})
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.fixture(scope="module")
+def dispatch_id(seeded_db):
+    db = seeded_db()
+    try:
+        return db.query(Dispatch.id).order_by(Dispatch.id).first()[0]
+    finally:
+        db.close()
+
+
+def create_sample(client, headers, dispatch_id, **fields):
+    return client.post("/api/v1/samples/", headers=headers,
+                       json={"dispatch_id": dispatch_id, "sample_type": "core", **fields})
+
+
+def test_unreserved_sample_id_of_a_sequence_is_refused(client, admin_headers, sequence, dispatch_id):
+    response = create_sample(client, admin_headers, dispatch_id, sample_id="TEST-SEQ-00123")
+    assert response.status_code == 400
+
+    # The id stays free for the sequence
+    block = client.post(f"/api/v1/samples/id-sequences/{sequence['id']}/reserve",
+                        headers=admin_headers, json={"count": 200}).json()
+    assert block["first_sample_id"] == "TEST-SEQ-00001"
+    assert block["last_sample_id"] == "TEST-SEQ-00200"
+
+
+def test_reserved_and_unrelated_sample_ids_are_accepted(client, admin_headers, sequence, dispatch_id):
+    client.post(f"/api/v1/samples/id-sequences/{sequence['id']}/reserve",
+                headers=admin_headers, json={"count": 1})
+    assert create_sample(client, admin_headers, dispatch_id, sample_id="TEST-SEQ-00001").status_code == 201
+    # Other forms under the prefix are not the sequence's
+    assert create_sample(client, admin_headers, dispatch_id, sample_id="TEST-SEQ-7").status_code == 201
+    assert create_sample(client, admin_headers, dispatch_id, sample_id="TEST-SEQ-000099").status_code == 201
+
+
+def test_replayed_sample_id_moves_the_sequence_past_it(seeded_db, sequence):
+    db = seeded_db()
+    try:
+        next_value = db.get(SampleIdSequence, sequence["id"]).next_value
+        claim_sample_id(db, f"TEST-SEQ-{next_value + 50:05d}")
+        claim_sample_id(db, f"TEST-SEQ-{next_value + 10:05d}")
+        db.commit()
+        db.expire_all()
+        assert db.get(SampleIdSequence, sequence["id"]).next_value == next_value + 51
+    finally:
+        db.close()
+
+
+def test_concurrently_created_prefix_is_a_value_error(seeded_db, monkeypatch):
+    db = seeded_db()
+
+    def created_meanwhile(db, prefix, width):
+        # Another request inserts the prefix after the overlap check ran
+        db.execute(insert(SampleIdSequence), [{"prefix": prefix, "width": width, "next_value": 1}])
+        return 0
+
+    monkeypatch.setattr(sample_ids, "highest_existing", created_meanwhile)
+    try:
+        with pytest.raises(ValueError, match="already exists"):
+            create_sequence(db, "TEST-RACE-", 5)
+    finally:
+        db.rollback()
+        db.close()
@@ -0,0 +1,188 @@
+"""
+Single-flight coalescing (app/utils/single_flight.py) and the report
+endpoints that use it
+
+Every call of a burst is released at once, and the leader's callable waits
+until the other calls have joined, so the tests do not depend on timing.
+"""
+import threading
+import time
+import pytest
+from app.config import settings
+from app.utils.single_flight import FLIGHTS, SingleFlight
+
+CALLERS = 16
+
+
+@pytest.fixture
+def flight():
+    flight = SingleFlight("tests.single_flight")
+    yield flight
+    FLIGHTS.pop(flight.name, None)
+
+
+def slow(flight, outcome, runs):
+    """Callable returning (or raising) outcome once every caller has joined"""
+
+    def func():
+        runs.append(threading.get_ident())
+        deadline = time.monotonic() + 5
+        while flight.stats()["coalesced"] < CALLERS - 1 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    return func
+
+
+def burst(flight, key, func):
+    """Call flight.do from CALLERS threads at once; returns results and errors"""
+    barrier = threading.Barrier(CALLERS)
+    results = [None] * CALLERS
+    errors = [None] * CALLERS
+
+    def call(index):
+        barrier.wait()
+        try:
+            results[index] = flight.do(key, func)
+        except Exception as exc:
+            errors[index] = exc
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results, errors
+
+
+def test_concurrent_calls_run_once_and_share_the_result(flight):
+    runs = []
+    result = {"rows": [1, 2, 3]}
+
+    results, errors = burst(flight, "report", slow(flight, result, runs))
+
+    assert len(runs) == 1
+    assert errors == [None] * CALLERS
+    assert all(value is result for value in results)
+    stats = flight.stats()
+    assert stats["executions"] == 1
+    assert stats["coalesced"] == CALLERS - 1
+    assert stats["largest_group"] == CALLERS
+    assert stats["in_flight"] == 0
+
+
+def test_exception_reaches_every_waiter(flight):
+    runs = []
+    error = RuntimeError("report failed")
+
+    results, errors = burst(flight, "report", slow(flight, error, runs))
+
+    assert len(runs) == 1
+    assert results == [None] * CALLERS
+    assert all(exc is error for exc in errors)
+    assert flight.stats()["errors"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_result_is_not_cached(flight):
+    calls = []
+
+    def func():
+        calls.append(None)
+        return len(calls)
+
+    assert flight.do("report", func) == 1
+    assert flight.do("report", func) == 2
+
+
+def test_different_keys_run_separately(flight):
+    assert flight.do("dashboard", lambda: "dashboard") == "dashboard"
+    assert flight.do("analytics", lambda: "analytics") == "analytics"
+    assert flight.stats()["executions"] == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def hold_leader(flight, monkeypatch):
+    """Make the leader of each burst wait until the other calls have joined"""
+    execute = flight.do
+
+    def held_do(key, func):
+        joined = flight.stats()["coalesced"]
+
+        def held():
+            deadline = time.monotonic() + 5
+            while flight.stats()["coalesced"] - joined < CALLERS - 1 and time.monotonic() < deadline:
+                time.sleep(0.005)
+            return func()
+
+        return execute(key, held)
+
+    monkeypatch.setattr(flight, "do", held_do)
+
+
+def count_report_statements(monkeypatch):
+    """Statements of every report computation, recorded as each finishes"""
+    from app.api.v1 import reports
+    from app.utils import query_stats
+
+    counts = []
+    coalesce = reports._coalesce
+
+    def counted(flight, request, user, etag, compute):
+        def tracked():
+            with query_stats.track() as stats:
+                result = compute()
+            counts.append(stats.statements)
+            return result
+
+        return coalesce(flight, request, user, etag, tracked)
+
+    monkeypatch.setattr(reports, "_coalesce", counted)
+    return counts
+
+
+def report_burst(client, path, headers):
+    """Bodies of CALLERS simultaneous GETs"""
+    barrier = threading.Barrier(CALLERS)
+    responses = [None] * CALLERS
+
+    def call(index):
+        barrier.wait()
+        responses[index] = client.get(path, headers=headers)
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert all(response.status_code == 200 for response in responses)
+    return [response.content for response in responses]
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("report", ["dashboard", "reconciliation", "analytics"])
+def test_simultaneous_report_requests_run_the_report_queries_once(
+    report, client, admin_headers, monkeypatch
+):
+    flight = FLIGHTS[f"reports.{report}"]
+    path = f"/api/v1/reports/{report}"
+    hold_leader(flight, monkeypatch)
+    counts = count_report_statements(monkeypatch)
+
+    monkeypatch.setattr(settings, "REPORT_SINGLE_FLIGHT", False)
+    separate = report_burst(client, path, admin_headers)
+    separate_counts = counts[:]
+    del counts[:]
+    monkeypatch.setattr(settings, "REPORT_SINGLE_FLIGHT", True)
+    before = flight.stats()["executions"]
+    coalesced = report_burst(client, path, admin_headers)
+
+    # Without coalescing every request runs the report queries
+    assert len(separate_counts) == CALLERS
+    assert len(set(separate_counts)) == 1 and separate_counts[0] > 0
+    # With it one set of report statements serves the whole burst
+    assert flight.stats()["executions"] - before == 1
+    assert counts == separate_counts[:1]
+    assert len(set(separate + coalesced)) == 1